@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+import multiprocessing
+import time
+import typing
+
+import click
+
+from gtfs_filtering.cli import (
+    compression_options,
+    filter_values_options,
+    read_cli_filter_values,
+    resolve_compression,
+)
+from gtfs_filtering.core import (
+    Engine,
+    FilterType,
+    ValueMatch,
+    list_input_gtfs_zips,
+    perform_batch_filter,
+)
+
+
+@click.command()
+@click.option(
+    "-o",
+    "--overwrite",
+    is_flag=True,
+    default=False,
+    help="pass it to overwrite output GTFS zips if they exist",
+)
+@click.option(
+    "-t",
+    "--filter-type",
+    type=click.Choice([f_type.value for f_type in FilterType]),
+    default=FilterType.ROUTE_ID.value,
+    help="type of filtering",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="number of feeds filtered in parallel (default: number of CPUs)",
+)
+@click.option(
+    "-e",
+    "--engine",
+    type=click.Choice([engine.value for engine in Engine]),
+    default=Engine.PANDAS.value,
+    help="filtering engine, csv copies kept rows verbatim without parsing GTFS files, "
+    "sqlite filters GTFS files larger than memory in an on-disk database, "
+    "polars (requires polars) filters with lazy queries on all CPU cores",
+)
+@click.option(
+    "--trim",
+    is_flag=True,
+    default=False,
+    help="pass it to also drop stop times outside of the time window (time_window filter type) "
+    "or stop times and shape points outside of the region (bbox and polygon filter types)",
+)
+@filter_values_options
+@compression_options
+@click.argument("input_gtfs_zips")
+@click.argument("output_directory", type=click.Path(file_okay=False))
+@click.argument("filter_values", nargs=-1)
+def batch(
+    overwrite: bool,
+    filter_type: str,
+    workers: typing.Optional[int],
+    engine: str,
+    trim: bool,
+    values_from: typing.Optional[typing.TextIO],
+    value_match: str,
+    compression_profile: str,
+    compression: typing.Optional[str],
+    compression_level: typing.Optional[int],
+    input_gtfs_zips: str,
+    output_directory: str,
+    filter_values: typing.List[str],
+):
+    """
+    Filters every GTFS zip of INPUT_GTFS_ZIPS (directory or glob pattern) into OUTPUT_DIRECTORY
+    """
+    filter_values = read_cli_filter_values(filter_values, values_from)
+    if not filter_values:
+        raise click.UsageError("Expected filter values.")
+    input_gtfs_zip_paths = list_input_gtfs_zips(input_gtfs_zips)
+    if not input_gtfs_zip_paths:
+        raise click.ClickException(f"No GTFS zip found in '{input_gtfs_zips}'.")
+    compression_method, compression_level = resolve_compression(
+        compression_profile, compression, compression_level
+    )
+    start = time.perf_counter()
+    try:
+        results = perform_batch_filter(
+            input_gtfs_zip_paths,
+            output_directory,
+            FilterType(filter_type),
+            filter_values,
+            overwrite,
+            workers,
+            compression=compression_method,
+            compression_level=compression_level,
+            engine=Engine(engine),
+            trim=trim,
+            value_match=ValueMatch(value_match),
+        )
+    except (PermissionError, ValueError) as e:
+        raise click.ClickException(str(e))
+    elapsed_seconds = time.perf_counter() - start
+
+    for result in results:
+        status = "OK" if result.succeeded else "FAILED"
+        line = f"{status:<6} {result.input_gtfs_zip} ({result.elapsed_seconds:.2f}s)"
+        if not result.succeeded:
+            line += f": {result.error}"
+        click.echo(line)
+    failures = [result for result in results if not result.succeeded]
+    click.echo(
+        f"{len(results) - len(failures)} succeeded, {len(failures)} failed "
+        f"in {elapsed_seconds:.2f}s"
+    )
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # required by process pool in pyinstaller executable
+    batch()
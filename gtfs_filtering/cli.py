@@ -1,9 +1,101 @@
 #!/usr/bin/env python3
+import io
+import itertools
+import sys
 import typing
+import zipfile
 
 import click
 
-from gtfs_filtering.core import perform_filter, FilterType
+from gtfs_filtering.core import (
+    CompressionMethod,
+    CompressionProfile,
+    Engine,
+    OutputFormat,
+    perform_filter,
+    preview_filter,
+    FilterType,
+    ValueMatch,
+    read_filter_spec,
+    read_filter_values,
+)
+
+
+def compression_options(command: typing.Callable) -> typing.Callable:
+    """
+    Adds output compression options to a command, see resolve_compression
+    """
+    command = click.option(
+        "--compression-level",
+        type=click.IntRange(min=0, max=9),
+        default=None,
+        help="output compression level, overrides compression profile level",
+    )(command)
+    command = click.option(
+        "--compression",
+        type=click.Choice([method.value for method in CompressionMethod]),
+        default=None,
+        help="output compression method, overrides compression profile method",
+    )(command)
+    command = click.option(
+        "-c",
+        "--compression-profile",
+        type=click.Choice([profile.value for profile in CompressionProfile]),
+        default=CompressionProfile.DEFAULT.value,
+        help="output compression preset, from fastest (store) to smallest output",
+    )(command)
+    return command
+
+
+def resolve_compression(
+    compression_profile: str,
+    compression: typing.Optional[str],
+    compression_level: typing.Optional[int],
+) -> typing.Tuple[CompressionMethod, typing.Optional[int]]:
+    """
+    Retrieves compression method and level from compression_options values
+    """
+    profile = CompressionProfile(compression_profile)
+    if compression is None:
+        method = profile.method
+        level = profile.level if compression_level is None else compression_level
+    else:
+        method = CompressionMethod(compression)
+        level = compression_level
+    return method, level
+
+
+def filter_values_options(command: typing.Callable) -> typing.Callable:
+    """
+    Adds filter values source and matching options to a command, see read_cli_filter_values
+    """
+    command = click.option(
+        "-m",
+        "--match",
+        "value_match",
+        type=click.Choice([value_match.value for value_match in ValueMatch]),
+        default=ValueMatch.EXACT.value,
+        help="how filter values are matched against ids (route_id, trip_id, agency_id and "
+        "stop_id filter types), glob for shell-style wildcards, regex for regular expressions",
+    )(command)
+    command = click.option(
+        "--values-from",
+        type=click.File("r"),
+        default=None,
+        help="file to read more filter values from, one per line, - for stdin",
+    )(command)
+    return command
+
+
+def read_cli_filter_values(
+    filter_values: typing.Iterable[str], values_from: typing.Optional[typing.TextIO]
+) -> typing.List[str]:
+    """
+    Retrieves filter values from arguments and filter_values_options values
+    """
+    if values_from is None:
+        return read_filter_values(filter_values)
+    return read_filter_values(itertools.chain(filter_values, values_from))
 
 
 @click.command()
@@ -21,26 +113,203 @@ from gtfs_filtering.core import perform_filter, FilterType
     default=FilterType.ROUTE_ID.value,
     help="type of filtering",
 )
-@click.argument("input_gtfs_zip", type=click.Path(exists=True, dir_okay=False))
-@click.argument("output_gtfs_zip", type=click.Path(dir_okay=False))
-@click.argument("filter_values", nargs=-1, required=True)
+@click.option(
+    "-i",
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="pass it to only re-filter GTFS files changed since previous incremental run",
+)
+@click.option(
+    "-e",
+    "--engine",
+    type=click.Choice([engine.value for engine in Engine]),
+    default=Engine.PANDAS.value,
+    help="filtering engine, csv copies kept rows verbatim without parsing GTFS files, "
+    "sqlite filters GTFS files larger than memory in an on-disk database, "
+    "polars (requires polars) filters with lazy queries on all CPU cores",
+)
+@click.option(
+    "-f",
+    "--output-format",
+    type=click.Choice([output_format.value for output_format in OutputFormat]),
+    default=OutputFormat.GTFS.value,
+    help="format of filtered GTFS, parquet/arrow (directory of tables) and sqlite (database) "
+    "outputs load without CSV parsing",
+)
+@click.option(
+    "--trim",
+    is_flag=True,
+    default=False,
+    help="pass it to also drop stop times outside of the time window (time_window filter type) "
+    "or stop times and shape points outside of the region (bbox and polygon filter types)",
+)
+@click.option(
+    "--simplify-shapes",
+    "shape_tolerance",
+    type=click.FloatRange(min=0),
+    default=None,
+    metavar="METERS",
+    help="simplify kept shapes, dropping shape points closer than METERS to the simplified "
+    "shape (Douglas-Peucker)",
+)
+@click.option(
+    "--dedupe-shapes",
+    is_flag=True,
+    default=False,
+    help="pass it to drop kept shapes identical to another shape, their trips use it instead",
+)
+@click.option(
+    "--prune",
+    is_flag=True,
+    default=False,
+    help="pass it to also drop rows no kept row references (services, shapes, levels, areas, "
+    "agencies) and rows referencing dropped rows, until there are none left",
+)
+@click.option(
+    "--compact-trips",
+    is_flag=True,
+    default=False,
+    help="pass it to rewrite kept trips with the same stop times repeated at a constant "
+    "headway as one trip and a frequencies.txt row",
+)
+@click.option(
+    "--filter-spec",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="JSON file of an AND/OR combination of filters evaluated in a single pass, "
+    'e.g. {"and": [{"route_id": ["R1"]}, {"service_date": ["20240101", "20240107"]}]}, '
+    "replaces filter type and filter values",
+)
+@filter_values_options
+@click.option(
+    "--validate",
+    is_flag=True,
+    default=False,
+    help="pass it to check referential integrity of output GTFS zip (keys and references "
+    "between GTFS files), fails when issues are found",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="pass it to only display rows the filtering would keep per GTFS file and the "
+    "estimated output size, output GTFS zip is not written",
+)
+@compression_options
+@click.argument(
+    "input_gtfs_zip", type=click.Path(exists=True, dir_okay=False, allow_dash=True)
+)
+@click.argument("output_gtfs_zip", type=click.Path(dir_okay=False, allow_dash=True))
+@click.argument("filter_values", nargs=-1)
 def cli(
     overwrite: bool,
     filter_type: str,
+    incremental: bool,
+    engine: str,
+    output_format: str,
+    trim: bool,
+    shape_tolerance: typing.Optional[float],
+    dedupe_shapes: bool,
+    prune: bool,
+    compact_trips: bool,
+    filter_spec: typing.Optional[str],
+    values_from: typing.Optional[typing.TextIO],
+    value_match: str,
+    validate: bool,
+    dry_run: bool,
+    compression_profile: str,
+    compression: typing.Optional[str],
+    compression_level: typing.Optional[int],
     input_gtfs_zip: str,
     output_gtfs_zip: str,
     filter_values: typing.List[str],
 ):
+    """
+    Filters INPUT_GTFS_ZIP into OUTPUT_GTFS_ZIP, - for stdin or stdout
+    """
+    if (
+        input_gtfs_zip == "-"
+        and values_from is not None
+        and values_from.name == "<stdin>"
+    ):
+        raise click.UsageError(
+            "Input GTFS zip and filter values can not both be read from stdin."
+        )
+    filter_values = read_cli_filter_values(filter_values, values_from)
+    if (filter_spec is None) == (not filter_values):
+        raise click.UsageError("Expected either filter values or a filter spec.")
+    compression_method, compression_level = resolve_compression(
+        compression_profile, compression, compression_level
+    )
     try:
-        perform_filter(
-            input_gtfs_zip,
-            output_gtfs_zip,
+        filter_expression = None
+        if filter_spec is not None:
+            filter_expression = read_filter_spec(filter_spec)
+        input_gtfs: typing.Union[str, bytes] = input_gtfs_zip
+        if input_gtfs_zip == "-":
+            # zip central directory is at the end, stdin is read entirely
+            input_gtfs = sys.stdin.buffer.read()
+        output_gtfs: typing.Union[str, io.BytesIO] = output_gtfs_zip
+        if output_gtfs_zip == "-":
+            # copied zip members require a seekable output, stdout is written once complete
+            output_gtfs = io.BytesIO()
+        if dry_run:
+            stats = preview_filter(
+                input_gtfs,
+                FilterType(filter_type),
+                filter_values,
+                trim,
+                filter_expression,
+                ValueMatch(value_match),
+                shape_tolerance,
+                dedupe_shapes,
+                prune,
+                compact_trips,
+            )
+            for file_stats in stats.gtfs_files:
+                click.echo(
+                    f"{file_stats.gtfs_file:<28} "
+                    f"{file_stats.output_rows:>12} / {file_stats.input_rows} rows"
+                )
+            click.echo(
+                f"estimated output size: {stats.output_size / 1_000_000:.1f} MB "
+                "(uncompressed)"
+            )
+            return
+        report = perform_filter(
+            input_gtfs,
+            output_gtfs,
             FilterType(filter_type),
             filter_values,
             overwrite,
+            incremental,
+            compression_method,
+            compression_level,
+            Engine(engine),
+            OutputFormat(output_format),
+            trim,
+            filter_expression,
+            ValueMatch(value_match),
+            validate,
+            shape_tolerance=shape_tolerance,
+            dedupe_shapes=dedupe_shapes,
+            prune=prune,
+            compact_trips=compact_trips,
         )
     except (FileExistsError, FileNotFoundError, PermissionError, ValueError) as e:
         raise click.ClickException(str(e))
+    except zipfile.BadZipFile as e:
+        raise click.ClickException(f"Input GTFS zip is invalid: {e}.")
+    if isinstance(output_gtfs, io.BytesIO):
+        sys.stdout.buffer.write(output_gtfs.getvalue())
+    if report is not None:
+        for issue in report.issues:
+            click.echo(str(issue), err=True)
+        if not report.is_valid:
+            raise click.ClickException(
+                f"Filtered GTFS has {len(report.issues)} validation issue(s)."
+            )
 
 
 if __name__ == "__main__":
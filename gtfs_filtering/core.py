@@ -1,20 +1,44 @@
 #!/usr/bin/env python3
+import concurrent.futures
+import contextlib
+import copy
 import dataclasses
+import datetime
 import enum
+import errno
+import fnmatch
+import functools
+import glob
+import heapq
+import io
 import logging
+import json
 import os
+import re
 import shutil
+import sqlite3
+import struct
+import tempfile
+import time
 import typing
+import weakref
 import zipfile
 
+import numpy as np
 import pandas as pd
 
+from gtfs_filtering import engine_filter, geo, stations
+
 IS_WINDOWS = os.name == "nt"  # check if user OS is WINDOWS
 ZIP_EXTRACT_TMP = (
     os.path.join("C:\\", "temp", "gtfs-utils-zip_extract_tmp")
     if IS_WINDOWS
     else os.path.join("/tmp", "gtfs-utils-zip_extract_tmp")
 )
+ZIP_COPY_CHUNK_SIZE = 1024 * 1024
+ZIP_DATA_DESCRIPTOR_FLAG = 0x08
+ZIP64_EXTRA_HEADER_ID = 0x0001
+INCREMENTAL_STATE_SUFFIX = ".state.json"
 
 
 @dataclasses.dataclass
@@ -50,6 +74,8 @@ class GTFS:
     attributions: typing.Optional[pd.DataFrame] = None  # optional
 
 
+REQUIRED_GTFS_FILES = ["agency.txt", "stops.txt", "routes.txt", "trips.txt"]
+
 OPTIONAL_GTFS_FILES = [
     "stop_times.txt",
     "calendar.txt",
@@ -73,6 +99,23 @@ OPTIONAL_GTFS_FILES = [
 ]
 
 
+# GTFS zip: fullpath, content or seekable binary file-like object
+GTFSZip = typing.Union[str, bytes, typing.BinaryIO]
+
+
+def _is_gtfs_zip_path(gtfs_zip: GTFSZip) -> bool:
+    return isinstance(gtfs_zip, (str, os.PathLike))
+
+
+def _zip_file_arg(gtfs_zip: GTFSZip) -> typing.Union[str, typing.BinaryIO]:
+    """
+    Retrieves zipfile.ZipFile file argument of a GTFS zip (contents are wrapped in memory)
+    """
+    if isinstance(gtfs_zip, (bytes, bytearray, memoryview)):
+        return io.BytesIO(gtfs_zip)
+    return gtfs_zip
+
+
 def parse_gtfs_file(directory: str, filename: str) -> pd.DataFrame:
     """
     Parses a single GTFS file from a directory
@@ -99,29 +142,46 @@ def parse_gtfs_file(directory: str, filename: str) -> pd.DataFrame:
             raise pd.errors.EmptyDataError(error_msg)
 
 
-def parse_gtfs(directory: str) -> GTFS:
+def parse_gtfs_zip_member(
+    input_zip: zipfile.ZipFile,
+    filename: str,
+    gtfs_files: typing.Optional[typing.Set[str]] = None,
+) -> pd.DataFrame:
     """
-    Parses all GTFS files from a directory
-
-    Parses all required AND optional GTFS files (according to GTFS spec)
-    Ignores missing optional GTFS files
-    Directory is an unzipped GTFS
+    Parses a single GTFS file from a GTFS zip, in memory (member is not extracted)
 
     Args:
-        directory: directory to parses GTFS files from
+        input_zip: GTFS zip opened in read mode
+        filename: GTFS file to parse
+        gtfs_files: GTFS files which can be parsed, others are considered missing
+        (all members when None)
 
     Returns:
-        Parsed GTFS files
+        parsed GTFS file
 
     Raises:
-        FileNotFoundError when a required GTFS file is missing
+        FileNotFoundError when filename is not a member of input_zip (or of gtfs_files)
+        pd.errors.EmptyDataError when file content is empty
     """
+    if (gtfs_files is not None and filename not in gtfs_files) or (
+        filename not in input_zip.NameToInfo
+    ):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
+    with input_zip.open(filename) as gtfs_file:
+        try:
+            return pd.read_csv(gtfs_file, dtype=str)
+        except pd.errors.EmptyDataError as e:
+            error_msg = f"{str(e)} '{filename}'."
+            raise pd.errors.EmptyDataError(error_msg)
+
+
+def _parse_gtfs_files(parse_file: typing.Callable[[str], pd.DataFrame]) -> GTFS:
     try:
         # required files in GTFS archive
-        agency = parse_gtfs_file(directory, "agency.txt")
-        stops = parse_gtfs_file(directory, "stops.txt")
-        routes = parse_gtfs_file(directory, "routes.txt")
-        trips = parse_gtfs_file(directory, "trips.txt")
+        agency = parse_file("agency.txt")
+        stops = parse_file("stops.txt")
+        routes = parse_file("routes.txt")
+        trips = parse_file("trips.txt")
     except FileNotFoundError as e:
         raise FileNotFoundError(
             f"GTFS is invalid: file '{os.path.basename(e.filename)}' is missing."
@@ -130,7 +190,7 @@ def parse_gtfs(directory: str) -> GTFS:
     # load optional files
     for gtfs_file in OPTIONAL_GTFS_FILES:
         try:
-            optional_file_content = parse_gtfs_file(directory, gtfs_file)
+            optional_file_content = parse_file(gtfs_file)
             attr_name = gtfs_file.rstrip(".txt")
             gtfs.__setattr__(attr_name, optional_file_content)
         except FileNotFoundError:
@@ -142,16 +202,105 @@ def parse_gtfs(directory: str) -> GTFS:
     return gtfs
 
 
-def save_gtfs(gtfs: GTFS, directory: str) -> None:
+def parse_gtfs_zip(
+    input_zip: zipfile.ZipFile, gtfs_files: typing.Optional[typing.Set[str]] = None
+) -> GTFS:
+    """
+    Parses GTFS files from a GTFS zip, in memory (members are not extracted)
+
+    Same as parse_gtfs for a directory.
+
+    Args:
+        input_zip: GTFS zip opened in read mode
+        gtfs_files: GTFS files to parse (all GTFS files when None)
+
+    Returns:
+        Parsed GTFS files
+
+    Raises:
+        FileNotFoundError when a required GTFS file is missing
+    """
+    return _parse_gtfs_files(
+        functools.partial(parse_gtfs_zip_member, input_zip, gtfs_files=gtfs_files)
+    )
+
+
+def parse_gtfs(source: typing.Union[str, bytes, typing.BinaryIO]) -> GTFS:
+    """
+    Parses all GTFS files from a directory
+
+    Parses all required AND optional GTFS files (according to GTFS spec)
+    Ignores missing optional GTFS files
+    Directory is an unzipped GTFS, a GTFS zip content (bytes) or binary file-like object
+    is parsed in memory instead (see parse_gtfs_zip)
+
+    Args:
+        source: directory to parses GTFS files from, or GTFS zip content or file-like object
+
+    Returns:
+        Parsed GTFS files
+
+    Raises:
+        FileNotFoundError when a required GTFS file is missing
+        zipfile.BadZipFile when source is not a directory and not a zip
+    """
+    if not _is_gtfs_zip_path(source):
+        with zipfile.ZipFile(_zip_file_arg(source)) as input_zip:
+            return parse_gtfs_zip(input_zip)
+    return _parse_gtfs_files(functools.partial(parse_gtfs_file, source))
+
+
+class OutputFormat(enum.StrEnum):
+    GTFS = "gtfs"  # GTFS CSV files (zipped by perform_filter)
+    PARQUET = "parquet"  # one Parquet file per GTFS file, requires pyarrow
+    ARROW = "arrow"  # one Arrow IPC file per GTFS file, requires pyarrow
+    SQLITE = "sqlite"  # one table per GTFS file in a single SQLite database
+
+    @property
+    def extension(self) -> str:
+        return ".txt" if self == OutputFormat.GTFS else f".{self.value}"
+
+
+SQLITE_DATABASE_FILENAME = "gtfs.sqlite"
+
+# columns dictionary-encoded (Parquet, Arrow) or indexed (SQLite) in columnar outputs
+GTFS_KEY_COLUMNS = [
+    "agency_id",
+    "stop_id",
+    "parent_station",
+    "level_id",
+    "zone_id",
+    "route_id",
+    "network_id",
+    "trip_id",
+    "service_id",
+    "shape_id",
+    "block_id",
+    "area_id",
+    "fare_id",
+    "from_stop_id",
+    "to_stop_id",
+    "from_route_id",
+    "to_route_id",
+    "from_trip_id",
+    "to_trip_id",
+]
+
+
+def save_gtfs(
+    gtfs: GTFS, directory: str, output_format: OutputFormat = OutputFormat.GTFS
+) -> None:
     """
     Saves all GTFS file into a directory
 
-    This will generate an unzipped GTFS
+    This will generate an unzipped GTFS (one file per GTFS file, or a single
+    SQLITE_DATABASE_FILENAME database for sqlite output format)
     Only non-None files will be saved
 
     Args:
         gtfs: GTFS files to save
         directory: directory to save GTFS
+        output_format: format of saved GTFS files
 
     Returns:
         None
@@ -159,11 +308,81 @@ def save_gtfs(gtfs: GTFS, directory: str) -> None:
     Raises:
         OSError when directory does not exist
         PermissionError when directory is not writable
+        ValueError when output format requires pyarrow and it is not installed
+    """
+    match output_format:
+        case OutputFormat.GTFS:
+            for field in dataclasses.fields(gtfs):
+                gtfs_data: pd.DataFrame = gtfs.__getattribute__(field.name)
+                if gtfs_data is not None:
+                    gtfs_data.to_csv(
+                        os.path.join(directory, f"{field.name}.txt"), index=False
+                    )
+        case OutputFormat.PARQUET | OutputFormat.ARROW:
+            _save_gtfs_arrow_tables(gtfs, directory, output_format)
+        case OutputFormat.SQLITE:
+            if not os.path.isdir(directory):
+                raise FileNotFoundError(f"Directory '{directory}' does not exist.")
+            _save_gtfs_sqlite(gtfs, os.path.join(directory, SQLITE_DATABASE_FILENAME))
+        case _:
+            raise ValueError(f"Invalid output format {output_format}.")
+
+
+def _import_pyarrow(output_format: OutputFormat) -> typing.Any:
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401 (loads pyarrow.parquet module)
+    except ImportError:
+        raise ValueError(
+            f"Output format {output_format} requires pyarrow, install it with 'pip install pyarrow'."
+        )
+    return pyarrow
+
+
+def _save_gtfs_arrow_tables(
+    gtfs: GTFS, directory: str, output_format: OutputFormat
+) -> None:
+    """
+    Saves each GTFS file as a Parquet or Arrow IPC file, key columns are dictionary-encoded
     """
+    pa = _import_pyarrow(output_format)
     for field in dataclasses.fields(gtfs):
         gtfs_data: pd.DataFrame = gtfs.__getattribute__(field.name)
-        if gtfs_data is not None:
-            gtfs_data.to_csv(os.path.join(directory, f"{field.name}.txt"), index=False)
+        if gtfs_data is None:
+            continue
+        table = pa.Table.from_pandas(gtfs_data, preserve_index=False)
+        for i, column in enumerate(table.column_names):
+            if column in GTFS_KEY_COLUMNS:
+                table = table.set_column(i, column, table.column(i).dictionary_encode())
+        path = os.path.join(directory, f"{field.name}{output_format.extension}")
+        if output_format == OutputFormat.PARQUET:
+            pa.parquet.write_table(table, path)
+        else:
+            with pa.OSFile(path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+
+def _save_gtfs_sqlite(gtfs: GTFS, database: str) -> None:
+    """
+    Saves each GTFS file as a table of database (replaced if it exists), key columns are indexed
+    """
+    with contextlib.closing(sqlite3.connect(database)) as connection:
+        with connection:
+            for field in dataclasses.fields(gtfs):
+                gtfs_data: pd.DataFrame = gtfs.__getattribute__(field.name)
+                if gtfs_data is None:
+                    continue
+                gtfs_data.to_sql(
+                    field.name, connection, if_exists="replace", index=False
+                )
+                for column in gtfs_data.columns:
+                    if column in GTFS_KEY_COLUMNS:
+                        connection.execute(
+                            f'CREATE INDEX "{field.name}_{column}" '
+                            f'ON "{field.name}" ("{column}")'
+                        )
+        connection.execute("ANALYZE")
 
 
 def filter_by_column_values(
@@ -235,202 +454,3900 @@ def get_unique_not_null_column_values(
     return df[col_name].dropna().unique().tolist()
 
 
-def filter_by_route_id(gtfs_in: GTFS, route_ids: typing.List[str]) -> GTFS:
+@dataclasses.dataclass
+class GTFSSelection:
     """
-    Filters all GTFS files by route id
+    Stores rows to keep from a parsed GTFS
+
+    Each field is a boolean mask over the rows of the same GTFS field,
+    e.g. 'stops' field selects rows of GTFS 'stops' field.
+    None when the GTFS file is absent or not selected (it is then dropped from filtered GTFS).
+    Parsed GTFS is never modified: rows are only gathered by materialize_selection.
+    """
+
+    agency: typing.Optional[np.ndarray] = None
+    stops: typing.Optional[np.ndarray] = None
+    routes: typing.Optional[np.ndarray] = None
+    trips: typing.Optional[np.ndarray] = None
+    stop_times: typing.Optional[np.ndarray] = None
+    calendar: typing.Optional[np.ndarray] = None
+    calendar_dates: typing.Optional[np.ndarray] = None
+    fare_attributes: typing.Optional[np.ndarray] = None
+    fare_rules: typing.Optional[np.ndarray] = None
+    fare_media: typing.Optional[np.ndarray] = None
+    fare_products: typing.Optional[np.ndarray] = None
+    fare_leg_rules: typing.Optional[np.ndarray] = None
+    fare_transfer_rules: typing.Optional[np.ndarray] = None
+    areas: typing.Optional[np.ndarray] = None
+    stop_areas: typing.Optional[np.ndarray] = None
+    shapes: typing.Optional[np.ndarray] = None
+    frequencies: typing.Optional[np.ndarray] = None
+    transfers: typing.Optional[np.ndarray] = None
+    pathways: typing.Optional[np.ndarray] = None
+    levels: typing.Optional[np.ndarray] = None
+    translations: typing.Optional[np.ndarray] = None
+    feed_info: typing.Optional[np.ndarray] = None
+    attributions: typing.Optional[np.ndarray] = None
+    # functions applied to selected rows of a GTFS file (by field name) once gathered,
+    # e.g. to clip calendar ranges
+    transforms: typing.Dict[str, typing.Callable[[pd.DataFrame], pd.DataFrame]] = (
+        dataclasses.field(default_factory=dict)
+    )
+
+
+def _select_all(df: pd.DataFrame) -> np.ndarray:
+    return np.ones(len(df), dtype=bool)
+
+
+def _select_by_column_values(
+    df: pd.DataFrame, col_name: str, accepted_values: typing.Iterable[str]
+) -> np.ndarray:
+    """
+    Selection counterpart of filter_by_column_values
+    """
+    return df[col_name].isin(accepted_values).to_numpy()
+
+
+def _select_by_column_values_optional(
+    df: pd.DataFrame, col_name: str, accepted_values: typing.Iterable[str]
+) -> np.ndarray:
+    """
+    Selection counterpart of filter_by_column_values_optional
+    """
+    if col_name not in df:
+        # column is not present, do not filter
+        return _select_all(df)
+    column = df[col_name]
+    return (column.isin(accepted_values) | column.isna()).to_numpy()
+
+
+def _get_selected_unique_not_null_column_values(
+    df: pd.DataFrame, selection: np.ndarray, col_name: str
+) -> typing.List[str]:
+    """
+    Selection counterpart of get_unique_not_null_column_values, only the column is gathered
+    """
+    return df[col_name][selection].dropna().unique().tolist()
+
+
+def _select_stops_with_stations(
+    gtfs_in: GTFS, stop_ids: typing.Iterable[str]
+) -> np.ndarray:
+    """
+    Selects stops by stop id along with all nodes of their stations, see
+    gtfs_filtering.stations.close_station_hierarchy
+    """
+    stops = gtfs_in.stops
+    pathways = gtfs_in.pathways
+    pathways_from_stop_ids = pathways_to_stop_ids = ()
+    if pathways is not None and "from_stop_id" in pathways and "to_stop_id" in pathways:
+        pathways_from_stop_ids = pathways["from_stop_id"].to_numpy()
+        pathways_to_stop_ids = pathways["to_stop_id"].to_numpy()
+    return stations.close_station_hierarchy(
+        stops["stop_id"].to_numpy(),
+        stops["parent_station"].to_numpy() if "parent_station" in stops else None,
+        stop_ids,
+        pathways_from_stop_ids,
+        pathways_to_stop_ids,
+    )
+
+
+def _select_related_to_routes_and_trips(
+    gtfs_in: GTFS,
+    route_ids: typing.List[str],
+    trips_selection: np.ndarray,
+    stop_times_selection: typing.Optional[np.ndarray] = None,
+) -> GTFSSelection:
+    """
+    Selects routes by route id and all rows of other GTFS files related to them and to selected trips
 
     Args:
         gtfs_in: parsed GTFS input
         route_ids: route ids to keep
+        trips_selection: trips to keep
+        stop_times_selection: stop times to keep among stop times of selected trips (trimming),
+        None to keep all of them
 
     Returns:
-        Filtered GTFS by route id
+        Selection of rows to keep
     """
-    agency = gtfs_in.agency
-    stops = gtfs_in.stops
-    routes = gtfs_in.routes
+    selection = GTFSSelection(trips=trips_selection)
     trips = gtfs_in.trips
-    stop_times = gtfs_in.stop_times
-    calendar = gtfs_in.calendar
-    calendar_dates = gtfs_in.calendar_dates
-    areas = gtfs_in.areas
-    stop_areas = gtfs_in.stop_areas
-    shapes = gtfs_in.shapes
-    frequencies = gtfs_in.frequencies
-    transfers = gtfs_in.transfers
-    pathways = gtfs_in.pathways
-    levels = gtfs_in.levels
-    attributions = gtfs_in.attributions
 
-    routes = filter_by_column_values(routes, "route_id", route_ids)
-    agency_ids = get_unique_not_null_column_values(routes, "agency_id")
+    selection.routes = _select_by_column_values(gtfs_in.routes, "route_id", route_ids)
+    agency_ids = []
+    if "agency_id" in gtfs_in.routes:
+        agency_ids = _get_selected_unique_not_null_column_values(
+            gtfs_in.routes, selection.routes, "agency_id"
+        )
 
     if len(agency_ids):
         # agency_id is not mandatory in routes.txt, make sure there is at least one non-null agency_id
-        agency = filter_by_column_values(agency, "agency_id", agency_ids)
+        selection.agency = _select_by_column_values(
+            gtfs_in.agency, "agency_id", agency_ids
+        )
+    else:
+        selection.agency = _select_all(gtfs_in.agency)
 
-    trips = filter_by_column_values(trips, "route_id", route_ids)
-    trip_ids = get_unique_not_null_column_values(trips, "trip_id")
+    trip_ids = _get_selected_unique_not_null_column_values(
+        trips, trips_selection, "trip_id"
+    )
 
-    stop_times = filter_by_column_values(stop_times, "trip_id", trip_ids)
-    stop_ids_from_stop_times = get_unique_not_null_column_values(stop_times, "stop_id")
-    filtered_stops = stops[stops["stop_id"].isin(stop_ids_from_stop_times)]
-    filtered_stops_parent_stations = filtered_stops[
-        filtered_stops["parent_station"].str.len() > 0
-    ]
-    stop_ids_from_parent_stations = (
-        filtered_stops_parent_stations["parent_station"].unique().tolist()
+    stop_ids_from_stop_times = []
+    if gtfs_in.stop_times is not None:
+        # optional file
+        selection.stop_times = _select_by_column_values(
+            gtfs_in.stop_times, "trip_id", trip_ids
+        )
+        if stop_times_selection is not None:
+            selection.stop_times &= stop_times_selection
+        stop_ids_from_stop_times = _get_selected_unique_not_null_column_values(
+            gtfs_in.stop_times, selection.stop_times, "stop_id"
+        )
+    stops = gtfs_in.stops
+    selection.stops = _select_stops_with_stations(gtfs_in, stop_ids_from_stop_times)
+    stop_ids = list(
+        set(stop_ids_from_stop_times).union(
+            _get_selected_unique_not_null_column_values(
+                stops, selection.stops, "stop_id"
+            )
+        )
     )
-    stop_ids = list(set(stop_ids_from_stop_times + stop_ids_from_parent_stations))
-    stops = filter_by_column_values(stops, "stop_id", stop_ids)
 
-    service_ids = get_unique_not_null_column_values(trips, "service_id")
-    if calendar is not None:
+    service_ids = _get_selected_unique_not_null_column_values(
+        trips, trips_selection, "service_id"
+    )
+    if gtfs_in.calendar is not None:
         # optional file
-        calendar = filter_by_column_values(calendar, "service_id", service_ids)
-    if calendar_dates is not None:
+        selection.calendar = _select_by_column_values(
+            gtfs_in.calendar, "service_id", service_ids
+        )
+    if gtfs_in.calendar_dates is not None:
         # optional file
-        calendar_dates = filter_by_column_values(
-            calendar_dates, "service_id", service_ids
+        selection.calendar_dates = _select_by_column_values(
+            gtfs_in.calendar_dates, "service_id", service_ids
         )
 
-    if areas is not None and stop_areas is not None:
+    if gtfs_in.areas is not None and gtfs_in.stop_areas is not None:
         # optional files
-        stop_areas = filter_by_column_values(stop_areas, "stop_id", stop_ids)
-        area_ids = get_unique_not_null_column_values(stop_areas, "area_id")
-        areas = filter_by_column_values(areas, "area_id", area_ids)
+        selection.stop_areas = _select_by_column_values(
+            gtfs_in.stop_areas, "stop_id", stop_ids
+        )
+        area_ids = _get_selected_unique_not_null_column_values(
+            gtfs_in.stop_areas, selection.stop_areas, "area_id"
+        )
+        selection.areas = _select_by_column_values(gtfs_in.areas, "area_id", area_ids)
+    else:
+        if gtfs_in.areas is not None:
+            selection.areas = _select_all(gtfs_in.areas)
+        if gtfs_in.stop_areas is not None:
+            selection.stop_areas = _select_all(gtfs_in.stop_areas)
 
-    if shapes is not None:
+    if gtfs_in.shapes is not None:
         # optional file
-        shape_ids = get_unique_not_null_column_values(trips, "shape_id")
+        shape_ids = []
+        if "shape_id" in trips:
+            shape_ids = _get_selected_unique_not_null_column_values(
+                trips, trips_selection, "shape_id"
+            )
         if len(shape_ids):
-            shapes = filter_by_column_values(shapes, "shape_id", shape_ids)
+            selection.shapes = _select_by_column_values(
+                gtfs_in.shapes, "shape_id", shape_ids
+            )
+        else:
+            selection.shapes = _select_all(gtfs_in.shapes)
 
-    if frequencies is not None:
+    if gtfs_in.frequencies is not None:
         # optional file
-        frequencies = filter_by_column_values(frequencies, "trip_id", trip_ids)
+        selection.frequencies = _select_by_column_values(
+            gtfs_in.frequencies, "trip_id", trip_ids
+        )
 
-    if transfers is not None:
+    if gtfs_in.transfers is not None:
         # optional file
-        transfers = filter_by_column_values(transfers, "from_stop_id", stop_ids)
-        transfers = filter_by_column_values(transfers, "to_stop_id", stop_ids)
-        transfers = filter_by_column_values_optional(
-            transfers, "from_route_id", route_ids
-        )
-        transfers = filter_by_column_values_optional(
-            transfers, "to_route_id", route_ids
+        transfers = gtfs_in.transfers
+        selection.transfers = (
+            _select_by_column_values(transfers, "from_stop_id", stop_ids)
+            & _select_by_column_values(transfers, "to_stop_id", stop_ids)
+            & _select_by_column_values_optional(transfers, "from_route_id", route_ids)
+            & _select_by_column_values_optional(transfers, "to_route_id", route_ids)
+            & _select_by_column_values_optional(transfers, "from_trip_id", trip_ids)
+            & _select_by_column_values_optional(transfers, "to_trip_id", trip_ids)
         )
-        transfers = filter_by_column_values_optional(
-            transfers, "from_trip_id", trip_ids
-        )
-        transfers = filter_by_column_values_optional(transfers, "to_trip_id", trip_ids)
 
-    if pathways is not None:
+    if gtfs_in.pathways is not None:
         # optional file
-        pathways = filter_by_column_values(pathways, "from_stop_id", stop_ids)
-        pathways = filter_by_column_values(pathways, "to_stop_id", stop_ids)
+        selection.pathways = _select_by_column_values(
+            gtfs_in.pathways, "from_stop_id", stop_ids
+        ) & _select_by_column_values(gtfs_in.pathways, "to_stop_id", stop_ids)
 
-    if levels is not None:
+    if gtfs_in.levels is not None:
         # optional file
-        level_ids = get_unique_not_null_column_values(stops, "level_id")
+        level_ids = _get_selected_unique_not_null_column_values(
+            stops, selection.stops, "level_id"
+        )
         if len(level_ids):
-            levels = filter_by_column_values(levels, "level_id", level_ids)
+            selection.levels = _select_by_column_values(
+                gtfs_in.levels, "level_id", level_ids
+            )
+        else:
+            selection.levels = _select_all(gtfs_in.levels)
 
-    if attributions is not None:
+    if gtfs_in.attributions is not None:
         # optional file
-        attributions = filter_by_column_values_optional(
-            attributions, "agency_id", agency_ids
+        attributions = gtfs_in.attributions
+        selection.attributions = (
+            _select_by_column_values_optional(attributions, "agency_id", agency_ids)
+            & _select_by_column_values_optional(attributions, "route_id", route_ids)
+            & _select_by_column_values_optional(attributions, "trip_id", trip_ids)
         )
-        attributions = filter_by_column_values_optional(
-            attributions, "route_id", route_ids
+
+    if gtfs_in.fare_rules is not None:
+        # optional file, rules without route or zone apply to every route or zone
+        fare_rules = gtfs_in.fare_rules
+        selection.fare_rules = _select_by_column_values_optional(
+            fare_rules, "route_id", route_ids
         )
-        attributions = filter_by_column_values_optional(
-            attributions, "trip_id", trip_ids
+        if "zone_id" in stops:
+            zone_ids = _get_selected_unique_not_null_column_values(
+                stops, selection.stops, "zone_id"
+            )
+            for col_name in ["origin_id", "destination_id", "contains_id"]:
+                selection.fare_rules &= _select_by_column_values_optional(
+                    fare_rules, col_name, zone_ids
+                )
+
+    if gtfs_in.fare_attributes is not None:
+        # optional file, agency_id is only required when there are several agencies
+        fare_attributes = gtfs_in.fare_attributes
+        selection.fare_attributes = _select_by_column_values_optional(
+            fare_attributes, "agency_id", agency_ids
         )
+        if selection.fare_rules is not None:
+            # a fare without rules applies everywhere: drop fares whose rules were all dropped
+            kept_fare_ids = _get_selected_unique_not_null_column_values(
+                fare_rules, selection.fare_rules, "fare_id"
+            )
+            dropped_fare_ids = set(fare_rules["fare_id"].dropna()) - set(kept_fare_ids)
+            selection.fare_attributes &= ~_select_by_column_values(
+                fare_attributes, "fare_id", dropped_fare_ids
+            )
+            fare_ids = _get_selected_unique_not_null_column_values(
+                fare_attributes, selection.fare_attributes, "fare_id"
+            )
+            selection.fare_rules &= _select_by_column_values(
+                fare_rules, "fare_id", fare_ids
+            )
 
     # TODO check if there is filtering to perform by routes.network_id
 
-    return GTFS(
-        agency=agency,
-        stops=stops,
-        routes=routes,
-        trips=trips,
-        stop_times=stop_times,
-        calendar=calendar,
-        calendar_dates=calendar_dates,
-        areas=areas,
-        stop_areas=stop_areas,
-        shapes=shapes,
-        frequencies=frequencies,
-        transfers=transfers,
-        pathways=pathways,
-        levels=levels,
-        attributions=attributions,
-    )
+    return selection
 
 
-def filter_by_trip_id(gtfs_in: GTFS, trip_ids: typing.List[str]) -> GTFS:
+def select_by_route_id(gtfs_in: GTFS, route_ids: typing.List[str]) -> GTFSSelection:
     """
-    Filters all GTFS files by trip id
+    Selects rows of all GTFS files by route id, without copying any GTFS file
+
+    Args:
+        gtfs_in: parsed GTFS input
+        route_ids: route ids to keep
+
+    Returns:
+        Selection of rows to keep by route id
+    """
+    trips_selection = _select_by_column_values(gtfs_in.trips, "route_id", route_ids)
+    return _select_related_to_routes_and_trips(gtfs_in, route_ids, trips_selection)
+
+
+def select_by_trip_id(gtfs_in: GTFS, trip_ids: typing.List[str]) -> GTFSSelection:
+    """
+    Selects rows of all GTFS files by trip id, without copying any GTFS file
 
     Args:
         gtfs_in: parsed GTFS input
         trip_ids: trip ids to keep
 
     Returns:
-        Filtered GTFS by trip id
+        Selection of rows to keep by trip id
     """
-    trips = gtfs_in.trips
-    filtered_trips = filter_by_column_values(trips, "trip_id", trip_ids)
-    route_ids = get_unique_not_null_column_values(filtered_trips, "route_id")
-    gtfs_in.trips = filtered_trips
-    return filter_by_route_id(gtfs_in, route_ids)
+    trips_selection = _select_by_column_values(gtfs_in.trips, "trip_id", trip_ids)
+    route_ids = _get_selected_unique_not_null_column_values(
+        gtfs_in.trips, trips_selection, "route_id"
+    )
+    return _select_related_to_routes_and_trips(gtfs_in, route_ids, trips_selection)
 
 
-class FilterType(enum.StrEnum):
-    ROUTE_ID = "route_id"
-    TRIP_ID = "trip_id"
+def _get_route_agency_ids(gtfs_in: GTFS) -> pd.Series:
+    routes = gtfs_in.routes
+    if "agency_id" in routes:
+        route_agency_ids = routes["agency_id"]
+    else:
+        route_agency_ids = pd.Series(None, index=routes.index, dtype=object)
+    agency = gtfs_in.agency
+    if len(agency) == 1 and "agency_id" in agency:
+        # agency_id is not mandatory in routes.txt when there is a single agency
+        route_agency_ids = route_agency_ids.fillna(agency["agency_id"].iloc[0])
+    return route_agency_ids
 
 
-def perform_filter(
-    input_gtfs_zip: str,
-    output_gtfs_zip: str,
-    filter_type: FilterType,
-    filter_values: typing.List[str],
-    overwrite_output_gtfs: bool,
+def _get_agency_route_ids(
+    gtfs_in: GTFS, agency_ids: typing.Iterable[str]
+) -> typing.List[str]:
+    routes_selection = _get_route_agency_ids(gtfs_in).isin(agency_ids).to_numpy()
+    return _get_selected_unique_not_null_column_values(
+        gtfs_in.routes, routes_selection, "route_id"
+    )
+
+
+def select_by_agency_id(gtfs_in: GTFS, agency_ids: typing.List[str]) -> GTFSSelection:
+    """
+    Selects rows of all GTFS files by agency id, without copying any GTFS file
+
+    Routes of agencies are resolved from routes.agency_id (routes without agency_id belong to
+    the agency of single agency GTFS), then rows are selected as select_by_route_id does.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        agency_ids: agency ids to keep
+
+    Returns:
+        Selection of rows to keep by agency id
+    """
+    route_ids = _get_agency_route_ids(gtfs_in, agency_ids)
+    trips_selection = _select_by_column_values(gtfs_in.trips, "route_id", route_ids)
+    return _select_related_to_routes_and_trips(gtfs_in, route_ids, trips_selection)
+
+
+GTFS_DATE_FORMAT = "%Y%m%d"
+CALENDAR_WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+
+
+def _to_epoch_days(dates: pd.Series) -> np.ndarray:
+    # GTFS dates (YYYYMMDD) to days since 1970-01-01 (a thursday)
+    return (
+        pd.to_datetime(dates, format=GTFS_DATE_FORMAT)
+        .to_numpy()
+        .astype("datetime64[D]")
+        .astype(np.int64)
+    )
+
+
+def _epoch_days_weekday(days: np.ndarray) -> np.ndarray:
+    # 0 for monday to 6 for sunday
+    return (days + 3) % 7
+
+
+def _count_active_days(
+    first_days: np.ndarray, last_days: np.ndarray, weekdays: np.ndarray
+) -> np.ndarray:
+    """
+    Counts days between first_days and last_days (included) whose weekday is active in weekdays
+    (one row of 7 flags per range), without expanding ranges into dates
+    """
+    days_count = np.maximum(last_days - first_days + 1, 0)
+    first_weekdays = _epoch_days_weekday(first_days)
+    counts = (days_count // 7) * weekdays.sum(axis=1)
+    remaining_days = days_count % 7
+    rows = np.arange(len(weekdays))
+    for i in range(6):
+        counts += (i < remaining_days) * weekdays[rows, (first_weekdays + i) % 7]
+    return counts
+
+
+def get_active_service_ids(
+    gtfs_in: GTFS, start_date: str, end_date: str
+) -> typing.List[str]:
+    """
+    Retrieves service ids running at least one day between start_date and end_date (included)
+
+    Service days are counted from calendar.txt weekdays in the window, minus days removed
+    and plus days added by calendar_dates.txt exceptions in the window. Only the first row of
+    a service id repeated in calendar.txt or of a (service id, date) repeated in
+    calendar_dates.txt is used.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        start_date: first day of the window (YYYYMMDD)
+        end_date: last day of the window (YYYYMMDD)
+
+    Returns:
+        Active service ids
+    """
+    window_first_day, window_last_day = _to_epoch_days(
+        pd.Series([start_date, end_date])
+    )
+    days_count = pd.Series(dtype=np.int64)
+
+    calendar = gtfs_in.calendar
+    if calendar is not None and len(calendar):
+        calendar = calendar.drop_duplicates("service_id")
+        weekdays = calendar[CALENDAR_WEEKDAYS].astype(np.int64).to_numpy()
+        first_days = _to_epoch_days(calendar["start_date"])
+        last_days = _to_epoch_days(calendar["end_date"])
+        days_count = pd.Series(
+            _count_active_days(
+                np.maximum(first_days, window_first_day),
+                np.minimum(last_days, window_last_day),
+                weekdays,
+            ),
+            index=calendar["service_id"].to_numpy(),
+        )
+
+    calendar_dates = gtfs_in.calendar_dates
+    if calendar_dates is not None and len(calendar_dates):
+        calendar_dates = calendar_dates[
+            (calendar_dates["date"] >= start_date)
+            & (calendar_dates["date"] <= end_date)
+        ].drop_duplicates(["service_id", "date"])
+        days = _to_epoch_days(calendar_dates["date"])
+        # is service active on date according to calendar.txt
+        regular_day = np.zeros(len(calendar_dates), dtype=bool)
+        if calendar is not None and len(calendar):
+            calendar_rows = pd.Index(calendar["service_id"]).get_indexer(
+                calendar_dates["service_id"]
+            )
+            in_calendar = calendar_rows >= 0
+            calendar_rows = calendar_rows[in_calendar]
+            regular_day[in_calendar] = (
+                (first_days[calendar_rows] <= days[in_calendar])
+                & (days[in_calendar] <= last_days[calendar_rows])
+                & weekdays[
+                    calendar_rows, _epoch_days_weekday(days[in_calendar])
+                ].astype(bool)
+            )
+        exception_types = calendar_dates["exception_type"].to_numpy()
+        days_delta = np.where(
+            (exception_types == "1") & ~regular_day,
+            1,
+            np.where((exception_types == "2") & regular_day, -1, 0),
+        )
+        days_count = days_count.add(
+            pd.Series(days_delta)
+            .groupby(calendar_dates["service_id"].to_numpy())
+            .sum(),
+            fill_value=0,
+        )
+
+    return days_count.index[days_count > 0].tolist()
+
+
+def _clip_calendar(
+    calendar: pd.DataFrame, start_date: str, end_date: str
+) -> pd.DataFrame:
+    # GTFS dates (YYYYMMDD) are ordered as strings
+    return calendar.assign(
+        start_date=calendar["start_date"].where(
+            calendar["start_date"] >= start_date, start_date
+        ),
+        end_date=calendar["end_date"].where(calendar["end_date"] <= end_date, end_date),
+    )
+
+
+def select_by_service_date(
+    gtfs_in: GTFS, start_date: str, end_date: str
+) -> GTFSSelection:
+    """
+    Selects rows of all GTFS files by service date, without copying any GTFS file
+
+    Trips not running between start_date and end_date are dropped, calendar.txt ranges are
+    clipped to the window and calendar_dates.txt exceptions outside of it are dropped.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        start_date: first day to keep (YYYYMMDD)
+        end_date: last day to keep (YYYYMMDD)
+
+    Returns:
+        Selection of rows to keep by service date
+    """
+    trips_selection = _select_trips_by_service_date(gtfs_in, start_date, end_date)
+    route_ids = _get_selected_unique_not_null_column_values(
+        gtfs_in.trips, trips_selection, "route_id"
+    )
+    selection = _select_related_to_routes_and_trips(gtfs_in, route_ids, trips_selection)
+    _clip_selection_to_service_dates(gtfs_in, selection, start_date, end_date)
+    return selection
+
+
+def _select_trips_by_service_date(
+    gtfs_in: GTFS, start_date: str, end_date: str
+) -> np.ndarray:
+    service_ids = get_active_service_ids(gtfs_in, start_date, end_date)
+    return _select_by_column_values(gtfs_in.trips, "service_id", service_ids)
+
+
+def _clip_selection_to_service_dates(
+    gtfs_in: GTFS, selection: GTFSSelection, start_date: str, end_date: str
 ) -> None:
+    if selection.calendar is not None:
+        selection.transforms["calendar"] = functools.partial(
+            _clip_calendar, start_date=start_date, end_date=end_date
+        )
+    if selection.calendar_dates is not None:
+        dates = gtfs_in.calendar_dates["date"]
+        selection.calendar_dates &= (
+            (dates >= start_date) & (dates <= end_date)
+        ).to_numpy()
+
+
+def parse_service_date_window(
+    filter_values: typing.List[str],
+) -> typing.Tuple[str, str]:
     """
-    Unzip input_gtfs_zip, parse and filter it by route_id or trip_id.
-    Filtered GTFS is zipped in output_gtfs_zip.
-    Clean all files generated except output_gtfs_zip.
+    Retrieves service date window from filter values
 
     Args:
-        input_gtfs_zip: fullpath GTFS zip to filter
-        output_gtfs_zip: fullpath to filtered GTFS zip
-        filter_type: type of filtering to perform
-        filter_values: values to keep (values not in filter_values are discarded)
-        overwrite_output_gtfs: flag to overwrite output_gtfs_zip if it already exists
+        filter_values: start date and end date (YYYYMMDD)
+
+    Returns:
+        Start date and end date
 
     Raises:
-        FileExistsError when overwrite_output_gtfs is False and output_gtfs_zip already exists
-        FileNotFoundError when a required GTFS file is missing
-        PermissionError when output directory is not writable
-        ValueError when filter type is invalid
+        ValueError when filter values are not 2 valid dates, start date first
     """
-    if os.path.isfile(output_gtfs_zip) and not overwrite_output_gtfs:
-        raise FileExistsError(f"File '{output_gtfs_zip}' already exists.")
-    try:
-        os.makedirs(ZIP_EXTRACT_TMP, exist_ok=True)
-        zipfile.ZipFile(input_gtfs_zip).extractall(ZIP_EXTRACT_TMP)
-        gtfs = parse_gtfs(ZIP_EXTRACT_TMP)
-        match filter_type:
-            case FilterType.ROUTE_ID:
-                gtfs = filter_by_route_id(gtfs, filter_values)
-            case FilterType.TRIP_ID:
-                gtfs = filter_by_trip_id(gtfs, filter_values)
-            case _:
-                raise ValueError(f"Invalid filter type {filter_type}.")
-        save_gtfs(gtfs, ZIP_EXTRACT_TMP)
-        shutil.make_archive(output_gtfs_zip.rstrip(".zip"), "zip", ZIP_EXTRACT_TMP)
-    finally:
-        shutil.rmtree(ZIP_EXTRACT_TMP, ignore_errors=True)
+    if len(filter_values) != 2:
+        raise ValueError(
+            "Service date filter expects 2 values: start date and end date (YYYYMMDD)."
+        )
+    start_date, end_date = filter_values
+    for date in filter_values:
+        try:
+            datetime.datetime.strptime(date, GTFS_DATE_FORMAT)
+        except ValueError:
+            raise ValueError(f"Invalid date '{date}', expected YYYYMMDD.")
+    if start_date > end_date:
+        raise ValueError(f"Start date {start_date} is after end date {end_date}.")
+    return start_date, end_date
+
+
+# values computed from parsed GTFS files (times, indexes), by (id of parsed GTFS file, name)
+_GTFS_DATA_CACHE: typing.Dict[typing.Tuple[int, str], typing.Any] = {}
+
+
+def _get_cached(
+    gtfs_data: pd.DataFrame, name: str, compute: typing.Callable[[], typing.Any]
+) -> typing.Any:
+    # parsed GTFS files are not modified by filtering, cache entries are dropped with them
+    key = (id(gtfs_data), name)
+    value = _GTFS_DATA_CACHE.get(key)
+    if value is None:
+        value = compute()
+        _GTFS_DATA_CACHE[key] = value
+        weakref.finalize(gtfs_data, _GTFS_DATA_CACHE.pop, key, None)
+    return value
+
+
+def parse_gtfs_times(times: pd.Series) -> np.ndarray:
+    """
+    Converts GTFS times (H:MM:SS or HH:MM:SS, may exceed 24:00:00) to seconds
+
+    Conversion works on the raw bytes of all times at once instead of parsing them one by one.
+
+    Args:
+        times: GTFS times, missing values are allowed
+
+    Returns:
+        Times in seconds, -1 for missing times
+
+    Raises:
+        ValueError when a time is invalid
+    """
+    raw = np.char.strip(times.fillna("").to_numpy(dtype="S"))
+    width = raw.dtype.itemsize
+    lengths = np.char.str_len(raw)
+    digits = raw.view(np.uint8).reshape(-1, width).astype(np.int64) - ord("0")
+    rows = np.arange(len(raw))
+
+    def digit_at(positions: np.ndarray) -> np.ndarray:
+        return digits[rows, np.clip(positions, 0, width - 1)]
+
+    missing = lengths == 0
+    hours_length = lengths - 6
+    separator = ord(":") - ord("0")
+    valid = (
+        (hours_length >= 1)
+        & (digit_at(lengths - 3) == separator)
+        & (digit_at(lengths - 6) == separator)
+    )
+    hours = np.zeros(len(raw), dtype=np.int64)
+    for i in range(max(width - 6, 0)):
+        is_hours_digit = i < hours_length
+        valid &= ~is_hours_digit | ((0 <= digits[:, i]) & (digits[:, i] <= 9))
+        hours = np.where(is_hours_digit, hours * 10 + digits[:, i], hours)
+    minutes_seconds = [digit_at(lengths - offset) for offset in [5, 4, 2, 1]]
+    for digit in minutes_seconds:
+        valid &= (0 <= digit) & (digit <= 9)
+    invalid = ~(valid | missing)
+    if invalid.any():
+        raise ValueError(f"Invalid GTFS time '{times[invalid].iloc[0]}'.")
+    minutes = minutes_seconds[0] * 10 + minutes_seconds[1]
+    seconds = minutes_seconds[2] * 10 + minutes_seconds[3]
+    return np.where(missing, -1, hours * 3600 + minutes * 60 + seconds)
+
+
+def get_gtfs_times(gtfs_data: pd.DataFrame, col_name: str) -> np.ndarray:
+    """
+    Retrieves times of a column of a parsed GTFS file in seconds, see parse_gtfs_times
+
+    Times are parsed once per parsed GTFS file and column: parsed GTFS files are not modified
+    by filtering so repeated time filters on the same GTFS reuse them. Cache entries are
+    dropped with the parsed GTFS file.
+
+    Args:
+        gtfs_data: parsed GTFS file
+        col_name: time column
+
+    Returns:
+        Times in seconds, -1 for missing times
+    """
+
+    def parse() -> np.ndarray:
+        times = parse_gtfs_times(gtfs_data[col_name])
+        times.flags.writeable = False
+        return times
+
+    return _get_cached(gtfs_data, f"times:{col_name}", parse)
+
+
+def _get_numbers(gtfs_data: pd.DataFrame, col_name: str) -> np.ndarray:
+    """
+    Retrieves numbers of a column of a parsed GTFS file (NaN for missing or invalid numbers),
+    parsed once per parsed GTFS file and column as get_gtfs_times
+    """
+
+    def parse() -> np.ndarray:
+        values = gtfs_data[col_name]
+        try:
+            numbers = values.to_numpy(dtype=float)
+        except ValueError:
+            numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        numbers.flags.writeable = False
+        return numbers
+
+    return _get_cached(gtfs_data, f"numbers:{col_name}", parse)
+
+
+def _get_codes(
+    gtfs_data: pd.DataFrame, col_name: str
+) -> typing.Tuple[np.ndarray, pd.Index]:
+    """
+    Retrieves integer codes of a column of a parsed GTFS file (-1 for missing values) and the
+    values they code, factorized once per parsed GTFS file and column as get_gtfs_times
+    """
+
+    def factorize() -> typing.Tuple[np.ndarray, pd.Index]:
+        codes, values = pd.factorize(gtfs_data[col_name])
+        codes.flags.writeable = False
+        return codes, pd.Index(values)
+
+    return _get_cached(gtfs_data, f"codes:{col_name}", factorize)
+
+
+def _get_selected_coded_values(
+    gtfs_data: pd.DataFrame, selection: np.ndarray, col_name: str
+) -> pd.Index:
+    """
+    Counterpart of _get_selected_unique_not_null_column_values gathering integer codes only
+    """
+    codes, values = _get_codes(gtfs_data, col_name)
+    selected_codes = codes[selection]
+    counts = np.bincount(selected_codes[selected_codes >= 0], minlength=len(values))
+    return values[counts > 0]
+
+
+def _select_by_coded_values(
+    gtfs_data: pd.DataFrame, col_name: str, accepted_values: typing.Iterable[str]
+) -> np.ndarray:
+    """
+    Counterpart of _select_by_column_values only hashing the distinct values of the column
+    """
+    codes, values = _get_codes(gtfs_data, col_name)
+    accepted = np.append(values.isin(accepted_values), False)
+    # missing values (code -1) gather the trailing False
+    return accepted[codes]
+
+
+def parse_time_window(filter_values: typing.List[str]) -> typing.Tuple[int, int]:
+    """
+    Retrieves time window from filter values
+
+    Args:
+        filter_values: start time and end time (HH:MM:SS, may exceed 24:00:00)
+
+    Returns:
+        Start time and end time in seconds
+
+    Raises:
+        ValueError when filter values are not 2 valid times, start time first
+    """
+    if len(filter_values) != 2:
+        raise ValueError(
+            "Time window filter expects 2 values: start time and end time (HH:MM:SS)."
+        )
+    start_time, end_time = parse_gtfs_times(pd.Series(filter_values, dtype=str))
+    if start_time < 0 or end_time < 0:
+        raise ValueError("Time window filter expects non empty times.")
+    if start_time > end_time:
+        raise ValueError(
+            f"Start time {filter_values[0]} is after end time {filter_values[1]}."
+        )
+    return int(start_time), int(end_time)
+
+
+def _is_in_time_window(times: np.ndarray, start_time: int, end_time: int) -> np.ndarray:
+    return (start_time <= times) & (times <= end_time)
+
+
+def _select_stop_times_in_time_window(
+    stop_times: pd.DataFrame, start_time: int, end_time: int
+) -> np.ndarray:
+    return _is_in_time_window(
+        get_gtfs_times(stop_times, "arrival_time"), start_time, end_time
+    ) | _is_in_time_window(
+        get_gtfs_times(stop_times, "departure_time"), start_time, end_time
+    )
+
+
+def _select_trips_by_time_window(
+    gtfs_in: GTFS, start_time: int, end_time: int
+) -> np.ndarray:
+    trip_ids = []
+    if gtfs_in.stop_times is not None:
+        trip_ids = _get_selected_unique_not_null_column_values(
+            gtfs_in.stop_times,
+            _select_stop_times_in_time_window(gtfs_in.stop_times, start_time, end_time),
+            "trip_id",
+        )
+    return _select_by_column_values(gtfs_in.trips, "trip_id", trip_ids)
+
+
+def select_by_time_window(
+    gtfs_in: GTFS, start_time: int, end_time: int, trim: bool = False
+) -> GTFSSelection:
+    """
+    Selects rows of all GTFS files by time of day, without copying any GTFS file
+
+    Trips with at least one arrival or departure time between start_time and end_time are kept.
+    When trimming, only stop times of kept trips in the window are kept: stop times without
+    times are kept when previous and next timed stop times of their trip are in the window.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        start_time: start of the window in seconds, see parse_time_window
+        end_time: end of the window in seconds
+        trim: flag to also drop stop times outside of the window
+
+    Returns:
+        Selection of rows to keep by time of day
+
+    Raises:
+        ValueError when a stop time is invalid
+    """
+    stop_times = gtfs_in.stop_times
+    if stop_times is None:
+        trip_ids = []
+        stop_times_selection = None
+    else:
+        arrival_times = get_gtfs_times(stop_times, "arrival_time")
+        departure_times = get_gtfs_times(stop_times, "departure_time")
+        in_window = _select_stop_times_in_time_window(stop_times, start_time, end_time)
+        trip_ids = stop_times["trip_id"][in_window].dropna().unique().tolist()
+
+        stop_times_selection = None
+        if trim:
+            times = pd.Series(
+                np.where(departure_times >= 0, departure_times, arrival_times),
+                dtype=float,
+            ).where(lambda t: t >= 0)
+            trips = stop_times["trip_id"].to_numpy()
+            previous_times = times.groupby(trips).ffill().to_numpy()
+            next_times = times.groupby(trips).bfill().to_numpy()
+            # NaN comparisons are False
+            untimed_in_window = (
+                times.isna().to_numpy()
+                & (start_time <= previous_times)
+                & (previous_times <= end_time)
+                & (start_time <= next_times)
+                & (next_times <= end_time)
+            )
+            stop_times_selection = in_window | untimed_in_window
+
+    trips_selection = _select_by_column_values(gtfs_in.trips, "trip_id", trip_ids)
+    route_ids = _get_selected_unique_not_null_column_values(
+        gtfs_in.trips, trips_selection, "route_id"
+    )
+    return _select_related_to_routes_and_trips(
+        gtfs_in, route_ids, trips_selection, stop_times_selection
+    )
+
+
+def parse_bbox(
+    filter_values: typing.List[str],
+) -> typing.Tuple[float, float, float, float]:
+    """
+    Retrieves bounding box from filter values
+
+    Args:
+        filter_values: min longitude, min latitude, max longitude and max latitude
+
+    Returns:
+        Bounding box, see geo.points_in_bbox
+
+    Raises:
+        ValueError when filter values are not 4 numbers, min values first
+    """
+    if len(filter_values) != 4:
+        raise ValueError(
+            "Bounding box filter expects 4 values: min longitude, min latitude, "
+            "max longitude and max latitude."
+        )
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in filter_values)
+    except ValueError:
+        raise ValueError(f"Invalid bounding box {' '.join(filter_values)}.")
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError(f"Invalid bounding box {' '.join(filter_values)}.")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def parse_polygon(filter_values: typing.List[str]) -> np.ndarray:
+    """
+    Retrieves polygon from filter values
+
+    Args:
+        filter_values: polygon vertices 'lon,lat', the polygon is closed implicitly
+
+    Returns:
+        (n, 2) polygon vertices (lon, lat)
+
+    Raises:
+        ValueError when filter values are not at least 3 valid vertices
+    """
+    if len(filter_values) < 3:
+        raise ValueError("Polygon filter expects at least 3 vertices 'lon,lat'.")
+    try:
+        vertices = [
+            [float(coordinate) for coordinate in vertex.split(",")]
+            for vertex in filter_values
+        ]
+        return np.array(vertices, dtype=float).reshape(len(vertices), 2)
+    except ValueError:
+        raise ValueError(
+            f"Invalid polygon {' '.join(filter_values)}, expected vertices 'lon,lat'."
+        )
+
+
+def _get_stop_ids_in_region(
+    stops: pd.DataFrame,
+    is_inside: typing.Callable[[np.ndarray, np.ndarray], np.ndarray],
+) -> typing.List[str]:
+    stops_inside = is_inside(
+        pd.to_numeric(stops["stop_lon"], errors="coerce").to_numpy(dtype=float),
+        pd.to_numeric(stops["stop_lat"], errors="coerce").to_numpy(dtype=float),
+    )
+    return _get_selected_unique_not_null_column_values(stops, stops_inside, "stop_id")
+
+
+def select_by_region(
+    gtfs_in: GTFS,
+    is_inside: typing.Callable[[np.ndarray, np.ndarray], np.ndarray],
+    trim: bool = False,
+) -> GTFSSelection:
+    """
+    Selects rows of all GTFS files by geographic region, without copying any GTFS file
+
+    Trips serving at least one stop inside the region are kept. When trimming, only stop times
+    at stops inside the region and shape points inside the region are kept.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        is_inside: tests which points (longitudes, latitudes) are inside the region,
+        see select_by_bbox and select_by_polygon
+        trim: flag to also drop stop times and shape points outside of the region
+
+    Returns:
+        Selection of rows to keep by region
+    """
+    stop_ids = _get_stop_ids_in_region(gtfs_in.stops, is_inside)
+
+    trip_ids = []
+    stop_times_selection = None
+    if gtfs_in.stop_times is not None:
+        stop_times_inside = _select_by_column_values(
+            gtfs_in.stop_times, "stop_id", stop_ids
+        )
+        trip_ids = _get_selected_unique_not_null_column_values(
+            gtfs_in.stop_times, stop_times_inside, "trip_id"
+        )
+        if trim:
+            stop_times_selection = stop_times_inside
+
+    trips_selection = _select_by_column_values(gtfs_in.trips, "trip_id", trip_ids)
+    route_ids = _get_selected_unique_not_null_column_values(
+        gtfs_in.trips, trips_selection, "route_id"
+    )
+    selection = _select_related_to_routes_and_trips(
+        gtfs_in, route_ids, trips_selection, stop_times_selection
+    )
+    if trim and selection.shapes is not None:
+        shapes = gtfs_in.shapes
+        selection.shapes &= is_inside(
+            pd.to_numeric(shapes["shape_pt_lon"], errors="coerce").to_numpy(
+                dtype=float
+            ),
+            pd.to_numeric(shapes["shape_pt_lat"], errors="coerce").to_numpy(
+                dtype=float
+            ),
+        )
+    return selection
+
+
+def select_by_bbox(
+    gtfs_in: GTFS,
+    bbox: typing.Tuple[float, float, float, float],
+    trim: bool = False,
+) -> GTFSSelection:
+    """
+    Selects rows of all GTFS files by bounding box, see select_by_region
+
+    Args:
+        gtfs_in: parsed GTFS input
+        bbox: min longitude, min latitude, max longitude, max latitude
+        trim: flag to also drop stop times and shape points outside of bbox
+
+    Returns:
+        Selection of rows to keep by bounding box
+    """
+    return select_by_region(
+        gtfs_in, lambda lons, lats: geo.points_in_bbox(lons, lats, bbox), trim
+    )
+
+
+def select_by_polygon(
+    gtfs_in: GTFS, polygon: np.ndarray, trim: bool = False
+) -> GTFSSelection:
+    """
+    Selects rows of all GTFS files by polygon, see select_by_region
+
+    Points are tested against a grid index of the polygon, see geo.PolygonGrid.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        polygon: (n, 2) vertices (lon, lat) of a simple polygon
+        trim: flag to also drop stop times and shape points outside of polygon
+
+    Returns:
+        Selection of rows to keep by polygon
+    """
+    polygon_grid = geo.build_polygon_grid(polygon)
+    return select_by_region(
+        gtfs_in,
+        lambda lons, lats: geo.points_in_polygon(lons, lats, polygon_grid),
+        trim,
+    )
+
+
+@dataclasses.dataclass
+class StopTripsIndex:
+    """
+    Reverse index of stop_times: trips serving each stop, in CSR layout
+
+    Trips serving stop_ids[i] are trip_ids[trip_codes[indptr[i] : indptr[i + 1]]], so looking
+    up a stop costs its number of stop times instead of a scan of stop_times.
+    """
+
+    stop_ids: pd.Index  # indexed stop ids
+    indptr: np.ndarray  # (len(stop_ids) + 1,) offsets of each stop in trip_codes
+    trip_codes: np.ndarray  # indexes in trip_ids, grouped by stop
+    trip_ids: np.ndarray  # indexed trip ids
+
+
+def build_stop_trips_index(stop_times: pd.DataFrame) -> StopTripsIndex:
+    """
+    Builds the reverse index of stop_times, see StopTripsIndex
+
+    Args:
+        stop_times: parsed stop_times
+
+    Returns:
+        Trips serving each stop (stop times without stop id or trip id are ignored)
+    """
+    stop_codes, stop_ids = pd.factorize(stop_times["stop_id"])
+    trip_codes, trip_ids = pd.factorize(stop_times["trip_id"])
+    indexed = (stop_codes >= 0) & (trip_codes >= 0)
+    stop_codes, trip_codes = stop_codes[indexed], trip_codes[indexed]
+    indptr = np.zeros(len(stop_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(stop_codes, minlength=len(stop_ids)), out=indptr[1:])
+    return StopTripsIndex(
+        stop_ids=pd.Index(stop_ids),
+        indptr=indptr,
+        trip_codes=trip_codes[np.argsort(stop_codes, kind="stable")],
+        trip_ids=np.asarray(trip_ids, dtype=object),
+    )
+
+
+def get_stop_trips_index(stop_times: pd.DataFrame) -> StopTripsIndex:
+    """
+    Retrieves the reverse index of stop_times, built once per parsed stop_times
+
+    Args:
+        stop_times: parsed stop_times
+
+    Returns:
+        Trips serving each stop, see build_stop_trips_index
+    """
+    return _get_cached(
+        stop_times, "stop_trips_index", lambda: build_stop_trips_index(stop_times)
+    )
+
+
+def get_trip_ids_serving_stops(
+    index: StopTripsIndex, stop_ids: typing.Iterable[str]
+) -> typing.List[str]:
+    """
+    Retrieves trips serving at least one of stop_ids
+
+    Args:
+        index: reverse index of stop_times, see get_stop_trips_index
+        stop_ids: stop ids (unknown stop ids are ignored)
+
+    Returns:
+        Trip ids, in order of first appearance in stop_times
+    """
+    stop_codes = index.stop_ids.get_indexer(list(stop_ids))
+    stop_codes = stop_codes[stop_codes >= 0]
+    starts = index.indptr[stop_codes]
+    lengths = index.indptr[stop_codes + 1] - starts
+    # positions of all requested stops slices in trip_codes, without a loop on stops
+    slice_offsets = np.cumsum(lengths) - lengths
+    positions = np.arange(lengths.sum()) + np.repeat(starts - slice_offsets, lengths)
+    served = np.zeros(len(index.trip_ids), dtype=bool)
+    served[index.trip_codes[positions]] = True
+    return index.trip_ids[served].tolist()
+
+
+def _get_stop_ids_with_children(
+    stops: pd.DataFrame, stop_ids: typing.Iterable[str]
+) -> typing.Set[str]:
+    # stations include their platforms and entrances, platforms their boarding areas
+    stop_ids = set(stop_ids)
+    if "parent_station" not in stops.columns:
+        return stop_ids
+    parents = stops["parent_station"]
+    added = stop_ids
+    while added:
+        children = stops["stop_id"][parents.isin(added)].dropna()
+        added = set(children) - stop_ids
+        stop_ids |= added
+    return stop_ids
+
+
+def _select_trips_serving_stops(
+    gtfs_in: GTFS, stop_ids: typing.Iterable[str]
+) -> np.ndarray:
+    trip_ids = []
+    if gtfs_in.stop_times is not None:
+        trip_ids = get_trip_ids_serving_stops(
+            get_stop_trips_index(gtfs_in.stop_times), stop_ids
+        )
+    return _select_by_column_values(gtfs_in.trips, "trip_id", trip_ids)
+
+
+def select_by_stop_id(gtfs_in: GTFS, stop_ids: typing.List[str]) -> GTFSSelection:
+    """
+    Selects rows of all GTFS files by stop id, without copying any GTFS file
+
+    Trips serving at least one of stop_ids or of their child stops (platforms of a station,
+    boarding areas of a platform) are kept with all their stop times. Trips are looked up in
+    a reverse index of stop_times, see get_stop_trips_index.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        stop_ids: stop ids to keep
+
+    Returns:
+        Selection of rows to keep by stop id
+    """
+    trips_selection = _select_trips_serving_stops(
+        gtfs_in, _get_stop_ids_with_children(gtfs_in.stops, stop_ids)
+    )
+    route_ids = _get_selected_unique_not_null_column_values(
+        gtfs_in.trips, trips_selection, "route_id"
+    )
+    return _select_related_to_routes_and_trips(gtfs_in, route_ids, trips_selection)
+
+
+# mixes position of a row in its sequence (point of a shape, stop time of a trip) into row
+# hashes (64-bit golden ratio)
+SEQUENCE_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _add_transform(
+    selection: GTFSSelection,
+    name: str,
+    transform: typing.Callable[[pd.DataFrame], pd.DataFrame],
+) -> None:
+    # applies transform after the transform already set on GTFS file, if any
+    previous_transform = selection.transforms.get(name)
+    if previous_transform is not None:
+        transform = _compose_transforms(previous_transform, transform)
+    selection.transforms[name] = transform
+
+
+def _compose_transforms(
+    first: typing.Callable[[pd.DataFrame], pd.DataFrame],
+    second: typing.Callable[[pd.DataFrame], pd.DataFrame],
+) -> typing.Callable[[pd.DataFrame], pd.DataFrame]:
+    return lambda df: second(first(df))
+
+
+def _replace_column_values(
+    df: pd.DataFrame, col_name: str, replacements: typing.Dict[str, str]
+) -> pd.DataFrame:
+    return df.assign(**{col_name: df[col_name].replace(replacements)})
+
+
+def _append_rows(df: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    return pd.concat([df, rows], ignore_index=True)
+
+
+def _hash_sequences(rows: pd.DataFrame, offsets: np.ndarray) -> np.ndarray:
+    """
+    Hashes sequences of rows at once, sequences hash equal when their rows have the same values
+    in the same order
+
+    Args:
+        rows: rows of all sequences, ordered by sequence
+        offsets: offsets of the first row of each sequence followed by the number of rows
+
+    Returns:
+        Hash of each sequence
+    """
+    row_hashes = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+    positions = np.arange(len(rows), dtype=np.uint64) - np.repeat(
+        offsets[:-1], np.diff(offsets)
+    ).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        mixed_hashes = row_hashes ^ (
+            (positions + np.uint64(1)) * SEQUENCE_HASH_MULTIPLIER
+        )
+        mixed_hashes *= SEQUENCE_HASH_MULTIPLIER
+    return np.add.reduceat(mixed_hashes, offsets[:-1])
+
+
+def _get_selected_shape_points(
+    shapes: pd.DataFrame, selection: np.ndarray
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Retrieves selected shape points (with a shape id) ordered by shape and sequence
+
+    Returns:
+        Rows of selected shape points, offsets of the first point of each shape followed by
+        the number of points (see gtfs_filtering.geo.simplify_polylines)
+    """
+    rows = np.flatnonzero(selection & shapes["shape_id"].notna().to_numpy())
+    if not len(rows):
+        return rows, np.zeros(1, dtype=np.int64)
+    shape_codes, _ = pd.factorize(shapes["shape_id"].to_numpy()[rows])
+    sequences = _get_numbers(shapes, "shape_pt_sequence")[rows]
+    order = np.lexsort((sequences, shape_codes))
+    sorted_codes = shape_codes[order]
+    offsets = np.flatnonzero(
+        np.concatenate([[True], sorted_codes[1:] != sorted_codes[:-1], [True]])
+    )
+    return rows[order], offsets
+
+
+def dedupe_selected_shapes(gtfs_in: GTFS, selection: GTFSSelection) -> None:
+    """
+    Drops selected shapes identical to another selected shape, trips are rewritten to it
+
+    Shapes are identical when their selected points have the same coordinates (and distances
+    traveled) in the same order, whatever their sequence numbers. Candidates are found by
+    hashing points of all shapes at once, then compared value by value. The first shape of a
+    set of identical shapes is kept.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        selection: selection to update
+    """
+    shapes = gtfs_in.shapes
+    if shapes is None or selection.shapes is None or selection.trips is None:
+        return
+    rows, offsets = _get_selected_shape_points(shapes, selection.shapes)
+    shapes_count = len(offsets) - 1
+    if shapes_count < 2:
+        return
+    columns = ["shape_pt_lat", "shape_pt_lon"]
+    if "shape_dist_traveled" in shapes:
+        columns.append("shape_dist_traveled")
+    points = shapes[columns].iloc[rows]
+    shape_hashes = pd.DataFrame(
+        {"hash": _hash_sequences(points, offsets), "length": np.diff(offsets)}
+    )
+    candidates = shape_hashes[shape_hashes.duplicated(keep=False)]
+    if candidates.empty:
+        return
+
+    values = points.to_numpy()
+    shape_ids = shapes["shape_id"].to_numpy()[rows[offsets[:-1]]]
+    replacements: typing.Dict[str, str] = {}
+    dropped_points = []
+    for group in candidates.groupby(["hash", "length"]).indices.values():
+        group_shapes = candidates.index.to_numpy()[group]
+        kept_shapes: typing.List[int] = []
+        for shape in group_shapes:
+            shape_values = values[offsets[shape] : offsets[shape + 1]]
+            for kept_shape in kept_shapes:
+                if np.array_equal(
+                    shape_values, values[offsets[kept_shape] : offsets[kept_shape + 1]]
+                ):
+                    replacements[shape_ids[shape]] = shape_ids[kept_shape]
+                    dropped_points.append(rows[offsets[shape] : offsets[shape + 1]])
+                    break
+            else:
+                kept_shapes.append(shape)
+    if not replacements:
+        return
+    selection.shapes[np.concatenate(dropped_points)] = False
+    _add_transform(
+        selection,
+        "trips",
+        functools.partial(
+            _replace_column_values, col_name="shape_id", replacements=replacements
+        ),
+    )
+
+
+def simplify_selected_shapes(
+    gtfs_in: GTFS, selection: GTFSSelection, tolerance_meters: float
+) -> None:
+    """
+    Drops selected shape points which are not needed to draw shapes within a tolerance
+
+    Shapes are simplified with the Douglas-Peucker algorithm, see
+    gtfs_filtering.geo.simplify_polylines. Kept points keep their sequence and distance
+    traveled.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        selection: selection to update
+        tolerance_meters: maximum distance between dropped points and simplified shapes
+
+    Raises:
+        ValueError when tolerance_meters is negative
+    """
+    if tolerance_meters < 0:
+        raise ValueError(f"Invalid shape tolerance {tolerance_meters}, expected >= 0.")
+    shapes = gtfs_in.shapes
+    if shapes is None or selection.shapes is None:
+        return
+    rows, offsets = _get_selected_shape_points(shapes, selection.shapes)
+    kept = geo.simplify_polylines(
+        _get_numbers(shapes, "shape_pt_lon")[rows],
+        _get_numbers(shapes, "shape_pt_lat")[rows],
+        offsets,
+        tolerance_meters,
+    )
+    selection.shapes[rows[~kept]] = False
+
+
+# GTFS files whose rows are only useful when kept rows of other GTFS files reference them
+# (see GTFS_FOREIGN_KEYS), pruned by prune_selection
+PRUNED_GTFS_FILES = [
+    "agency",
+    "calendar",
+    "calendar_dates",
+    "levels",
+    "areas",
+    "shapes",
+]
+
+
+def _get_kept_rows(
+    gtfs_in: GTFS, selection: GTFSSelection, name: str
+) -> typing.Optional[np.ndarray]:
+    """
+    Retrieves rows kept from a GTFS file, all of them when the GTFS file is not selected
+    (it is then passed through as is), None when the GTFS file is absent
+    """
+    gtfs_data = gtfs_in.__getattribute__(name)
+    if gtfs_data is None:
+        return None
+    kept = selection.__getattribute__(name)
+    return _select_all(gtfs_data) if kept is None else kept
+
+
+def _update_kept_rows(
+    selection: GTFSSelection, name: str, kept: np.ndarray, pruned: np.ndarray
+) -> bool:
+    if np.array_equal(kept, pruned):
+        return False
+    selection.__setattr__(name, pruned)
+    return True
+
+
+def _prune_dangling_rows(
+    gtfs_in: GTFS,
+    selection: GTFSSelection,
+    name: str,
+    col_name: str,
+    referenced_names: typing.List[str],
+    referenced_col_name: str,
+) -> bool:
+    """
+    Drops kept rows of a GTFS file referencing rows which were all dropped
+
+    References to rows absent from the input GTFS are not created by filtering and are left
+    as they are.
+
+    Returns:
+        True when rows were dropped
+    """
+    kept = _get_kept_rows(gtfs_in, selection, name)
+    if kept is None or col_name not in gtfs_in.__getattribute__(name):
+        return False
+    input_values = pd.Index([])
+    kept_values = pd.Index([])
+    for referenced_name in referenced_names:
+        referenced = gtfs_in.__getattribute__(referenced_name)
+        if referenced is None or referenced_col_name not in referenced:
+            continue
+        input_values = input_values.append(
+            _get_codes(referenced, referenced_col_name)[1]
+        )
+        kept_values = kept_values.append(
+            _get_selected_coded_values(
+                referenced,
+                _get_kept_rows(gtfs_in, selection, referenced_name),
+                referenced_col_name,
+            )
+        )
+    dropped_values = input_values.difference(kept_values)
+    if not len(dropped_values):
+        return False
+    gtfs_data = gtfs_in.__getattribute__(name)
+    pruned = kept & ~_select_by_coded_values(gtfs_data, col_name, dropped_values)
+    return _update_kept_rows(selection, name, kept, pruned)
+
+
+def _prune_unreferenced_rows(
+    gtfs_in: GTFS, selection: GTFSSelection, name: str
+) -> bool:
+    """
+    Drops kept rows of a GTFS file which no kept row references
+
+    Returns:
+        True when rows were dropped
+    """
+    kept = _get_kept_rows(gtfs_in, selection, name)
+    if kept is None:
+        return False
+    gtfs_data = gtfs_in.__getattribute__(name)
+    references = [
+        (referencing_name, col_name, referenced_col_name)
+        for referencing_name, col_name, referenced_names, referenced_col_name, _ in (
+            GTFS_FOREIGN_KEYS
+        )
+        if name in referenced_names and referencing_name != name
+    ]
+    # pruned GTFS files are all referenced by their primary key
+    key_col_name = references[0][2]
+    if key_col_name not in gtfs_data:
+        return False
+    referenced_values = pd.Index([])
+    for referencing_name, col_name, _ in references:
+        referencing = gtfs_in.__getattribute__(referencing_name)
+        if referencing is None:
+            continue
+        if col_name not in referencing:
+            if name == "agency" and referencing_name == "routes":
+                # agency_id is only required when there are several agencies
+                return False
+            continue
+        referencing_kept = _get_kept_rows(gtfs_in, selection, referencing_name)
+        if name == "agency" and referencing_name == "routes":
+            codes, _ = _get_codes(referencing, col_name)
+            if (codes[referencing_kept] < 0).any():
+                # routes without agency_id are operated by the single agency
+                return False
+        referenced_values = referenced_values.append(
+            _get_selected_coded_values(referencing, referencing_kept, col_name)
+        )
+    pruned = kept & _select_by_coded_values(gtfs_data, key_col_name, referenced_values)
+    return _update_kept_rows(selection, name, kept, pruned)
+
+
+def prune_selection(gtfs_in: GTFS, selection: GTFSSelection) -> None:
+    """
+    Drops kept rows left orphan by a selection, until there are none left
+
+    Rows of PRUNED_GTFS_FILES no kept row references are dropped (e.g. services without
+    trips, shapes without trips, levels without stops, areas without stop areas, agencies
+    without routes) as well as rows whose required references (see GTFS_FOREIGN_KEYS) were
+    all dropped (e.g. stop times of dropped trips). Dropping rows may orphan other rows so
+    both passes are repeated until no row is dropped. Stops are never pruned, as stations
+    kept with their stops are not referenced by kept rows.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        selection: selection to update
+    """
+    dropped = True
+    while dropped:
+        dropped = False
+        for (
+            name,
+            col_name,
+            referenced_names,
+            referenced_col_name,
+            required,
+        ) in GTFS_FOREIGN_KEYS:
+            if required:
+                dropped |= _prune_dangling_rows(
+                    gtfs_in,
+                    selection,
+                    name,
+                    col_name,
+                    referenced_names,
+                    referenced_col_name,
+                )
+        for name in PRUNED_GTFS_FILES:
+            dropped |= _prune_unreferenced_rows(gtfs_in, selection, name)
+
+
+# minimum number of trips at a constant headway rewritten as a frequency by
+# compact_selected_trips
+FREQUENCY_MIN_TRIPS = 3
+
+# relative time of missing stop times in trip patterns
+MISSING_TIME_OFFSET = np.iinfo(np.int64).min
+
+
+def _format_gtfs_time(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _concatenate_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # e.g. starts [0, 10] and lengths [2, 3] give [0, 1, 10, 11, 12]
+    ends = np.cumsum(lengths)
+    return np.arange(ends[-1] if len(ends) else 0) + np.repeat(
+        starts - (ends - lengths), lengths
+    )
+
+
+def _get_coded_rows(
+    gtfs_data: pd.DataFrame, rows: np.ndarray, excluded_col_names: typing.List[str]
+) -> pd.DataFrame:
+    # integer codes of values (see _get_codes), missing values are equal to each other
+    return pd.DataFrame(
+        {
+            col_name: _get_codes(gtfs_data, col_name)[0][rows]
+            for col_name in gtfs_data.columns
+            if col_name not in excluded_col_names
+        },
+        index=pd.RangeIndex(len(rows)),
+    )
+
+
+def _equal_rows(
+    values: np.ndarray, rows: np.ndarray, other_rows: np.ndarray
+) -> np.ndarray:
+    return (values[rows] == values[other_rows]).all(axis=1)
+
+
+def _assign_trips_to_headway_runs(
+    starts: np.ndarray, same_pattern: np.ndarray
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits trips ordered by pattern then start time into runs at a constant headway
+
+    Consecutive trips of a pattern with the same positive headway form a run. A trip between
+    two runs joins the longest one.
+
+    Args:
+        starts: (n,) start time of each trip
+        same_pattern: (n,) whether each trip has the same pattern as the previous one
+
+    Returns:
+        (n,) run of each trip (-1 for none), headway of each run
+    """
+    headways = np.diff(starts, prepend=0)
+    # pair i links trips i - 1 and i
+    pairs = same_pattern & (headways > 0)
+    pairs[0] = False
+    new_runs = pairs & ~(
+        np.concatenate([[False], pairs[:-1]])
+        & (headways == np.concatenate([[0], headways[:-1]]))
+    )
+    pair_runs = np.where(pairs, np.cumsum(new_runs) - 1, -1)
+    runs_count = int(new_runs.sum())
+    run_lengths = np.bincount(pair_runs[pairs], minlength=runs_count)
+    run_headways = np.zeros(runs_count, dtype=np.int64)
+    run_headways[pair_runs[pairs]] = headways[pairs]
+
+    previous_runs = pair_runs
+    next_runs = np.append(pair_runs[1:], -1)
+    previous_lengths = np.append(run_lengths, 0)[previous_runs]
+    next_lengths = np.append(run_lengths, 0)[next_runs]
+    trip_runs = np.where(next_lengths > previous_lengths, next_runs, previous_runs)
+    return trip_runs, run_headways
+
+
+def compact_selected_trips(
+    gtfs_in: GTFS, selection: GTFSSelection, min_trips: int = FREQUENCY_MIN_TRIPS
+) -> None:
+    """
+    Rewrites runs of selected trips repeating the same stop pattern at a constant headway as
+    one template trip and a frequency
+
+    Trips share a pattern when all their trips columns but trip_id are equal and their
+    selected stop times are equal once times are taken relative to their first departure.
+    Candidates are found by hashing stop times of all trips at once, then compared value by
+    value. The first trip of a run of at least min_trips trips is kept with its stop times as
+    template, other trips of the run and their stop times are dropped and an exact_times
+    frequency from the first departure of the run to the last one plus the headway is added.
+    Trips referenced by frequencies, transfers or attributions are left as they are.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        selection: selection to update
+        min_trips: minimum number of trips of a run
+    """
+    trips = gtfs_in.trips
+    stop_times = gtfs_in.stop_times
+    if stop_times is None or selection.stop_times is None or selection.trips is None:
+        return
+    referenced_trip_ids = pd.Index([])
+    for name, col_name, referenced_names, _, _ in GTFS_FOREIGN_KEYS:
+        referencing = gtfs_in.__getattribute__(name)
+        if (
+            referenced_names == ["trips"]
+            and name != "stop_times"
+            and referencing is not None
+            and col_name in referencing
+        ):
+            referenced_trip_ids = referenced_trip_ids.append(
+                _get_codes(referencing, col_name)[1]
+            )
+    trip_ids = trips["trip_id"]
+    trip_rows = np.flatnonzero(
+        selection.trips
+        & trip_ids.notna().to_numpy()
+        & ~trip_ids.duplicated(keep=False).to_numpy()
+        & ~trip_ids.isin(referenced_trip_ids).to_numpy()
+    )
+
+    # stop times of candidate trips, ordered by trip and sequence
+    codes, coded_trip_ids = _get_codes(stop_times, "trip_id")
+    code_trips = np.append(
+        pd.Index(trip_ids.to_numpy()[trip_rows]).get_indexer(coded_trip_ids), -1
+    )
+    row_trips = code_trips[codes]
+    rows = np.flatnonzero(selection.stop_times & (row_trips >= 0))
+    rows = rows[
+        np.lexsort((_get_numbers(stop_times, "stop_sequence")[rows], row_trips[rows]))
+    ]
+    row_trips = row_trips[rows]
+    offsets = np.flatnonzero(
+        np.concatenate([[True], row_trips[1:] != row_trips[:-1], [True]])
+    )
+    if len(offsets) - 1 < min_trips:
+        return
+    lengths = np.diff(offsets)
+    departures = get_gtfs_times(stop_times, "departure_time")[rows]
+    starts = departures[offsets[:-1]]
+    trip_starts = np.repeat(starts, lengths)
+
+    pattern = _get_coded_rows(
+        stop_times, rows, ["trip_id", "arrival_time", "departure_time"]
+    )
+    for col_name, times in [
+        ("arrival_time", get_gtfs_times(stop_times, "arrival_time")[rows]),
+        ("departure_time", departures),
+    ]:
+        pattern[col_name] = np.where(
+            times >= 0, times - trip_starts, MISSING_TIME_OFFSET
+        )
+    attributes = _get_coded_rows(trips, trip_rows[row_trips[offsets[:-1]]], ["trip_id"])
+    candidates = pd.DataFrame(
+        {
+            "pattern": _hash_sequences(pattern, offsets),
+            "attributes": (
+                pd.util.hash_pandas_object(attributes, index=False).to_numpy()
+                if len(attributes.columns)
+                else 0
+            ),
+            "length": lengths,
+            "start": starts,
+        }
+    )
+    candidates = candidates[candidates["start"] >= 0].sort_values(
+        ["pattern", "attributes", "length", "start"], kind="stable"
+    )
+    keys = candidates[["pattern", "attributes", "length"]].to_numpy()
+    same_pattern = np.concatenate([[False], (keys[1:] == keys[:-1]).all(axis=1)])
+    trip_runs, run_headways = _assign_trips_to_headway_runs(
+        candidates["start"].to_numpy(), same_pattern
+    )
+    in_run = trip_runs >= 0
+    run_sizes = np.bincount(trip_runs[in_run], minlength=len(run_headways))
+    compacted = in_run & (np.append(run_sizes, 0)[trip_runs] >= min_trips)
+    if not compacted.any():
+        return
+
+    # trips of compacted runs (index in offsets) and the template (first trip) of their run
+    run_trips = candidates.index.to_numpy()[compacted]
+    runs = trip_runs[compacted]
+    is_template = np.concatenate([[True], runs[1:] != runs[:-1]])
+    templates = run_trips[is_template][np.cumsum(is_template) - 1]
+
+    # hashes may collide: runs with a trip differing from its template are not compacted
+    pattern_values = pattern.to_numpy()
+    equal_stop_times = _equal_rows(
+        pattern_values,
+        _concatenate_ranges(offsets[run_trips], lengths[run_trips]),
+        _concatenate_ranges(offsets[templates], lengths[run_trips]),
+    )
+    equal_trips = np.logical_and.reduceat(
+        equal_stop_times, np.cumsum(lengths[run_trips]) - lengths[run_trips]
+    )
+    equal_trips &= _equal_rows(attributes.to_numpy(), run_trips, templates)
+    failed_runs = np.unique(runs[~equal_trips])
+    kept_runs = ~np.isin(runs, failed_runs)
+    if not kept_runs.any():
+        return
+
+    dropped_trips = run_trips[kept_runs & ~is_template]
+    selection.trips[trip_rows[row_trips[offsets[dropped_trips]]]] = False
+    selection.stop_times[
+        rows[_concatenate_ranges(offsets[dropped_trips], lengths[dropped_trips])]
+    ] = False
+
+    run_starts = pd.Series(starts[run_trips[kept_runs]]).groupby(runs[kept_runs])
+    first_starts = run_starts.min()
+    headways = run_headways[first_starts.index.to_numpy()]
+    end_times = run_starts.max().to_numpy() + headways
+    template_trip_ids = trip_ids.to_numpy()[
+        trip_rows[row_trips[offsets[run_trips[kept_runs & is_template]]]]
+    ]
+    frequencies = pd.DataFrame(
+        {
+            "trip_id": template_trip_ids,
+            "start_time": [_format_gtfs_time(t) for t in first_starts.to_numpy()],
+            "end_time": [_format_gtfs_time(t) for t in end_times],
+            "headway_secs": headways.astype(str),
+            "exact_times": "1",
+        }
+    )
+    if selection.frequencies is None:
+        # frequencies.txt is added when absent from input
+        selection.frequencies = (
+            np.zeros(0, dtype=bool)
+            if gtfs_in.frequencies is None
+            else _select_all(gtfs_in.frequencies)
+        )
+    _add_transform(
+        selection,
+        "frequencies",
+        functools.partial(_append_rows, rows=frequencies),
+    )
+
+
+def materialize_gtfs_data(
+    gtfs_data: typing.Optional[pd.DataFrame],
+    selection: typing.Optional[np.ndarray],
+    transform: typing.Optional[typing.Callable[[pd.DataFrame], pd.DataFrame]] = None,
+) -> typing.Optional[pd.DataFrame]:
+    """
+    Gathers selected rows of a single GTFS file
+
+    Args:
+        gtfs_data: parsed GTFS file
+        selection: rows to keep, None to drop GTFS file
+        transform: function applied to selected rows, None to keep them as is
+
+    Returns:
+        Selected rows (gtfs_data itself when all rows are selected), None when GTFS file is dropped
+    """
+    if gtfs_data is None or selection is None:
+        return None
+    if not selection.all():
+        gtfs_data = gtfs_data[selection]
+    if transform is not None:
+        gtfs_data = transform(gtfs_data)
+    return gtfs_data
+
+
+def _materialize_gtfs_file(
+    gtfs: GTFS, selection: GTFSSelection, name: str
+) -> typing.Optional[pd.DataFrame]:
+    gtfs_data = gtfs.__getattribute__(name)
+    if gtfs_data is None and selection.__getattribute__(name) is not None:
+        # GTFS file absent from input whose rows are all added by its transform
+        gtfs_data = pd.DataFrame(dtype=str)
+    return materialize_gtfs_data(
+        gtfs_data, selection.__getattribute__(name), selection.transforms.get(name)
+    )
+
+
+def _get_added_gtfs_files(gtfs: GTFS, selection: GTFSSelection) -> typing.List[str]:
+    # GTFS files absent from input but selected, see _materialize_gtfs_file
+    return [
+        f"{field.name}.txt"
+        for field in dataclasses.fields(gtfs)
+        if gtfs.__getattribute__(field.name) is None
+        and selection.__getattribute__(field.name) is not None
+    ]
+
+
+def materialize_selection(gtfs_in: GTFS, selection: GTFSSelection) -> GTFS:
+    """
+    Gathers selected rows of all GTFS files
+
+    Args:
+        gtfs_in: parsed GTFS the selection was computed on
+        selection: rows to keep
+
+    Returns:
+        GTFS with selected rows only
+    """
+    return GTFS(
+        **{
+            field.name: _materialize_gtfs_file(gtfs_in, selection, field.name)
+            for field in dataclasses.fields(gtfs_in)
+        }
+    )
+
+
+def filter_by_route_id(gtfs_in: GTFS, route_ids: typing.List[str]) -> GTFS:
+    """
+    Filters all GTFS files by route id
+
+    Args:
+        gtfs_in: parsed GTFS input
+        route_ids: route ids to keep
+
+    Returns:
+        Filtered GTFS by route id
+    """
+    return materialize_selection(gtfs_in, select_by_route_id(gtfs_in, route_ids))
+
+
+def filter_by_trip_id(gtfs_in: GTFS, trip_ids: typing.List[str]) -> GTFS:
+    """
+    Filters all GTFS files by trip id
+
+    Args:
+        gtfs_in: parsed GTFS input
+        trip_ids: trip ids to keep
+
+    Returns:
+        Filtered GTFS by trip id
+    """
+    return materialize_selection(gtfs_in, select_by_trip_id(gtfs_in, trip_ids))
+
+
+def filter_by_agency_id(gtfs_in: GTFS, agency_ids: typing.List[str]) -> GTFS:
+    """
+    Filters all GTFS files by agency id
+
+    Args:
+        gtfs_in: parsed GTFS input
+        agency_ids: agency ids to keep
+
+    Returns:
+        Filtered GTFS by agency id
+    """
+    return materialize_selection(gtfs_in, select_by_agency_id(gtfs_in, agency_ids))
+
+
+def filter_by_service_date(gtfs_in: GTFS, start_date: str, end_date: str) -> GTFS:
+    """
+    Filters all GTFS files by service date
+
+    Args:
+        gtfs_in: parsed GTFS input
+        start_date: first day to keep (YYYYMMDD)
+        end_date: last day to keep (YYYYMMDD)
+
+    Returns:
+        Filtered GTFS by service date
+    """
+    return materialize_selection(
+        gtfs_in, select_by_service_date(gtfs_in, start_date, end_date)
+    )
+
+
+def filter_by_time_window(
+    gtfs_in: GTFS, start_time: int, end_time: int, trim: bool = False
+) -> GTFS:
+    """
+    Filters all GTFS files by time of day
+
+    Args:
+        gtfs_in: parsed GTFS input
+        start_time: start of the window in seconds, see parse_time_window
+        end_time: end of the window in seconds
+        trim: flag to also drop stop times outside of the window
+
+    Returns:
+        Filtered GTFS by time of day
+    """
+    return materialize_selection(
+        gtfs_in, select_by_time_window(gtfs_in, start_time, end_time, trim)
+    )
+
+
+def filter_by_stop_id(gtfs_in: GTFS, stop_ids: typing.List[str]) -> GTFS:
+    """
+    Filters all GTFS files by stop id
+
+    Args:
+        gtfs_in: parsed GTFS input
+        stop_ids: stop ids to keep (child stops included)
+
+    Returns:
+        Filtered GTFS by stop id
+    """
+    return materialize_selection(gtfs_in, select_by_stop_id(gtfs_in, stop_ids))
+
+
+# GTFS files filtered by filter_by_route_id/filter_by_trip_id and the filtered GTFS files their filtering
+# depends on (e.g. stops are filtered by stop ids found in filtered stop_times)
+FILTERED_GTFS_FILE_DEPENDENCIES = {
+    "agency.txt": {"routes.txt"},
+    "stops.txt": {"stop_times.txt", "pathways.txt"},
+    "routes.txt": {"trips.txt"},
+    "trips.txt": set(),
+    "stop_times.txt": {"trips.txt"},
+    "calendar.txt": {"trips.txt"},
+    "calendar_dates.txt": {"trips.txt"},
+    "areas.txt": {"stop_areas.txt"},
+    "stop_areas.txt": {"stops.txt", "areas.txt"},
+    "shapes.txt": {"trips.txt"},
+    "frequencies.txt": {"trips.txt"},
+    "transfers.txt": {"stops.txt", "trips.txt"},
+    "pathways.txt": {"stops.txt"},
+    "levels.txt": {"stops.txt"},
+    "attributions.txt": {"routes.txt", "trips.txt"},
+    "fare_attributes.txt": {"routes.txt", "fare_rules.txt"},
+    "fare_rules.txt": {"routes.txt", "stops.txt", "fare_attributes.txt"},
+}
+
+
+def get_gtfs_file_input_dependencies(gtfs_file: str) -> typing.Set[str]:
+    """
+    Retrieves all input GTFS files a filtered GTFS file depends on
+
+    A filtered GTFS file depends on its own input file and, transitively, on the files of
+    FILTERED_GTFS_FILE_DEPENDENCIES. A GTFS file which is not filtered only depends on itself.
+
+    Args:
+        gtfs_file: filtered GTFS file, e.g. 'stops.txt'
+
+    Returns:
+        Input GTFS files which can change the content of the filtered GTFS file
+    """
+    dependencies = {gtfs_file}
+    to_visit = [gtfs_file]
+    while to_visit:
+        for dependency in FILTERED_GTFS_FILE_DEPENDENCIES.get(to_visit.pop(), set()):
+            if dependency not in dependencies:
+                dependencies.add(dependency)
+                to_visit.append(dependency)
+    return dependencies
+
+
+# columns identifying rows of a GTFS field
+GTFS_PRIMARY_KEYS = {
+    "agency": ["agency_id"],
+    "stops": ["stop_id"],
+    "routes": ["route_id"],
+    "trips": ["trip_id"],
+    "stop_times": ["trip_id", "stop_sequence"],
+    "calendar": ["service_id"],
+    "calendar_dates": ["service_id", "date"],
+    "fare_attributes": ["fare_id"],
+    "areas": ["area_id"],
+    "stop_areas": ["area_id", "stop_id"],
+    "shapes": ["shape_id", "shape_pt_sequence"],
+    "frequencies": ["trip_id", "start_time"],
+    "pathways": ["pathway_id"],
+    "levels": ["level_id"],
+}
+
+# (GTFS field, column, referenced GTFS fields, referenced column, required)
+# when not required, rows with an empty value are valid and a missing column is ignored
+GTFS_FOREIGN_KEYS = [
+    ("routes", "agency_id", ["agency"], "agency_id", False),
+    ("trips", "route_id", ["routes"], "route_id", True),
+    ("trips", "service_id", ["calendar", "calendar_dates"], "service_id", True),
+    ("trips", "shape_id", ["shapes"], "shape_id", False),
+    ("stop_times", "trip_id", ["trips"], "trip_id", True),
+    ("stop_times", "stop_id", ["stops"], "stop_id", True),
+    ("stops", "parent_station", ["stops"], "stop_id", False),
+    ("stops", "level_id", ["levels"], "level_id", False),
+    ("fare_attributes", "agency_id", ["agency"], "agency_id", False),
+    ("fare_rules", "fare_id", ["fare_attributes"], "fare_id", True),
+    ("fare_rules", "route_id", ["routes"], "route_id", False),
+    ("fare_rules", "origin_id", ["stops"], "zone_id", False),
+    ("fare_rules", "destination_id", ["stops"], "zone_id", False),
+    ("fare_rules", "contains_id", ["stops"], "zone_id", False),
+    ("stop_areas", "area_id", ["areas"], "area_id", True),
+    ("stop_areas", "stop_id", ["stops"], "stop_id", True),
+    ("frequencies", "trip_id", ["trips"], "trip_id", True),
+    ("transfers", "from_stop_id", ["stops"], "stop_id", False),
+    ("transfers", "to_stop_id", ["stops"], "stop_id", False),
+    ("transfers", "from_route_id", ["routes"], "route_id", False),
+    ("transfers", "to_route_id", ["routes"], "route_id", False),
+    ("transfers", "from_trip_id", ["trips"], "trip_id", False),
+    ("transfers", "to_trip_id", ["trips"], "trip_id", False),
+    ("pathways", "from_stop_id", ["stops"], "stop_id", True),
+    ("pathways", "to_stop_id", ["stops"], "stop_id", True),
+    ("attributions", "agency_id", ["agency"], "agency_id", False),
+    ("attributions", "route_id", ["routes"], "route_id", False),
+    ("attributions", "trip_id", ["trips"], "trip_id", False),
+]
+
+# GTFS files read by validate_gtfs
+VALIDATED_GTFS_FILES = {
+    f"{gtfs_field}.txt"
+    for gtfs_fields in [
+        list(GTFS_PRIMARY_KEYS),
+        *([field, *referenced] for field, _, referenced, _, _ in GTFS_FOREIGN_KEYS),
+    ]
+    for gtfs_field in gtfs_fields
+}
+
+# values listed in a validation issue
+VALIDATION_ISSUE_EXAMPLES = 5
+
+
+class ValidationCheck(enum.StrEnum):
+    MISSING_COLUMN = "missing_column"  # required column is missing
+    DUPLICATE_KEY = "duplicate_key"  # several rows have the same primary key
+    MISSING_REFERENCE = "missing_reference"  # referenced row does not exist
+    INACTIVE_SERVICE = "inactive_service"  # service of trips never runs
+    INVALID_VALUE = "invalid_value"  # value cannot be parsed (e.g. dates)
+
+
+@dataclasses.dataclass
+class ValidationIssue:
+    check: ValidationCheck
+    gtfs_file: str  # e.g. 'trips.txt'
+    columns: typing.List[str]
+    rows_count: int  # number of invalid rows
+    examples: typing.List[str]  # some invalid values
+
+    def __str__(self) -> str:
+        return (
+            f"{self.check}: {self.gtfs_file} ({', '.join(self.columns)}), "
+            f"{self.rows_count} row(s), e.g. {', '.join(self.examples)}"
+        )
+
+
+@dataclasses.dataclass
+class ValidationReport:
+    """
+    Referential integrity issues of a parsed GTFS, see validate_gtfs
+    """
+
+    issues: typing.List[ValidationIssue] = dataclasses.field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.issues
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "is_valid": self.is_valid,
+            "issues": [dataclasses.asdict(issue) for issue in self.issues],
+        }
+
+
+def _add_validation_issue(
+    report: ValidationReport,
+    check: ValidationCheck,
+    gtfs_field: str,
+    columns: typing.List[str],
+    invalid_values: pd.DataFrame,
+) -> None:
+    if not len(invalid_values):
+        return
+    examples = (
+        invalid_values.fillna("").astype(str).agg(",".join, axis=1).drop_duplicates()
+    )
+    report.issues.append(
+        ValidationIssue(
+            check=check,
+            gtfs_file=f"{gtfs_field}.txt",
+            columns=columns,
+            rows_count=len(invalid_values),
+            examples=examples.head(VALIDATION_ISSUE_EXAMPLES).tolist(),
+        )
+    )
+
+
+def _check_service_days(gtfs: GTFS, report: ValidationReport) -> None:
+    # services of trips must run at least one day, duplicated calendar keys are already
+    # reported and only their first row is used by get_active_service_ids
+    dates = []
+    if gtfs.calendar is not None:
+        dates += gtfs.calendar[["start_date", "end_date"]].stack().tolist()
+    if gtfs.calendar_dates is not None:
+        dates += gtfs.calendar_dates["date"].tolist()
+    dates = [date for date in dates if isinstance(date, str)]
+    if not dates or "service_id" not in gtfs.trips:
+        return
+    try:
+        active_service_ids = get_active_service_ids(gtfs, min(dates), max(dates))
+    except (KeyError, ValueError) as e:
+        report.issues.append(
+            ValidationIssue(
+                check=ValidationCheck.INVALID_VALUE,
+                gtfs_file="calendar.txt",
+                columns=[],
+                rows_count=0,
+                examples=[str(e)],
+            )
+        )
+        return
+    trips = gtfs.trips
+    inactive = trips["service_id"].notna() & ~trips["service_id"].isin(
+        active_service_ids
+    )
+    _add_validation_issue(
+        report,
+        ValidationCheck.INACTIVE_SERVICE,
+        "trips",
+        ["service_id"],
+        trips.loc[inactive, ["service_id"]],
+    )
+
+
+def validate_gtfs(gtfs: GTFS) -> ValidationReport:
+    """
+    Checks referential integrity of a parsed GTFS, e.g. of a filtered GTFS
+
+    Each check runs on whole columns at once: primary keys are unique (GTFS_PRIMARY_KEYS),
+    referenced rows exist (GTFS_FOREIGN_KEYS) and services of trips run at least one day.
+    It is not a full GTFS validation: value formats and optional rules are not checked.
+
+    Args:
+        gtfs: parsed GTFS
+
+    Returns:
+        Issues found, see ValidationReport
+    """
+    report = ValidationReport()
+
+    for gtfs_field, key_columns in GTFS_PRIMARY_KEYS.items():
+        gtfs_data = gtfs.__getattribute__(gtfs_field)
+        if gtfs_data is None or not set(key_columns).issubset(gtfs_data.columns):
+            continue
+        duplicated = gtfs_data.duplicated(subset=key_columns, keep=False)
+        _add_validation_issue(
+            report,
+            ValidationCheck.DUPLICATE_KEY,
+            gtfs_field,
+            key_columns,
+            gtfs_data.loc[duplicated, key_columns],
+        )
+
+    for (
+        gtfs_field,
+        col_name,
+        referenced_fields,
+        referenced_col_name,
+        required,
+    ) in GTFS_FOREIGN_KEYS:
+        gtfs_data = gtfs.__getattribute__(gtfs_field)
+        if gtfs_data is None:
+            continue
+        if col_name not in gtfs_data:
+            if required:
+                report.issues.append(
+                    ValidationIssue(
+                        check=ValidationCheck.MISSING_COLUMN,
+                        gtfs_file=f"{gtfs_field}.txt",
+                        columns=[col_name],
+                        rows_count=len(gtfs_data),
+                        examples=[],
+                    )
+                )
+            continue
+        referenced_values = [
+            referenced_data[referenced_col_name].dropna().unique()
+            for referenced_data in (
+                gtfs.__getattribute__(field) for field in referenced_fields
+            )
+            if referenced_data is not None and referenced_col_name in referenced_data
+        ]
+        values = gtfs_data[col_name]
+        invalid = ~values.isin(
+            np.concatenate(referenced_values) if referenced_values else []
+        )
+        if not required:
+            invalid &= values.notna()
+        _add_validation_issue(
+            report,
+            ValidationCheck.MISSING_REFERENCE,
+            gtfs_field,
+            [col_name],
+            gtfs_data.loc[invalid, [col_name]],
+        )
+
+    _check_service_days(gtfs, report)
+    return report
+
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """
+    Removes zip64 extra field records, they are regenerated when writing a local file header
+    """
+    stripped = b""
+    i = 0
+    while i + 4 <= len(extra):
+        header_id, data_size = struct.unpack("<HH", extra[i : i + 4])
+        if header_id != ZIP64_EXTRA_HEADER_ID:
+            stripped += extra[i : i + 4 + data_size]
+        i += 4 + data_size
+    return stripped
+
+
+def _can_copy_raw_zip_member(output_zip: zipfile.ZipFile) -> bool:
+    # raw copy relies on ZipFile internals which are not part of its public API
+    return (
+        all(
+            hasattr(output_zip, attribute)
+            for attribute in ["_writecheck", "_didModify", "start_dir", "NameToInfo"]
+        )
+        and getattr(output_zip, "_writing", True) is False
+    )
+
+
+def copy_zip_member(
+    input_zip: zipfile.ZipFile, filename: str, output_zip: zipfile.ZipFile
+) -> None:
+    """
+    Copies a member from a zip to another one without decompressing/recompressing it
+
+    Compressed bytes are copied as is, output zip member keeps input compression and CRC.
+    When output_zip internals are not the expected ones (e.g. other Python implementation),
+    member is decompressed and compressed again with the same compression method instead.
+
+    Args:
+        input_zip: zip opened in read mode
+        filename: member to copy
+        output_zip: zip opened in write mode
+
+    Raises:
+        KeyError when filename is not a member of input_zip
+    """
+    zinfo = input_zip.getinfo(filename)
+    if not _can_copy_raw_zip_member(output_zip):
+        _recompress_zip_member(input_zip, zinfo, output_zip)
+        return
+    input_zip.fp.seek(zinfo.header_offset)
+    local_header = input_zip.fp.read(zipfile.sizeFileHeader)
+    # local file header name and extra field lengths are its 2 last fields
+    name_length, extra_length = struct.unpack("<HH", local_header[-4:])
+    input_zip.fp.seek(
+        zinfo.header_offset + zipfile.sizeFileHeader + name_length + extra_length
+    )
+
+    output_zinfo = copy.copy(zinfo)
+    # CRC and sizes are known, they are written in local header instead of a data descriptor
+    output_zinfo.flag_bits &= ~ZIP_DATA_DESCRIPTOR_FLAG
+    output_zinfo.extra = _strip_zip64_extra(zinfo.extra)
+    output_zinfo.header_offset = output_zip.fp.tell()
+    zip64 = max(zinfo.file_size, zinfo.compress_size) > zipfile.ZIP64_LIMIT
+    # no public API to write raw compressed bytes, mimics ZipFile.write internals
+    output_zip._writecheck(output_zinfo)
+    output_zip._didModify = True
+    output_zip.fp.write(output_zinfo.FileHeader(zip64))
+    remaining = zinfo.compress_size
+    while remaining > 0:
+        chunk = input_zip.fp.read(min(ZIP_COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated member '{filename}'.")
+        output_zip.fp.write(chunk)
+        remaining -= len(chunk)
+    output_zip.filelist.append(output_zinfo)
+    output_zip.NameToInfo[output_zinfo.filename] = output_zinfo
+    output_zip.start_dir = output_zip.fp.tell()
+
+
+def _recompress_zip_member(
+    input_zip: zipfile.ZipFile, zinfo: zipfile.ZipInfo, output_zip: zipfile.ZipFile
+) -> None:
+    output_zinfo = zipfile.ZipInfo(zinfo.filename, zinfo.date_time)
+    output_zinfo.compress_type = zinfo.compress_type
+    output_zinfo.external_attr = zinfo.external_attr
+    with (
+        input_zip.open(zinfo) as input_file,
+        output_zip.open(
+            output_zinfo, "w", force_zip64=zinfo.file_size > zipfile.ZIP64_LIMIT
+        ) as output_file,
+    ):
+        shutil.copyfileobj(input_file, output_file, ZIP_COPY_CHUNK_SIZE)
+
+
+def write_dataframe_to_zip(
+    df: pd.DataFrame, output_zip: zipfile.ZipFile, filename: str
+) -> None:
+    """
+    Writes a dataframe as a CSV member of a zip
+
+    Args:
+        df: dataframe to write
+        output_zip: zip opened in write mode
+        filename: member to create
+    """
+    with output_zip.open(filename, "w") as gtfs_file:
+        df.to_csv(gtfs_file, index=False)
+
+
+class FilterType(enum.StrEnum):
+    ROUTE_ID = "route_id"
+    TRIP_ID = "trip_id"
+    SERVICE_DATE = "service_date"  # filter values: start date and end date (YYYYMMDD)
+    TIME_WINDOW = "time_window"  # filter values: start time and end time (HH:MM:SS)
+    # filter values: min longitude, min latitude, max longitude and max latitude
+    BBOX = "bbox"
+    POLYGON = "polygon"  # filter values: polygon vertices 'lon,lat'
+    STOP_ID = "stop_id"  # filter values: stop ids (stations include their platforms)
+    AGENCY_ID = "agency_id"
+
+
+class Engine(enum.StrEnum):
+    PANDAS = "pandas"
+    CSV = "csv"  # byte-level filtering without pandas, see gtfs_filtering.csv_filter
+    SQLITE = "sqlite"  # on-disk filtering with SQL, see gtfs_filtering.sqlite_filter
+    POLARS = "polars"  # lazy multi-core filtering, requires polars, see gtfs_filtering.polars_filter
+
+
+class CompressionMethod(enum.StrEnum):
+    STORED = "stored"
+    DEFLATED = "deflated"
+    BZIP2 = "bzip2"
+    LZMA = "lzma"
+
+    @property
+    def zip_compression(self) -> int:
+        return {
+            CompressionMethod.STORED: zipfile.ZIP_STORED,
+            CompressionMethod.DEFLATED: zipfile.ZIP_DEFLATED,
+            CompressionMethod.BZIP2: zipfile.ZIP_BZIP2,
+            CompressionMethod.LZMA: zipfile.ZIP_LZMA,
+        }[self]
+
+
+class CompressionProfile(enum.StrEnum):
+    """
+    Output compression presets, from fastest to smallest output
+    """
+
+    STORE = "store"  # no compression, for local pipelines
+    FAST = "fast"
+    DEFAULT = "default"
+    SMALLEST = "smallest"
+
+    @property
+    def method(self) -> CompressionMethod:
+        if self == CompressionProfile.STORE:
+            return CompressionMethod.STORED
+        return CompressionMethod.DEFLATED
+
+    @property
+    def level(self) -> typing.Optional[int]:
+        return {
+            CompressionProfile.STORE: None,
+            CompressionProfile.FAST: 1,
+            CompressionProfile.DEFAULT: None,
+            CompressionProfile.SMALLEST: 9,
+        }[self]
+
+
+def _check_compression_level(
+    compression: CompressionMethod, compression_level: typing.Optional[int]
+) -> None:
+    if compression_level is None:
+        return
+    match compression:
+        case CompressionMethod.DEFLATED if not 0 <= compression_level <= 9:
+            raise ValueError(
+                f"Invalid compression level {compression_level} for {compression}, expected 0 to 9."
+            )
+        case CompressionMethod.BZIP2 if not 1 <= compression_level <= 9:
+            raise ValueError(
+                f"Invalid compression level {compression_level} for {compression}, expected 1 to 9."
+            )
+
+
+@dataclasses.dataclass
+class FilterPredicate:
+    """
+    Keeps trips matching a single filter, e.g. trips of some routes
+    """
+
+    filter_type: FilterType
+    filter_values: typing.List[str]  # see perform_filter
+
+
+@dataclasses.dataclass
+class AndFilter:
+    """
+    Keeps trips matching all operands
+    """
+
+    operands: typing.List["FilterExpression"]
+
+
+@dataclasses.dataclass
+class OrFilter:
+    """
+    Keeps trips matching at least one operand
+    """
+
+    operands: typing.List["FilterExpression"]
+
+
+FilterExpression = typing.Union[FilterPredicate, AndFilter, OrFilter]
+
+
+def parse_filter_spec(spec: typing.Any) -> FilterExpression:
+    """
+    Converts a filter spec (parsed JSON) to a filter expression
+
+    A filter spec is an object with a single key: 'and' or 'or' with a list of filter specs,
+    or a filter type with its filter values (a value or a list of values), e.g.
+    {"and": [{"route_id": ["R1", "R2"]}, {"bbox": [2.2, 48.8, 2.5, 48.9]}]}
+
+    Args:
+        spec: filter spec
+
+    Returns:
+        Filter expression
+
+    Raises:
+        ValueError when filter spec is invalid
+    """
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise ValueError(
+            f"Invalid filter spec {json.dumps(spec)}, expected an object with a single key: "
+            "'and', 'or' or a filter type."
+        )
+    ((key, value),) = spec.items()
+    if key in ("and", "or"):
+        if not isinstance(value, list) or not value:
+            raise ValueError(
+                f"Invalid filter spec, '{key}' expects a non empty list of filter specs."
+            )
+        operands = [parse_filter_spec(operand) for operand in value]
+        return AndFilter(operands) if key == "and" else OrFilter(operands)
+    if key not in [f_type.value for f_type in FilterType]:
+        raise ValueError(f"Invalid filter spec, unknown filter type '{key}'.")
+    values = value if isinstance(value, list) else [value]
+    if not all(isinstance(v, (str, int, float)) for v in values):
+        raise ValueError(
+            f"Invalid filter spec, '{key}' expects a value or a list of values."
+        )
+    return FilterPredicate(FilterType(key), [str(v) for v in values])
+
+
+def read_filter_spec(filter_spec_file: str) -> FilterExpression:
+    """
+    Reads a filter expression from a JSON filter spec file, see parse_filter_spec
+
+    Args:
+        filter_spec_file: fullpath to JSON filter spec file
+
+    Returns:
+        Filter expression
+
+    Raises:
+        FileNotFoundError when filter_spec_file does not exist
+        ValueError when filter spec is not valid JSON or is invalid
+    """
+    with open(filter_spec_file) as f:
+        try:
+            spec = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid filter spec file '{filter_spec_file}': {e}.")
+    return parse_filter_spec(spec)
+
+
+def _compile_filter_predicate(
+    predicate: FilterPredicate,
+) -> typing.Callable[[GTFS], np.ndarray]:
+    values = predicate.filter_values
+    match predicate.filter_type:
+        case FilterType.ROUTE_ID:
+            return lambda gtfs: _select_by_column_values(gtfs.trips, "route_id", values)
+        case FilterType.TRIP_ID:
+            return lambda gtfs: _select_by_column_values(gtfs.trips, "trip_id", values)
+        case FilterType.AGENCY_ID:
+            return lambda gtfs: _select_by_column_values(
+                gtfs.trips, "route_id", _get_agency_route_ids(gtfs, values)
+            )
+        case FilterType.STOP_ID:
+            return lambda gtfs: _select_trips_serving_stops(
+                gtfs, _get_stop_ids_with_children(gtfs.stops, values)
+            )
+        case FilterType.SERVICE_DATE:
+            start_date, end_date = parse_service_date_window(values)
+            return lambda gtfs: _select_trips_by_service_date(
+                gtfs, start_date, end_date
+            )
+        case FilterType.TIME_WINDOW:
+            start_time, end_time = parse_time_window(values)
+            return lambda gtfs: _select_trips_by_time_window(gtfs, start_time, end_time)
+        case FilterType.BBOX:
+            is_inside = functools.partial(geo.points_in_bbox, bbox=parse_bbox(values))
+            return lambda gtfs: _select_trips_serving_stops(
+                gtfs, _get_stop_ids_in_region(gtfs.stops, is_inside)
+            )
+        case FilterType.POLYGON:
+            is_inside = functools.partial(
+                geo.points_in_polygon,
+                polygon_grid=geo.build_polygon_grid(parse_polygon(values)),
+            )
+            return lambda gtfs: _select_trips_serving_stops(
+                gtfs, _get_stop_ids_in_region(gtfs.stops, is_inside)
+            )
+        case _:
+            raise ValueError(f"Invalid filter type {predicate.filter_type}.")
+
+
+def compile_filter_expression(
+    expression: FilterExpression,
+) -> typing.Callable[[GTFS], np.ndarray]:
+    """
+    Compiles a filter expression into a function selecting trips of a parsed GTFS
+
+    Filter values are parsed and validated once, at compile time. Each predicate is evaluated
+    once per parsed GTFS into a trips mask, masks are combined with boolean operations.
+
+    Args:
+        expression: filter expression
+
+    Returns:
+        Function selecting trips of a parsed GTFS
+
+    Raises:
+        ValueError when filter values of a predicate are invalid
+    """
+    if isinstance(expression, FilterPredicate):
+        return _compile_filter_predicate(expression)
+    operands = [compile_filter_expression(operand) for operand in expression.operands]
+    combine = np.logical_and if isinstance(expression, AndFilter) else np.logical_or
+
+    def evaluate(gtfs: GTFS) -> np.ndarray:
+        return functools.reduce(combine, (operand(gtfs) for operand in operands))
+
+    return evaluate
+
+
+def _get_required_service_date_windows(
+    expression: FilterExpression,
+) -> typing.List[typing.Tuple[str, str]]:
+    # service date windows every kept trip runs in
+    if isinstance(expression, FilterPredicate):
+        if expression.filter_type == FilterType.SERVICE_DATE:
+            return [parse_service_date_window(expression.filter_values)]
+        return []
+    if isinstance(expression, AndFilter):
+        return [
+            window
+            for operand in expression.operands
+            for window in _get_required_service_date_windows(operand)
+        ]
+    return []
+
+
+def select_by_expression(gtfs_in: GTFS, expression: FilterExpression) -> GTFSSelection:
+    """
+    Selects rows of all GTFS files by a filter expression, without copying any GTFS file
+
+    Trips are selected in a single evaluation of the compiled expression (see
+    compile_filter_expression), then related rows are selected once as select_by_trip_id does.
+    When every kept trip must run in service date windows, calendar files are clipped to them
+    as select_by_service_date does.
+
+    Args:
+        gtfs_in: parsed GTFS input
+        expression: filter expression
+
+    Returns:
+        Selection of rows to keep by filter expression
+
+    Raises:
+        ValueError when filter values of a predicate are invalid
+    """
+    trips_selection = compile_filter_expression(expression)(gtfs_in)
+    route_ids = _get_selected_unique_not_null_column_values(
+        gtfs_in.trips, trips_selection, "route_id"
+    )
+    selection = _select_related_to_routes_and_trips(gtfs_in, route_ids, trips_selection)
+    windows = _get_required_service_date_windows(expression)
+    if windows:
+        start_dates, end_dates = zip(*windows)
+        _clip_selection_to_service_dates(
+            gtfs_in, selection, min(start_dates), max(end_dates)
+        )
+    return selection
+
+
+class ValueMatch(enum.StrEnum):
+    """
+    How filter values of id filter types are matched against ids
+    """
+
+    EXACT = "exact"
+    GLOB = "glob"  # shell-style wildcards (*, ?, [seq])
+    REGEX = "regex"  # regular expressions matching whole ids
+
+
+# GTFS field and column of the ids matched by filter values, by id filter type
+FILTER_TYPE_ID_COLUMNS = {
+    FilterType.ROUTE_ID: ("routes", "route_id"),
+    FilterType.TRIP_ID: ("trips", "trip_id"),
+    FilterType.AGENCY_ID: ("agency", "agency_id"),
+    FilterType.STOP_ID: ("stops", "stop_id"),
+}
+
+
+def read_filter_values(lines: typing.Iterable[str]) -> typing.List[str]:
+    """
+    Reads filter values, one per line, without duplicates
+
+    Lines are consumed one by one so that a file or stdin is streamed.
+
+    Args:
+        lines: lines of filter values, surrounding whitespaces and blank lines are ignored
+
+    Returns:
+        Distinct filter values, in order of first appearance
+    """
+    values: typing.Dict[str, None] = {}
+    for line in lines:
+        value = line.strip()
+        if value:
+            values[value] = None
+    return list(values)
+
+
+def _compile_value_patterns(
+    patterns: typing.List[str], value_match: ValueMatch
+) -> typing.Tuple[typing.List[str], typing.Optional[re.Pattern]]:
+    # literal values are matched with a hash lookup, only actual patterns with a regex
+    if value_match == ValueMatch.EXACT:
+        return patterns, None
+    if value_match == ValueMatch.GLOB:
+        literals = [p for p in patterns if not re.search(r"[*?[]", p)]
+        regexes = [fnmatch.translate(p) for p in patterns if re.search(r"[*?[]", p)]
+    else:
+        literals, regexes = [], patterns
+    if not regexes:
+        return literals, None
+    try:
+        return literals, re.compile("|".join(f"(?:{regex})" for regex in regexes))
+    except re.error as e:
+        raise ValueError(f"Invalid regular expression in filter values: {e}.")
+
+
+def match_values(
+    values: pd.Series, patterns: typing.List[str], value_match: ValueMatch
+) -> np.ndarray:
+    """
+    Tests which values match at least one pattern, all values are matched at once
+
+    Args:
+        values: values to test, missing values never match
+        patterns: values (exact), shell-style wildcards (glob) or regular expressions (regex)
+        value_match: how patterns are matched
+
+    Returns:
+        Mask of matching values
+
+    Raises:
+        ValueError when a regular expression is invalid
+    """
+    literals, regex = _compile_value_patterns(patterns, value_match)
+    matched = values.isin(literals).to_numpy()
+    if regex is not None:
+        matched |= values.str.fullmatch(regex, na=False).to_numpy(dtype=bool)
+    return matched
+
+
+def resolve_filter_values(
+    gtfs_in: GTFS,
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    value_match: ValueMatch,
+) -> typing.List[str]:
+    """
+    Retrieves ids matching filter values of an id filter type, see FILTER_TYPE_ID_COLUMNS
+
+    Args:
+        gtfs_in: parsed GTFS input
+        filter_type: type of filtering
+        filter_values: values or patterns, see match_values
+        value_match: how filter values are matched
+
+    Returns:
+        Matching ids (filter values as is for exact matching)
+
+    Raises:
+        ValueError when filter type does not filter by ids and value_match is not exact
+        ValueError when a regular expression is invalid
+    """
+    if value_match == ValueMatch.EXACT:
+        return filter_values
+    if filter_type not in FILTER_TYPE_ID_COLUMNS:
+        raise ValueError(
+            f"Filter type {filter_type} does not support {value_match} value matching."
+        )
+    gtfs_field, col_name = FILTER_TYPE_ID_COLUMNS[filter_type]
+    gtfs_data = gtfs_in.__getattribute__(gtfs_field)
+    return _get_selected_unique_not_null_column_values(
+        gtfs_data,
+        match_values(gtfs_data[col_name], filter_values, value_match),
+        col_name,
+    )
+
+
+def select_gtfs(
+    gtfs: GTFS,
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    trim: bool = False,
+    filter_expression: typing.Optional[FilterExpression] = None,
+    value_match: ValueMatch = ValueMatch.EXACT,
+    shape_tolerance: typing.Optional[float] = None,
+    dedupe_shapes: bool = False,
+    prune: bool = False,
+    compact_trips: bool = False,
+) -> GTFSSelection:
+    """
+    Selects rows of all GTFS files with a filter, without copying any GTFS file
+
+    Args:
+        gtfs: parsed GTFS input
+        filter_type: type of filtering, see perform_filter
+        filter_values: values to keep, see perform_filter
+        trim: flag to also drop stop times (and shape points) outside of the window or region
+        filter_expression: filter expression replacing filter_type and filter_values
+        value_match: how filter values of id filter types are matched against ids
+        shape_tolerance: tolerance in meters to simplify kept shapes (see
+        simplify_selected_shapes), None to keep all their points
+        dedupe_shapes: flag to drop kept shapes identical to another one (see
+        dedupe_selected_shapes)
+        prune: flag to drop kept rows left orphan by the filter (see prune_selection)
+        compact_trips: flag to rewrite kept trips repeated at a constant headway as
+        frequencies (see compact_selected_trips)
+
+    Returns:
+        Selection of rows to keep
+
+    Raises:
+        ValueError when filter type or filter values are invalid
+    """
+    selection = _select_gtfs_by_filter(
+        gtfs, filter_type, filter_values, trim, filter_expression, value_match
+    )
+    if prune:
+        # before shape options, which then only process shapes of kept trips
+        prune_selection(gtfs, selection)
+    if compact_trips:
+        compact_selected_trips(gtfs, selection)
+    if dedupe_shapes:
+        dedupe_selected_shapes(gtfs, selection)
+    if shape_tolerance is not None:
+        simplify_selected_shapes(gtfs, selection, shape_tolerance)
+    return selection
+
+
+def _select_gtfs_by_filter(
+    gtfs: GTFS,
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    trim: bool,
+    filter_expression: typing.Optional[FilterExpression],
+    value_match: ValueMatch,
+) -> GTFSSelection:
+    if filter_expression is not None:
+        return select_by_expression(gtfs, filter_expression)
+    filter_values = resolve_filter_values(gtfs, filter_type, filter_values, value_match)
+    match filter_type:
+        case FilterType.ROUTE_ID:
+            return select_by_route_id(gtfs, filter_values)
+        case FilterType.TRIP_ID:
+            return select_by_trip_id(gtfs, filter_values)
+        case FilterType.SERVICE_DATE:
+            return select_by_service_date(
+                gtfs, *parse_service_date_window(filter_values)
+            )
+        case FilterType.TIME_WINDOW:
+            return select_by_time_window(gtfs, *parse_time_window(filter_values), trim)
+        case FilterType.BBOX:
+            return select_by_bbox(gtfs, parse_bbox(filter_values), trim)
+        case FilterType.POLYGON:
+            return select_by_polygon(gtfs, parse_polygon(filter_values), trim)
+        case FilterType.STOP_ID:
+            return select_by_stop_id(gtfs, filter_values)
+        case FilterType.AGENCY_ID:
+            return select_by_agency_id(gtfs, filter_values)
+        case _:
+            raise ValueError(f"Invalid filter type {filter_type}.")
+
+
+def _extract_and_parse_gtfs(
+    input_zip: zipfile.ZipFile,
+    directory: typing.Optional[str],
+    gtfs_files: typing.Optional[typing.Set[str]] = None,
+) -> GTFS:
+    """
+    Extracts GTFS files (all members when None) from input_zip into directory and parses them,
+    they are parsed in memory without being extracted when directory is None
+    """
+    if directory is None:
+        return parse_gtfs_zip(input_zip, gtfs_files)
+    members = None
+    if gtfs_files is not None:
+        members = [name for name in input_zip.namelist() if name in gtfs_files]
+    input_zip.extractall(directory, members)
+    return parse_gtfs(directory)
+
+
+def _write_output_gtfs_member(
+    output_zip: zipfile.ZipFile,
+    input_zip: zipfile.ZipFile,
+    gtfs: typing.Optional[GTFS],
+    selection: typing.Optional[GTFSSelection],
+    filename: str,
+) -> None:
+    """
+    Writes a filtered GTFS file to output_zip, members which are not filtered
+    (feed_info.txt, translations.txt, non GTFS files, ...) are passed through as is from input_zip
+
+    Selected rows are gathered only here, right before being written.
+    """
+    gtfs_data = None
+    if filename in FILTERED_GTFS_FILE_DEPENDENCIES and gtfs is not None:
+        gtfs_file = os.path.splitext(filename)[0]
+        gtfs_data = _materialize_gtfs_file(gtfs, selection, gtfs_file)
+    if gtfs_data is not None:
+        write_dataframe_to_zip(gtfs_data, output_zip, filename)
+    else:
+        # no need to decompress/recompress members which are not filtered
+        copy_zip_member(input_zip, filename, output_zip)
+
+
+def _write_output_gtfs_zip(
+    output_gtfs_zip: typing.Union[str, typing.BinaryIO],
+    input_zip: zipfile.ZipFile,
+    gtfs: GTFS,
+    selection: GTFSSelection,
+    compression: CompressionMethod,
+    compression_level: typing.Optional[int],
+) -> None:
+    with zipfile.ZipFile(
+        output_gtfs_zip,
+        "w",
+        compression.zip_compression,
+        compresslevel=compression_level,
+    ) as output_zip:
+        for filename in input_zip.namelist() + _get_added_gtfs_files(gtfs, selection):
+            _write_output_gtfs_member(output_zip, input_zip, gtfs, selection, filename)
+
+
+def _save_output_gtfs(
+    output_path: str,
+    gtfs: GTFS,
+    selection: GTFSSelection,
+    output_format: OutputFormat,
+) -> None:
+    """
+    Saves filtered GTFS files and GTFS files which are not filtered in a columnar output format,
+    output_path (directory of tables or database) is replaced if it exists
+    """
+    output_gtfs = GTFS(
+        **{
+            field.name: (
+                gtfs.__getattribute__(field.name)
+                if selection.__getattribute__(field.name) is None
+                else _materialize_gtfs_file(gtfs, selection, field.name)
+            )
+            for field in dataclasses.fields(gtfs)
+        }
+    )
+    if os.path.isdir(output_path):
+        shutil.rmtree(output_path)
+    elif os.path.isfile(output_path):
+        os.remove(output_path)
+    if output_format == OutputFormat.SQLITE:
+        _save_gtfs_sqlite(output_gtfs, output_path)
+    else:
+        os.makedirs(output_path)
+        save_gtfs(output_gtfs, output_path, output_format)
+
+
+class FilterFeature(enum.StrEnum):
+    """
+    perform_filter options which are not supported by all engines
+    """
+
+    INCREMENTAL = "incremental mode"
+    FILTER_EXPRESSION = "filter expressions"
+    SHAPE_OPTIONS = "shape options"
+    PRUNE = "pruning"
+    COMPACT_TRIPS = "trip compaction"
+
+
+EngineFeature = typing.Union[FilterType, ValueMatch, OutputFormat, FilterFeature]
+
+_ZIP_FILTER_FEATURES = {
+    FilterType.ROUTE_ID,
+    FilterType.TRIP_ID,
+    ValueMatch.EXACT,
+    OutputFormat.GTFS,
+}
+
+# filter types, value matchings, output formats and options supported by each engine
+ENGINE_FEATURES: typing.Dict[Engine, typing.Set[EngineFeature]] = {
+    Engine.PANDAS: {*FilterType, *ValueMatch, *OutputFormat, *FilterFeature},
+    Engine.CSV: _ZIP_FILTER_FEATURES,
+    Engine.SQLITE: _ZIP_FILTER_FEATURES,
+    Engine.POLARS: _ZIP_FILTER_FEATURES,
+}
+
+# features supported in incremental mode: trips of other filter types depend on files
+# FILTERED_GTFS_FILE_DEPENDENCIES does not track (calendar, stop_times, stops), and ids
+# matched by glob or regex depend on input GTFS files, which the incremental state does not track
+INCREMENTAL_FEATURES = {
+    FilterType.ROUTE_ID,
+    FilterType.TRIP_ID,
+    ValueMatch.EXACT,
+    OutputFormat.GTFS,
+    FilterFeature.INCREMENTAL,
+}
+
+# GTFS zip filter of engines which do not parse GTFS files with pandas
+ENGINE_ZIP_FILTERS: typing.Dict[Engine, engine_filter.ZipFilter] = {
+    Engine.CSV: engine_filter.filter_gtfs_zip_with_csv,
+    Engine.SQLITE: engine_filter.filter_gtfs_zip_with_sqlite,
+    Engine.POLARS: engine_filter.filter_gtfs_zip_with_polars,
+}
+
+
+def _get_engine_feature_name(feature: EngineFeature) -> str:
+    match feature:
+        case FilterType():
+            return f"{feature} filter type"
+        case ValueMatch():
+            return f"{feature} value matching"
+        case OutputFormat():
+            return f"{feature} output format"
+    return str(feature)
+
+
+def _check_engine_features(
+    engine: Engine, features: typing.Iterable[EngineFeature]
+) -> None:
+    """
+    Checks that engine supports all features, and incremental mode the other features
+    when it is one of them (see ENGINE_FEATURES and INCREMENTAL_FEATURES)
+
+    Args:
+        engine: filtering engine
+        features: filter type, value matching, output format and options of a filtering
+
+    Raises:
+        ValueError when a feature is not supported by engine or incremental mode
+    """
+    features = list(features)
+    for feature in features:
+        if feature not in ENGINE_FEATURES[engine]:
+            raise ValueError(
+                f"Engine {engine} does not support {_get_engine_feature_name(feature)}."
+            )
+        if (
+            FilterFeature.INCREMENTAL in features
+            and feature not in INCREMENTAL_FEATURES
+        ):
+            raise ValueError(
+                "Incremental mode does not support "
+                f"{_get_engine_feature_name(feature)}."
+            )
+
+
+def _write_engine_filtered_gtfs_zip(
+    output_gtfs_zip: typing.Union[str, typing.BinaryIO],
+    input_zip: zipfile.ZipFile,
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    compression: CompressionMethod,
+    compression_level: typing.Optional[int],
+    engine: Engine,
+    extract_directory: typing.Optional[str],
+) -> None:
+    """
+    Filters input_zip with an engine which does not parse GTFS files with pandas
+    """
+    members = input_zip.namelist()
+    for gtfs_file in REQUIRED_GTFS_FILES:
+        if gtfs_file not in members:
+            raise FileNotFoundError(f"GTFS is invalid: file '{gtfs_file}' is missing.")
+    match filter_type:
+        case FilterType.ROUTE_ID:
+            filter_kwargs = {"route_ids": filter_values}
+        case FilterType.TRIP_ID:
+            filter_kwargs = {"trip_ids": filter_values}
+        case _:
+            raise ValueError(f"Invalid filter type {filter_type}.")
+    with zipfile.ZipFile(
+        output_gtfs_zip,
+        "w",
+        compression.zip_compression,
+        compresslevel=compression_level,
+    ) as output_zip:
+        filtered_files = ENGINE_ZIP_FILTERS[engine](
+            input_zip, output_zip, extract_directory, **filter_kwargs
+        )
+        for filename in members:
+            if filename not in filtered_files:
+                copy_zip_member(input_zip, filename, output_zip)
+
+
+def _zip_member_checksums(
+    gtfs_zip: zipfile.ZipFile,
+) -> typing.Dict[str, typing.List[int]]:
+    return {
+        zinfo.filename: [zinfo.CRC, zinfo.file_size]
+        for zinfo in gtfs_zip.infolist()
+        if not zinfo.is_dir()
+    }
+
+
+def _incremental_state_settings(
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    compression: CompressionMethod,
+    compression_level: typing.Optional[int],
+) -> typing.Dict[str, typing.Any]:
+    # settings the output depends on, other perform_filter options are not supported by
+    # incremental mode
+    return {
+        "filter_type": str(filter_type),
+        "filter_values": sorted(set(filter_values)),
+        "compression": str(compression),
+        "compression_level": compression_level,
+    }
+
+
+def _read_incremental_state(
+    output_gtfs_zip: str, state_settings: typing.Dict[str, typing.Any]
+) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    """
+    Reads state saved by a previous incremental filtering of output_gtfs_zip
+
+    Returns None when state is missing, was saved for other settings (filter or compression)
+    or output_gtfs_zip has been modified since.
+    """
+    try:
+        with open(f"{output_gtfs_zip}{INCREMENTAL_STATE_SUFFIX}", "r") as state_file:
+            state = json.load(state_file)
+        with zipfile.ZipFile(output_gtfs_zip) as previous_output_zip:
+            output_checksums = _zip_member_checksums(previous_output_zip)
+        if state["settings"] == state_settings and state["output"] == output_checksums:
+            return state
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        pass
+    return None
+
+
+def _write_incremental_state(
+    output_gtfs_zip: str,
+    state_settings: typing.Dict[str, typing.Any],
+    input_gtfs_zip: str,
+) -> None:
+    with zipfile.ZipFile(input_gtfs_zip) as input_zip:
+        input_checksums = _zip_member_checksums(input_zip)
+    with zipfile.ZipFile(output_gtfs_zip) as output_zip:
+        output_checksums = _zip_member_checksums(output_zip)
+    state = {
+        "settings": state_settings,
+        "input": input_checksums,
+        "output": output_checksums,
+    }
+    with open(f"{output_gtfs_zip}{INCREMENTAL_STATE_SUFFIX}", "w") as state_file:
+        json.dump(state, state_file)
+
+
+def _perform_incremental_filter(
+    input_gtfs_zip: str,
+    output_gtfs_zip: str,
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    previous_input_checksums: typing.Dict[str, typing.List[int]],
+    extract_directory: str,
+    compression: CompressionMethod,
+    compression_level: typing.Optional[int],
+) -> None:
+    """
+    Filters only GTFS files whose inputs changed since previous filtering,
+    other members are copied as is from previous output_gtfs_zip
+    """
+    output_directory = os.path.dirname(os.path.abspath(output_gtfs_zip))
+    tmp_fd, tmp_output_gtfs_zip = tempfile.mkstemp(suffix=".zip", dir=output_directory)
+    os.close(tmp_fd)
+    try:
+        with (
+            zipfile.ZipFile(input_gtfs_zip) as input_zip,
+            zipfile.ZipFile(output_gtfs_zip) as previous_output_zip,
+            zipfile.ZipFile(
+                tmp_output_gtfs_zip,
+                "w",
+                compression.zip_compression,
+                compresslevel=compression_level,
+            ) as output_zip,
+        ):
+            input_checksums = _zip_member_checksums(input_zip)
+            changed_files = {
+                filename
+                for filename in input_checksums.keys() | previous_input_checksums.keys()
+                if input_checksums.get(filename)
+                != previous_input_checksums.get(filename)
+            }
+            files_to_filter = {
+                gtfs_file
+                for gtfs_file in FILTERED_GTFS_FILE_DEPENDENCIES
+                if get_gtfs_file_input_dependencies(gtfs_file) & changed_files
+            }
+            gtfs = None
+            selection = None
+            if files_to_filter:
+                files_to_parse = set(REQUIRED_GTFS_FILES).union(
+                    *(get_gtfs_file_input_dependencies(f) for f in files_to_filter)
+                )
+                gtfs = _extract_and_parse_gtfs(
+                    input_zip, extract_directory, files_to_parse
+                )
+                selection = select_gtfs(gtfs, filter_type, filter_values)
+
+            previous_output_files = set(previous_output_zip.namelist())
+            for filename in input_zip.namelist():
+                if (
+                    filename in files_to_filter
+                    or filename in changed_files
+                    or filename not in previous_output_files
+                ):
+                    _write_output_gtfs_member(
+                        output_zip, input_zip, gtfs, selection, filename
+                    )
+                else:
+                    copy_zip_member(previous_output_zip, filename, output_zip)
+        os.replace(tmp_output_gtfs_zip, output_gtfs_zip)
+    finally:
+        if os.path.isfile(tmp_output_gtfs_zip):
+            os.remove(tmp_output_gtfs_zip)
+
+
+@dataclasses.dataclass
+class GTFSFileStats:
+    gtfs_file: str  # e.g. 'trips.txt'
+    input_rows: int
+    output_rows: int
+    output_size: int  # estimated uncompressed size in bytes
+
+
+@dataclasses.dataclass
+class FilterStats:
+    """
+    Preview of a filtered GTFS, see get_selection_stats
+    """
+
+    gtfs_files: typing.List[GTFSFileStats]  # filtered GTFS files
+    output_size: int  # estimated uncompressed size in bytes of all output members
+
+
+def get_zip_member_sizes(gtfs_zip: GTFSZip) -> typing.Dict[str, int]:
+    """
+    Retrieves uncompressed sizes of the members of a zip, without decompressing them
+
+    Args:
+        gtfs_zip: fullpath to zip, zip content or binary file-like object
+
+    Returns:
+        Uncompressed size in bytes by member
+    """
+    with zipfile.ZipFile(_zip_file_arg(gtfs_zip)) as input_zip:
+        return {info.filename: info.file_size for info in input_zip.infolist()}
+
+
+def get_selection_stats(
+    gtfs: GTFS, selection: GTFSSelection, member_sizes: typing.Dict[str, int]
+) -> FilterStats:
+    """
+    Counts rows a selection keeps per GTFS file, without gathering them
+
+    Output sizes are estimated from input sizes, assuming kept rows have the average row size.
+    Members which are not filtered are counted with their input size.
+
+    Args:
+        gtfs: parsed GTFS input
+        selection: selection of rows to keep, see select_gtfs
+        member_sizes: uncompressed sizes of input GTFS zip members, see get_zip_member_sizes
+
+    Returns:
+        Rows kept per filtered GTFS file and estimated output size
+    """
+    gtfs_files_stats = []
+    output_size = 0
+    for filename, size in member_sizes.items():
+        gtfs_data = None
+        if filename in FILTERED_GTFS_FILE_DEPENDENCIES:
+            gtfs_field = os.path.splitext(filename)[0]
+            gtfs_data = gtfs.__getattribute__(gtfs_field)
+        if gtfs_data is None or not len(gtfs_data):
+            output_size += size
+            continue
+        rows_selection = selection.__getattribute__(gtfs_field)
+        output_rows = (
+            len(gtfs_data) if rows_selection is None else int(rows_selection.sum())
+        )
+        file_output_size = size * output_rows // len(gtfs_data)
+        gtfs_files_stats.append(
+            GTFSFileStats(filename, len(gtfs_data), output_rows, file_output_size)
+        )
+        output_size += file_output_size
+    return FilterStats(gtfs_files_stats, output_size)
+
+
+def read_gtfs_zip(
+    gtfs_zip: GTFSZip, gtfs_files: typing.Optional[typing.Set[str]] = None
+) -> GTFS:
+    """
+    Parses GTFS files of a GTFS zip, extracted files are removed once parsed
+
+    GTFS zip contents and file-like objects are parsed in memory, without extracting them.
+
+    Args:
+        gtfs_zip: fullpath to GTFS zip, GTFS zip content or binary file-like object
+        gtfs_files: GTFS files to parse (all GTFS files when None)
+
+    Returns:
+        Parsed GTFS files
+
+    Raises:
+        FileNotFoundError when a required GTFS file is missing
+    """
+    if not _is_gtfs_zip_path(gtfs_zip):
+        with zipfile.ZipFile(_zip_file_arg(gtfs_zip)) as input_zip:
+            return parse_gtfs_zip(input_zip, gtfs_files)
+    os.makedirs(ZIP_EXTRACT_TMP, exist_ok=True)
+    extract_directory = tempfile.mkdtemp(dir=ZIP_EXTRACT_TMP)
+    try:
+        with zipfile.ZipFile(gtfs_zip) as input_zip:
+            return _extract_and_parse_gtfs(input_zip, extract_directory, gtfs_files)
+    finally:
+        shutil.rmtree(extract_directory, ignore_errors=True)
+
+
+def preview_filter(
+    input_gtfs_zip: GTFSZip,
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    trim: bool = False,
+    filter_expression: typing.Optional[FilterExpression] = None,
+    value_match: ValueMatch = ValueMatch.EXACT,
+    shape_tolerance: typing.Optional[float] = None,
+    dedupe_shapes: bool = False,
+    prune: bool = False,
+    compact_trips: bool = False,
+) -> FilterStats:
+    """
+    Previews filtering of input_gtfs_zip (dry run): rows are selected as perform_filter does
+    with pandas engine but they are neither gathered nor written
+
+    Args:
+        input_gtfs_zip: GTFS zip to filter, see perform_filter
+        filter_type: type of filtering, see perform_filter
+        filter_values: values to keep, see perform_filter
+        trim: see perform_filter
+        filter_expression: see perform_filter
+        value_match: see perform_filter
+        shape_tolerance: see perform_filter
+        dedupe_shapes: see perform_filter
+        prune: see perform_filter
+        compact_trips: see perform_filter
+
+    Returns:
+        Rows kept per filtered GTFS file and estimated output size, see get_selection_stats
+
+    Raises:
+        FileNotFoundError when a required GTFS file is missing
+        ValueError when filter type or filter values are invalid
+    """
+    input_gtfs_zip = _zip_file_arg(input_gtfs_zip)
+    member_sizes = get_zip_member_sizes(input_gtfs_zip)
+    gtfs = read_gtfs_zip(input_gtfs_zip, set(FILTERED_GTFS_FILE_DEPENDENCIES))
+    selection = select_gtfs(
+        gtfs,
+        filter_type,
+        filter_values,
+        trim,
+        filter_expression,
+        value_match,
+        shape_tolerance,
+        dedupe_shapes,
+        prune,
+        compact_trips,
+    )
+    return get_selection_stats(gtfs, selection, member_sizes)
+
+
+def perform_filter(
+    input_gtfs_zip: GTFSZip,
+    output_gtfs_zip: typing.Union[str, typing.BinaryIO],
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    overwrite_output_gtfs: bool,
+    incremental: bool = False,
+    compression: CompressionMethod = CompressionMethod.DEFLATED,
+    compression_level: typing.Optional[int] = None,
+    engine: Engine = Engine.PANDAS,
+    output_format: OutputFormat = OutputFormat.GTFS,
+    trim: bool = False,
+    filter_expression: typing.Optional[FilterExpression] = None,
+    value_match: ValueMatch = ValueMatch.EXACT,
+    validate: bool = False,
+    parsed_input_gtfs: typing.Optional[GTFS] = None,
+    shape_tolerance: typing.Optional[float] = None,
+    dedupe_shapes: bool = False,
+    prune: bool = False,
+    compact_trips: bool = False,
+) -> typing.Optional[ValidationReport]:
+    """
+    Unzip input_gtfs_zip, parse and filter it by route_id, trip_id, service date, time of day,
+    geographic region, stop_id or agency_id.
+    Filtered GTFS is zipped in output_gtfs_zip.
+    Members of input_gtfs_zip which are not filtered (see FILTERED_GTFS_FILE_DEPENDENCIES) are
+    copied to output_gtfs_zip without being extracted, parsed nor recompressed.
+    Clean all files generated except output_gtfs_zip.
+
+    input_gtfs_zip may also be a GTFS zip content (bytes) or a seekable binary file-like object,
+    and output_gtfs_zip a seekable binary file-like object (e.g. io.BytesIO) the filtered GTFS
+    zip is written to: with pandas and csv engines, GTFS files are then parsed and filtered in
+    memory without any temporary file (see perform_filter_in_memory).
+
+    In incremental mode, zip member checksums of input_gtfs_zip are saved next to output_gtfs_zip.
+    When output_gtfs_zip comes from a previous incremental filtering with the same filter and
+    compression settings, only GTFS files whose inputs changed (see
+    FILTERED_GTFS_FILE_DEPENDENCIES) are filtered again, other members are copied byte-for-byte
+    from previous output_gtfs_zip which is overwritten.
+
+    compression and compression_level only apply to filtered GTFS files, copied members keep
+    their compression. Storing is the fastest, deflate level 1 is a fast trade-off
+    (see CompressionProfile).
+
+    Args:
+        input_gtfs_zip: fullpath GTFS zip to filter, GTFS zip content or file-like object
+        output_gtfs_zip: fullpath to filtered GTFS zip or file-like object to write it to
+        filter_type: type of filtering to perform
+        filter_values: values to keep (values not in filter_values are discarded), start date
+        and end date (YYYYMMDD) for service date filter type, start time and end time
+        (HH:MM:SS) for time window filter type, see parse_bbox and parse_polygon for
+        geographic filter types
+        overwrite_output_gtfs: flag to overwrite output_gtfs_zip if it already exists
+        incremental: flag to re-filter only what changed since previous incremental filtering
+        compression: compression method of output_gtfs_zip members
+        compression_level: compression level (0-9 for deflated, 1-9 for bzip2, ignored otherwise),
+        None for the method default level
+        engine: filtering engine, csv engine copies kept rows verbatim without parsing GTFS files
+        (lower CPU and memory usage), sqlite engine filters GTFS files loaded in an on-disk
+        database (for GTFS files larger than memory), polars engine (requires polars) runs
+        lazy queries on all CPU cores, they do not support incremental mode
+        output_format: format of filtered GTFS, other formats than gtfs save GTFS files
+        parsed from input_gtfs_zip (other members are dropped) for loading without CSV parsing:
+        output_gtfs_zip is then a directory of tables (parquet, arrow) or a database (sqlite),
+        they do not support csv engine nor incremental mode
+        trim: flag to also drop stop times outside of the window (time window filter type) or
+        stop times and shape points outside of the region (geographic filter types)
+        filter_expression: AND/OR combination of filters evaluated in a single pass, see
+        select_by_expression, filter_type and filter_values are then ignored, it does not
+        support other engines than pandas, incremental mode nor trimming
+        value_match: how filter values of id filter types (see FILTER_TYPE_ID_COLUMNS) are
+        matched against ids, glob and regex value matching do not support other engines than
+        pandas, incremental mode nor filter expressions
+        validate: flag to check referential integrity of output_gtfs_zip once written (see
+        validate_gtfs), only supported by gtfs output format
+        parsed_input_gtfs: all GTFS files of input_gtfs_zip already parsed (see read_gtfs_zip),
+        used instead of extracting and parsing them again, e.g. to run several filters on the
+        same GTFS (ignored by other engines than pandas and by incremental mode)
+        shape_tolerance: tolerance in meters to simplify kept shapes with the Douglas-Peucker
+        algorithm (see simplify_selected_shapes), None to keep all their points
+        dedupe_shapes: flag to drop kept shapes identical to another one, trips are rewritten
+        to the kept shape (see dedupe_selected_shapes), shape options do not support other
+        engines than pandas nor incremental mode
+        prune: flag to drop kept rows left orphan by the filter until there are none left
+        (see prune_selection), e.g. services, shapes, levels, areas and agencies no kept row
+        references, it does not support other engines than pandas nor incremental mode
+        compact_trips: flag to rewrite runs of kept trips with the same stop times at a
+        constant headway as one trip and a frequency (see compact_selected_trips), it does
+        not support other engines than pandas nor incremental mode
+
+    Returns:
+        Validation report of output_gtfs_zip when validate is set, None otherwise
+
+    Raises:
+        FileExistsError when overwrite_output_gtfs is False and output_gtfs_zip already exists
+        (and is not the output of a previous incremental filtering in incremental mode)
+        FileNotFoundError when a required GTFS file is missing
+        PermissionError when output directory is not writable
+        ValueError when filter type, filter values or compression level is invalid
+        ValueError when filter type, value matching, output format or an option is not
+        supported by engine or incremental mode (see ENGINE_FEATURES and INCREMENTAL_FEATURES)
+        ValueError when shape tolerance is negative, or output format requires pyarrow and
+        it is not installed
+        ValueError when input_gtfs_zip or output_gtfs_zip is not a fullpath and incremental
+        mode is set or output format is not gtfs
+    """
+    input_is_path = _is_gtfs_zip_path(input_gtfs_zip)
+    output_is_path = _is_gtfs_zip_path(output_gtfs_zip)
+    input_gtfs_zip = _zip_file_arg(input_gtfs_zip)
+    _check_compression_level(compression, compression_level)
+    if incremental and not (input_is_path and output_is_path):
+        # incremental state is saved next to output GTFS zip
+        raise ValueError("Incremental mode requires input and output GTFS zip paths.")
+    if output_format != OutputFormat.GTFS and not output_is_path:
+        raise ValueError(f"Output format {output_format} requires an output path.")
+    if value_match != ValueMatch.EXACT:
+        if filter_expression is not None:
+            raise ValueError(
+                f"Filter expressions do not support {value_match} value matching."
+            )
+        if filter_type not in FILTER_TYPE_ID_COLUMNS:
+            raise ValueError(
+                f"Filter type {filter_type} does not support {value_match} value matching."
+            )
+        _compile_value_patterns(filter_values, value_match)
+    if filter_expression is not None:
+        compile_filter_expression(filter_expression)
+        if trim:
+            raise ValueError("Trimming is not supported by filter expressions.")
+    else:
+        match filter_type:
+            case FilterType.SERVICE_DATE:
+                parse_service_date_window(filter_values)
+            case FilterType.TIME_WINDOW:
+                parse_time_window(filter_values)
+            case FilterType.BBOX:
+                parse_bbox(filter_values)
+            case FilterType.POLYGON:
+                parse_polygon(filter_values)
+    if shape_tolerance is not None and shape_tolerance < 0:
+        raise ValueError(f"Invalid shape tolerance {shape_tolerance}, expected >= 0.")
+    if validate and output_format != OutputFormat.GTFS:
+        raise ValueError(
+            f"Validation is not supported by {output_format} output format."
+        )
+    features = [
+        filter_type if filter_expression is None else FilterFeature.FILTER_EXPRESSION,
+        value_match,
+        output_format,
+    ]
+    if incremental:
+        features.append(FilterFeature.INCREMENTAL)
+    if shape_tolerance is not None or dedupe_shapes:
+        features.append(FilterFeature.SHAPE_OPTIONS)
+    if prune:
+        features.append(FilterFeature.PRUNE)
+    if compact_trips:
+        features.append(FilterFeature.COMPACT_TRIPS)
+    _check_engine_features(engine, features)
+    if output_format in (OutputFormat.PARQUET, OutputFormat.ARROW):
+        _import_pyarrow(output_format)
+    state_settings = _incremental_state_settings(
+        filter_type, filter_values, compression, compression_level
+    )
+    state = (
+        _read_incremental_state(output_gtfs_zip, state_settings)
+        if incremental
+        else None
+    )
+    if (
+        output_is_path
+        and os.path.exists(output_gtfs_zip)
+        and not overwrite_output_gtfs
+        and state is None
+    ):
+        raise FileExistsError(f"File '{output_gtfs_zip}' already exists.")
+    extract_directory = None
+    if input_is_path or output_is_path or engine not in (Engine.PANDAS, Engine.CSV):
+        os.makedirs(ZIP_EXTRACT_TMP, exist_ok=True)
+        # one extract directory per call so that concurrent filterings do not collide
+        extract_directory = tempfile.mkdtemp(dir=ZIP_EXTRACT_TMP)
+    # GTFS files of in-memory inputs are parsed in memory too
+    parse_directory = extract_directory if input_is_path else None
+    try:
+        if state is not None:
+            _perform_incremental_filter(
+                input_gtfs_zip,
+                output_gtfs_zip,
+                filter_type,
+                filter_values,
+                state["input"],
+                extract_directory,
+                compression,
+                compression_level,
+            )
+        else:
+            with zipfile.ZipFile(input_gtfs_zip) as input_zip:
+                if engine != Engine.PANDAS:
+                    _write_engine_filtered_gtfs_zip(
+                        output_gtfs_zip,
+                        input_zip,
+                        filter_type,
+                        filter_values,
+                        compression,
+                        compression_level,
+                        engine,
+                        extract_directory,
+                    )
+                elif output_format != OutputFormat.GTFS:
+                    gtfs = parsed_input_gtfs
+                    if gtfs is None:
+                        gtfs = _extract_and_parse_gtfs(input_zip, parse_directory)
+                    selection = select_gtfs(
+                        gtfs,
+                        filter_type,
+                        filter_values,
+                        trim,
+                        filter_expression,
+                        value_match,
+                        shape_tolerance,
+                        dedupe_shapes,
+                        prune,
+                        compact_trips,
+                    )
+                    _save_output_gtfs(output_gtfs_zip, gtfs, selection, output_format)
+                else:
+                    gtfs = parsed_input_gtfs
+                    if gtfs is None:
+                        # GTFS files which are not filtered are neither extracted nor parsed
+                        gtfs = _extract_and_parse_gtfs(
+                            input_zip,
+                            parse_directory,
+                            set(FILTERED_GTFS_FILE_DEPENDENCIES),
+                        )
+                    selection = select_gtfs(
+                        gtfs,
+                        filter_type,
+                        filter_values,
+                        trim,
+                        filter_expression,
+                        value_match,
+                        shape_tolerance,
+                        dedupe_shapes,
+                        prune,
+                        compact_trips,
+                    )
+                    _write_output_gtfs_zip(
+                        output_gtfs_zip,
+                        input_zip,
+                        gtfs,
+                        selection,
+                        compression,
+                        compression_level,
+                    )
+        report = None
+        if validate:
+            with zipfile.ZipFile(output_gtfs_zip) as output_zip:
+                report = validate_gtfs(
+                    _extract_and_parse_gtfs(
+                        output_zip,
+                        (
+                            os.path.join(extract_directory, "output")
+                            if output_is_path
+                            else None
+                        ),
+                        VALIDATED_GTFS_FILES,
+                    )
+                )
+    finally:
+        if extract_directory is not None:
+            shutil.rmtree(extract_directory, ignore_errors=True)
+    if incremental:
+        _write_incremental_state(output_gtfs_zip, state_settings, input_gtfs_zip)
+    return report
+
+
+def perform_filter_in_memory(
+    input_gtfs_zip: typing.Union[bytes, typing.BinaryIO],
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    **perform_filter_options: typing.Any,
+) -> bytes:
+    """
+    Filters a GTFS zip held in memory, e.g. received from or returned to a network client
+
+    Args:
+        input_gtfs_zip: GTFS zip content or seekable binary file-like object
+        filter_type: type of filtering, see perform_filter
+        filter_values: values to keep, see perform_filter
+        perform_filter_options: other perform_filter options (engine, compression, ...),
+        incremental mode and other output formats than gtfs are not supported
+
+    Returns:
+        Filtered GTFS zip content
+
+    Raises:
+        ValueError when filtered GTFS has validation issues (validate option)
+        Same errors as perform_filter otherwise
+    """
+    output = io.BytesIO()
+    report = perform_filter(
+        input_gtfs_zip,
+        output,
+        filter_type,
+        filter_values,
+        True,
+        **perform_filter_options,
+    )
+    if report is not None and not report.is_valid:
+        raise ValueError(
+            f"Filtered GTFS has {len(report.issues)} validation issue(s): "
+            + "; ".join(str(issue) for issue in report.issues)
+        )
+    return output.getvalue()
+
+
+@dataclasses.dataclass
+class BatchFilterResult:
+    """
+    Outcome of filtering a single GTFS zip during a batch filtering
+    """
+
+    input_gtfs_zip: str
+    output_gtfs_zip: str
+    elapsed_seconds: float
+    error: typing.Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def list_input_gtfs_zips(input_gtfs_zips: str) -> typing.List[str]:
+    """
+    Lists GTFS zips to filter from a directory or a glob pattern
+
+    Args:
+        input_gtfs_zips: directory containing GTFS zips (non-recursive) or glob pattern matching GTFS zips
+
+    Returns:
+        Sorted paths to GTFS zips
+    """
+    if os.path.isdir(input_gtfs_zips):
+        input_gtfs_zips = os.path.join(input_gtfs_zips, "*.zip")
+    return sorted(path for path in glob.glob(input_gtfs_zips) if os.path.isfile(path))
+
+
+def _perform_filter_isolated(
+    input_gtfs_zip: str,
+    output_gtfs_zip: str,
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    overwrite_output_gtfs: bool,
+    perform_filter_options: typing.Dict[str, typing.Any],
+) -> BatchFilterResult:
+    """
+    Runs perform_filter in a worker process and reports any failure instead of raising it
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        perform_filter(
+            input_gtfs_zip,
+            output_gtfs_zip,
+            filter_type,
+            filter_values,
+            overwrite_output_gtfs,
+            **perform_filter_options,
+        )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return BatchFilterResult(
+        input_gtfs_zip, output_gtfs_zip, time.perf_counter() - start, error
+    )
+
+
+def _perform_filter_in_own_process(
+    input_gtfs_zip: str,
+    output_gtfs_zip: str,
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    overwrite_output_gtfs: bool,
+    perform_filter_options: typing.Dict[str, typing.Any],
+) -> BatchFilterResult:
+    """
+    Runs _perform_filter_isolated in a dedicated worker process and reports its death
+    """
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(
+            _perform_filter_isolated,
+            input_gtfs_zip,
+            output_gtfs_zip,
+            filter_type,
+            filter_values,
+            overwrite_output_gtfs,
+            perform_filter_options,
+        )
+        try:
+            return future.result()
+        except Exception as e:
+            return BatchFilterResult(
+                input_gtfs_zip, output_gtfs_zip, 0.0, f"{type(e).__name__}: {e}"
+            )
+
+
+def perform_batch_filter(
+    input_gtfs_zips: typing.List[str],
+    output_directory: str,
+    filter_type: FilterType,
+    filter_values: typing.List[str],
+    overwrite_output_gtfs: bool,
+    workers: typing.Optional[int] = None,
+    **perform_filter_options,
+) -> typing.List[BatchFilterResult]:
+    """
+    Filters several GTFS zips with the same filter across a process pool.
+    Each filtered GTFS is zipped in output_directory under its input filename.
+
+    A failing GTFS (invalid GTFS, crashed worker, ...) does not stop the other filterings,
+    its error is reported in its result instead.
+
+    Args:
+        input_gtfs_zips: fullpaths to GTFS zips to filter
+        output_directory: directory to save filtered GTFS zips (created if missing)
+        filter_type: type of filtering to perform
+        filter_values: values to keep (values not in filter_values are discarded)
+        overwrite_output_gtfs: flag to overwrite output GTFS zips if they already exist
+        workers: number of worker processes, defaults to the number of CPUs
+        perform_filter_options: other keyword arguments of perform_filter (compression, ...)
+
+    Returns:
+        One result per input GTFS zip, in input order
+
+    Raises:
+        ValueError when two input GTFS zips have the same filename
+        PermissionError when output directory cannot be created
+    """
+    filenames = [os.path.basename(path) for path in input_gtfs_zips]
+    if len(set(filenames)) != len(filenames):
+        raise ValueError("Input GTFS zips must have distinct filenames.")
+    os.makedirs(output_directory, exist_ok=True)
+    output_gtfs_zips = {
+        input_gtfs_zip: os.path.join(output_directory, filename)
+        for input_gtfs_zip, filename in zip(input_gtfs_zips, filenames)
+    }
+    filter_args = (filter_type, filter_values, overwrite_output_gtfs)
+    results: typing.Dict[str, BatchFilterResult] = {}
+    interrupted_gtfs_zips = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                _perform_filter_isolated,
+                input_gtfs_zip,
+                output_gtfs_zip,
+                *filter_args,
+                perform_filter_options,
+            ): input_gtfs_zip
+            for input_gtfs_zip, output_gtfs_zip in output_gtfs_zips.items()
+        }
+        for future in concurrent.futures.as_completed(futures):
+            input_gtfs_zip = futures[future]
+            try:
+                results[input_gtfs_zip] = future.result()
+            except concurrent.futures.process.BrokenProcessPool:
+                # a worker process died (e.g. killed when running out of memory): the pool
+                # is broken and all its pending filterings fail, whichever killed it
+                interrupted_gtfs_zips.append(input_gtfs_zip)
+            except Exception as e:
+                results[input_gtfs_zip] = BatchFilterResult(
+                    input_gtfs_zip,
+                    output_gtfs_zips[input_gtfs_zip],
+                    0.0,
+                    f"{type(e).__name__}: {e}",
+                )
+    if interrupted_gtfs_zips:
+        # interrupted filterings are run again in a process of their own, so that only the
+        # GTFS killing its worker fails
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers or os.cpu_count()
+        ) as executor:
+            for input_gtfs_zip, result in zip(
+                interrupted_gtfs_zips,
+                executor.map(
+                    lambda input_gtfs_zip: _perform_filter_in_own_process(
+                        input_gtfs_zip,
+                        output_gtfs_zips[input_gtfs_zip],
+                        *filter_args,
+                        perform_filter_options,
+                    ),
+                    interrupted_gtfs_zips,
+                ),
+            ):
+                results[input_gtfs_zip] = result
+    return [results[input_gtfs_zip] for input_gtfs_zip in input_gtfs_zips]
+
+
+@dataclasses.dataclass
+class GTFSShard:
+    """
+    GTFS zip holding some routes of a sharded GTFS, see perform_shard
+    """
+
+    output_gtfs_zip: str
+    route_ids: typing.List[str]
+    stop_times_count: int  # stop times of trips of routes of the shard
+
+
+def get_route_stop_times_counts(gtfs: GTFS) -> pd.Series:
+    """
+    Counts stop times of trips of each route
+
+    Args:
+        gtfs: parsed GTFS
+
+    Returns:
+        Number of stop times by route_id, in routes order
+    """
+    _, route_ids = _get_codes(gtfs.routes, "route_id")
+    trip_routes = route_ids.get_indexer(gtfs.trips["route_id"])
+    trip_stop_times_counts = np.zeros(len(gtfs.trips), dtype=np.int64)
+    if gtfs.stop_times is not None:
+        codes, trip_ids = _get_codes(gtfs.stop_times, "trip_id")
+        counts = np.append(np.bincount(codes[codes >= 0], minlength=len(trip_ids)), 0)
+        # trips without stop times gather the trailing 0
+        trip_stop_times_counts = counts[trip_ids.get_indexer(gtfs.trips["trip_id"])]
+    known = trip_routes >= 0
+    return pd.Series(
+        np.bincount(
+            trip_routes[known],
+            weights=trip_stop_times_counts[known],
+            minlength=len(route_ids),
+        ).astype(np.int64),
+        index=route_ids,
+    )
+
+
+def assign_to_shards(weights: np.ndarray, shards_count: int) -> np.ndarray:
+    """
+    Assigns weighted items to shards with balanced total weights
+
+    Items are assigned from the heaviest to the lightest, each to the lightest shard so far
+    (longest processing time first): the heaviest shard weighs at most 4/3 of the heaviest
+    shard of an optimal assignment. Every shard gets an item when there are enough items.
+
+    Args:
+        weights: (n,) weight of each item
+        shards_count: number of shards
+
+    Returns:
+        (n,) shard of each item, from 0 to shards_count - 1
+    """
+    shards = np.zeros(len(weights), dtype=np.int64)
+    # shards with the same weight are ordered by number of items, to spread weightless items
+    loads = [(0, 0, shard) for shard in range(shards_count)]
+    for item in np.argsort(-np.asarray(weights), kind="stable"):
+        load, items_count, shard = heapq.heappop(loads)
+        shards[item] = shard
+        heapq.heappush(loads, (load + weights[item], items_count + 1, shard))
+    return shards
+
+
+def perform_shard(
+    input_gtfs_zip: str,
+    output_directory: str,
+    shards_count: int,
+    overwrite_output_gtfs: bool,
+    compression: CompressionMethod = CompressionMethod.DEFLATED,
+    compression_level: typing.Optional[int] = None,
+) -> typing.List[GTFSShard]:
+    """
+    Splits input_gtfs_zip into shards_count GTFS zips with balanced numbers of stop times,
+    e.g. to process a large GTFS in parallel.
+
+    Routes are assigned to shards by their number of stop times (see assign_to_shards), each
+    shard is filtered by the route ids of its routes as filter_by_route_id does. Input GTFS
+    is parsed once for all shards. Shards are zipped in output_directory as
+    <input filename>_<shard number>.zip.
+
+    Args:
+        input_gtfs_zip: fullpath to GTFS zip to split
+        output_directory: directory to save shards (created if missing)
+        shards_count: number of shards, at most the number of routes
+        overwrite_output_gtfs: flag to overwrite shards if they already exist
+        compression: compression method of shards
+        compression_level: compression level of shards, see perform_filter
+
+    Returns:
+        Shards, in shard number order
+
+    Raises:
+        FileExistsError when overwrite_output_gtfs is False and a shard already exists
+        FileNotFoundError when a required GTFS file is missing
+        PermissionError when output directory is not writable
+        ValueError when shards_count or compression level is invalid
+    """
+    if shards_count < 1:
+        raise ValueError(f"Invalid shards count {shards_count}, expected >= 1.")
+    _check_compression_level(compression, compression_level)
+    name = os.path.splitext(os.path.basename(input_gtfs_zip))[0]
+    width = len(str(shards_count))
+    output_gtfs_zips = [
+        os.path.join(output_directory, f"{name}_{shard + 1:0{width}d}.zip")
+        for shard in range(shards_count)
+    ]
+    if not overwrite_output_gtfs:
+        for output_gtfs_zip in output_gtfs_zips:
+            if os.path.exists(output_gtfs_zip):
+                raise FileExistsError(f"File '{output_gtfs_zip}' already exists.")
+    gtfs = read_gtfs_zip(input_gtfs_zip, set(FILTERED_GTFS_FILE_DEPENDENCIES))
+    route_weights = get_route_stop_times_counts(gtfs)
+    if shards_count > len(route_weights):
+        raise ValueError(
+            f"Invalid shards count {shards_count}, GTFS has {len(route_weights)} route(s)."
+        )
+    route_shards = assign_to_shards(route_weights.to_numpy(), shards_count)
+    os.makedirs(output_directory, exist_ok=True)
+    shards = []
+    with zipfile.ZipFile(input_gtfs_zip) as input_zip:
+        for shard, output_gtfs_zip in enumerate(output_gtfs_zips):
+            shard_weights = route_weights[route_shards == shard]
+            route_ids = shard_weights.index.tolist()
+            _write_output_gtfs_zip(
+                output_gtfs_zip,
+                input_zip,
+                gtfs,
+                select_by_route_id(gtfs, route_ids),
+                compression,
+                compression_level,
+            )
+            shards.append(
+                GTFSShard(output_gtfs_zip, route_ids, int(shard_weights.sum()))
+            )
+    return shards
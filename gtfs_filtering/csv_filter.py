@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+import csv
+import io
+import itertools
+import typing
+import zipfile
+
+from gtfs_filtering import stations
+
+READ_BUFFER_SIZE = 1024 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+UTF8_BOM = b"\xef\xbb\xbf"
+
+# (column, accepted values, optional)
+# when optional, rows with an empty value are kept and filter is ignored if column is missing
+ColumnFilter = typing.Tuple[str, typing.Set[bytes], bool]
+
+
+def read_csv_record(gtfs_file: typing.BinaryIO, line: bytes) -> bytes:
+    """
+    Reads a raw CSV record starting with line, line endings included
+
+    A record spans several lines when a quoted field contains a line break.
+
+    Args:
+        gtfs_file: CSV file opened in binary mode
+        line: first line of the record, already read from gtfs_file
+
+    Returns:
+        Raw record
+    """
+    # quotes are balanced at the end of a record (escaped quotes are doubled)
+    while line.count(b'"') % 2:
+        next_line = gtfs_file.readline()
+        if not next_line:
+            break
+        line += next_line
+    return line
+
+
+def read_csv_header(gtfs_file: typing.BinaryIO) -> bytes:
+    """
+    Reads the raw header record of a CSV file, blank lines before it are skipped
+
+    Args:
+        gtfs_file: CSV file opened in binary mode, at its beginning
+
+    Returns:
+        Raw header, empty when file is empty or blank
+    """
+    for line in gtfs_file:
+        if not line.isspace():
+            return read_csv_record(gtfs_file, line)
+    return b""
+
+
+def split_csv_record(record: bytes, max_split: int = -1) -> typing.List[bytes]:
+    """
+    Splits a raw CSV record into its (unquoted) fields
+
+    Args:
+        record: raw record
+        max_split: maximum number of splits, fields after it are not split (-1 for no limit)
+
+    Returns:
+        Record fields
+    """
+    record = record.rstrip(b"\r\n")
+    if b'"' not in record:
+        return record.split(b",", max_split)
+    row = next(csv.reader(io.StringIO(record.decode("utf-8"))))
+    return [field.encode("utf-8") for field in row]
+
+
+def _parse_header(record: bytes) -> typing.Dict[str, int]:
+    if record.startswith(UTF8_BOM):
+        record = record[len(UTF8_BOM) :]
+    fields = split_csv_record(record)
+    return {field.decode("utf-8"): i for i, field in enumerate(fields)}
+
+
+def filter_csv_member(
+    input_zip: zipfile.ZipFile,
+    filename: str,
+    column_filters: typing.List[ColumnFilter],
+    collected_columns: typing.List[str] = (),
+    output_zip: typing.Optional[zipfile.ZipFile] = None,
+) -> typing.Dict[str, typing.Set[bytes]]:
+    """
+    Filters a CSV member of a zip such as a SQL 'IN' filtering, without parsing it
+
+    Keep rows matching all column filters, they are copied verbatim to output_zip (when set).
+
+    Args:
+        input_zip: zip to read filename from
+        filename: CSV member to filter
+        column_filters: filters on columns, see ColumnFilter
+        collected_columns: columns whose non-empty values of kept rows are collected
+        output_zip: zip to write filtered filename to, None to only collect values
+
+    Returns:
+        Collected values per collected column (empty when column is missing)
+
+    Raises:
+        KeyError when filename is not in input_zip
+        KeyError when a column of a non optional filter is not in filename
+        ValueError when filename is empty or blank
+    """
+    collected: typing.Dict[str, typing.Set[bytes]] = {
+        column: set() for column in collected_columns
+    }
+    with io.BufferedReader(input_zip.open(filename), READ_BUFFER_SIZE) as gtfs_file:
+        header = read_csv_header(gtfs_file)
+        if not header:
+            raise ValueError(f"No columns to parse from file '{filename}'.")
+        columns = _parse_header(header)
+
+        filters = []
+        for column, accepted_values, optional in column_filters:
+            if column not in columns:
+                if optional:
+                    continue
+                raise KeyError(f"Column '{column}' is missing from file '{filename}'.")
+            filters.append((columns[column], accepted_values, optional))
+        collects = [
+            (columns[column], collected[column])
+            for column in collected_columns
+            if column in columns
+        ]
+        used_indexes = [i for i, _, _ in filters] + [i for i, _ in collects]
+        max_split = max(used_indexes, default=-1) + 1
+
+        output_file = None
+        if output_zip is not None:
+            output_file = output_zip.open(filename, "w")
+        try:
+            buffer = bytearray(header)
+            # hot loop: kept as flat as possible, stop_times may have hundreds of millions of rows
+            for record in gtfs_file:
+                if record.isspace():
+                    # blank line
+                    continue
+                if b'"' in record:
+                    record = read_csv_record(gtfs_file, record)
+                    fields = split_csv_record(record)
+                else:
+                    fields = record.split(b",", max_split)
+                    if len(fields) <= max_split:
+                        # last split field is the last column, remove line ending
+                        fields[-1] = fields[-1].rstrip(b"\r\n")
+                if len(fields) < max_split:
+                    fields += [b""] * (max_split - len(fields))
+                kept = True
+                for i, accepted_values, optional in filters:
+                    value = fields[i]
+                    if value not in accepted_values and (value or not optional):
+                        kept = False
+                        break
+                if not kept:
+                    continue
+                for i, values in collects:
+                    if fields[i]:
+                        values.add(fields[i])
+                if output_file is not None:
+                    buffer += record
+                    if len(buffer) >= WRITE_BUFFER_SIZE:
+                        output_file.write(buffer)
+                        buffer.clear()
+            if output_file is not None:
+                output_file.write(buffer)
+        finally:
+            if output_file is not None:
+                output_file.close()
+    return collected
+
+
+def read_csv_columns(
+    input_zip: zipfile.ZipFile, filename: str, columns: typing.List[str]
+) -> typing.Dict[str, typing.List[bytes]]:
+    """
+    Reads columns of a CSV member of a zip, values of a row are at the same index in each column
+
+    Args:
+        input_zip: zip to read filename from
+        filename: CSV member to read
+        columns: columns to read
+
+    Returns:
+        Raw values per column, missing columns are omitted
+
+    Raises:
+        KeyError when filename is not in input_zip
+        ValueError when filename is empty or blank
+    """
+    with io.BufferedReader(input_zip.open(filename), READ_BUFFER_SIZE) as gtfs_file:
+        header = read_csv_header(gtfs_file)
+        if not header:
+            raise ValueError(f"No columns to parse from file '{filename}'.")
+        header_columns = _parse_header(header)
+        read = [
+            (column, header_columns[column], [])
+            for column in columns
+            if column in header_columns
+        ]
+        max_split = max((i for _, i, _ in read), default=-1) + 1
+        for record in gtfs_file:
+            if record.isspace():
+                continue
+            if b'"' in record:
+                fields = split_csv_record(read_csv_record(gtfs_file, record))
+            else:
+                fields = record.split(b",", max_split)
+                if len(fields) <= max_split:
+                    fields[-1] = fields[-1].rstrip(b"\r\n")
+            if len(fields) < max_split:
+                fields += [b""] * (max_split - len(fields))
+            for _, i, values in read:
+                values.append(fields[i])
+    return {column: values for column, _, values in read}
+
+
+def _encode_values(values: typing.Iterable[str]) -> typing.Set[bytes]:
+    return {value.encode("utf-8") for value in values}
+
+
+def filter_gtfs_zip(
+    input_zip: zipfile.ZipFile,
+    output_zip: zipfile.ZipFile,
+    route_ids: typing.Optional[typing.Iterable[str]] = None,
+    trip_ids: typing.Optional[typing.Iterable[str]] = None,
+) -> typing.Set[str]:
+    """
+    Filters all GTFS files of a zip by route id or trip id, without parsing them
+
+    GTFS files are scanned line by line, only columns used for filtering are split and
+    kept rows are copied verbatim (quoting, number formatting and line endings are preserved).
+    Same relations as gtfs_filtering.core.filter_by_route_id/filter_by_trip_id.
+    Members which are not filtered (feed_info.txt, ...) are not written to output_zip.
+
+    Args:
+        input_zip: GTFS zip to filter, required GTFS files must be present
+        output_zip: zip to write filtered GTFS files to
+        route_ids: route ids to keep (filtering by route id)
+        trip_ids: trip ids to keep (filtering by trip id)
+
+    Returns:
+        Filtered GTFS files written to output_zip
+
+    Raises:
+        ValueError when a required GTFS file is empty
+        ValueError when neither or both route_ids and trip_ids are set
+    """
+    if (route_ids is None) == (trip_ids is None):
+        raise ValueError("Exactly one of route_ids and trip_ids must be set.")
+    members = set(input_zip.namelist())
+    written: typing.Set[str] = set()
+
+    def is_filterable(filename: str) -> bool:
+        # empty or blank optional files are ignored (copied as is), as with pandas
+        if filename not in members or input_zip.getinfo(filename).file_size == 0:
+            return False
+        with input_zip.open(filename) as gtfs_file:
+            return bool(read_csv_header(gtfs_file))
+
+    def filter_member(
+        filename: str,
+        column_filters: typing.List[ColumnFilter],
+        collected_columns: typing.List[str] = (),
+    ) -> typing.Dict[str, typing.Set[bytes]]:
+        written.add(filename)
+        return filter_csv_member(
+            input_zip, filename, column_filters, collected_columns, output_zip
+        )
+
+    trip_columns = ["trip_id", "route_id", "service_id", "shape_id"]
+    if route_ids is not None:
+        route_id_values = _encode_values(route_ids)
+        trips_values = filter_member(
+            "trips.txt", [("route_id", route_id_values, False)], trip_columns
+        )
+    else:
+        trips_values = filter_member(
+            "trips.txt", [("trip_id", _encode_values(trip_ids), False)], trip_columns
+        )
+        route_id_values = trips_values["route_id"]
+    trip_id_values = trips_values["trip_id"]
+
+    routes_values = filter_member(
+        "routes.txt", [("route_id", route_id_values, False)], ["agency_id"]
+    )
+    agency_id_values = routes_values["agency_id"]
+    if agency_id_values:
+        # agency_id is not mandatory in routes.txt
+        filter_member("agency.txt", [("agency_id", agency_id_values, False)])
+
+    stop_id_values: typing.Set[bytes] = set()
+    if is_filterable("stop_times.txt"):
+        stop_id_values = filter_member(
+            "stop_times.txt", [("trip_id", trip_id_values, False)], ["stop_id"]
+        )["stop_id"]
+    # stops are kept with all nodes of their stations, see stations.close_station_hierarchy
+    stops_columns = read_csv_columns(
+        input_zip, "stops.txt", ["stop_id", "parent_station", "zone_id"]
+    )
+    if "stop_id" not in stops_columns:
+        raise KeyError("Column 'stop_id' is missing from file 'stops.txt'.")
+    pathways_columns: typing.Dict[str, typing.List[bytes]] = {}
+    if is_filterable("pathways.txt"):
+        pathways_columns = read_csv_columns(
+            input_zip, "pathways.txt", ["from_stop_id", "to_stop_id"]
+        )
+        if len(pathways_columns) < 2:
+            pathways_columns = {}
+    kept_stops = stations.close_station_hierarchy(
+        stops_columns["stop_id"],
+        stops_columns.get("parent_station"),
+        stop_id_values,
+        pathways_columns.get("from_stop_id", ()),
+        pathways_columns.get("to_stop_id", ()),
+    )
+    stop_id_values |= set(itertools.compress(stops_columns["stop_id"], kept_stops))
+    stops_values = filter_member(
+        "stops.txt", [("stop_id", stop_id_values, False)], ["level_id", "zone_id"]
+    )
+    level_id_values = stops_values["level_id"]
+
+    service_id_values = trips_values["service_id"]
+    for filename in ["calendar.txt", "calendar_dates.txt"]:
+        if is_filterable(filename):
+            filter_member(filename, [("service_id", service_id_values, False)])
+
+    if is_filterable("areas.txt") and is_filterable("stop_areas.txt"):
+        area_id_values = filter_member(
+            "stop_areas.txt", [("stop_id", stop_id_values, False)], ["area_id"]
+        )["area_id"]
+        filter_member("areas.txt", [("area_id", area_id_values, False)])
+
+    shape_id_values = trips_values["shape_id"]
+    if is_filterable("shapes.txt") and shape_id_values:
+        filter_member("shapes.txt", [("shape_id", shape_id_values, False)])
+
+    if is_filterable("frequencies.txt"):
+        filter_member("frequencies.txt", [("trip_id", trip_id_values, False)])
+
+    if is_filterable("transfers.txt"):
+        filter_member(
+            "transfers.txt",
+            [
+                ("from_stop_id", stop_id_values, False),
+                ("to_stop_id", stop_id_values, False),
+                ("from_route_id", route_id_values, True),
+                ("to_route_id", route_id_values, True),
+                ("from_trip_id", trip_id_values, True),
+                ("to_trip_id", trip_id_values, True),
+            ],
+        )
+
+    if is_filterable("pathways.txt"):
+        filter_member(
+            "pathways.txt",
+            [
+                ("from_stop_id", stop_id_values, False),
+                ("to_stop_id", stop_id_values, False),
+            ],
+        )
+
+    if is_filterable("levels.txt") and level_id_values:
+        filter_member("levels.txt", [("level_id", level_id_values, False)])
+
+    if is_filterable("attributions.txt"):
+        filter_member(
+            "attributions.txt",
+            [
+                ("agency_id", agency_id_values, True),
+                ("route_id", route_id_values, True),
+                ("trip_id", trip_id_values, True),
+            ],
+        )
+
+    fare_rules_filters: typing.List[ColumnFilter] = []
+    if is_filterable("fare_rules.txt"):
+        # rules without route or zone apply to every route or zone
+        fare_rules_filters.append(("route_id", route_id_values, True))
+        if "zone_id" in stops_columns:
+            fare_rules_filters += [
+                (column, stops_values["zone_id"], True)
+                for column in ["origin_id", "destination_id", "contains_id"]
+            ]
+    if is_filterable("fare_attributes.txt"):
+        # agency_id is only required when there are several agencies
+        fare_attributes_filters = [("agency_id", agency_id_values, True)]
+        if is_filterable("fare_rules.txt"):
+            # a fare without rules applies everywhere: drop fares whose rules were all dropped
+            ruled_fare_id_values = filter_csv_member(
+                input_zip, "fare_rules.txt", [], ["fare_id"]
+            )["fare_id"]
+            kept_ruled_fare_id_values = filter_csv_member(
+                input_zip, "fare_rules.txt", fare_rules_filters, ["fare_id"]
+            )["fare_id"]
+            fare_id_values = set(
+                read_csv_columns(input_zip, "fare_attributes.txt", ["fare_id"]).get(
+                    "fare_id", ()
+                )
+            )
+            fare_attributes_filters.append(
+                (
+                    "fare_id",
+                    fare_id_values - (ruled_fare_id_values - kept_ruled_fare_id_values),
+                    True,
+                )
+            )
+            fare_id_values = filter_member(
+                "fare_attributes.txt", fare_attributes_filters, ["fare_id"]
+            )["fare_id"]
+            fare_rules_filters.append(("fare_id", fare_id_values, False))
+        else:
+            filter_member("fare_attributes.txt", fare_attributes_filters)
+    if is_filterable("fare_rules.txt"):
+        filter_member("fare_rules.txt", fare_rules_filters)
+
+    return written
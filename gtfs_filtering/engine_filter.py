@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+import os
+import typing
+import zipfile
+
+from gtfs_filtering import csv_filter, sqlite_filter
+
+SQLITE_DATABASE_FILENAME = "gtfs.sqlite"
+
+# filters all GTFS files of input_zip by route id or trip id and writes them to output_zip,
+# with a work directory for temporary files, returns written GTFS files
+ZipFilter = typing.Callable[..., typing.Set[str]]
+
+
+def filter_gtfs_zip_with_csv(
+    input_zip: zipfile.ZipFile,
+    output_zip: zipfile.ZipFile,
+    work_directory: typing.Optional[str],
+    route_ids: typing.Optional[typing.Iterable[str]] = None,
+    trip_ids: typing.Optional[typing.Iterable[str]] = None,
+) -> typing.Set[str]:
+    """
+    Filters input_zip line by line, see gtfs_filtering.csv_filter.filter_gtfs_zip
+
+    Args:
+        input_zip: GTFS zip to filter
+        output_zip: zip filtered GTFS files are written to
+        work_directory: unused, GTFS files are filtered in memory
+        route_ids: route ids to keep
+        trip_ids: trip ids to keep
+
+    Returns:
+        GTFS files written to output_zip
+    """
+    return csv_filter.filter_gtfs_zip(input_zip, output_zip, route_ids, trip_ids)
+
+
+def filter_gtfs_zip_with_sqlite(
+    input_zip: zipfile.ZipFile,
+    output_zip: zipfile.ZipFile,
+    work_directory: str,
+    route_ids: typing.Optional[typing.Iterable[str]] = None,
+    trip_ids: typing.Optional[typing.Iterable[str]] = None,
+) -> typing.Set[str]:
+    """
+    Filters input_zip through a SQLite database created in work_directory,
+    see gtfs_filtering.sqlite_filter.filter_gtfs_zip
+
+    Args:
+        input_zip: GTFS zip to filter
+        output_zip: zip filtered GTFS files are written to
+        work_directory: directory of the SQLite database
+        route_ids: route ids to keep
+        trip_ids: trip ids to keep
+
+    Returns:
+        GTFS files written to output_zip
+    """
+    return sqlite_filter.filter_gtfs_zip(
+        input_zip,
+        output_zip,
+        os.path.join(work_directory, SQLITE_DATABASE_FILENAME),
+        route_ids,
+        trip_ids,
+    )
+
+
+def filter_gtfs_zip_with_polars(
+    input_zip: zipfile.ZipFile,
+    output_zip: zipfile.ZipFile,
+    work_directory: str,
+    route_ids: typing.Optional[typing.Iterable[str]] = None,
+    trip_ids: typing.Optional[typing.Iterable[str]] = None,
+) -> typing.Set[str]:
+    """
+    Extracts GTFS files of input_zip to work_directory and filters them with polars lazy
+    queries, see gtfs_filtering.polars_filter.filter_gtfs_directory
+
+    Args:
+        input_zip: GTFS zip to filter
+        output_zip: zip filtered GTFS files are written to
+        work_directory: directory GTFS files are extracted to
+        route_ids: route ids to keep
+        trip_ids: trip ids to keep
+
+    Returns:
+        GTFS files written to output_zip
+
+    Raises:
+        ValueError when polars is not installed
+    """
+    try:
+        from gtfs_filtering import polars_filter
+    except ImportError:
+        raise ValueError(
+            "polars engine requires polars, install it with 'pip install polars'."
+        )
+    input_zip.extractall(
+        work_directory,
+        [name for name in input_zip.namelist() if name in polars_filter.GTFS_FILES],
+    )
+    return polars_filter.filter_gtfs_directory(
+        work_directory, output_zip, route_ids, trip_ids
+    )
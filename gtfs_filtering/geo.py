@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+import dataclasses
+import typing
+
+import numpy as np
+
+# cells per side of PolygonGrid
+POLYGON_GRID_SIZE = 64
+# centers of PolygonGrid cells tested at once against all polygon edges
+RAY_CAST_CHUNK_SIZE = 256
+
+
+@dataclasses.dataclass
+class PolygonGrid:
+    """
+    Grid index over the bounding box of a polygon
+
+    Cells crossed by no polygon edge are entirely inside or outside of the polygon,
+    points of other cells are only tested against edges crossing their cell.
+    """
+
+    polygon: np.ndarray  # (n, 2) vertices (lon, lat)
+    min_lon: float
+    min_lat: float
+    cell_width: float
+    cell_height: float
+    size: int  # cells per side
+    cell_center_inside: np.ndarray  # (size * size,) is cell center inside polygon
+    cell_edges: typing.List[np.ndarray]  # indexes of edges crossing each cell
+
+
+def points_in_bbox(
+    lons: np.ndarray,
+    lats: np.ndarray,
+    bbox: typing.Tuple[float, float, float, float],
+) -> np.ndarray:
+    """
+    Tests which points are inside a bounding box (borders included)
+
+    Args:
+        lons: points longitudes, NaN for missing coordinates
+        lats: points latitudes, NaN for missing coordinates
+        bbox: min longitude, min latitude, max longitude, max latitude
+
+    Returns:
+        Mask of points inside bbox (False for missing coordinates)
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return (min_lon <= lons) & (lons <= max_lon) & (min_lat <= lats) & (lats <= max_lat)
+
+
+def _polygon_edges(polygon: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+    return polygon, np.roll(polygon, -1, axis=0)
+
+
+def _ray_cast(lons: np.ndarray, lats: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    # even-odd rule: count polygon edges crossed by a ray going east from each point
+    starts, ends = _polygon_edges(polygon)
+    x1, y1 = starts[:, 0], starts[:, 1]
+    x2, y2 = ends[:, 0], ends[:, 1]
+    x, y = lons[:, np.newaxis], lats[:, np.newaxis]
+    spans = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing_lons = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    crossings = spans & (x < crossing_lons)
+    return crossings.sum(axis=1) % 2 == 1
+
+
+def build_polygon_grid(
+    polygon: np.ndarray, size: int = POLYGON_GRID_SIZE
+) -> PolygonGrid:
+    """
+    Builds a grid index over a polygon, see PolygonGrid
+
+    Args:
+        polygon: (n, 2) vertices (lon, lat) of a simple polygon, closing vertex is optional
+        size: cells per side
+
+    Returns:
+        Grid index of polygon
+    """
+    polygon = np.asarray(polygon, dtype=float)
+    if len(polygon) > 1 and (polygon[0] == polygon[-1]).all():
+        polygon = polygon[:-1]
+    min_lon, min_lat = polygon.min(axis=0)
+    max_lon, max_lat = polygon.max(axis=0)
+    # avoid empty cells for degenerated polygons
+    cell_width = max(max_lon - min_lon, np.finfo(float).eps) / size
+    cell_height = max(max_lat - min_lat, np.finfo(float).eps) / size
+
+    starts, ends = _polygon_edges(polygon)
+    first_columns = _cell_indexes(
+        np.minimum(starts[:, 0], ends[:, 0]), min_lon, cell_width, size
+    )
+    last_columns = _cell_indexes(
+        np.maximum(starts[:, 0], ends[:, 0]), min_lon, cell_width, size
+    )
+    first_rows = _cell_indexes(
+        np.minimum(starts[:, 1], ends[:, 1]), min_lat, cell_height, size
+    )
+    last_rows = _cell_indexes(
+        np.maximum(starts[:, 1], ends[:, 1]), min_lat, cell_height, size
+    )
+    cell_edges_lists: typing.List[typing.List[int]] = [[] for _ in range(size * size)]
+    for edge, (first_column, last_column, first_row, last_row) in enumerate(
+        zip(first_columns, last_columns, first_rows, last_rows)
+    ):
+        # cells overlapping edge bounding box (superset of cells crossed by edge)
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                cell_edges_lists[row * size + column].append(edge)
+
+    centers = np.arange(size) + 0.5
+    center_lons = np.tile(min_lon + centers * cell_width, size)
+    center_lats = np.repeat(min_lat + centers * cell_height, size)
+    cell_center_inside = np.concatenate(
+        [
+            _ray_cast(
+                center_lons[i : i + RAY_CAST_CHUNK_SIZE],
+                center_lats[i : i + RAY_CAST_CHUNK_SIZE],
+                polygon,
+            )
+            for i in range(0, size * size, RAY_CAST_CHUNK_SIZE)
+        ]
+    )
+    return PolygonGrid(
+        polygon=polygon,
+        min_lon=min_lon,
+        min_lat=min_lat,
+        cell_width=cell_width,
+        cell_height=cell_height,
+        size=size,
+        cell_center_inside=cell_center_inside,
+        cell_edges=[np.array(edges, dtype=np.int64) for edges in cell_edges_lists],
+    )
+
+
+def _cell_indexes(
+    values: np.ndarray, min_value: float, cell_length: float, size: int
+) -> np.ndarray:
+    return np.clip(((values - min_value) / cell_length).astype(np.int64), 0, size - 1)
+
+
+def _cross(
+    ax: np.ndarray, ay: np.ndarray, bx: np.ndarray, by: np.ndarray
+) -> np.ndarray:
+    return ax * by - ay * bx
+
+
+def points_in_polygon(
+    lons: np.ndarray, lats: np.ndarray, polygon_grid: PolygonGrid
+) -> np.ndarray:
+    """
+    Tests which points are inside a polygon
+
+    A point is inside when its cell center is inside and the segment between them crosses
+    an even number of polygon edges (or the opposite), only edges crossing the cell are tested.
+
+    Args:
+        lons: points longitudes, NaN for missing coordinates
+        lats: points latitudes, NaN for missing coordinates
+        polygon_grid: grid index of polygon, see build_polygon_grid
+
+    Returns:
+        Mask of points inside polygon (False for missing coordinates)
+    """
+    grid = polygon_grid
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    max_lon = grid.min_lon + grid.size * grid.cell_width
+    max_lat = grid.min_lat + grid.size * grid.cell_height
+    inside = np.zeros(len(lons), dtype=bool)
+    in_grid = np.flatnonzero(
+        points_in_bbox(lons, lats, (grid.min_lon, grid.min_lat, max_lon, max_lat))
+    )
+    columns = _cell_indexes(lons[in_grid], grid.min_lon, grid.cell_width, grid.size)
+    rows = _cell_indexes(lats[in_grid], grid.min_lat, grid.cell_height, grid.size)
+    cells = rows * grid.size + columns
+    inside[in_grid] = grid.cell_center_inside[cells]
+
+    starts, ends = _polygon_edges(grid.polygon)
+    order = np.argsort(cells, kind="stable")
+    sorted_cells = cells[order]
+    boundaries = np.flatnonzero(np.diff(sorted_cells)) + 1
+    for cell_points in np.split(order, boundaries):
+        if not len(cell_points):
+            continue
+        cell = cells[cell_points[0]]
+        edges = grid.cell_edges[cell]
+        if not len(edges):
+            continue
+        points = in_grid[cell_points]
+        px, py = lons[points][:, np.newaxis], lats[points][:, np.newaxis]
+        cx = grid.min_lon + (cell % grid.size + 0.5) * grid.cell_width
+        cy = grid.min_lat + (cell // grid.size + 0.5) * grid.cell_height
+        ax, ay = starts[edges, 0], starts[edges, 1]
+        bx, by = ends[edges, 0], ends[edges, 1]
+        # segment (point, center) properly crosses edge (a, b)
+        point_side = _cross(bx - ax, by - ay, px - ax, py - ay)
+        center_side = _cross(bx - ax, by - ay, cx - ax, cy - ay)
+        a_side = _cross(cx - px, cy - py, ax - px, ay - py)
+        b_side = _cross(cx - px, cy - py, bx - px, by - py)
+        crossings = (point_side * center_side < 0) & (a_side * b_side < 0)
+        inside[points] ^= crossings.sum(axis=1) % 2 == 1
+    return inside
+
+
+EARTH_RADIUS_METERS = 6_371_000
+
+
+def _project_to_meters(
+    lons: np.ndarray, lats: np.ndarray, reference_lats: np.ndarray
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # equirectangular projection, accurate at the scale of a polyline around reference_lats
+    x = EARTH_RADIUS_METERS * np.radians(lons) * np.cos(np.radians(reference_lats))
+    y = EARTH_RADIUS_METERS * np.radians(lats)
+    return x, y
+
+
+def _distances_to_segments(
+    px: np.ndarray,
+    py: np.ndarray,
+    ax: np.ndarray,
+    ay: np.ndarray,
+    bx: np.ndarray,
+    by: np.ndarray,
+) -> np.ndarray:
+    dx, dy = bx - ax, by - ay
+    squared_lengths = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = ((px - ax) * dx + (py - ay) * dy) / squared_lengths
+    # degenerated segments (closed polylines): distance to their single point
+    t = np.clip(np.where(squared_lengths > 0, t, 0), 0, 1)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def simplify_polylines(
+    lons: np.ndarray,
+    lats: np.ndarray,
+    offsets: np.ndarray,
+    tolerance_meters: float,
+) -> np.ndarray:
+    """
+    Simplifies polylines with the Douglas-Peucker algorithm
+
+    All polylines are simplified at once: each iteration finds the farthest point of every
+    segment still to split, segments whose farthest point is further than tolerance_meters
+    are split at this point (which is kept), others are replaced by their end points.
+
+    Args:
+        lons: points longitudes, points of a polyline are contiguous and in order
+        lats: points latitudes
+        offsets: (m + 1,) index of the first point of each polyline, then number of points
+        tolerance_meters: maximum distance between dropped points and simplified polylines
+
+    Returns:
+        Mask of points to keep (first and last points of each polyline are always kept,
+        points with missing coordinates are dropped unless they are first or last)
+    """
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    keep = np.zeros(len(lons), dtype=bool)
+    starts = offsets[:-1]
+    ends = offsets[1:] - 1
+    not_empty = ends >= starts
+    starts, ends = starts[not_empty], ends[not_empty]
+    keep[starts] = True
+    keep[ends] = True
+    x, y = _project_to_meters(lons, lats, np.repeat(lats[starts], ends - starts + 1))
+
+    segment_starts, segment_ends = starts, ends
+    while True:
+        has_inner_points = segment_ends - segment_starts > 1
+        segment_starts = segment_starts[has_inner_points]
+        segment_ends = segment_ends[has_inner_points]
+        if not len(segment_starts):
+            return keep
+        inner_counts = segment_ends - segment_starts - 1
+        segments = np.repeat(np.arange(len(segment_starts)), inner_counts)
+        segment_offsets = np.concatenate([[0], np.cumsum(inner_counts)[:-1]])
+        points = (
+            np.arange(len(segments))
+            - segment_offsets[segments]
+            + segment_starts[segments]
+            + 1
+        )
+        a, b = segment_starts[segments], segment_ends[segments]
+        distances = _distances_to_segments(x[points], y[points], x[a], y[a], x[b], y[b])
+        # missing coordinates are never the farthest point
+        max_distances = np.fmax.reduceat(distances, segment_offsets)
+        is_farthest = distances == max_distances[segments]
+        farthest_segments, first_farthest = np.unique(
+            segments[is_farthest], return_index=True
+        )
+        farthest_points = np.full(len(segment_starts), -1)
+        farthest_points[farthest_segments] = points[is_farthest][first_farthest]
+        split = max_distances > tolerance_meters
+        keep[farthest_points[split]] = True
+        segment_starts, segment_ends = (
+            np.concatenate([segment_starts[split], farthest_points[split]]),
+            np.concatenate([farthest_points[split], segment_ends[split]]),
+        )
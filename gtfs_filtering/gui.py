@@ -11,6 +11,7 @@ from PyQt6.QtWidgets import (
     QApplication,
     QCheckBox,
     QComboBox,
+    QLabel,
     QLineEdit,
     QMainWindow,
     QPushButton,
@@ -22,7 +23,16 @@ from PyQt6.QtWidgets import (
     QAbstractItemView,
 )
 
-from gtfs_filtering.core import FilterType, perform_filter
+from gtfs_filtering.core import (
+    FILTERED_GTFS_FILE_DEPENDENCIES,
+    GTFS,
+    FilterType,
+    get_selection_stats,
+    get_zip_member_sizes,
+    perform_filter,
+    read_gtfs_zip,
+    select_gtfs,
+)
 
 APP_NAME = "GTFS Filtering"
 
@@ -40,6 +50,10 @@ OUTPUT_GTFS_FOLDER_LABEL = "Sélection du répertoire de sortie"
 OUTPUT_GTFS_FOLDER_SELECT_CAPTION_LABEL = "Sélectionner le dossier de sortie"
 OUTPUT_GTFS_FULLPATH_LABEL = "Chemin complet vers l'archive de sortie"
 OVERWRITE_OUTPUT_GTFS_LABEL = "Ecraser le GTFS de sortie s'il existe ?"
+PREVIEW_LABEL = "Aperçu du GTFS filtré"
+PREVIEW_ERROR_LABEL = "Aperçu indisponible : {error}"
+PREVIEW_ROWS_LABEL = "{gtfs_file} : {output_rows} / {input_rows} lignes"
+PREVIEW_SIZE_LABEL = "Taille estimée : {size:.1f} Mo (non compressé)"
 SELECT_INPUT_GTFS_LABEL = "Sélection du GTFS à filtrer (.zip)"
 SELECT_LABEL = "Sélectionner"
 START_FILTERING_LABEL = "Lancer le filtrage"
@@ -57,6 +71,9 @@ class MainWindowModel:
     filter_type: FilterType = FilterType.ROUTE_ID
     route_ids_from_input_gtfs: typing.List[str] = None
     trip_ids_from_input_gtfs: typing.List[str] = None
+    # parsed once to preview filtering live
+    input_gtfs: GTFS = None
+    input_gtfs_member_sizes: typing.Dict[str, int] = None
 
     def output_gtfs_zip_fullpath(self):
         return os.path.join(self.output_gtfs_zip_folder, self.output_gtfs_zip_filename)
@@ -122,6 +139,9 @@ class MainWindow(QMainWindow):
         self.delete_filter_values_push_button = QPushButton(DELETE_FILTER_VALUES_LABEL)
         self.delete_filter_values_push_button.setDisabled(True)
 
+        # Filtered GTFS preview
+        self.preview_label = QLabel()
+
         # Start filtering
         self.start_filtering_push_button = QPushButton(START_FILTERING_LABEL)
 
@@ -165,6 +185,7 @@ class MainWindow(QMainWindow):
         main_layout.addRow(FILTER_TYPE_LABEL, self.filter_type_select)
         main_layout.addRow(FILTER_VALUES_LABEL, self.filter_values_list)
         main_layout.addWidget(self.delete_filter_values_push_button)
+        main_layout.addRow(PREVIEW_LABEL, self.preview_label)
         main_layout.addWidget(self.start_filtering_push_button)
 
         # Add main_layout to main_widget
@@ -213,12 +234,53 @@ class MainWindow(QMainWindow):
         self.model.trip_ids_from_input_gtfs.sort()
         pass
 
+    def _parse_input_gtfs(self):
+        try:
+            self.model.input_gtfs_member_sizes = get_zip_member_sizes(
+                self.model.input_gtfs_zip
+            )
+            self.model.input_gtfs = read_gtfs_zip(
+                self.model.input_gtfs_zip, set(FILTERED_GTFS_FILE_DEPENDENCIES)
+            )
+        except Exception:
+            self.model.input_gtfs = None
+
     def _update_filter_values(self):
         self.filter_values_list.clear()
         if self._get_filter_type() == FilterType.ROUTE_ID:
             self.filter_values_list.addItems(self.model.route_ids_from_input_gtfs)
         elif self._get_filter_type() == FilterType.TRIP_ID:
             self.filter_values_list.addItems(self.model.trip_ids_from_input_gtfs)
+        self._update_preview()
+
+    def _update_preview(self):
+        # selection only: rows are counted without being gathered nor written
+        if self.model.input_gtfs is None:
+            self.preview_label.clear()
+            return
+        try:
+            selection = select_gtfs(
+                self.model.input_gtfs,
+                self._get_filter_type(),
+                self._get_filter_values(),
+            )
+            stats = get_selection_stats(
+                self.model.input_gtfs, selection, self.model.input_gtfs_member_sizes
+            )
+        except Exception as e:
+            # e.g. invalid input GTFS, an exception must not escape a Qt slot
+            self.preview_label.setText(PREVIEW_ERROR_LABEL.format(error=e))
+            return
+        lines = [
+            PREVIEW_ROWS_LABEL.format(
+                gtfs_file=file_stats.gtfs_file,
+                output_rows=file_stats.output_rows,
+                input_rows=file_stats.input_rows,
+            )
+            for file_stats in stats.gtfs_files
+        ]
+        lines.append(PREVIEW_SIZE_LABEL.format(size=stats.output_size / 1_000_000))
+        self.preview_label.setText("\n".join(lines))
 
     def on__select_input_gtfs_zip__clicked_handler(self):
         input_gtfs_zip, _ = QFileDialog.getOpenFileName(
@@ -233,6 +295,7 @@ class MainWindow(QMainWindow):
                 self.model.input_gtfs_zip
             )
             self._retrieve_route_ids_and_trip_ids_from_input_gtfs()
+            self._parse_input_gtfs()
             self._update_filter_values()
             self.filter_type_select.setEnabled(True)
             self.delete_filter_values_push_button.setEnabled(True)
@@ -282,6 +345,7 @@ class MainWindow(QMainWindow):
             return
         for item in self.filter_values_list.selectedItems():
             self.filter_values_list.takeItem(self.filter_values_list.row(item))
+        self._update_preview()
 
 
 if __name__ == "__main__":
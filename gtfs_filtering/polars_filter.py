@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+import os
+import typing
+import zipfile
+
+import polars as pl
+
+from gtfs_filtering import csv_filter, stations
+
+GTFS_FILES = [
+    "agency.txt",
+    "stops.txt",
+    "routes.txt",
+    "trips.txt",
+    "stop_times.txt",
+    "calendar.txt",
+    "calendar_dates.txt",
+    "areas.txt",
+    "stop_areas.txt",
+    "shapes.txt",
+    "frequencies.txt",
+    "transfers.txt",
+    "pathways.txt",
+    "levels.txt",
+    "attributions.txt",
+    "fare_attributes.txt",
+    "fare_rules.txt",
+]
+
+
+def scan_gtfs_file(directory: str, filename: str) -> pl.LazyFrame:
+    """
+    Lazily scans a single GTFS file from a directory, all columns are read as strings
+
+    Args:
+        directory: directory containing GTFS file
+        filename: GTFS file to scan
+
+    Returns:
+        Lazy frame of GTFS file, only columns and rows used by the query plan are read
+    """
+    return pl.scan_csv(os.path.join(directory, filename), infer_schema=False)
+
+
+def _has_header(path: str) -> bool:
+    # missing, empty or blank GTFS files are ignored (copied as is), as with pandas
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as gtfs_file:
+        return bool(csv_filter.read_csv_header(gtfs_file))
+
+
+def _column_values(df: pl.DataFrame, column: str) -> pl.Series:
+    # unique non null values of column, empty when column is missing
+    if column not in df.columns:
+        return pl.Series(column, [], dtype=pl.String)
+    return df.get_column(column).drop_nulls().unique()
+
+
+def _is_in(
+    lf: pl.LazyFrame, column: str, values: pl.Series, optional: bool = False
+) -> pl.Expr:
+    # optional: rows with a null value are kept and filter is ignored if column is missing
+    if optional and column not in lf.collect_schema().names():
+        return pl.lit(True)
+    expr = pl.col(column).is_in(values.implode())
+    if optional:
+        expr = expr | pl.col(column).is_null()
+    return expr
+
+
+def filter_gtfs_directory(
+    directory: str,
+    output_zip: zipfile.ZipFile,
+    route_ids: typing.Optional[typing.Iterable[str]] = None,
+    trip_ids: typing.Optional[typing.Iterable[str]] = None,
+) -> typing.Set[str]:
+    """
+    Filters all GTFS files of an unzipped GTFS by route id or trip id with polars lazy queries
+
+    GTFS files are scanned lazily, so that filters are pushed down to the CSV reader and
+    only used columns are read, and queries run on all CPU cores. Queries are collected in
+    3 stages (trips/routes, stop_times/stops, others) as each stage filters by keys of the previous
+    ones, queries of the last stage are collected together.
+    Same relations as gtfs_filtering.core.filter_by_route_id/filter_by_trip_id.
+    Files which are not filtered (feed_info.txt, ...) are not written to output_zip.
+
+    Args:
+        directory: unzipped GTFS, required GTFS files must be present
+        output_zip: zip to write filtered GTFS files to
+        route_ids: route ids to keep (filtering by route id)
+        trip_ids: trip ids to keep (filtering by trip id)
+
+    Returns:
+        Filtered GTFS files written to output_zip
+
+    Raises:
+        polars.exceptions.ColumnNotFoundError when a column required for filtering is missing
+        ValueError when neither or both route_ids and trip_ids are set
+    """
+    if (route_ids is None) == (trip_ids is None):
+        raise ValueError("Exactly one of route_ids and trip_ids must be set.")
+    gtfs: typing.Dict[str, pl.LazyFrame] = {
+        filename.removesuffix(".txt"): scan_gtfs_file(directory, filename)
+        for filename in GTFS_FILES
+        if _has_header(os.path.join(directory, filename))
+    }
+    filtered: typing.Dict[str, pl.LazyFrame] = {}
+
+    # stage 1: trips and routes
+    if route_ids is not None:
+        route_id_values = pl.Series("route_id", list(route_ids), dtype=pl.String)
+        trips_filter = _is_in(gtfs["trips"], "route_id", route_id_values)
+    else:
+        trip_id_values = pl.Series("trip_id", list(trip_ids), dtype=pl.String)
+        trips_filter = _is_in(gtfs["trips"], "trip_id", trip_id_values)
+    trips = gtfs["trips"].filter(trips_filter).collect()
+    if trip_ids is not None:
+        route_id_values = _column_values(trips, "route_id")
+    routes = (
+        gtfs["routes"]
+        .filter(_is_in(gtfs["routes"], "route_id", route_id_values))
+        .collect()
+    )
+    trip_id_values = _column_values(trips, "trip_id")
+    agency_id_values = _column_values(routes, "agency_id")
+    service_id_values = _column_values(trips, "service_id")
+    shape_id_values = _column_values(trips, "shape_id")
+    written = {"trips": trips, "routes": routes}
+
+    # stage 2: stop_times and stops
+    stop_id_values = pl.Series("stop_id", [], dtype=pl.String)
+    if "stop_times" in gtfs:
+        stop_times = (
+            gtfs["stop_times"]
+            .filter(_is_in(gtfs["stop_times"], "trip_id", trip_id_values))
+            .collect()
+        )
+        written["stop_times"] = stop_times
+        stop_id_values = _column_values(stop_times, "stop_id")
+    stops = gtfs["stops"].collect()
+    # stops are kept with all nodes of their stations, see stations.close_station_hierarchy
+    pathways_from_stop_ids = pathways_to_stop_ids = ()
+    if "pathways" in gtfs and {"from_stop_id", "to_stop_id"} <= set(
+        gtfs["pathways"].collect_schema().names()
+    ):
+        pathways = gtfs["pathways"].select("from_stop_id", "to_stop_id").collect()
+        pathways_from_stop_ids = pathways.get_column("from_stop_id").to_numpy()
+        pathways_to_stop_ids = pathways.get_column("to_stop_id").to_numpy()
+    kept_stops = stations.close_station_hierarchy(
+        stops.get_column("stop_id").to_numpy(),
+        (
+            stops.get_column("parent_station").to_numpy()
+            if "parent_station" in stops.columns
+            else None
+        ),
+        stop_id_values.to_list(),
+        pathways_from_stop_ids,
+        pathways_to_stop_ids,
+    )
+    stops = stops.filter(pl.Series(kept_stops))
+    stop_id_values = pl.concat([stop_id_values, stops.get_column("stop_id")]).unique()
+    written["stops"] = stops
+    level_id_values = _column_values(stops, "level_id")
+
+    # stage 3: other GTFS files
+    if len(agency_id_values):
+        # agency_id is not mandatory in routes.txt
+        filtered["agency"] = gtfs["agency"].filter(
+            _is_in(gtfs["agency"], "agency_id", agency_id_values)
+        )
+    for name in ["calendar", "calendar_dates"]:
+        if name in gtfs:
+            filtered[name] = gtfs[name].filter(
+                _is_in(gtfs[name], "service_id", service_id_values)
+            )
+    if "areas" in gtfs and "stop_areas" in gtfs:
+        stop_areas = (
+            gtfs["stop_areas"]
+            .filter(_is_in(gtfs["stop_areas"], "stop_id", stop_id_values))
+            .cache()
+        )
+        filtered["stop_areas"] = stop_areas
+        filtered["areas"] = gtfs["areas"].join(
+            stop_areas.select("area_id").unique(),
+            on="area_id",
+            how="semi",
+            maintain_order="left",
+        )
+    if "shapes" in gtfs and len(shape_id_values):
+        filtered["shapes"] = gtfs["shapes"].filter(
+            _is_in(gtfs["shapes"], "shape_id", shape_id_values)
+        )
+    if "frequencies" in gtfs:
+        filtered["frequencies"] = gtfs["frequencies"].filter(
+            _is_in(gtfs["frequencies"], "trip_id", trip_id_values)
+        )
+    if "transfers" in gtfs:
+        transfers = gtfs["transfers"]
+        filtered["transfers"] = transfers.filter(
+            _is_in(transfers, "from_stop_id", stop_id_values),
+            _is_in(transfers, "to_stop_id", stop_id_values),
+            _is_in(transfers, "from_route_id", route_id_values, True),
+            _is_in(transfers, "to_route_id", route_id_values, True),
+            _is_in(transfers, "from_trip_id", trip_id_values, True),
+            _is_in(transfers, "to_trip_id", trip_id_values, True),
+        )
+    if "pathways" in gtfs:
+        filtered["pathways"] = gtfs["pathways"].filter(
+            _is_in(gtfs["pathways"], "from_stop_id", stop_id_values),
+            _is_in(gtfs["pathways"], "to_stop_id", stop_id_values),
+        )
+    if "levels" in gtfs and len(level_id_values):
+        filtered["levels"] = gtfs["levels"].filter(
+            _is_in(gtfs["levels"], "level_id", level_id_values)
+        )
+    if "attributions" in gtfs:
+        attributions = gtfs["attributions"]
+        filtered["attributions"] = attributions.filter(
+            _is_in(attributions, "agency_id", agency_id_values, True),
+            _is_in(attributions, "route_id", route_id_values, True),
+            _is_in(attributions, "trip_id", trip_id_values, True),
+        )
+    if "fare_rules" in gtfs:
+        # rules without route or zone apply to every route or zone
+        fare_rules = gtfs["fare_rules"]
+        fare_rules_filters = [_is_in(fare_rules, "route_id", route_id_values, True)]
+        if "zone_id" in stops.columns:
+            zone_id_values = _column_values(stops, "zone_id")
+            fare_rules_filters += [
+                _is_in(fare_rules, column, zone_id_values, True)
+                for column in ["origin_id", "destination_id", "contains_id"]
+            ]
+    if "fare_attributes" in gtfs:
+        # agency_id is only required when there are several agencies, fare files are
+        # small: fares are collected now to filter fare rules by kept fares
+        fare_attributes = gtfs["fare_attributes"]
+        fare_attributes_filters = [
+            _is_in(fare_attributes, "agency_id", agency_id_values, True)
+        ]
+        if "fare_rules" in gtfs:
+            # a fare without rules applies everywhere: drop fares whose rules were all dropped
+            ruled_fare_id_values = _column_values(
+                fare_rules.select("fare_id").collect(), "fare_id"
+            )
+            kept_ruled_fare_id_values = _column_values(
+                fare_rules.filter(*fare_rules_filters).select("fare_id").collect(),
+                "fare_id",
+            )
+            dropped_fare_id_values = ruled_fare_id_values.filter(
+                ~ruled_fare_id_values.is_in(kept_ruled_fare_id_values.implode())
+            )
+            fare_attributes_filters.append(
+                pl.col("fare_id").is_null()
+                | ~pl.col("fare_id").is_in(dropped_fare_id_values.implode())
+            )
+        written["fare_attributes"] = fare_attributes.filter(
+            *fare_attributes_filters
+        ).collect()
+        if "fare_rules" in gtfs:
+            fare_rules_filters.append(
+                _is_in(
+                    fare_rules,
+                    "fare_id",
+                    _column_values(written["fare_attributes"], "fare_id"),
+                )
+            )
+    if "fare_rules" in gtfs:
+        filtered["fare_rules"] = fare_rules.filter(*fare_rules_filters)
+    written.update(zip(filtered.keys(), pl.collect_all(filtered.values())))
+
+    for name, df in written.items():
+        with output_zip.open(f"{name}.txt", "w") as gtfs_file:
+            df.write_csv(gtfs_file)
+    return {f"{name}.txt" for name in written}
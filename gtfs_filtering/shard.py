@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+import typing
+import zipfile
+
+import click
+
+from gtfs_filtering.cli import compression_options, resolve_compression
+from gtfs_filtering.core import perform_shard
+
+
+@click.command()
+@click.option(
+    "-o",
+    "--overwrite",
+    is_flag=True,
+    default=False,
+    help="pass it to overwrite output GTFS zips if they exist",
+)
+@compression_options
+@click.argument("input_gtfs_zip", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_directory", type=click.Path(file_okay=False))
+@click.argument("shards_count", type=click.IntRange(min=1))
+def shard(
+    overwrite: bool,
+    compression_profile: str,
+    compression: typing.Optional[str],
+    compression_level: typing.Optional[int],
+    input_gtfs_zip: str,
+    output_directory: str,
+    shards_count: int,
+):
+    """
+    Splits INPUT_GTFS_ZIP into SHARDS_COUNT GTFS zips in OUTPUT_DIRECTORY, routes are
+    assigned to GTFS zips so that they have balanced numbers of stop times
+    """
+    compression_method, compression_level = resolve_compression(
+        compression_profile, compression, compression_level
+    )
+    try:
+        shards = perform_shard(
+            input_gtfs_zip,
+            output_directory,
+            shards_count,
+            overwrite,
+            compression_method,
+            compression_level,
+        )
+    except (FileExistsError, FileNotFoundError, PermissionError, ValueError) as e:
+        raise click.ClickException(str(e))
+    except zipfile.BadZipFile as e:
+        raise click.ClickException(f"Input GTFS zip is invalid: {e}.")
+    for gtfs_shard in shards:
+        click.echo(
+            f"{gtfs_shard.output_gtfs_zip}: {len(gtfs_shard.route_ids)} route(s), "
+            f"{gtfs_shard.stop_times_count} stop times"
+        )
+
+
+if __name__ == "__main__":
+    shard()
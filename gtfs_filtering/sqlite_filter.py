@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+import contextlib
+import csv
+import io
+import itertools
+import sqlite3
+import typing
+import zipfile
+
+from gtfs_filtering import csv_filter, stations
+
+# SQLite page cache per connection (negative value: KiB), larger tables spill to disk
+CACHE_SIZE_KIB = 64 * 1024
+
+REQUIRED_GTFS_FILES = ["agency.txt", "stops.txt", "routes.txt", "trips.txt"]
+GTFS_FILES = [
+    "agency.txt",
+    "stops.txt",
+    "routes.txt",
+    "trips.txt",
+    "stop_times.txt",
+    "calendar.txt",
+    "calendar_dates.txt",
+    "areas.txt",
+    "stop_areas.txt",
+    "shapes.txt",
+    "frequencies.txt",
+    "transfers.txt",
+    "pathways.txt",
+    "levels.txt",
+    "attributions.txt",
+    "fare_attributes.txt",
+    "fare_rules.txt",
+]
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _table_name(filename: str) -> str:
+    return filename.removesuffix(".txt")
+
+
+def connect(database: str) -> sqlite3.Connection:
+    """
+    Opens a database for loading and filtering GTFS files
+
+    Durability is traded for speed (database is a temporary file) and temporary
+    tables and indexes are stored on disk so that feeds larger than memory can be filtered.
+
+    Args:
+        database: database file, created if missing
+
+    Returns:
+        Connection to database
+    """
+    connection = sqlite3.connect(database, isolation_level=None)
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("PRAGMA temp_store = FILE")
+    connection.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    return connection
+
+
+def load_gtfs_file(
+    input_zip: zipfile.ZipFile, filename: str, connection: sqlite3.Connection
+) -> typing.List[str]:
+    """
+    Bulk-loads a CSV member of a zip into a table of the same name (without '.txt')
+
+    All values are loaded as TEXT, missing trailing values as empty strings. Rows are
+    streamed from the zip member to the database, the member is never fully loaded in memory.
+
+    Args:
+        input_zip: zip to read filename from
+        filename: CSV member to load
+        connection: connection to the database to load filename into
+
+    Returns:
+        Columns of loaded table
+
+    Raises:
+        KeyError when filename is not in input_zip
+        ValueError when filename is empty or blank, or a row has more fields than its header
+    """
+    with io.TextIOWrapper(
+        input_zip.open(filename), encoding="utf-8-sig", newline=""
+    ) as gtfs_file:
+        reader = csv.reader(gtfs_file)
+        # blank lines before header are skipped
+        columns = next((row for row in reader if "".join(row).strip()), None)
+        if not columns:
+            raise ValueError(f"No columns to parse from file '{filename}'.")
+        column_count = len(columns)
+        table = _quote(_table_name(filename))
+        connection.execute(f"DROP TABLE IF EXISTS {table}")
+        connection.execute(
+            f"CREATE TABLE {table} ({', '.join(_quote(c) + ' TEXT' for c in columns)})"
+        )
+        # connection is in autocommit mode, a single transaction avoids a commit per row
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                f"INSERT INTO {table} VALUES ({', '.join('?' * column_count)})",
+                _padded_rows(reader, column_count, filename),
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+    return columns
+
+
+def _padded_rows(
+    reader: typing.Any, column_count: int, filename: str
+) -> typing.Iterator[typing.List[str]]:
+    # skips blank lines and pads short rows, overlong rows would silently lose values
+    for row in reader:
+        if len(row) > column_count:
+            raise ValueError(
+                f"Expected {column_count} fields in line {reader.line_num} of file "
+                f"'{filename}', saw {len(row)}."
+            )
+        if row:
+            yield row + [""] * (column_count - len(row))
+
+
+def _has_header(input_zip: zipfile.ZipFile, filename: str) -> bool:
+    with input_zip.open(filename) as gtfs_file:
+        return bool(csv_filter.read_csv_header(gtfs_file))
+
+
+def _filter_table_to_zip(
+    connection: sqlite3.Connection,
+    table: str,
+    where: str,
+    output_zip: zipfile.ZipFile,
+) -> None:
+    with io.TextIOWrapper(
+        output_zip.open(f"{table}.txt", "w"), encoding="utf-8", newline=""
+    ) as gtfs_file:
+        writer = csv.writer(gtfs_file, lineterminator="\n")
+        # rows are written in input order
+        cursor = connection.execute(
+            f"SELECT * FROM {_quote(table)} WHERE {where} ORDER BY rowid"
+        )
+        writer.writerow([description[0] for description in cursor.description])
+        writer.writerows(cursor)
+
+
+def _fetch_columns(
+    connection: sqlite3.Connection, query: str, columns_count: int
+) -> typing.List[typing.List[str]]:
+    # values of each column of query result, in rows order
+    columns: typing.List[typing.List[str]] = [[] for _ in range(columns_count)]
+    for row in connection.execute(query):
+        for column, value in zip(columns, row):
+            column.append(value)
+    return columns
+
+
+def filter_gtfs_zip(
+    input_zip: zipfile.ZipFile,
+    output_zip: zipfile.ZipFile,
+    database: str,
+    route_ids: typing.Optional[typing.Iterable[str]] = None,
+    trip_ids: typing.Optional[typing.Iterable[str]] = None,
+) -> typing.Set[str]:
+    """
+    Filters all GTFS files of a zip by route id or trip id through a SQLite database
+
+    GTFS files are bulk-loaded into database, kept keys are computed with indexed SQL
+    queries and kept rows are streamed from database to output_zip, so GTFS files do
+    not need to fit in memory.
+    Same relations as gtfs_filtering.core.filter_by_route_id/filter_by_trip_id.
+    Members which are not filtered (feed_info.txt, ...) are not written to output_zip.
+
+    Args:
+        input_zip: GTFS zip to filter, required GTFS files must be present
+        output_zip: zip to write filtered GTFS files to
+        database: database file to load GTFS files into (temporary, its content is replaced)
+        route_ids: route ids to keep (filtering by route id)
+        trip_ids: trip ids to keep (filtering by trip id)
+
+    Returns:
+        Filtered GTFS files written to output_zip
+
+    Raises:
+        KeyError when a column required for filtering is missing
+        ValueError when a required GTFS file is empty
+        ValueError when neither or both route_ids and trip_ids are set
+    """
+    if (route_ids is None) == (trip_ids is None):
+        raise ValueError("Exactly one of route_ids and trip_ids must be set.")
+    members = set(input_zip.namelist())
+
+    with contextlib.closing(connect(database)) as connection:
+        columns: typing.Dict[str, typing.List[str]] = {}
+        for filename in GTFS_FILES:
+            if filename not in members:
+                continue
+            if filename not in REQUIRED_GTFS_FILES and not _has_header(
+                input_zip, filename
+            ):
+                # empty or blank optional files are ignored (copied as is), as with pandas
+                continue
+            columns[_table_name(filename)] = load_gtfs_file(
+                input_zip, filename, connection
+            )
+        written: typing.Set[str] = set()
+
+        def has_column(table: str, column: str) -> bool:
+            return column in columns.get(table, [])
+
+        def column_in(table: str, column: str, keys: str, optional=False) -> str:
+            # optional: rows with an empty value are kept and filter is ignored if column is missing
+            if not has_column(table, column):
+                if optional:
+                    return "1"
+                raise KeyError(f"Column '{column}' is missing from file '{table}.txt'.")
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {_quote(f'{table}_{column}')} "
+                f"ON {_quote(table)} ({_quote(column)})"
+            )
+            condition = f"{_quote(column)} IN (SELECT value FROM {keys})"
+            if optional:
+                condition = f"({_quote(column)} = '' OR {condition})"
+            return condition
+
+        def create_keys(keys: str, table: str, column: str, where: str) -> int:
+            # distinct non-empty values of column from rows of table matching where
+            connection.execute(
+                f"CREATE TEMP TABLE {keys} (value TEXT PRIMARY KEY) WITHOUT ROWID"
+            )
+            if has_column(table, column):
+                connection.execute(
+                    f"INSERT OR IGNORE INTO {keys} SELECT {_quote(column)} "
+                    f"FROM {_quote(table)} WHERE {where} AND {_quote(column)} != ''"
+                )
+            return connection.execute(f"SELECT COUNT(*) FROM {keys}").fetchone()[0]
+
+        def write(table: str, where: str) -> None:
+            written.add(f"{table}.txt")
+            _filter_table_to_zip(connection, table, where, output_zip)
+
+        connection.execute(
+            "CREATE TEMP TABLE filter_values (value TEXT PRIMARY KEY) WITHOUT ROWID"
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO filter_values VALUES (?)",
+            ((value,) for value in (route_ids if route_ids is not None else trip_ids)),
+        )
+        if route_ids is not None:
+            trips_where = column_in("trips", "route_id", "filter_values")
+        else:
+            trips_where = column_in("trips", "trip_id", "filter_values")
+        create_keys("trip_keys", "trips", "trip_id", trips_where)
+        if route_ids is not None:
+            connection.execute(
+                "CREATE TEMP TABLE route_keys AS SELECT value FROM filter_values"
+            )
+        else:
+            create_keys("route_keys", "trips", "route_id", trips_where)
+        write("trips", trips_where)
+
+        routes_where = column_in("routes", "route_id", "route_keys")
+        write("routes", routes_where)
+        if create_keys("agency_keys", "routes", "agency_id", routes_where):
+            # agency_id is not mandatory in routes.txt
+            write("agency", column_in("agency", "agency_id", "agency_keys"))
+
+        if "stop_times" in columns:
+            stop_times_where = column_in("stop_times", "trip_id", "trip_keys")
+            write("stop_times", stop_times_where)
+            create_keys("stop_keys", "stop_times", "stop_id", stop_times_where)
+        else:
+            create_keys("stop_keys", "stop_times", "stop_id", "0")
+        # stops are kept with all nodes of their stations, see stations.close_station_hierarchy
+        if not has_column("stops", "stop_id"):
+            raise KeyError("Column 'stop_id' is missing from file 'stops.txt'.")
+        has_parent_station = has_column("stops", "parent_station")
+        stop_ids, parent_stations = _fetch_columns(
+            connection,
+            f"SELECT stop_id, {'parent_station' if has_parent_station else 'NULL'} "
+            "FROM stops",
+            2,
+        )
+        pathways_from_stop_ids, pathways_to_stop_ids = (), ()
+        if has_column("pathways", "from_stop_id") and has_column(
+            "pathways", "to_stop_id"
+        ):
+            pathways_from_stop_ids, pathways_to_stop_ids = _fetch_columns(
+                connection, "SELECT from_stop_id, to_stop_id FROM pathways", 2
+            )
+        (seed_stop_ids,) = _fetch_columns(connection, "SELECT value FROM stop_keys", 1)
+        kept_stops = stations.close_station_hierarchy(
+            stop_ids,
+            parent_stations if has_parent_station else None,
+            seed_stop_ids,
+            pathways_from_stop_ids,
+            pathways_to_stop_ids,
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO stop_keys VALUES (?)",
+            ((stop_id,) for stop_id in itertools.compress(stop_ids, kept_stops)),
+        )
+        stops_where = column_in("stops", "stop_id", "stop_keys")
+        write("stops", stops_where)
+
+        create_keys("service_keys", "trips", "service_id", trips_where)
+        for table in ["calendar", "calendar_dates"]:
+            if table in columns:
+                write(table, column_in(table, "service_id", "service_keys"))
+
+        if "areas" in columns and "stop_areas" in columns:
+            stop_areas_where = column_in("stop_areas", "stop_id", "stop_keys")
+            write("stop_areas", stop_areas_where)
+            create_keys("area_keys", "stop_areas", "area_id", stop_areas_where)
+            write("areas", column_in("areas", "area_id", "area_keys"))
+
+        if create_keys("shape_keys", "trips", "shape_id", trips_where) and (
+            "shapes" in columns
+        ):
+            write("shapes", column_in("shapes", "shape_id", "shape_keys"))
+
+        if "frequencies" in columns:
+            write("frequencies", column_in("frequencies", "trip_id", "trip_keys"))
+
+        if "transfers" in columns:
+            write(
+                "transfers",
+                " AND ".join(
+                    [
+                        column_in("transfers", "from_stop_id", "stop_keys"),
+                        column_in("transfers", "to_stop_id", "stop_keys"),
+                        column_in("transfers", "from_route_id", "route_keys", True),
+                        column_in("transfers", "to_route_id", "route_keys", True),
+                        column_in("transfers", "from_trip_id", "trip_keys", True),
+                        column_in("transfers", "to_trip_id", "trip_keys", True),
+                    ]
+                ),
+            )
+
+        if "pathways" in columns:
+            write(
+                "pathways",
+                column_in("pathways", "from_stop_id", "stop_keys")
+                + " AND "
+                + column_in("pathways", "to_stop_id", "stop_keys"),
+            )
+
+        if create_keys("level_keys", "stops", "level_id", stops_where) and (
+            "levels" in columns
+        ):
+            write("levels", column_in("levels", "level_id", "level_keys"))
+
+        if "attributions" in columns:
+            write(
+                "attributions",
+                " AND ".join(
+                    [
+                        column_in("attributions", "agency_id", "agency_keys", True),
+                        column_in("attributions", "route_id", "route_keys", True),
+                        column_in("attributions", "trip_id", "trip_keys", True),
+                    ]
+                ),
+            )
+
+        if "fare_rules" in columns:
+            # rules without route or zone apply to every route or zone
+            fare_rules_conditions = [
+                column_in("fare_rules", "route_id", "route_keys", True)
+            ]
+            if has_column("stops", "zone_id"):
+                create_keys("zone_keys", "stops", "zone_id", stops_where)
+                fare_rules_conditions += [
+                    column_in("fare_rules", column, "zone_keys", True)
+                    for column in ["origin_id", "destination_id", "contains_id"]
+                ]
+        if "fare_attributes" in columns:
+            # agency_id is only required when there are several agencies
+            fare_attributes_where = column_in(
+                "fare_attributes", "agency_id", "agency_keys", True
+            )
+            if "fare_rules" in columns:
+                # a fare without rules applies everywhere: drop fares whose rules were all dropped
+                create_keys("dropped_fare_keys", "fare_rules", "fare_id", "1")
+                connection.execute(
+                    "DELETE FROM dropped_fare_keys WHERE value IN (SELECT fare_id "
+                    f"FROM fare_rules WHERE {' AND '.join(fare_rules_conditions)})"
+                )
+                fare_attributes_where += " AND NOT " + column_in(
+                    "fare_attributes", "fare_id", "dropped_fare_keys"
+                )
+                create_keys(
+                    "fare_keys", "fare_attributes", "fare_id", fare_attributes_where
+                )
+                fare_rules_conditions.append(
+                    column_in("fare_rules", "fare_id", "fare_keys")
+                )
+            write("fare_attributes", fare_attributes_where)
+        if "fare_rules" in columns:
+            write("fare_rules", " AND ".join(fare_rules_conditions))
+
+    return written
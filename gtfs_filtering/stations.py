@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import typing
+
+import numpy as np
+import pandas as pd
+
+
+def connected_component_labels(
+    nodes_count: int, edge_starts: np.ndarray, edge_ends: np.ndarray
+) -> np.ndarray:
+    """
+    Labels connected components of an undirected graph by fixed-point label propagation
+
+    Each node starts with its own label, then each edge lowers the labels of its nodes to their
+    minimum and labels jump to the label of their label, until no label changes.
+
+    Args:
+        nodes_count: number of nodes, nodes are integers from 0 to nodes_count - 1
+        edge_starts: (n,) first nodes of edges
+        edge_ends: (n,) second nodes of edges
+
+    Returns:
+        (nodes_count,) label of each node, the smallest node of its connected component
+    """
+    labels = np.arange(nodes_count)
+    while True:
+        edge_labels = np.minimum(labels[edge_starts], labels[edge_ends])
+        next_labels = labels.copy()
+        np.minimum.at(next_labels, edge_starts, edge_labels)
+        np.minimum.at(next_labels, edge_ends, edge_labels)
+        next_labels = next_labels[next_labels]
+        if np.array_equal(next_labels, labels):
+            return labels
+        labels = next_labels
+
+
+def close_station_hierarchy(
+    stop_ids: typing.Sequence,
+    parent_stations: typing.Optional[typing.Sequence],
+    seed_stop_ids: typing.Iterable,
+    pathways_from_stop_ids: typing.Sequence = (),
+    pathways_to_stop_ids: typing.Sequence = (),
+) -> np.ndarray:
+    """
+    Selects stops connected to seed stops by the station hierarchy or by pathways
+
+    Stops linked by parent_station (station, platforms, entrances, generic nodes, boarding areas)
+    or by a pathway are connected, all nodes of the stations of seed stops are kept whatever
+    their depth, as well as nodes only reachable through pathways.
+    Stop ids are integer-coded so that the closure runs on adjacency arrays.
+
+    Args:
+        stop_ids: stop_id of each stop
+        parent_stations: parent_station of each stop (empty or null for no parent),
+        None when stops have no parent_station column
+        seed_stop_ids: stop ids to keep, e.g. stops served by kept trips
+        pathways_from_stop_ids: from_stop_id of each pathway
+        pathways_to_stop_ids: to_stop_id of each pathway
+
+    Returns:
+        Mask of stops to keep
+    """
+    codes, unique_stop_ids = pd.factorize(np.asarray(stop_ids, dtype=object))
+    stop_index = pd.Index(unique_stop_ids)
+    edge_starts = [np.empty(0, dtype=np.intp)]
+    edge_ends = [np.empty(0, dtype=np.intp)]
+    if parent_stations is not None:
+        parents = stop_index.get_indexer(np.asarray(parent_stations, dtype=object))
+        has_parent = (codes >= 0) & (parents >= 0)
+        edge_starts.append(codes[has_parent])
+        edge_ends.append(parents[has_parent])
+    if len(pathways_from_stop_ids):
+        from_codes = stop_index.get_indexer(
+            np.asarray(pathways_from_stop_ids, dtype=object)
+        )
+        to_codes = stop_index.get_indexer(
+            np.asarray(pathways_to_stop_ids, dtype=object)
+        )
+        known = (from_codes >= 0) & (to_codes >= 0)
+        edge_starts.append(from_codes[known])
+        edge_ends.append(to_codes[known])
+    labels = connected_component_labels(
+        len(stop_index), np.concatenate(edge_starts), np.concatenate(edge_ends)
+    )
+    seeds = stop_index.get_indexer(np.asarray(list(seed_stop_ids), dtype=object))
+    kept_labels = np.zeros(len(stop_index), dtype=bool)
+    kept_labels[labels[seeds[seeds >= 0]]] = True
+    kept = np.zeros(len(codes), dtype=bool)
+    known = codes >= 0
+    kept[known] = kept_labels[labels[codes[known]]]
+    return kept
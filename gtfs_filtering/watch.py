@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+import concurrent.futures
+import ctypes
+import ctypes.util
+import dataclasses
+import json
+import logging
+import multiprocessing
+import os
+import select
+import struct
+import time
+import typing
+import zipfile
+
+import click
+
+from gtfs_filtering.core import (
+    BatchFilterResult,
+    CompressionMethod,
+    Engine,
+    FilterExpression,
+    FilterType,
+    OutputFormat,
+    ValueMatch,
+    _check_compression_level,
+    parse_filter_spec,
+    perform_filter,
+    read_gtfs_zip,
+)
+
+DEFAULT_DEBOUNCE_SECONDS = 5.0
+DEFAULT_POLL_INTERVAL_SECONDS = 2.0
+
+# inotify constants, see inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o00004000
+IN_CLOEXEC = 0o02000000
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+INOTIFY_READ_SIZE = 64 * 1024
+
+# (size, modification time) of a file, changes while the file is being written
+FileSignature = typing.Tuple[int, int]
+
+
+@dataclasses.dataclass
+class FilterJob:
+    """
+    Filter applied to each new GTFS zip, its output is saved in output_directory
+    under the GTFS zip filename
+    """
+
+    name: str
+    output_directory: str
+    filter_type: FilterType = FilterType.ROUTE_ID
+    filter_values: typing.List[str] = dataclasses.field(default_factory=list)
+    filter_expression: typing.Optional[FilterExpression] = None
+    value_match: ValueMatch = ValueMatch.EXACT
+    engine: Engine = Engine.PANDAS
+    output_format: OutputFormat = OutputFormat.GTFS
+    trim: bool = False
+    compression: CompressionMethod = CompressionMethod.DEFLATED
+    compression_level: typing.Optional[int] = None
+
+
+def read_jobs_config(jobs_config: str) -> typing.List[FilterJob]:
+    """
+    Reads filter jobs from a JSON config file
+
+    Config is an object with a 'jobs' list, each job has a 'name', an 'output_directory' and
+    either 'filter_type' (default route_id) and 'filter_values' or a 'filter_spec' (see
+    gtfs_filtering.core.parse_filter_spec). Optional keys: 'value_match', 'engine',
+    'output_format', 'trim', 'compression' and 'compression_level'.
+
+    Args:
+        jobs_config: fullpath to JSON config file
+
+    Returns:
+        Filter jobs
+
+    Raises:
+        FileNotFoundError when jobs_config does not exist
+        ValueError when jobs config is invalid
+    """
+    with open(jobs_config) as f:
+        try:
+            config = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid jobs config file '{jobs_config}': {e}.")
+    if not isinstance(config, dict) or not isinstance(config.get("jobs"), list):
+        raise ValueError("Invalid jobs config, expected an object with a 'jobs' list.")
+    jobs = []
+    for job_config in config["jobs"]:
+        if not isinstance(job_config, dict):
+            raise ValueError("Invalid jobs config, jobs must be objects.")
+        job_config = dict(job_config)
+        try:
+            name = job_config.pop("name")
+            output_directory = job_config.pop("output_directory")
+        except KeyError as e:
+            raise ValueError(f"Invalid jobs config, job is missing {e}.")
+        filter_spec = job_config.pop("filter_spec", None)
+        compression_level = job_config.pop("compression_level", None)
+        try:
+            job = FilterJob(
+                name=name,
+                output_directory=output_directory,
+                filter_type=FilterType(job_config.pop("filter_type", "route_id")),
+                filter_values=[str(v) for v in job_config.pop("filter_values", [])],
+                filter_expression=(
+                    None if filter_spec is None else parse_filter_spec(filter_spec)
+                ),
+                value_match=ValueMatch(job_config.pop("value_match", "exact")),
+                engine=Engine(job_config.pop("engine", "pandas")),
+                output_format=OutputFormat(job_config.pop("output_format", "gtfs")),
+                trim=bool(job_config.pop("trim", False)),
+                compression=CompressionMethod(
+                    job_config.pop("compression", "deflated")
+                ),
+                compression_level=(
+                    None if compression_level is None else int(compression_level)
+                ),
+            )
+            _check_compression_level(job.compression, job.compression_level)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid jobs config, job '{name}': {e}")
+        if job_config:
+            raise ValueError(
+                f"Invalid jobs config, job '{name}' has unknown keys: "
+                f"{', '.join(sorted(job_config))}."
+            )
+        if (job.filter_expression is None) == (not job.filter_values):
+            raise ValueError(
+                f"Invalid jobs config, job '{name}' expects either filter values "
+                "or a filter spec."
+            )
+        jobs.append(job)
+    if not jobs:
+        raise ValueError("Invalid jobs config, no job.")
+    output_directories = [os.path.abspath(job.output_directory) for job in jobs]
+    if len(set(output_directories)) != len(output_directories):
+        raise ValueError(
+            "Invalid jobs config, jobs must have distinct output directories."
+        )
+    return jobs
+
+
+def filter_feed(
+    input_gtfs_zip: str, jobs: typing.List[FilterJob]
+) -> typing.List[BatchFilterResult]:
+    """
+    Applies all jobs to a GTFS zip, GTFS files are parsed once for all pandas engine jobs
+
+    A failing job does not stop the other jobs, its error is reported in its result instead.
+
+    Args:
+        input_gtfs_zip: fullpath to GTFS zip to filter
+        jobs: filter jobs, outputs are overwritten
+
+    Returns:
+        One result per job, in jobs order
+    """
+    parsed_input_gtfs = None
+    parse_error = None
+    if any(job.engine == Engine.PANDAS for job in jobs):
+        try:
+            parsed_input_gtfs = read_gtfs_zip(input_gtfs_zip)
+        except Exception as e:
+            parse_error = f"{type(e).__name__}: {e}"
+    results = []
+    for job in jobs:
+        output_gtfs_zip = os.path.join(
+            job.output_directory, os.path.basename(input_gtfs_zip)
+        )
+        start = time.perf_counter()
+        error = parse_error if job.engine == Engine.PANDAS else None
+        if error is None:
+            try:
+                os.makedirs(job.output_directory, exist_ok=True)
+                perform_filter(
+                    input_gtfs_zip,
+                    output_gtfs_zip,
+                    job.filter_type,
+                    job.filter_values,
+                    True,
+                    compression=job.compression,
+                    compression_level=job.compression_level,
+                    engine=job.engine,
+                    output_format=job.output_format,
+                    trim=job.trim,
+                    filter_expression=job.filter_expression,
+                    value_match=job.value_match,
+                    parsed_input_gtfs=parsed_input_gtfs,
+                )
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+        results.append(
+            BatchFilterResult(
+                input_gtfs_zip, output_gtfs_zip, time.perf_counter() - start, error
+            )
+        )
+    return results
+
+
+class InotifyWatcher:
+    """
+    Waits for files closed after writing or moved into a directory, with inotify (Linux)
+    """
+
+    def __init__(self, directory: str):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("C library not found.")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available.")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        watch_descriptor = libc.inotify_add_watch(
+            self.fd,
+            os.fsencode(directory),
+            IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE | IN_MOVED_FROM,
+        )
+        if watch_descriptor < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, os.strerror(errno), directory)
+
+    def wait(self, timeout: float) -> typing.Set[str]:
+        """
+        Waits at most timeout seconds for events
+
+        Returns:
+            Names of files closed after writing, moved into or out of the directory or
+            deleted
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        names: typing.Set[str] = set()
+        if not readable:
+            return names
+        try:
+            data = os.read(self.fd, INOTIFY_READ_SIZE)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset + INOTIFY_EVENT_HEADER.size <= len(data):
+            _, _, _, name_length = INOTIFY_EVENT_HEADER.unpack_from(data, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = data[offset : offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Fallback of InotifyWatcher: waits timeout seconds, changes are detected by scanning
+    """
+
+    def wait(self, timeout: float) -> typing.Set[str]:
+        time.sleep(timeout)
+        return set()
+
+    def close(self) -> None:
+        pass
+
+
+def _file_signature(path: str) -> typing.Optional[FileSignature]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _scan_gtfs_zips(directory: str) -> typing.Set[str]:
+    with os.scandir(directory) as entries:
+        return {
+            entry.name
+            for entry in entries
+            if entry.is_file() and entry.name.lower().endswith(".zip")
+        }
+
+
+def watch_directory(
+    input_directory: str,
+    jobs: typing.List[FilterJob],
+    on_results: typing.Callable[[typing.List[BatchFilterResult]], None],
+    workers: typing.Optional[int] = None,
+    debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+    poll_interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS,
+    use_inotify: bool = True,
+    should_stop: typing.Callable[[], bool] = lambda: False,
+) -> None:
+    """
+    Applies jobs to GTFS zips present or dropped in input_directory, until should_stop
+
+    New files are detected with inotify (polling when unavailable or use_inotify is False).
+    A GTFS zip is filtered once it is unchanged (size and modification time) for
+    debounce_seconds and it is a complete zip, so partially written zips are not filtered.
+    A GTFS zip replaced by a new version is filtered again. Each GTFS zip is filtered by a
+    worker of a process pool, see filter_feed. When a worker dies (e.g. killed when running
+    out of memory), GTFS zips it interrupted are reported as failed and the pool is
+    recreated.
+
+    Args:
+        input_directory: directory to watch
+        jobs: filter jobs applied to each GTFS zip
+        on_results: called with the results of each filtered GTFS zip
+        workers: number of worker processes, defaults to the number of CPUs
+        debounce_seconds: delay without change before a GTFS zip is filtered
+        poll_interval_seconds: delay between scans when polling, between checks otherwise
+        use_inotify: flag to detect new files with inotify when available
+        should_stop: called between checks, watching stops when it returns True
+    """
+    watcher: typing.Union[InotifyWatcher, PollingWatcher] = PollingWatcher()
+    if use_inotify:
+        try:
+            watcher = InotifyWatcher(input_directory)
+        except OSError as e:
+            logging.warning(f"inotify is not available ({e}), polls {input_directory}")
+    # name -> (signature, time it was first seen) of GTFS zips waiting to be stable
+    pending: typing.Dict[str, typing.Tuple[FileSignature, float]] = {}
+    # name -> signature of GTFS zips already submitted
+    submitted: typing.Dict[str, FileSignature] = {}
+    # future -> (path, executor) of GTFS zips being filtered
+    futures: typing.Dict[
+        concurrent.futures.Future,
+        typing.Tuple[str, concurrent.futures.ProcessPoolExecutor],
+    ] = {}
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+
+    def report(future: concurrent.futures.Future) -> None:
+        nonlocal executor
+        path, future_executor = futures.pop(future)
+        try:
+            results = future.result()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            results = [
+                BatchFilterResult(
+                    path,
+                    os.path.join(job.output_directory, os.path.basename(path)),
+                    0.0,
+                    error,
+                )
+                for job in jobs
+            ]
+            if (
+                isinstance(e, concurrent.futures.process.BrokenProcessPool)
+                and future_executor is executor
+            ):
+                # a worker died, the pool does not accept GTFS zips anymore
+                executor.shutdown(wait=False)
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        on_results(results)
+
+    changed_names = _scan_gtfs_zips(input_directory)
+    last_scan = time.monotonic()
+    try:
+        while not should_stop():
+            now = time.monotonic()
+            if isinstance(watcher, PollingWatcher) or (
+                now - last_scan >= poll_interval_seconds and pending
+            ):
+                scanned_names = _scan_gtfs_zips(input_directory)
+                for name in submitted.keys() - scanned_names:
+                    # GTFS zips removed since they were filtered
+                    del submitted[name]
+                changed_names |= scanned_names
+                last_scan = now
+            for name in changed_names:
+                signature = _file_signature(os.path.join(input_directory, name))
+                if signature is None:
+                    pending.pop(name, None)
+                    submitted.pop(name, None)
+                elif submitted.get(name) == signature:
+                    pending.pop(name, None)
+                elif name not in pending or pending[name][0] != signature:
+                    # new or still being written: restart debounce delay
+                    pending[name] = (signature, now)
+            changed_names = set()
+
+            for name, (signature, since) in list(pending.items()):
+                path = os.path.join(input_directory, name)
+                if now - since < debounce_seconds:
+                    continue
+                if not zipfile.is_zipfile(path):
+                    # incomplete zip (no central directory yet), wait for next change
+                    pending[name] = (signature, now)
+                    continue
+                del pending[name]
+                submitted[name] = signature
+                futures[executor.submit(filter_feed, path, jobs)] = (path, executor)
+
+            for future in [future for future in futures if future.done()]:
+                report(future)
+
+            timeout = poll_interval_seconds
+            if pending:
+                timeout = min(timeout, debounce_seconds)
+            if futures:
+                timeout = min(timeout, 0.1)
+            changed_names |= {
+                name for name in watcher.wait(timeout) if name.lower().endswith(".zip")
+            }
+        for future in concurrent.futures.as_completed(list(futures)):
+            report(future)
+    finally:
+        executor.shutdown()
+        watcher.close()
+
+
+@click.command()
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="number of GTFS zips filtered in parallel (default: number of CPUs)",
+)
+@click.option(
+    "--debounce",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_DEBOUNCE_SECONDS,
+    help="seconds a GTFS zip must stay unchanged before being filtered",
+)
+@click.option(
+    "--poll-interval",
+    type=click.FloatRange(min=0.1),
+    default=DEFAULT_POLL_INTERVAL_SECONDS,
+    help="seconds between scans of input directory when polling",
+)
+@click.option(
+    "--polling",
+    is_flag=True,
+    default=False,
+    help="pass it to poll input directory instead of using inotify",
+)
+@click.argument("input_directory", type=click.Path(exists=True, file_okay=False))
+@click.argument("jobs_config", type=click.Path(exists=True, dir_okay=False))
+def watch(
+    workers: typing.Optional[int],
+    debounce: float,
+    poll_interval: float,
+    polling: bool,
+    input_directory: str,
+    jobs_config: str,
+):
+    """
+    Applies filter jobs of JOBS_CONFIG (JSON) to every GTFS zip dropped in INPUT_DIRECTORY
+    """
+    try:
+        jobs = read_jobs_config(jobs_config)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    def echo_results(results: typing.List[BatchFilterResult]) -> None:
+        for job, result in zip(jobs, results):
+            status = "OK" if result.succeeded else "FAILED"
+            line = (
+                f"{status:<6} {job.name}: {result.input_gtfs_zip} "
+                f"({result.elapsed_seconds:.2f}s)"
+            )
+            if not result.succeeded:
+                line += f": {result.error}"
+            click.echo(line)
+
+    click.echo(f"watching {input_directory} ({len(jobs)} job(s)), Ctrl+C to stop")
+    try:
+        watch_directory(
+            input_directory,
+            jobs,
+            echo_results,
+            workers,
+            debounce,
+            poll_interval,
+            use_inotify=not polling,
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # required by process pool in pyinstaller executable
+    watch()
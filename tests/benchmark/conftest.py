@@ -0,0 +1,71 @@
+import io
+import os
+import random
+import zipfile
+
+import pandas as pd
+import pytest
+
+# real GTFS zip to benchmark, a synthetic GTFS is generated when not set
+BENCHMARK_GTFS_ENV = "GTFS_BENCHMARK_FEED"
+# number of trips of the synthetic GTFS
+BENCHMARK_TRIPS_ENV = "GTFS_BENCHMARK_TRIPS"
+DEFAULT_BENCHMARK_TRIPS = 2000
+STOPS_PER_TRIP = 30
+ROUTES = 20
+
+
+def write_synthetic_gtfs_zip(path: str, trips_count: int) -> str:
+    rng = random.Random(42)
+    stop_ids = [f"STOP_{i}" for i in range(STOPS_PER_TRIP * ROUTES)]
+    route_ids = [f"ROUTE_{i}" for i in range(ROUTES)]
+    files = {
+        "agency.txt": "agency_id,agency_name,agency_url,agency_timezone\n"
+        "A,Agency,http://agency.example,Europe/Paris\n",
+        "stops.txt": "stop_id,stop_name,stop_lat,stop_lon,parent_station\n"
+        + "".join(
+            f"{stop_id},Stop {stop_id},{48 + rng.random():.6f},{2 + rng.random():.6f},\n"
+            for stop_id in stop_ids
+        ),
+        "routes.txt": "route_id,agency_id,route_short_name,route_type\n"
+        + "".join(f"{route_id},A,{route_id},3\n" for route_id in route_ids),
+        "trips.txt": "route_id,service_id,trip_id\n"
+        + "".join(
+            f"{route_ids[i % ROUTES]},WEEK,TRIP_{i}\n" for i in range(trips_count)
+        ),
+    }
+    stop_times = io.StringIO()
+    stop_times.write("trip_id,arrival_time,departure_time,stop_id,stop_sequence\n")
+    for i in range(trips_count):
+        route = i % ROUTES
+        start = 5 * 3600 + (i // ROUTES) * 300
+        for sequence in range(STOPS_PER_TRIP):
+            seconds = start + sequence * 90
+            hhmmss = f"{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+            stop_id = stop_ids[route * STOPS_PER_TRIP + sequence]
+            stop_times.write(f"TRIP_{i},{hhmmss},{hhmmss},{stop_id},{sequence}\n")
+    files["stop_times.txt"] = stop_times.getvalue()
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as gtfs_zip:
+        for filename, content in files.items():
+            gtfs_zip.writestr(filename, content)
+    return path
+
+
+@pytest.fixture(scope="session")
+def benchmark_gtfs_zip(tmp_path_factory) -> str:
+    path = os.environ.get(BENCHMARK_GTFS_ENV)
+    if path:
+        assert os.path.isfile(path), f"{path} should exist"
+        return path
+    trips_count = int(os.environ.get(BENCHMARK_TRIPS_ENV, DEFAULT_BENCHMARK_TRIPS))
+    return write_synthetic_gtfs_zip(
+        os.path.join(tmp_path_factory.mktemp("benchmark"), "gtfs.zip"), trips_count
+    )
+
+
+@pytest.fixture(scope="session")
+def benchmark_route_ids(benchmark_gtfs_zip) -> list:
+    """all route ids: filtering keeps the whole GTFS, worst case for writing output"""
+    with zipfile.ZipFile(benchmark_gtfs_zip) as gtfs_zip:
+        routes = pd.read_csv(gtfs_zip.open("routes.txt"), dtype=str)
+    return routes["route_id"].tolist()
@@ -0,0 +1,43 @@
+import os
+import time
+
+import pytest
+
+from gtfs_filtering.core import CompressionProfile, FilterType, perform_filter
+
+
+@pytest.fixture(scope="module")
+def compression_results(benchmark_gtfs_zip, benchmark_route_ids, tmp_path_factory):
+    output_directory = tmp_path_factory.mktemp("compression")
+    results = {}
+    for profile in CompressionProfile:
+        output_gtfs = os.path.join(output_directory, f"{profile}.zip")
+        start = time.perf_counter()
+        perform_filter(
+            benchmark_gtfs_zip,
+            output_gtfs,
+            FilterType.ROUTE_ID,
+            benchmark_route_ids,
+            False,
+            compression=profile.method,
+            compression_level=profile.level,
+        )
+        results[profile] = (time.perf_counter() - start, os.path.getsize(output_gtfs))
+
+    print(f"\nCompression trade-off for {benchmark_gtfs_zip}")
+    print(f"{'profile':<10} {'time (s)':>10} {'size (bytes)':>14}")
+    for profile, (elapsed_seconds, size) in results.items():
+        print(f"{profile:<10} {elapsed_seconds:>10.2f} {size:>14}")
+    return results
+
+
+def test_compression_benchmark__store_gives_biggest_output(compression_results):
+    store_size = compression_results[CompressionProfile.STORE][1]
+
+    assert all(size <= store_size for _, size in compression_results.values())
+
+
+def test_compression_benchmark__smallest_gives_smallest_output(compression_results):
+    smallest_size = compression_results[CompressionProfile.SMALLEST][1]
+
+    assert all(size >= smallest_size for _, size in compression_results.values())
@@ -0,0 +1,45 @@
+import os
+import shutil
+import subprocess
+import typing
+
+from tests.e2e.conftest import ROOT_FOLDER
+
+BATCH_PATH = os.path.join(ROOT_FOLDER, "dist", "batch")
+
+
+def test_batch__when_filtering_directory__filters_each_gtfs_and_reports_failures(
+    gtfs_nyc: str,
+    gtfs_missing_routes_txt: str,
+    route_ids: typing.List[str],
+    tmp_path,
+):
+    input_directory = os.path.join(tmp_path, "input")
+    output_directory = os.path.join(tmp_path, "output")
+    os.makedirs(input_directory)
+    shutil.copy(gtfs_nyc, input_directory)
+    shutil.copy(gtfs_missing_routes_txt, input_directory)
+
+    output = subprocess.run(
+        [BATCH_PATH, "--workers", "2", input_directory, output_directory, *route_ids],
+        capture_output=True,
+        text=True,
+    )
+
+    assert output.returncode != 0, "command should fail when a GTFS fails"
+    assert os.path.isfile(
+        os.path.join(output_directory, os.path.basename(gtfs_nyc))
+    ), "valid GTFS should be filtered"
+    assert "1 succeeded, 1 failed" in output.stdout, "summary should be displayed"
+    assert "GTFS is invalid: file 'routes.txt' is missing." in output.stdout
+
+
+def test_batch__when_no_gtfs_matches__fails_and_displays_error_message(tmp_path):
+    output = subprocess.run(
+        [BATCH_PATH, os.path.join(tmp_path, "*.zip"), str(tmp_path), "1"],
+        capture_output=True,
+        text=True,
+    )
+
+    assert output.returncode != 0, "command should fail"
+    assert "Error: No GTFS zip found in" in output.stderr
@@ -1,4 +1,5 @@
 import io
+import json
 import os
 import subprocess
 import typing
@@ -182,3 +183,95 @@ def test_cli__when_required_file_is_empty_in_input_gtfs_zip__fails_and_displays_
     assert (
         "Error: No columns to parse from file 'routes.txt'." in output.stderr
     ), "command should display error message to user"
+
+
+@pytest.mark.parametrize("engine", ["csv", "sqlite", "polars"])
+def test_cli__when_engine_is_set__output_has_same_rows_as_pandas_engine(
+    gtfs_nyc: str, tmp_path, route_ids: typing.List[str], engine: str
+):
+    pandas_output_gtfs = os.path.join(tmp_path, "pandas.zip")
+    engine_output_gtfs = os.path.join(tmp_path, f"{engine}.zip")
+
+    pandas_output = subprocess.run(
+        [CLI_PATH, gtfs_nyc, pandas_output_gtfs, *route_ids],
+        capture_output=True,
+        text=True,
+    )
+    engine_output = subprocess.run(
+        [CLI_PATH, "--engine", engine, gtfs_nyc, engine_output_gtfs, *route_ids],
+        capture_output=True,
+        text=True,
+    )
+
+    assert pandas_output.returncode == 0, "command is successful"
+    assert engine_output.returncode == 0, "command is successful"
+    with (
+        zipfile.ZipFile(pandas_output_gtfs) as pandas_zip,
+        zipfile.ZipFile(engine_output_gtfs) as engine_zip,
+    ):
+        assert sorted(engine_zip.namelist()) == sorted(
+            pandas_zip.namelist()
+        ), "output GTFS should have the same files"
+        for filename in pandas_zip.namelist():
+            pd.testing.assert_frame_equal(
+                pd.read_csv(engine_zip.open(filename), dtype=str),
+                pd.read_csv(pandas_zip.open(filename), dtype=str),
+                obj=filename,
+            )
+
+
+def test_cli__when_filter_spec_is_set__filters_by_filter_expression(
+    gtfs_nyc: str, tmp_path, route_ids: typing.List[str]
+):
+    filter_spec = os.path.join(tmp_path, "filter_spec.json")
+    with open(filter_spec, "w") as f:
+        json.dump({"or": [{"route_id": route_ids}]}, f)
+    route_id_output_gtfs = os.path.join(tmp_path, "route_id.zip")
+    filter_spec_output_gtfs = os.path.join(tmp_path, "filter_spec.zip")
+
+    route_id_output = subprocess.run(
+        [CLI_PATH, gtfs_nyc, route_id_output_gtfs, *route_ids],
+        capture_output=True,
+        text=True,
+    )
+    filter_spec_output = subprocess.run(
+        [CLI_PATH, "--filter-spec", filter_spec, gtfs_nyc, filter_spec_output_gtfs],
+        capture_output=True,
+        text=True,
+    )
+
+    assert route_id_output.returncode == 0, "command is successful"
+    assert filter_spec_output.returncode == 0, "command is successful"
+    with (
+        zipfile.ZipFile(route_id_output_gtfs) as route_id_zip,
+        zipfile.ZipFile(filter_spec_output_gtfs) as filter_spec_zip,
+    ):
+        trips = pd.read_csv(filter_spec_zip.open("trips.txt"), dtype=str)
+        expected_trips = pd.read_csv(route_id_zip.open("trips.txt"), dtype=str)
+    pd.testing.assert_frame_equal(trips, expected_trips)
+
+
+def test_cli__when_input_and_output_are_dashes__filters_stdin_to_stdout(
+    gtfs_nyc: str, output_gtfs: str, route_ids: typing.List[str]
+):
+    with open(gtfs_nyc, "rb") as f:
+        gtfs_nyc_bytes = f.read()
+
+    pipe_output = subprocess.run(
+        [CLI_PATH, "-", "-", *route_ids], input=gtfs_nyc_bytes, capture_output=True
+    )
+    file_output = subprocess.run(
+        [CLI_PATH, gtfs_nyc, output_gtfs, *route_ids], capture_output=True, text=True
+    )
+
+    assert pipe_output.returncode == 0, "command is successful"
+    assert file_output.returncode == 0, "command is successful"
+    with (
+        zipfile.ZipFile(io.BytesIO(pipe_output.stdout)) as pipe_zip,
+        zipfile.ZipFile(output_gtfs) as file_zip,
+    ):
+        assert pipe_zip.namelist() == file_zip.namelist(), "same GTFS files"
+        for filename in file_zip.namelist():
+            assert pipe_zip.read(filename) == file_zip.read(
+                filename
+            ), f"{filename} is filtered as with file paths"
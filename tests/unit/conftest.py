@@ -1,4 +1,6 @@
 import os
+import typing
+import zipfile
 
 import pytest
 
@@ -34,3 +36,72 @@ def not_existing_file(tmp_path):
         os.remove(filepath)
     except FileNotFoundError:
         pass
+
+
+SAMPLE_GTFS_FILES = {
+    "agency.txt": """agency_id,agency_name,agency_url,agency_timezone
+A1,Agency 1,http://agency1.example,Europe/Paris
+A2,Agency 2,http://agency2.example,Europe/Paris
+""",
+    "stops.txt": """stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station
+ST1,Station 1,48.8500,2.3500,1,
+S1,Stop 1,48.8501,2.3501,0,ST1
+S2,Stop 2,48.8600,2.3600,0,
+S3,Stop 3,48.8700,2.3700,0,
+S4,Stop 4,48.9000,2.4000,0,
+""",
+    "routes.txt": """route_id,agency_id,route_short_name,route_type
+R1,A1,1,3
+R2,A1,2,3
+R3,A2,3,3
+""",
+    "trips.txt": """route_id,service_id,trip_id,shape_id
+R1,WEEK,T1,SH1
+R1,WEEKEND,T2,SH1
+R2,WEEK,T3,SH2
+R3,WEEK,T4,SH3
+""",
+    "stop_times.txt": """trip_id,arrival_time,departure_time,stop_id,stop_sequence
+T1,06:00:00,06:00:00,S1,1
+T1,06:10:00,06:10:00,S2,2
+T2,08:00:00,08:00:00,S1,1
+T2,08:10:00,08:10:00,S2,2
+T3,07:00:00,07:00:00,S2,1
+T3,07:10:00,07:10:00,S3,2
+T4,25:00:00,25:00:00,S3,1
+T4,25:30:00,25:30:00,S4,2
+""",
+    "calendar.txt": """service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date
+WEEK,1,1,1,1,1,0,0,20240101,20241231
+WEEKEND,0,0,0,0,0,1,1,20240101,20241231
+""",
+    "calendar_dates.txt": """service_id,date,exception_type
+WEEK,20240101,2
+WEEKEND,20240101,1
+""",
+    "shapes.txt": """shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence
+SH1,48.8501,2.3501,1
+SH1,48.8600,2.3600,2
+SH2,48.8600,2.3600,1
+SH2,48.8700,2.3700,2
+SH3,48.8700,2.3700,1
+SH3,48.9000,2.4000,2
+""",
+    "feed_info.txt": """feed_publisher_name,feed_publisher_url,feed_lang
+Publisher,http://publisher.example,fr
+""",
+}
+
+
+def write_gtfs_zip(path: str, files: typing.Dict[str, str]) -> str:
+    """writes a GTFS zip containing files (filename -> content)"""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as gtfs_zip:
+        for filename, content in files.items():
+            gtfs_zip.writestr(filename, content)
+    return path
+
+
+@pytest.fixture()
+def sample_gtfs_zip(tmp_path) -> str:
+    """creates a small but complete GTFS zip for testing"""
+    return write_gtfs_zip(os.path.join(tmp_path, "sample_gtfs.zip"), SAMPLE_GTFS_FILES)
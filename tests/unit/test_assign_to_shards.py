@@ -0,0 +1,24 @@
+import numpy as np
+
+from gtfs_filtering.core import assign_to_shards
+
+
+def test_assign_to_shards__balances_shard_weights():
+    weights = np.array([5, 4, 3, 3, 3])
+
+    shards = assign_to_shards(weights, 2)
+
+    loads = np.bincount(shards, weights=weights, minlength=2)
+    assert sorted(loads) == [8, 10], "heaviest items should be spread over shards"
+
+
+def test_assign_to_shards__when_single_shard__assigns_all_items_to_it():
+    shards = assign_to_shards(np.array([1, 2, 3]), 1)
+
+    assert shards.tolist() == [0, 0, 0], "all items should be in shard 0"
+
+
+def test_assign_to_shards__when_items_outnumber_shards__fills_every_shard():
+    shards = assign_to_shards(np.array([1, 0, 0]), 3)
+
+    assert sorted(shards.tolist()) == [0, 1, 2], "every shard should get an item"
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from gtfs_filtering.core import build_stop_trips_index, get_trip_ids_serving_stops
+
+
+def test_build_stop_trips_index__indexes_trips_by_stop():
+    stop_times = pd.DataFrame(
+        {
+            "trip_id": ["T1", "T1", "T2", "T3", None],
+            "stop_id": ["S1", "S2", "S2", "S1", "S3"],
+        },
+        dtype=str,
+    )
+
+    index = build_stop_trips_index(stop_times)
+
+    assert index.indptr.tolist() == [
+        0,
+        2,
+        4,
+        4,
+    ], "stop times without trip id should be ignored"
+    assert index.trip_ids[index.trip_codes].tolist() == [
+        "T1",
+        "T3",
+        "T1",
+        "T2",
+    ], "trips should be grouped by stop in stop_times order"
+
+
+def test_get_trip_ids_serving_stops__returns_unique_trips_in_stop_times_order():
+    stop_times = pd.DataFrame(
+        {"trip_id": ["T1", "T1", "T2", "T3"], "stop_id": ["S1", "S2", "S2", "S3"]},
+        dtype=str,
+    )
+    index = build_stop_trips_index(stop_times)
+
+    trip_ids = get_trip_ids_serving_stops(index, ["S2", "S1", "UNKNOWN"])
+
+    assert trip_ids == ["T1", "T2"], "unknown stops should be ignored"
+
+
+def test_get_trip_ids_serving_stops__when_no_stop__returns_no_trip():
+    stop_times = pd.DataFrame({"trip_id": ["T1"], "stop_id": ["S1"]}, dtype=str)
+    index = build_stop_trips_index(stop_times)
+
+    assert get_trip_ids_serving_stops(index, []) == [], "no trip should be returned"
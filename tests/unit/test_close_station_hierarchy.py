@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from gtfs_filtering.stations import (
+    close_station_hierarchy,
+    connected_component_labels,
+)
+
+# station ST1: platform P1 (boarding area B1), platform P2, entrance E1, generic node N1
+# node N2 is only linked to the station by a pathway, S9 is an unrelated stop
+STOP_IDS = ["ST1", "P1", "B1", "P2", "E1", "N1", "N2", "S9"]
+PARENT_STATIONS = ["", "ST1", "P1", "ST1", "ST1", "ST1", "", ""]
+PATHWAYS_FROM_STOP_IDS = ["E1", "N1"]
+PATHWAYS_TO_STOP_IDS = ["N1", "N2"]
+
+
+def test_connected_component_labels__labels_each_component_with_its_smallest_node():
+    labels = connected_component_labels(
+        6, np.array([5, 3, 1], dtype=np.intp), np.array([4, 4, 0], dtype=np.intp)
+    )
+
+    assert labels.tolist() == [0, 0, 2, 3, 3, 3], "chain 3-4-5 should converge to 3"
+
+
+def test_close_station_hierarchy__when_platform_is_served__keeps_all_station_nodes():
+    kept = close_station_hierarchy(
+        STOP_IDS,
+        PARENT_STATIONS,
+        ["P2"],
+        PATHWAYS_FROM_STOP_IDS,
+        PATHWAYS_TO_STOP_IDS,
+    )
+
+    kept_stop_ids = [s for s, k in zip(STOP_IDS, kept) if k]
+    assert kept_stop_ids == [
+        "ST1",
+        "P1",
+        "B1",
+        "P2",
+        "E1",
+        "N1",
+        "N2",
+    ], "station, its nodes at any depth and nodes reachable through pathways are kept"
+
+
+def test_close_station_hierarchy__when_stops_have_no_parent_station__keeps_seed_stops():
+    kept = close_station_hierarchy(STOP_IDS, None, ["P1", "S9", "unknown"])
+
+    assert kept.tolist() == [False, True, False, False, False, False, False, True]
+
+
+@pytest.mark.parametrize("parent_station", [None, float("nan")])
+def test_close_station_hierarchy__when_parent_station_is_null__ignores_it(
+    parent_station,
+):
+    kept = close_station_hierarchy(["S1", "S2"], [parent_station, "S1"], ["S2"])
+
+    assert kept.tolist() == [True, True], "null parent station should be ignored"
+
+
+def test_close_station_hierarchy__when_stations_are_large__converges():
+    # one station with a chain of 10000 generic nodes linked by pathways
+    nodes = [f"N{i}" for i in range(10000)]
+
+    kept = close_station_hierarchy(
+        ["ST1", "S9"] + nodes,
+        ["", ""] + ["ST1"] * len(nodes),
+        ["N9999"],
+        nodes[:-1],
+        nodes[1:],
+    )
+
+    assert kept.sum() == len(nodes) + 1, "only S9 should be dropped"
+    assert not kept[1], "unrelated stop should be dropped"
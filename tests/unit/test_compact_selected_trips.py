@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import (
+    GTFS,
+    GTFSSelection,
+    compact_selected_trips,
+    materialize_selection,
+)
+
+TRIP_IDS = ["T1", "T2", "T3", "T4", "T5"]
+
+
+@pytest.fixture
+def sample_gtfs():
+    # T1 to T4 run every 10 minutes, then T5 15 minutes later
+    times = [
+        "06:00:00",
+        "06:05:00",
+        "06:10:00",
+        "06:15:00",
+        "06:20:00",
+        "06:25:00",
+        "06:30:00",
+        "06:35:00",
+        "06:45:00",
+        "06:50:00",
+    ]
+    return GTFS(
+        trips=pd.DataFrame(
+            {
+                "route_id": "R1",
+                "service_id": "WEEK",
+                "trip_id": TRIP_IDS,
+                "trip_headsign": "North",
+            },
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(
+            {
+                "trip_id": [trip_id for trip_id in TRIP_IDS for _ in range(2)],
+                "arrival_time": times,
+                "departure_time": times,
+                "stop_id": ["S1", "S2"] * len(TRIP_IDS),
+                "stop_sequence": ["1", "2"] * len(TRIP_IDS),
+            },
+            dtype=str,
+        ),
+    )
+
+
+def _select_all(gtfs: GTFS) -> GTFSSelection:
+    return GTFSSelection(
+        trips=np.ones(len(gtfs.trips), dtype=bool),
+        stop_times=np.ones(len(gtfs.stop_times), dtype=bool),
+    )
+
+
+def test_compact_selected_trips__when_trips_run_at_constant_headway__keeps_template_trip(
+    sample_gtfs,
+):
+    selection = _select_all(sample_gtfs)
+
+    compact_selected_trips(sample_gtfs, selection)
+
+    gtfs = materialize_selection(sample_gtfs, selection)
+    assert gtfs.trips["trip_id"].tolist() == [
+        "T1",
+        "T5",
+    ], "T2, T3 and T4 should be dropped"
+    assert gtfs.stop_times["trip_id"].tolist() == [
+        "T1",
+        "T1",
+        "T5",
+        "T5",
+    ], "stop times of dropped trips should be dropped"
+    assert gtfs.frequencies.to_dict("records") == [
+        {
+            "trip_id": "T1",
+            "start_time": "06:00:00",
+            "end_time": "06:40:00",
+            "headway_secs": "600",
+            "exact_times": "1",
+        }
+    ], "T1 should run every 10 minutes until T4"
+
+
+def test_compact_selected_trips__when_trips_differ__keeps_all_trips(sample_gtfs):
+    sample_gtfs.trips.loc[2, "trip_headsign"] = "South"
+    sample_gtfs.stop_times.loc[7, "stop_id"] = "S3"
+    selection = _select_all(sample_gtfs)
+
+    compact_selected_trips(sample_gtfs, selection)
+
+    assert selection.trips.all(), "trips should all be kept"
+    assert selection.frequencies is None, "no frequency should be added"
+
+
+def test_compact_selected_trips__when_trip_is_referenced__does_not_compact_it(
+    sample_gtfs,
+):
+    sample_gtfs.transfers = pd.DataFrame(
+        {"from_trip_id": ["T2"], "to_trip_id": ["T5"]}, dtype=str
+    )
+    selection = _select_all(sample_gtfs)
+
+    compact_selected_trips(sample_gtfs, selection)
+
+    assert selection.trips.all(), "T2 should be kept, no run of 3 trips is left"
+
+
+def test_compact_selected_trips__when_frequencies_exist__appends_frequencies(
+    sample_gtfs,
+):
+    sample_gtfs.frequencies = pd.DataFrame(
+        {
+            "trip_id": ["T9"],
+            "start_time": ["10:00:00"],
+            "end_time": ["11:00:00"],
+            "headway_secs": ["300"],
+        },
+        dtype=str,
+    )
+    selection = _select_all(sample_gtfs)
+
+    compact_selected_trips(sample_gtfs, selection)
+
+    frequencies = materialize_selection(sample_gtfs, selection).frequencies
+    assert frequencies["trip_id"].tolist() == [
+        "T9",
+        "T1",
+    ], "frequency of T1 should be appended"
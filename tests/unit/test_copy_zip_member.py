@@ -0,0 +1,82 @@
+import os
+import zipfile
+
+import pytest
+
+from gtfs_filtering import core
+from gtfs_filtering.core import copy_zip_member
+
+
+@pytest.fixture()
+def input_zip_path(tmp_path) -> str:
+    path = os.path.join(tmp_path, "input.zip")
+    with zipfile.ZipFile(path, "w") as input_zip:
+        input_zip.writestr("deflated.txt", "a,b\n" * 1000, zipfile.ZIP_DEFLATED)
+        input_zip.writestr("stored.txt", "c,d\n", zipfile.ZIP_STORED)
+        # written through a stream: CRC and sizes are stored in a data descriptor
+        with input_zip.open("streamed.txt", "w") as f:
+            f.write(b"e,f\n" * 10)
+    return path
+
+
+def test_copy_zip_member__copies_compressed_bytes_as_is(tmp_path, input_zip_path):
+    output_zip_path = os.path.join(tmp_path, "output.zip")
+
+    with (
+        zipfile.ZipFile(input_zip_path) as input_zip,
+        zipfile.ZipFile(output_zip_path, "w") as output_zip,
+    ):
+        for filename in input_zip.namelist():
+            copy_zip_member(input_zip, filename, output_zip)
+        output_zip.writestr("other.txt", "g,h\n")
+
+    with (
+        zipfile.ZipFile(input_zip_path) as input_zip,
+        zipfile.ZipFile(output_zip_path) as output_zip,
+    ):
+        assert output_zip.testzip() is None, "output zip should not be corrupted"
+        for zinfo in input_zip.infolist():
+            output_zinfo = output_zip.getinfo(zinfo.filename)
+            assert output_zinfo.compress_type == zinfo.compress_type
+            assert output_zinfo.compress_size == zinfo.compress_size
+            assert output_zinfo.CRC == zinfo.CRC
+            assert output_zip.read(zinfo.filename) == input_zip.read(zinfo.filename)
+        assert output_zip.read("other.txt") == b"g,h\n"
+
+
+def test_copy_zip_member__when_raw_copy_is_not_supported__recompresses_members(
+    tmp_path, input_zip_path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(core, "_can_copy_raw_zip_member", lambda output_zip: False)
+    output_zip_path = os.path.join(tmp_path, "output.zip")
+
+    with (
+        zipfile.ZipFile(input_zip_path) as input_zip,
+        zipfile.ZipFile(output_zip_path, "w") as output_zip,
+    ):
+        for filename in input_zip.namelist():
+            copy_zip_member(input_zip, filename, output_zip)
+
+    with (
+        zipfile.ZipFile(input_zip_path) as input_zip,
+        zipfile.ZipFile(output_zip_path) as output_zip,
+    ):
+        assert output_zip.testzip() is None, "output zip should not be corrupted"
+        for zinfo in input_zip.infolist():
+            output_zinfo = output_zip.getinfo(zinfo.filename)
+            assert (
+                output_zinfo.compress_type == zinfo.compress_type
+            ), "compression method should be kept"
+            assert output_zinfo.CRC == zinfo.CRC
+            assert output_zip.read(zinfo.filename) == input_zip.read(zinfo.filename)
+
+
+def test_copy_zip_member__when_member_does_not_exist__raises_key_error(
+    tmp_path, input_zip_path
+):
+    with (
+        zipfile.ZipFile(input_zip_path) as input_zip,
+        zipfile.ZipFile(os.path.join(tmp_path, "output.zip"), "w") as output_zip,
+    ):
+        with pytest.raises(KeyError):
+            copy_zip_member(input_zip, "not_existing.txt", output_zip)
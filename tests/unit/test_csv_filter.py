@@ -0,0 +1,105 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from gtfs_filtering.csv_filter import (
+    filter_csv_member,
+    read_csv_record,
+    split_csv_record,
+)
+
+
+def test_read_csv_record__when_quoted_field_contains_line_break__reads_next_lines():
+    gtfs_file = io.BytesIO(b'line"\r\n2,"x ""quoted"", y"\r\n')
+
+    result = read_csv_record(gtfs_file, b'1,"multi\n')
+
+    assert result == b'1,"multi\nline"\r\n', "record should end with its quoted field"
+    assert gtfs_file.readline() == b'2,"x ""quoted"", y"\r\n'
+
+
+def test_read_csv_record__when_quotes_are_balanced__returns_line():
+    gtfs_file = io.BytesIO(b"3,z\n")
+
+    assert read_csv_record(gtfs_file, b'2,"x ""quoted"", y"\r\n') == (
+        b'2,"x ""quoted"", y"\r\n'
+    )
+
+
+def test_split_csv_record__when_not_quoted__splits_on_commas():
+    assert split_csv_record(b"a,,c\r\n") == [b"a", b"", b"c"]
+
+
+def test_split_csv_record__when_max_split__does_not_split_remaining_fields():
+    assert split_csv_record(b"a,b,c,d\n", 2) == [b"a", b"b", b"c,d"]
+
+
+def test_split_csv_record__when_quoted__unquotes_fields():
+    assert split_csv_record(b'"a,b","c ""d""",e\n') == [b"a,b", b'c "d"', b"e"]
+
+
+@pytest.fixture()
+def input_zip(tmp_path):
+    path = os.path.join(tmp_path, "input.zip")
+    with zipfile.ZipFile(path, "w") as gtfs_zip:
+        gtfs_zip.writestr(
+            "stops.txt",
+            "\ufeffstop_id,stop_name,stop_lat,parent_station\r\n"
+            'S1,"Stop, 1",48.850,P1\r\n'
+            "S2,Stop 2,48.86,\r\n"
+            "\r\n"
+            '"S3",Stop 3,48.870,P1\r\n',
+        )
+        gtfs_zip.writestr("empty.txt", "")
+    with zipfile.ZipFile(path) as gtfs_zip:
+        yield gtfs_zip
+
+
+def test_filter_csv_member__copies_kept_rows_verbatim_and_collects_values(
+    tmp_path, input_zip
+):
+    output_path = os.path.join(tmp_path, "output.zip")
+    with zipfile.ZipFile(output_path, "w") as output_zip:
+        collected = filter_csv_member(
+            input_zip,
+            "stops.txt",
+            [("stop_id", {b"S1", b"S3"}, False)],
+            ["parent_station", "stop_name"],
+            output_zip,
+        )
+
+    with zipfile.ZipFile(output_path) as output_zip:
+        assert output_zip.read("stops.txt") == (
+            "\ufeffstop_id,stop_name,stop_lat,parent_station\r\n"
+            'S1,"Stop, 1",48.850,P1\r\n'
+            '"S3",Stop 3,48.870,P1\r\n'
+        ).encode("utf-8"), "kept rows should be copied verbatim"
+    assert collected == {
+        "parent_station": {b"P1"},
+        "stop_name": {b"Stop, 1", b"Stop 3"},
+    }
+
+
+def test_filter_csv_member__when_optional_filter__keeps_empty_values(input_zip):
+    collected = filter_csv_member(
+        input_zip,
+        "stops.txt",
+        [("parent_station", {b"P2"}, True), ("not_a_column", set(), True)],
+        ["stop_id"],
+    )
+
+    assert collected == {"stop_id": {b"S2"}}
+
+
+def test_filter_csv_member__when_required_column_is_missing__raises_key_error(
+    input_zip,
+):
+    with pytest.raises(KeyError):
+        filter_csv_member(input_zip, "stops.txt", [("not_a_column", set(), False)])
+
+
+def test_filter_csv_member__when_file_is_empty__raises_value_error(input_zip):
+    with pytest.raises(ValueError):
+        filter_csv_member(input_zip, "empty.txt", [])
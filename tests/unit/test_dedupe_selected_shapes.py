@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import (
+    GTFS,
+    GTFSSelection,
+    dedupe_selected_shapes,
+    materialize_selection,
+)
+
+
+@pytest.fixture
+def sample_gtfs():
+    return GTFS(
+        trips=pd.DataFrame(
+            {"trip_id": ["T1", "T2", "T3"], "shape_id": ["SH1", "SH2", "SH3"]},
+            dtype=str,
+        ),
+        shapes=pd.DataFrame(
+            {
+                # SH2 is SH1 with other sequence numbers and rows in another order
+                "shape_id": ["SH1", "SH1", "SH2", "SH2", "SH3", "SH3"],
+                "shape_pt_lat": ["48.1", "48.2", "48.2", "48.1", "48.1", "48.3"],
+                "shape_pt_lon": ["2.1", "2.2", "2.2", "2.1", "2.1", "2.3"],
+                "shape_pt_sequence": ["1", "2", "20", "10", "1", "2"],
+            },
+            dtype=str,
+        ),
+    )
+
+
+def _select_all(gtfs: GTFS) -> GTFSSelection:
+    return GTFSSelection(
+        trips=np.ones(len(gtfs.trips), dtype=bool),
+        shapes=np.ones(len(gtfs.shapes), dtype=bool),
+    )
+
+
+def test_dedupe_selected_shapes__when_shapes_are_identical__keeps_first_one(
+    sample_gtfs,
+):
+    selection = _select_all(sample_gtfs)
+
+    dedupe_selected_shapes(sample_gtfs, selection)
+
+    assert selection.shapes.tolist() == [
+        True,
+        True,
+        False,
+        False,
+        True,
+        True,
+    ], "SH2 should be dropped"
+    trips = materialize_selection(sample_gtfs, selection).trips
+    assert trips["shape_id"].tolist() == [
+        "SH1",
+        "SH1",
+        "SH3",
+    ], "trips of SH2 should use SH1"
+
+
+def test_dedupe_selected_shapes__when_points_differ__keeps_all_shapes(sample_gtfs):
+    sample_gtfs.shapes.loc[3, "shape_pt_lat"] = "48.15"
+    selection = _select_all(sample_gtfs)
+
+    dedupe_selected_shapes(sample_gtfs, selection)
+
+    assert selection.shapes.all(), "all shapes should be kept"
+    assert "trips" not in selection.transforms, "trips should not be rewritten"
+
+
+def test_dedupe_selected_shapes__when_shape_is_not_selected__does_not_use_it(
+    sample_gtfs,
+):
+    selection = _select_all(sample_gtfs)
+    selection.shapes[:2] = False
+
+    dedupe_selected_shapes(sample_gtfs, selection)
+
+    assert selection.shapes.tolist() == [
+        False,
+        False,
+        True,
+        True,
+        True,
+        True,
+    ], "SH2 should be kept as SH1 is not selected"
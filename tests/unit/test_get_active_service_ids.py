@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import GTFS, get_active_service_ids
+
+
+@pytest.fixture
+def sample_gtfs():
+    calendar_data = {
+        "service_id": ["WEEK", "WEEKEND", "SUMMER"],
+        "monday": ["1", "0", "1"],
+        "tuesday": ["1", "0", "1"],
+        "wednesday": ["1", "0", "1"],
+        "thursday": ["1", "0", "1"],
+        "friday": ["1", "0", "1"],
+        "saturday": ["0", "1", "1"],
+        "sunday": ["0", "1", "1"],
+        "start_date": ["20240101", "20240101", "20240701"],
+        "end_date": ["20241231", "20241231", "20240831"],
+    }
+    # 20240101 is a monday
+    calendar_dates_data = {
+        "service_id": ["WEEK", "WEEKEND", "EXTRA"],
+        "date": ["20240101", "20240101", "20240103"],
+        "exception_type": ["2", "1", "1"],
+    }
+    return GTFS(
+        calendar=pd.DataFrame(calendar_data, dtype=str),
+        calendar_dates=pd.DataFrame(calendar_dates_data, dtype=str),
+    )
+
+
+@pytest.mark.parametrize(
+    "start_date, end_date, expected_service_ids",
+    [
+        ("20240102", "20240105", ["EXTRA", "WEEK"]),
+        ("20240106", "20240107", ["WEEKEND"]),
+        ("20240101", "20240101", ["WEEKEND"]),
+        ("20240801", "20240801", ["SUMMER", "WEEK"]),
+        ("20250101", "20250131", []),
+    ],
+)
+def test_get_active_service_ids__returns_services_running_in_window(
+    sample_gtfs, start_date, end_date, expected_service_ids
+):
+    service_ids = get_active_service_ids(sample_gtfs, start_date, end_date)
+
+    assert sorted(service_ids) == expected_service_ids
+
+
+def test_get_active_service_ids__when_calendar_is_absent__uses_calendar_dates_only(
+    sample_gtfs,
+):
+    gtfs = GTFS(calendar_dates=sample_gtfs.calendar_dates)
+
+    service_ids = get_active_service_ids(gtfs, "20240101", "20240103")
+
+    assert sorted(service_ids) == ["EXTRA", "WEEKEND"], "added dates should be active"
+
+
+def test_get_active_service_ids__when_service_id_is_repeated__uses_first_row(
+    sample_gtfs,
+):
+    # repeated WEEK runs on weekends only
+    sample_gtfs.calendar = pd.concat(
+        [sample_gtfs.calendar, sample_gtfs.calendar.iloc[[1]].assign(service_id="WEEK")]
+    )
+
+    service_ids = get_active_service_ids(sample_gtfs, "20240101", "20240105")
+
+    assert sorted(service_ids) == [
+        "EXTRA",
+        "WEEK",
+        "WEEKEND",
+    ], "first WEEK row should be used"
+
+
+def test_get_active_service_ids__when_date_is_repeated__counts_it_once(sample_gtfs):
+    sample_gtfs.calendar_dates = pd.DataFrame(
+        {
+            "service_id": ["WEEKEND", "WEEKEND", "WEEKEND"],
+            "date": ["20240106", "20240106", "20240106"],
+            "exception_type": ["2", "2", "2"],
+        },
+        dtype=str,
+    )
+
+    service_ids = get_active_service_ids(sample_gtfs, "20240106", "20240107")
+
+    assert service_ids == ["WEEKEND"], "sunday should still be active"
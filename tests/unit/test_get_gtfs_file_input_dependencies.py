@@ -0,0 +1,38 @@
+from gtfs_filtering.core import get_gtfs_file_input_dependencies
+
+
+def test_get_gtfs_file_input_dependencies__when_file_is_filtered__returns_transitive_dependencies():
+    result = get_gtfs_file_input_dependencies("stops.txt")
+
+    assert result == {"stops.txt", "stop_times.txt", "trips.txt", "pathways.txt"}
+
+
+def test_get_gtfs_file_input_dependencies__when_dependencies_are_cyclic__terminates():
+    result = get_gtfs_file_input_dependencies("areas.txt")
+
+    assert result == {
+        "areas.txt",
+        "stop_areas.txt",
+        "stops.txt",
+        "stop_times.txt",
+        "trips.txt",
+        "pathways.txt",
+    }
+
+
+def test_get_gtfs_file_input_dependencies__when_file_is_not_filtered__returns_itself():
+    assert get_gtfs_file_input_dependencies("feed_info.txt") == {"feed_info.txt"}
+
+
+def test_get_gtfs_file_input_dependencies__when_fare_rules__returns_routes_and_stops_dependencies():
+    result = get_gtfs_file_input_dependencies("fare_rules.txt")
+
+    assert result == {
+        "fare_rules.txt",
+        "fare_attributes.txt",
+        "routes.txt",
+        "trips.txt",
+        "stops.txt",
+        "stop_times.txt",
+        "pathways.txt",
+    }
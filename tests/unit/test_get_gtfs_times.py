@@ -0,0 +1,40 @@
+import gc
+
+import pandas as pd
+import pytest
+
+from gtfs_filtering import core
+from gtfs_filtering.core import get_gtfs_times
+
+
+def test_get_gtfs_times__when_called_twice__parses_times_once(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    stop_times = pd.DataFrame({"arrival_time": ["06:00:00", "25:00:00"]})
+    parsed_columns = []
+    parse_gtfs_times = core.parse_gtfs_times
+
+    def spy_parse_gtfs_times(times):
+        parsed_columns.append(times.name)
+        return parse_gtfs_times(times)
+
+    monkeypatch.setattr("gtfs_filtering.core.parse_gtfs_times", spy_parse_gtfs_times)
+
+    first_times = get_gtfs_times(stop_times, "arrival_time")
+    second_times = get_gtfs_times(stop_times, "arrival_time")
+
+    assert first_times.tolist() == [21600, 90000]
+    assert second_times is first_times, "cached times should be returned"
+    assert parsed_columns == ["arrival_time"], "times should be parsed once"
+
+
+def test_get_gtfs_times__when_gtfs_file_is_deleted__drops_cached_times():
+    stop_times = pd.DataFrame({"arrival_time": ["06:00:00"]})
+    get_gtfs_times(stop_times, "arrival_time")
+    key = (id(stop_times), "times:arrival_time")
+    assert key in core._GTFS_DATA_CACHE, "times should be cached"
+
+    del stop_times
+    gc.collect()
+
+    assert key not in core._GTFS_DATA_CACHE, "cached times should be dropped"
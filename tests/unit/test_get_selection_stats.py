@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from gtfs_filtering.core import GTFS, GTFSSelection, get_selection_stats
+
+
+def test_get_selection_stats__counts_selected_rows_and_estimates_output_size():
+    gtfs = GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1"]}, dtype=str),
+        trips=pd.DataFrame({"trip_id": ["T1", "T2", "T3", "T4"]}, dtype=str),
+    )
+    selection = GTFSSelection(trips=np.array([True, False, True, False]))
+    member_sizes = {"agency.txt": 30, "trips.txt": 400, "feed_info.txt": 50}
+
+    stats = get_selection_stats(gtfs, selection, member_sizes)
+
+    assert [
+        (file_stats.gtfs_file, file_stats.output_rows, file_stats.output_size)
+        for file_stats in stats.gtfs_files
+    ] == [
+        ("agency.txt", 1, 30),
+        ("trips.txt", 2, 200),
+    ], "files without selection should keep all their rows"
+    assert (
+        stats.output_size == 30 + 200 + 50
+    ), "members which are not filtered should be counted with their input size"
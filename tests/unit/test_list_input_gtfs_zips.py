@@ -0,0 +1,36 @@
+import os
+
+from gtfs_filtering.core import list_input_gtfs_zips
+
+
+def create_files(directory: str, filenames):
+    for filename in filenames:
+        with open(os.path.join(directory, filename), "w") as f:
+            f.write("")
+
+
+def test_list_input_gtfs_zips__when_directory__returns_sorted_zips(tmp_path):
+    create_files(tmp_path, ["b.zip", "a.zip", "readme.txt"])
+    os.makedirs(os.path.join(tmp_path, "sub.zip"))
+
+    result = list_input_gtfs_zips(str(tmp_path))
+
+    assert result == [
+        os.path.join(tmp_path, "a.zip"),
+        os.path.join(tmp_path, "b.zip"),
+    ], "only zip files of the directory should be listed"
+
+
+def test_list_input_gtfs_zips__when_glob_pattern__returns_matching_files(tmp_path):
+    create_files(tmp_path, ["feed_1.zip", "feed_2.zip", "other.zip"])
+
+    result = list_input_gtfs_zips(os.path.join(tmp_path, "feed_*.zip"))
+
+    assert result == [
+        os.path.join(tmp_path, "feed_1.zip"),
+        os.path.join(tmp_path, "feed_2.zip"),
+    ], "only matching files should be listed"
+
+
+def test_list_input_gtfs_zips__when_nothing_matches__returns_empty_list(tmp_path):
+    assert list_input_gtfs_zips(os.path.join(tmp_path, "*.zip")) == []
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import ValueMatch, match_values
+
+
+@pytest.fixture
+def values() -> pd.Series:
+    return pd.Series(["R1", "R10", "R2", "BUS_1", None], dtype=str)
+
+
+def test_match_values__when_exact__matches_equal_values(values):
+    result = match_values(values, ["R1", "R2"], ValueMatch.EXACT)
+
+    assert result.tolist() == [True, False, True, False, False]
+
+
+def test_match_values__when_glob__matches_wildcards_and_literals(values):
+    result = match_values(values, ["R1?", "BUS_1"], ValueMatch.GLOB)
+
+    assert result.tolist() == [
+        False,
+        True,
+        False,
+        True,
+        False,
+    ], "patterns should match whole values"
+
+
+def test_match_values__when_regex__matches_whole_values(values):
+    result = match_values(values, [r"R\d", "BUS"], ValueMatch.REGEX)
+
+    assert result.tolist() == [
+        True,
+        False,
+        True,
+        False,
+        False,
+    ], "patterns should match whole values"
+
+
+def test_match_values__when_regex_is_invalid__raises_value_error(values):
+    with pytest.raises(ValueError):
+        match_values(values, ["R("], ValueMatch.REGEX)
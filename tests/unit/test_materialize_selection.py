@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from gtfs_filtering.core import GTFS, GTFSSelection, materialize_selection
+
+
+def test_materialize_selection__gathers_selected_rows():
+    gtfs = GTFS(routes=pd.DataFrame({"route_id": ["R1", "R2", "R3"]}, dtype=str))
+    selection = GTFSSelection(routes=np.array([True, False, True]))
+
+    materialized_gtfs = materialize_selection(gtfs, selection)
+
+    assert materialized_gtfs.routes["route_id"].tolist() == [
+        "R1",
+        "R3",
+    ], "only selected routes should be gathered"
+
+
+def test_materialize_selection__when_all_rows_are_selected__does_not_copy_gtfs_file():
+    gtfs = GTFS(routes=pd.DataFrame({"route_id": ["R1", "R2"]}, dtype=str))
+    selection = GTFSSelection(routes=np.array([True, True]))
+
+    materialized_gtfs = materialize_selection(gtfs, selection)
+
+    assert materialized_gtfs.routes is gtfs.routes, "routes should not be copied"
+
+
+def test_materialize_selection__when_gtfs_file_is_not_selected__drops_it():
+    gtfs = GTFS(feed_info=pd.DataFrame({"feed_publisher_name": ["P"]}, dtype=str))
+
+    materialized_gtfs = materialize_selection(gtfs, GTFSSelection())
+
+    assert materialized_gtfs.feed_info is None, "feed_info should be dropped"
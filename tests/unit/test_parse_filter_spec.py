@@ -0,0 +1,49 @@
+import pytest
+
+from gtfs_filtering.core import (
+    AndFilter,
+    FilterPredicate,
+    FilterType,
+    OrFilter,
+    parse_filter_spec,
+)
+
+
+def test_parse_filter_spec__converts_nested_spec_to_filter_expression():
+    spec = {
+        "and": [
+            {"or": [{"route_id": ["R1", "R2"]}, {"agency_id": "A2"}]},
+            {"bbox": [2.2, 48.8, 2.5, 48.9]},
+        ]
+    }
+
+    expression = parse_filter_spec(spec)
+
+    assert expression == AndFilter(
+        [
+            OrFilter(
+                [
+                    FilterPredicate(FilterType.ROUTE_ID, ["R1", "R2"]),
+                    FilterPredicate(FilterType.AGENCY_ID, ["A2"]),
+                ]
+            ),
+            FilterPredicate(FilterType.BBOX, ["2.2", "48.8", "2.5", "48.9"]),
+        ]
+    ), "values should be converted to lists of strings"
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        [],
+        {},
+        {"route_id": ["R1"], "trip_id": ["T1"]},
+        {"and": []},
+        {"or": {"route_id": ["R1"]}},
+        {"unknown": ["R1"]},
+        {"route_id": [{"route_id": "R1"}]},
+    ],
+)
+def test_parse_filter_spec__when_spec_is_invalid__raises_value_error(spec):
+    with pytest.raises(ValueError):
+        parse_filter_spec(spec)
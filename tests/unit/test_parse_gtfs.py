@@ -98,3 +98,16 @@ def test_parse_gtfs__when_missing_optional_file__returns_gtfs_object(
             assert isinstance(
                 gtfs.__getattribute__(field.name), pd.DataFrame
             ), f"field {field.name} should be a DataFrame"
+
+
+def test_parse_gtfs__when_source_is_gtfs_zip_content__parses_it_in_memory(
+    sample_gtfs_zip,
+):
+    with open(sample_gtfs_zip, "rb") as f:
+        gtfs_zip_content = f.read()
+
+    gtfs = parse_gtfs(gtfs_zip_content)
+
+    assert gtfs.routes["route_id"].tolist() == ["R1", "R2", "R3"], "routes are parsed"
+    assert gtfs.stop_times is not None, "optional files are parsed"
+    assert gtfs.pathways is None, "missing optional files are None"
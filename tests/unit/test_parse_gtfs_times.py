@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import parse_gtfs_times
+
+
+def test_parse_gtfs_times__converts_times_to_seconds():
+    times = pd.Series(["06:00:00", "6:30:15", "25:00:00", "125:00:01", " 07:00:00 "])
+
+    seconds = parse_gtfs_times(times)
+
+    assert seconds.tolist() == [21600, 23415, 90000, 450001, 25200]
+
+
+def test_parse_gtfs_times__when_time_is_missing__returns_minus_one():
+    times = pd.Series(["06:00:00", None, ""], dtype=object)
+
+    seconds = parse_gtfs_times(times)
+
+    assert seconds.tolist() == [21600, -1, -1], "missing times should be -1"
+
+
+@pytest.mark.parametrize("time", ["6:0:00", "ab:00:00", "06:00", "06-00-00"])
+def test_parse_gtfs_times__when_time_is_invalid__raises_value_error(time):
+    with pytest.raises(ValueError):
+        parse_gtfs_times(pd.Series(["06:00:00", time]))
@@ -0,0 +1,115 @@
+import os
+import shutil
+import zipfile
+
+import pandas as pd
+import pytest
+
+from gtfs_filtering import core
+from gtfs_filtering.core import FilterType, perform_batch_filter
+from tests.unit.conftest import SAMPLE_GTFS_FILES, write_gtfs_zip
+
+
+@pytest.fixture()
+def input_gtfs_zips(tmp_path, sample_gtfs_zip):
+    input_directory = os.path.join(tmp_path, "input")
+    os.makedirs(input_directory)
+    valid_gtfs_zip = shutil.copy(
+        sample_gtfs_zip, os.path.join(input_directory, "valid.zip")
+    )
+    invalid_files = dict(SAMPLE_GTFS_FILES)
+    del invalid_files["routes.txt"]
+    invalid_gtfs_zip = write_gtfs_zip(
+        os.path.join(input_directory, "invalid.zip"), invalid_files
+    )
+    return [valid_gtfs_zip, invalid_gtfs_zip]
+
+
+def test_perform_batch_filter__when_one_gtfs_is_invalid__other_gtfs_are_filtered(
+    tmp_path, input_gtfs_zips
+):
+    output_directory = os.path.join(tmp_path, "output")
+
+    results = perform_batch_filter(
+        input_gtfs_zips, output_directory, FilterType.ROUTE_ID, ["R1"], False, 2
+    )
+
+    assert [r.input_gtfs_zip for r in results] == input_gtfs_zips, "keeps input order"
+    assert results[0].succeeded, "valid GTFS should be filtered"
+    assert results[0].output_gtfs_zip == os.path.join(output_directory, "valid.zip")
+    routes = pd.read_csv(
+        zipfile.ZipFile(results[0].output_gtfs_zip).open("routes.txt"), dtype=str
+    )
+    assert routes["route_id"].tolist() == ["R1"], "output GTFS is filtered"
+    assert not results[1].succeeded, "invalid GTFS should fail"
+    assert "routes.txt" in results[1].error, "error should be reported"
+    assert not os.path.isfile(results[1].output_gtfs_zip), "no output on failure"
+
+
+def test_perform_batch_filter__when_output_exists_and_overwrite_not_set__reports_failure(
+    tmp_path, input_gtfs_zips
+):
+    output_directory = os.path.join(tmp_path, "output")
+    os.makedirs(output_directory)
+    with open(os.path.join(output_directory, "valid.zip"), "w") as f:
+        f.write("")
+
+    results = perform_batch_filter(
+        input_gtfs_zips[:1], output_directory, FilterType.ROUTE_ID, ["R1"], False, 1
+    )
+
+    assert not results[0].succeeded, "existing output should not be overwritten"
+    assert "already exists" in results[0].error
+
+
+def test_perform_batch_filter__when_filenames_collide__raises_value_error(
+    tmp_path, sample_gtfs_zip
+):
+    other_directory = os.path.join(tmp_path, "other")
+    os.makedirs(other_directory)
+    other_gtfs_zip = shutil.copy(sample_gtfs_zip, other_directory)
+
+    with pytest.raises(ValueError):
+        perform_batch_filter(
+            [sample_gtfs_zip, other_gtfs_zip],
+            os.path.join(tmp_path, "output"),
+            FilterType.ROUTE_ID,
+            ["R1"],
+            False,
+        )
+
+
+def test_perform_batch_filter__when_a_worker_dies__other_gtfs_are_filtered(
+    tmp_path, sample_gtfs_zip, monkeypatch
+):
+    input_directory = os.path.join(tmp_path, "input")
+    os.makedirs(input_directory)
+    input_gtfs_zips = [
+        shutil.copy(sample_gtfs_zip, os.path.join(input_directory, filename))
+        for filename in ["a.zip", "crash.zip", "b.zip"]
+    ]
+    perform_filter = core.perform_filter
+
+    def perform_filter_or_die(input_gtfs_zip, *args, **kwargs):
+        if os.path.basename(input_gtfs_zip) == "crash.zip":
+            os._exit(1)  # worker process is killed, e.g. when running out of memory
+        return perform_filter(input_gtfs_zip, *args, **kwargs)
+
+    # worker processes are forked, they inherit the patched function
+    monkeypatch.setattr(core, "perform_filter", perform_filter_or_die)
+
+    results = perform_batch_filter(
+        input_gtfs_zips,
+        os.path.join(tmp_path, "output"),
+        FilterType.ROUTE_ID,
+        ["R1"],
+        False,
+        2,
+    )
+
+    assert [r.succeeded for r in results] == [
+        True,
+        False,
+        True,
+    ], "only the GTFS killing its worker should fail"
+    assert "BrokenProcessPool" in results[1].error, "worker death should be reported"
@@ -0,0 +1,742 @@
+import importlib.util
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import (
+    AndFilter,
+    CompressionMethod,
+    Engine,
+    FilterPredicate,
+    FilterType,
+    ValueMatch,
+    perform_filter,
+)
+from tests.unit.conftest import SAMPLE_GTFS_FILES, write_gtfs_zip
+
+
+@pytest.fixture()
+def output_gtfs(tmp_path) -> str:
+    return os.path.join(tmp_path, "output.zip")
+
+
+def test_perform_filter__filters_gtfs_files(sample_gtfs_zip, output_gtfs):
+    perform_filter(sample_gtfs_zip, output_gtfs, FilterType.ROUTE_ID, ["R1"], False)
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        routes = pd.read_csv(output_zip.open("routes.txt"), dtype=str)
+        trips = pd.read_csv(output_zip.open("trips.txt"), dtype=str)
+    assert routes["route_id"].tolist() == ["R1"], "routes should be filtered"
+    assert trips["trip_id"].tolist() == ["T1", "T2"], "trips should be filtered"
+
+
+def test_perform_filter__when_output_exists_and_overwrite_not_set__raises_file_exists_error(
+    sample_gtfs_zip, output_gtfs
+):
+    with open(output_gtfs, "w") as f:
+        f.write("")
+
+    with pytest.raises(FileExistsError):
+        perform_filter(sample_gtfs_zip, output_gtfs, FilterType.ROUTE_ID, ["R1"], False)
+
+
+def test_perform_filter__passes_through_not_filtered_files_without_parsing_them(
+    sample_gtfs_zip, output_gtfs, monkeypatch: pytest.MonkeyPatch
+):
+    parsed_files = []
+
+    def spy_parse_gtfs_file(directory, filename):
+        gtfs_data = pd.read_csv(os.path.join(directory, filename), dtype=str)
+        parsed_files.append(filename)
+        return gtfs_data
+
+    monkeypatch.setattr("gtfs_filtering.core.parse_gtfs_file", spy_parse_gtfs_file)
+
+    perform_filter(sample_gtfs_zip, output_gtfs, FilterType.ROUTE_ID, ["R1"], False)
+
+    assert "feed_info.txt" not in parsed_files, "feed_info should not be parsed"
+    with (
+        zipfile.ZipFile(sample_gtfs_zip) as input_zip,
+        zipfile.ZipFile(output_gtfs) as output_zip,
+    ):
+        input_zinfo = input_zip.getinfo("feed_info.txt")
+        output_zinfo = output_zip.getinfo("feed_info.txt")
+        assert output_zinfo.CRC == input_zinfo.CRC
+        assert output_zinfo.compress_type == input_zinfo.compress_type
+        assert output_zinfo.compress_size == input_zinfo.compress_size
+        assert output_zip.read("feed_info.txt") == input_zip.read("feed_info.txt")
+
+
+@pytest.mark.parametrize(
+    "compression, expected_compress_type",
+    [
+        (CompressionMethod.STORED, zipfile.ZIP_STORED),
+        (CompressionMethod.DEFLATED, zipfile.ZIP_DEFLATED),
+        (CompressionMethod.BZIP2, zipfile.ZIP_BZIP2),
+        (CompressionMethod.LZMA, zipfile.ZIP_LZMA),
+    ],
+)
+def test_perform_filter__when_compression_is_set__compresses_filtered_files_with_it(
+    sample_gtfs_zip, output_gtfs, compression, expected_compress_type
+):
+    perform_filter(
+        sample_gtfs_zip,
+        output_gtfs,
+        FilterType.ROUTE_ID,
+        ["R1"],
+        False,
+        compression=compression,
+    )
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        assert output_zip.testzip() is None, "output zip should not be corrupted"
+        assert (
+            output_zip.getinfo("stop_times.txt").compress_type == expected_compress_type
+        ), "filtered files should use requested compression"
+        assert (
+            output_zip.getinfo("feed_info.txt").compress_type == zipfile.ZIP_DEFLATED
+        ), "passed through files should keep their compression"
+
+
+@pytest.mark.parametrize(
+    "compression, compression_level",
+    [(CompressionMethod.DEFLATED, 10), (CompressionMethod.BZIP2, 0)],
+)
+def test_perform_filter__when_compression_level_is_invalid__raises_value_error(
+    sample_gtfs_zip, output_gtfs, compression, compression_level
+):
+    with pytest.raises(ValueError):
+        perform_filter(
+            sample_gtfs_zip,
+            output_gtfs,
+            FilterType.ROUTE_ID,
+            ["R1"],
+            False,
+            compression=compression,
+            compression_level=compression_level,
+        )
+    assert not os.path.isfile(output_gtfs), "output should not be created"
+
+
+@pytest.mark.parametrize(
+    "engine",
+    [
+        Engine.CSV,
+        Engine.SQLITE,
+        pytest.param(
+            Engine.POLARS,
+            marks=pytest.mark.skipif(
+                importlib.util.find_spec("polars") is None,
+                reason="polars is not installed",
+            ),
+        ),
+    ],
+)
+@pytest.mark.parametrize(
+    "filter_type, filter_values",
+    [(FilterType.ROUTE_ID, ["R1", "R3"]), (FilterType.TRIP_ID, ["T1", "T3"])],
+)
+def test_perform_filter__when_not_pandas_engine__output_has_same_rows_as_pandas_engine(
+    tmp_path, sample_gtfs_zip, filter_type, filter_values, engine
+):
+    pandas_output = os.path.join(tmp_path, "pandas.zip")
+    engine_output = os.path.join(tmp_path, f"{engine}.zip")
+
+    perform_filter(sample_gtfs_zip, pandas_output, filter_type, filter_values, False)
+    perform_filter(
+        sample_gtfs_zip,
+        engine_output,
+        filter_type,
+        filter_values,
+        False,
+        engine=engine,
+    )
+
+    with (
+        zipfile.ZipFile(pandas_output) as pandas_zip,
+        zipfile.ZipFile(engine_output) as engine_zip,
+    ):
+        assert sorted(engine_zip.namelist()) == sorted(pandas_zip.namelist())
+        for filename in pandas_zip.namelist():
+            pd.testing.assert_frame_equal(
+                pd.read_csv(engine_zip.open(filename), dtype=str),
+                pd.read_csv(pandas_zip.open(filename), dtype=str),
+                obj=filename,
+            )
+
+
+def test_perform_filter__when_csv_engine__copies_kept_rows_verbatim(
+    tmp_path, output_gtfs
+):
+    files = dict(SAMPLE_GTFS_FILES)
+    files["stops.txt"] = files["stops.txt"].replace(
+        "S2,Stop 2,48.8600,2.3600,0,", 'S2,"Stop 2, platform A",48.8600,2.3600,0,'
+    )
+    input_gtfs = write_gtfs_zip(os.path.join(tmp_path, "input.zip"), files)
+
+    perform_filter(
+        input_gtfs, output_gtfs, FilterType.ROUTE_ID, ["R2"], False, engine=Engine.CSV
+    )
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        stops = output_zip.read("stops.txt").decode()
+    assert stops == (
+        "stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station\n"
+        'S2,"Stop 2, platform A",48.8600,2.3600,0,\n'
+        "S3,Stop 3,48.8700,2.3700,0,\n"
+    ), "kept rows should be copied verbatim"
+
+
+def test_perform_filter__when_csv_engine_and_required_file_missing__raises_file_not_found_error(
+    tmp_path, output_gtfs
+):
+    files = dict(SAMPLE_GTFS_FILES)
+    del files["routes.txt"]
+    input_gtfs = write_gtfs_zip(os.path.join(tmp_path, "input.zip"), files)
+
+    with pytest.raises(FileNotFoundError, match="routes.txt"):
+        perform_filter(
+            input_gtfs,
+            output_gtfs,
+            FilterType.ROUTE_ID,
+            ["R1"],
+            False,
+            engine=Engine.CSV,
+        )
+
+
+def test_perform_filter__when_service_date_filter__keeps_trips_running_in_window(
+    sample_gtfs_zip, output_gtfs
+):
+    # 20240106 and 20240107 are a saturday and a sunday
+    perform_filter(
+        sample_gtfs_zip,
+        output_gtfs,
+        FilterType.SERVICE_DATE,
+        ["20240106", "20240107"],
+        False,
+    )
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        trips = pd.read_csv(output_zip.open("trips.txt"), dtype=str)
+        calendar = pd.read_csv(output_zip.open("calendar.txt"), dtype=str)
+    assert trips["trip_id"].tolist() == ["T2"], "only weekend trips should be kept"
+    assert calendar[["start_date", "end_date"]].values.tolist() == [
+        ["20240106", "20240107"]
+    ], "calendar should be clipped to window"
+
+
+@pytest.mark.parametrize("options", [{"engine": Engine.CSV}, {"incremental": True}])
+def test_perform_filter__when_service_date_filter_and_unsupported_option__raises_value_error(
+    sample_gtfs_zip, output_gtfs, options
+):
+    with pytest.raises(ValueError):
+        perform_filter(
+            sample_gtfs_zip,
+            output_gtfs,
+            FilterType.SERVICE_DATE,
+            ["20240106", "20240107"],
+            False,
+            **options,
+        )
+
+
+def test_perform_filter__when_time_window_filter_and_trim__trims_stop_times(
+    sample_gtfs_zip, output_gtfs
+):
+    perform_filter(
+        sample_gtfs_zip,
+        output_gtfs,
+        FilterType.TIME_WINDOW,
+        ["24:30:00", "25:10:00"],
+        False,
+        trim=True,
+    )
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        trips = pd.read_csv(output_zip.open("trips.txt"), dtype=str)
+        stop_times = pd.read_csv(output_zip.open("stop_times.txt"), dtype=str)
+    assert trips["trip_id"].tolist() == ["T4"], "only T4 should be kept"
+    assert stop_times["stop_id"].tolist() == [
+        "S3"
+    ], "stop times outside of window should be dropped"
+
+
+def test_perform_filter__when_bbox_filter__keeps_trips_serving_stops_inside_bbox(
+    sample_gtfs_zip, output_gtfs
+):
+    perform_filter(
+        sample_gtfs_zip,
+        output_gtfs,
+        FilterType.BBOX,
+        ["2.39", "48.89", "2.41", "48.91"],
+        False,
+    )
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        trips = pd.read_csv(output_zip.open("trips.txt"), dtype=str)
+    assert trips["trip_id"].tolist() == ["T4"], "only trips serving S4 should be kept"
+
+
+def test_perform_filter__when_stop_id_filter__keeps_trips_serving_station_platforms(
+    sample_gtfs_zip, output_gtfs
+):
+    perform_filter(sample_gtfs_zip, output_gtfs, FilterType.STOP_ID, ["ST1"], False)
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        trips = pd.read_csv(output_zip.open("trips.txt"), dtype=str)
+    assert trips["trip_id"].tolist() == [
+        "T1",
+        "T2",
+    ], "only trips serving S1 (platform of ST1) should be kept"
+
+
+def test_perform_filter__when_agency_id_filter__keeps_routes_of_agency(
+    sample_gtfs_zip, output_gtfs
+):
+    perform_filter(sample_gtfs_zip, output_gtfs, FilterType.AGENCY_ID, ["A2"], False)
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        agency = pd.read_csv(output_zip.open("agency.txt"), dtype=str)
+        routes = pd.read_csv(output_zip.open("routes.txt"), dtype=str)
+    assert agency["agency_id"].tolist() == ["A2"], "only A2 should be kept"
+    assert routes["route_id"].tolist() == ["R3"], "only routes of A2 should be kept"
+
+
+def test_perform_filter__when_filter_expression__ignores_filter_type_and_values(
+    sample_gtfs_zip, output_gtfs
+):
+    filter_expression = AndFilter(
+        [
+            FilterPredicate(FilterType.AGENCY_ID, ["A1"]),
+            FilterPredicate(FilterType.STOP_ID, ["S3"]),
+        ]
+    )
+
+    perform_filter(
+        sample_gtfs_zip,
+        output_gtfs,
+        FilterType.ROUTE_ID,
+        [],
+        False,
+        filter_expression=filter_expression,
+    )
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        trips = pd.read_csv(output_zip.open("trips.txt"), dtype=str)
+    assert trips["trip_id"].tolist() == [
+        "T3"
+    ], "only trips of A1 serving S3 should be kept"
+
+
+def test_perform_filter__when_filter_expression_and_csv_engine__raises_value_error(
+    sample_gtfs_zip, output_gtfs
+):
+    filter_expression = FilterPredicate(FilterType.ROUTE_ID, ["R1"])
+
+    with pytest.raises(ValueError):
+        perform_filter(
+            sample_gtfs_zip,
+            output_gtfs,
+            FilterType.ROUTE_ID,
+            [],
+            False,
+            engine=Engine.CSV,
+            filter_expression=filter_expression,
+        )
+    assert not os.path.exists(output_gtfs), "output should not be created"
+
+
+def test_perform_filter__when_glob_value_match__keeps_matching_ids(
+    sample_gtfs_zip, output_gtfs
+):
+    perform_filter(
+        sample_gtfs_zip,
+        output_gtfs,
+        FilterType.TRIP_ID,
+        ["T[12]", "T4"],
+        False,
+        value_match=ValueMatch.GLOB,
+    )
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        trips = pd.read_csv(output_zip.open("trips.txt"), dtype=str)
+    assert trips["trip_id"].tolist() == [
+        "T1",
+        "T2",
+        "T4",
+    ], "trips matching patterns should be kept"
+
+
+@pytest.mark.parametrize(
+    "filter_type,options",
+    [
+        (FilterType.SERVICE_DATE, {}),
+        (FilterType.TRIP_ID, {"engine": Engine.CSV}),
+        (FilterType.TRIP_ID, {"incremental": True}),
+    ],
+)
+def test_perform_filter__when_regex_value_match_is_not_supported__raises_value_error(
+    sample_gtfs_zip, output_gtfs, filter_type, options
+):
+    with pytest.raises(ValueError):
+        perform_filter(
+            sample_gtfs_zip,
+            output_gtfs,
+            filter_type,
+            ["T.*"],
+            False,
+            value_match=ValueMatch.REGEX,
+            **options,
+        )
+
+
+def test_perform_filter__when_validate__returns_validation_report_of_output(
+    sample_gtfs_zip, output_gtfs
+):
+    report = perform_filter(
+        sample_gtfs_zip, output_gtfs, FilterType.ROUTE_ID, ["R1"], False, validate=True
+    )
+
+    assert report is not None, "validation report should be returned"
+    assert report.is_valid, f"filtered GTFS should be valid: {report.issues}"
+
+
+STATION_GTFS_FILES = {
+    **SAMPLE_GTFS_FILES,
+    "stops.txt": """stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station
+ST1,Station 1,48.8500,2.3500,1,
+S1,Stop 1,48.8501,2.3501,0,ST1
+B1,Boarding area 1,48.8501,2.3501,4,S1
+E1,Entrance 1,48.8502,2.3502,2,ST1
+N1,Node 1,48.8502,2.3502,3,
+S2,Stop 2,48.8600,2.3600,0,
+S3,Stop 3,48.8700,2.3700,0,
+S4,Stop 4,48.9000,2.4000,0,
+""",
+    "pathways.txt": """pathway_id,from_stop_id,to_stop_id,pathway_mode,is_bidirectional
+PW1,E1,N1,1,1
+PW2,N1,S1,1,1
+""",
+}
+
+
+@pytest.mark.parametrize(
+    "engine",
+    [
+        Engine.PANDAS,
+        Engine.CSV,
+        Engine.SQLITE,
+        pytest.param(
+            Engine.POLARS,
+            marks=pytest.mark.skipif(
+                importlib.util.find_spec("polars") is None,
+                reason="polars is not installed",
+            ),
+        ),
+    ],
+)
+def test_perform_filter__when_stop_belongs_to_station__keeps_all_station_nodes(
+    tmp_path, engine
+):
+    input_gtfs_zip = write_gtfs_zip(
+        os.path.join(tmp_path, "input.zip"), STATION_GTFS_FILES
+    )
+    output_gtfs_zip = os.path.join(tmp_path, "output.zip")
+
+    perform_filter(
+        input_gtfs_zip,
+        output_gtfs_zip,
+        FilterType.ROUTE_ID,
+        ["R1"],
+        False,
+        engine=engine,
+    )
+
+    with zipfile.ZipFile(output_gtfs_zip) as output_zip:
+        stops = pd.read_csv(output_zip.open("stops.txt"), dtype=str)
+        pathways = pd.read_csv(output_zip.open("pathways.txt"), dtype=str)
+    assert sorted(stops["stop_id"]) == [
+        "B1",
+        "E1",
+        "N1",
+        "S1",
+        "S2",
+        "ST1",
+    ], "served stops, their station nodes and pathway nodes should be kept"
+    assert pathways["pathway_id"].tolist() == ["PW1", "PW2"], "pathways should be kept"
+
+
+@pytest.mark.parametrize(
+    "engine",
+    [
+        Engine.PANDAS,
+        Engine.CSV,
+        Engine.SQLITE,
+        pytest.param(
+            Engine.POLARS,
+            marks=pytest.mark.skipif(
+                importlib.util.find_spec("polars") is None,
+                reason="polars is not installed",
+            ),
+        ),
+    ],
+)
+def test_perform_filter__when_optional_file_is_blank__copies_it(tmp_path, engine):
+    files = dict(SAMPLE_GTFS_FILES)
+    files["shapes.txt"] = "\n \r\n"
+    input_gtfs_zip = write_gtfs_zip(os.path.join(tmp_path, "input.zip"), files)
+    output_gtfs_zip = os.path.join(tmp_path, "output.zip")
+
+    perform_filter(
+        input_gtfs_zip,
+        output_gtfs_zip,
+        FilterType.ROUTE_ID,
+        ["R1"],
+        False,
+        engine=engine,
+    )
+
+    with zipfile.ZipFile(output_gtfs_zip) as output_zip:
+        assert (
+            output_zip.read("shapes.txt") == b"\n \r\n"
+        ), "blank optional file should be copied as is"
+
+
+FARE_GTFS_FILES = {
+    **SAMPLE_GTFS_FILES,
+    "stops.txt": """stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station,zone_id
+ST1,Station 1,48.8500,2.3500,1,,
+S1,Stop 1,48.8501,2.3501,0,ST1,Z1
+S2,Stop 2,48.8600,2.3600,0,,Z2
+S3,Stop 3,48.8700,2.3700,0,,Z3
+S4,Stop 4,48.9000,2.4000,0,,Z4
+""",
+    "fare_attributes.txt": """fare_id,price,currency_type,payment_method,transfers,agency_id
+F1,1.50,EUR,0,0,A1
+F2,1.50,EUR,0,0,A1
+F3,1.50,EUR,0,0,A2
+F4,1.50,EUR,0,0,A1
+F5,2.00,EUR,0,0,A1
+""",
+    "fare_rules.txt": """fare_id,route_id,origin_id,destination_id,contains_id
+F1,R1,,,
+F2,R2,,,
+F3,R3,,,
+F5,,Z1,Z3,
+F5,,Z1,,
+""",
+}
+
+
+@pytest.mark.parametrize(
+    "engine",
+    [
+        Engine.CSV,
+        Engine.SQLITE,
+        pytest.param(
+            Engine.POLARS,
+            marks=pytest.mark.skipif(
+                importlib.util.find_spec("polars") is None,
+                reason="polars is not installed",
+            ),
+        ),
+    ],
+)
+def test_perform_filter__when_not_pandas_engine__filters_fares_as_pandas_engine(
+    tmp_path, engine
+):
+    input_gtfs_zip = write_gtfs_zip(
+        os.path.join(tmp_path, "input.zip"), FARE_GTFS_FILES
+    )
+    pandas_output = os.path.join(tmp_path, "pandas.zip")
+    engine_output = os.path.join(tmp_path, f"{engine}.zip")
+
+    perform_filter(input_gtfs_zip, pandas_output, FilterType.ROUTE_ID, ["R1"], False)
+    perform_filter(
+        input_gtfs_zip,
+        engine_output,
+        FilterType.ROUTE_ID,
+        ["R1"],
+        False,
+        engine=engine,
+    )
+
+    with (
+        zipfile.ZipFile(pandas_output) as pandas_zip,
+        zipfile.ZipFile(engine_output) as engine_zip,
+    ):
+        fare_attributes = pd.read_csv(engine_zip.open("fare_attributes.txt"), dtype=str)
+        fare_rules = pd.read_csv(engine_zip.open("fare_rules.txt"), dtype=str)
+        for filename in ["fare_attributes.txt", "fare_rules.txt"]:
+            pd.testing.assert_frame_equal(
+                pd.read_csv(engine_zip.open(filename), dtype=str),
+                pd.read_csv(pandas_zip.open(filename), dtype=str),
+                obj=filename,
+            )
+    assert (
+        fare_attributes["fare_id"].tolist() == ["F1", "F4", "F5"]
+    ), "fares of other agencies and fares whose rules were all dropped should be dropped"
+    assert fare_rules["fare_id"].tolist() == [
+        "F1",
+        "F5",
+    ], "rules of dropped routes and zones should be dropped"
+
+
+def test_perform_filter__when_shape_options_are_set_with_csv_engine__raises_value_error(
+    tmp_path, sample_gtfs_zip
+):
+    with pytest.raises(ValueError):
+        perform_filter(
+            sample_gtfs_zip,
+            os.path.join(tmp_path, "output.zip"),
+            FilterType.ROUTE_ID,
+            ["R1"],
+            False,
+            engine=Engine.CSV,
+            dedupe_shapes=True,
+        )
+
+
+@pytest.mark.parametrize("engine", [Engine.CSV, Engine.SQLITE, Engine.POLARS])
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"incremental": True},
+        {"value_match": ValueMatch.GLOB},
+        {"filter_expression": FilterPredicate(FilterType.ROUTE_ID, ["R1"])},
+        {"shape_tolerance": 1.0},
+        {"prune": True},
+        {"compact_trips": True},
+    ],
+)
+def test_perform_filter__when_option_is_not_supported_by_engine__raises_value_error(
+    tmp_path, sample_gtfs_zip, engine, options
+):
+    output_gtfs = os.path.join(tmp_path, "output.zip")
+
+    with pytest.raises(ValueError, match=f"Engine {engine} does not support"):
+        perform_filter(
+            sample_gtfs_zip,
+            output_gtfs,
+            FilterType.ROUTE_ID,
+            ["R1"],
+            False,
+            engine=engine,
+            **options,
+        )
+    assert not os.path.exists(output_gtfs), "output should not be created"
+
+
+def test_perform_filter__when_shapes_are_duplicated__writes_deduped_shapes(tmp_path):
+    input_gtfs_zip = write_gtfs_zip(
+        os.path.join(tmp_path, "input.zip"),
+        {
+            **SAMPLE_GTFS_FILES,
+            "shapes.txt": SAMPLE_GTFS_FILES["shapes.txt"].replace(
+                "SH2,48.8600,2.3600,1\nSH2,48.8700,2.3700,2",
+                "SH2,48.8501,2.3501,1\nSH2,48.8600,2.3600,2",
+            ),
+        },
+    )
+    output_gtfs_zip = os.path.join(tmp_path, "output.zip")
+
+    report = perform_filter(
+        input_gtfs_zip,
+        output_gtfs_zip,
+        FilterType.ROUTE_ID,
+        ["R1", "R2"],
+        False,
+        validate=True,
+        shape_tolerance=1,
+        dedupe_shapes=True,
+    )
+
+    with zipfile.ZipFile(output_gtfs_zip) as output_zip:
+        shapes = pd.read_csv(output_zip.open("shapes.txt"), dtype=str)
+        trips = pd.read_csv(output_zip.open("trips.txt"), dtype=str)
+    assert shapes["shape_id"].unique().tolist() == ["SH1"], "SH2 should be dropped"
+    assert trips["shape_id"].tolist() == ["SH1", "SH1", "SH1"], "trips use SH1"
+    assert report.is_valid, "output GTFS should be valid"
+
+
+def test_perform_filter__when_prune_is_set_with_csv_engine__raises_value_error(
+    tmp_path, sample_gtfs_zip
+):
+    with pytest.raises(ValueError):
+        perform_filter(
+            sample_gtfs_zip,
+            os.path.join(tmp_path, "output.zip"),
+            FilterType.ROUTE_ID,
+            ["R1"],
+            False,
+            engine=Engine.CSV,
+            prune=True,
+        )
+
+
+def test_perform_filter__when_prune__drops_shapes_unused_by_trips(tmp_path):
+    input_gtfs_zip = write_gtfs_zip(
+        os.path.join(tmp_path, "input.zip"),
+        {
+            **SAMPLE_GTFS_FILES,
+            "trips.txt": "route_id,service_id,trip_id\n"
+            "R1,WEEK,T1\nR1,WEEKEND,T2\nR2,WEEK,T3\nR3,WEEK,T4\n",
+        },
+    )
+    output_gtfs_zip = os.path.join(tmp_path, "output.zip")
+
+    report = perform_filter(
+        input_gtfs_zip,
+        output_gtfs_zip,
+        FilterType.ROUTE_ID,
+        ["R1"],
+        False,
+        validate=True,
+        prune=True,
+    )
+
+    with zipfile.ZipFile(output_gtfs_zip) as output_zip:
+        shapes = pd.read_csv(output_zip.open("shapes.txt"), dtype=str)
+        agency = pd.read_csv(output_zip.open("agency.txt"), dtype=str)
+    assert shapes.empty, "shapes unused by trips should be dropped"
+    assert agency["agency_id"].tolist() == ["A1"], "agency of R1 should be kept"
+    assert report.is_valid, "output GTFS should be valid"
+
+
+def test_perform_filter__when_compact_trips__writes_frequencies(tmp_path):
+    input_gtfs_zip = write_gtfs_zip(
+        os.path.join(tmp_path, "input.zip"),
+        {
+            **SAMPLE_GTFS_FILES,
+            "trips.txt": "route_id,service_id,trip_id\n"
+            "R1,WEEK,T1\nR1,WEEK,T2\nR1,WEEK,T3\nR2,WEEK,T4\n",
+            "stop_times.txt": "trip_id,arrival_time,departure_time,stop_id,stop_sequence\n"
+            "T1,06:00:00,06:00:00,S1,1\nT1,06:10:00,06:10:00,S2,2\n"
+            "T2,06:30:00,06:30:00,S1,1\nT2,06:40:00,06:40:00,S2,2\n"
+            "T3,07:00:00,07:00:00,S1,1\nT3,07:10:00,07:10:00,S2,2\n"
+            "T4,07:00:00,07:00:00,S2,1\nT4,07:10:00,07:10:00,S3,2\n",
+        },
+    )
+    output_gtfs_zip = os.path.join(tmp_path, "output.zip")
+
+    report = perform_filter(
+        input_gtfs_zip,
+        output_gtfs_zip,
+        FilterType.ROUTE_ID,
+        ["R1"],
+        False,
+        validate=True,
+        compact_trips=True,
+    )
+
+    with zipfile.ZipFile(output_gtfs_zip) as output_zip:
+        trips = pd.read_csv(output_zip.open("trips.txt"), dtype=str)
+        frequencies = pd.read_csv(output_zip.open("frequencies.txt"), dtype=str)
+    assert trips["trip_id"].tolist() == ["T1"], "T2 and T3 should be compacted"
+    assert frequencies.values.tolist() == [
+        ["T1", "06:00:00", "07:30:00", "1800", "1"]
+    ], "T1 should run every 30 minutes"
+    assert report.is_valid, "output GTFS should be valid"
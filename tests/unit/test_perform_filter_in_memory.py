@@ -0,0 +1,96 @@
+import io
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import (
+    Engine,
+    FilterType,
+    OutputFormat,
+    perform_filter,
+    perform_filter_in_memory,
+)
+
+
+@pytest.fixture()
+def sample_gtfs_bytes(sample_gtfs_zip) -> bytes:
+    with open(sample_gtfs_zip, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("engine", [Engine.PANDAS, Engine.CSV])
+def test_perform_filter_in_memory__when_input_is_bytes__returns_same_gtfs_as_file_paths(
+    tmp_path, sample_gtfs_zip, sample_gtfs_bytes, engine
+):
+    output_gtfs_zip = os.path.join(tmp_path, "output.zip")
+    perform_filter(
+        sample_gtfs_zip,
+        output_gtfs_zip,
+        FilterType.ROUTE_ID,
+        ["R1"],
+        False,
+        engine=engine,
+    )
+
+    output = perform_filter_in_memory(
+        sample_gtfs_bytes, FilterType.ROUTE_ID, ["R1"], engine=engine
+    )
+
+    with (
+        zipfile.ZipFile(io.BytesIO(output)) as in_memory_zip,
+        zipfile.ZipFile(output_gtfs_zip) as file_zip,
+    ):
+        assert in_memory_zip.namelist() == file_zip.namelist(), "same GTFS files"
+        for filename in file_zip.namelist():
+            assert in_memory_zip.read(filename) == file_zip.read(
+                filename
+            ), f"{filename} should be filtered as with file paths"
+
+
+def test_perform_filter_in_memory__when_input_is_file_like__does_not_create_temporary_files(
+    sample_gtfs_bytes, monkeypatch
+):
+    def fail_mkdtemp(*args, **kwargs):
+        raise AssertionError("no temporary directory should be created")
+
+    monkeypatch.setattr("tempfile.mkdtemp", fail_mkdtemp)
+
+    output = perform_filter_in_memory(
+        io.BytesIO(sample_gtfs_bytes), FilterType.ROUTE_ID, ["R1"], validate=True
+    )
+
+    routes = pd.read_csv(
+        zipfile.ZipFile(io.BytesIO(output)).open("routes.txt"), dtype=str
+    )
+    assert routes["route_id"].tolist() == ["R1"], "output GTFS is filtered"
+
+
+def test_perform_filter__when_output_is_file_like__writes_gtfs_zip_to_it(
+    sample_gtfs_zip,
+):
+    output = io.BytesIO()
+
+    perform_filter(sample_gtfs_zip, output, FilterType.TRIP_ID, ["T1"], False)
+
+    trips = pd.read_csv(zipfile.ZipFile(output).open("trips.txt"), dtype=str)
+    assert trips["trip_id"].tolist() == ["T1"], "output GTFS is filtered"
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"incremental": True}, {"output_format": OutputFormat.SQLITE}],
+)
+def test_perform_filter_in_memory__when_option_requires_paths__raises_value_error(
+    sample_gtfs_bytes, options
+):
+    with pytest.raises(ValueError):
+        perform_filter_in_memory(
+            sample_gtfs_bytes, FilterType.ROUTE_ID, ["R1"], **options
+        )
+
+
+def test_perform_filter_in_memory__when_input_is_not_a_zip__raises_bad_zip_file():
+    with pytest.raises(zipfile.BadZipFile):
+        perform_filter_in_memory(b"not a zip", FilterType.ROUTE_ID, ["R1"])
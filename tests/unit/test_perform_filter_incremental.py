@@ -0,0 +1,127 @@
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import (
+    INCREMENTAL_STATE_SUFFIX,
+    CompressionMethod,
+    FilterType,
+    perform_filter,
+)
+from tests.unit.conftest import SAMPLE_GTFS_FILES, write_gtfs_zip
+
+
+@pytest.fixture()
+def previous_output_gtfs(tmp_path, sample_gtfs_zip) -> str:
+    path = os.path.join(tmp_path, "output.zip")
+    perform_filter(sample_gtfs_zip, path, FilterType.ROUTE_ID, ["R1"], False, True)
+    return path
+
+
+def read_member_infos(gtfs_zip_path: str):
+    with zipfile.ZipFile(gtfs_zip_path) as gtfs_zip:
+        return {
+            zinfo.filename: (zinfo.CRC, zinfo.compress_size, gtfs_zip.read(zinfo))
+            for zinfo in gtfs_zip.infolist()
+        }
+
+
+def test_perform_filter__when_incremental__saves_state(previous_output_gtfs):
+    assert os.path.isfile(f"{previous_output_gtfs}{INCREMENTAL_STATE_SUFFIX}")
+
+
+def test_perform_filter__when_incremental_and_calendar_dates_changed__only_refilters_dependents(
+    tmp_path, previous_output_gtfs, monkeypatch: pytest.MonkeyPatch
+):
+    files = dict(SAMPLE_GTFS_FILES)
+    files["calendar_dates.txt"] += "WEEK,20240102,2\n"
+    new_input = write_gtfs_zip(os.path.join(tmp_path, "new_input.zip"), files)
+    previous_members = read_member_infos(previous_output_gtfs)
+    parsed_files = []
+
+    def spy_parse_gtfs_file(directory, filename):
+        gtfs_data = pd.read_csv(os.path.join(directory, filename), dtype=str)
+        parsed_files.append(filename)
+        return gtfs_data
+
+    monkeypatch.setattr("gtfs_filtering.core.parse_gtfs_file", spy_parse_gtfs_file)
+
+    perform_filter(
+        new_input, previous_output_gtfs, FilterType.ROUTE_ID, ["R1"], False, True
+    )
+
+    assert "stop_times.txt" not in parsed_files, "stop_times should not be parsed"
+    assert "shapes.txt" not in parsed_files, "shapes should not be parsed"
+    new_members = read_member_infos(previous_output_gtfs)
+    assert new_members.keys() == previous_members.keys()
+    for filename in ["stop_times.txt", "stops.txt", "shapes.txt", "feed_info.txt"]:
+        assert (
+            new_members[filename] == previous_members[filename]
+        ), f"{filename} should be copied from previous output"
+    calendar_dates = new_members["calendar_dates.txt"][2].decode()
+    assert "WEEK,20240102,2" in calendar_dates, "calendar_dates should be re-filtered"
+
+
+def test_perform_filter__when_incremental_output_equals_full_filtering(
+    tmp_path, previous_output_gtfs
+):
+    files = dict(SAMPLE_GTFS_FILES)
+    files["trips.txt"] = files["trips.txt"].replace("R1,WEEKEND,T2", "R2,WEEKEND,T2")
+    new_input = write_gtfs_zip(os.path.join(tmp_path, "new_input.zip"), files)
+    full_output = os.path.join(tmp_path, "full_output.zip")
+
+    perform_filter(
+        new_input, previous_output_gtfs, FilterType.ROUTE_ID, ["R1"], False, True
+    )
+    perform_filter(new_input, full_output, FilterType.ROUTE_ID, ["R1"], False)
+
+    incremental_members = read_member_infos(previous_output_gtfs)
+    full_members = read_member_infos(full_output)
+    assert {k: v[2] for k, v in incremental_members.items()} == {
+        k: v[2] for k, v in full_members.items()
+    }, "incremental output should have same content as a full filtering"
+
+
+def test_perform_filter__when_incremental_and_filter_changed__refuses_to_overwrite(
+    sample_gtfs_zip, previous_output_gtfs
+):
+    with pytest.raises(FileExistsError):
+        perform_filter(
+            sample_gtfs_zip,
+            previous_output_gtfs,
+            FilterType.ROUTE_ID,
+            ["R2"],
+            False,
+            True,
+        )
+
+
+def test_perform_filter__when_incremental_and_compression_changed__refilters_all(
+    tmp_path, previous_output_gtfs, monkeypatch: pytest.MonkeyPatch
+):
+    files = dict(SAMPLE_GTFS_FILES)
+    files["calendar_dates.txt"] += "WEEK,20240102,2\n"
+    new_input = write_gtfs_zip(os.path.join(tmp_path, "new_input.zip"), files)
+    incremental_filters = []
+    monkeypatch.setattr(
+        "gtfs_filtering.core._perform_incremental_filter",
+        lambda *args: incremental_filters.append(args),
+    )
+
+    perform_filter(
+        new_input,
+        previous_output_gtfs,
+        FilterType.ROUTE_ID,
+        ["R1"],
+        True,
+        True,
+        compression=CompressionMethod.STORED,
+    )
+
+    assert not incremental_filters, "previous output should not be reused"
+    with zipfile.ZipFile(previous_output_gtfs) as output_zip:
+        assert output_zip.getinfo("stop_times.txt").compress_type == (
+            zipfile.ZIP_STORED
+        ), "unchanged filtered GTFS files should be recompressed"
@@ -0,0 +1,111 @@
+import contextlib
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import Engine, FilterType, OutputFormat, perform_filter
+
+
+def test_perform_filter__when_sqlite_output_format__saves_indexed_database(
+    sample_gtfs_zip, tmp_path
+):
+    output_database = os.path.join(tmp_path, "output.sqlite")
+
+    perform_filter(
+        sample_gtfs_zip,
+        output_database,
+        FilterType.ROUTE_ID,
+        ["R1"],
+        False,
+        output_format=OutputFormat.SQLITE,
+    )
+
+    with contextlib.closing(sqlite3.connect(output_database)) as connection:
+        trips = pd.read_sql("SELECT * FROM trips", connection)
+        feed_info = pd.read_sql("SELECT * FROM feed_info", connection)
+        indexes = [
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        ]
+    assert trips["trip_id"].tolist() == ["T1", "T2"], "trips should be filtered"
+    assert len(feed_info) == 1, "feed_info should be saved even if it is not filtered"
+    assert "stop_times_trip_id" in indexes, "stop_times.trip_id should be indexed"
+
+
+def test_perform_filter__when_sqlite_output_exists_and_overwrite_set__replaces_it(
+    sample_gtfs_zip, tmp_path
+):
+    output_database = os.path.join(tmp_path, "output.sqlite")
+    for route_id in ["R1", "R3"]:
+        perform_filter(
+            sample_gtfs_zip,
+            output_database,
+            FilterType.ROUTE_ID,
+            [route_id],
+            True,
+            output_format=OutputFormat.SQLITE,
+        )
+
+    with contextlib.closing(sqlite3.connect(output_database)) as connection:
+        routes = pd.read_sql("SELECT * FROM routes", connection)
+    assert routes["route_id"].tolist() == ["R3"], "routes should be replaced"
+
+
+@pytest.mark.parametrize(
+    "output_format, read_table",
+    [
+        (OutputFormat.PARQUET, "read_parquet"),
+        (OutputFormat.ARROW, "read_feather"),
+    ],
+)
+def test_perform_filter__when_arrow_output_format__saves_dictionary_encoded_tables(
+    sample_gtfs_zip, tmp_path, output_format, read_table
+):
+    pytest.importorskip("pyarrow")
+    output_directory = os.path.join(tmp_path, "output")
+
+    perform_filter(
+        sample_gtfs_zip,
+        output_directory,
+        FilterType.ROUTE_ID,
+        ["R1"],
+        False,
+        output_format=output_format,
+    )
+
+    trips = getattr(pd, read_table)(
+        os.path.join(output_directory, f"trips{output_format.extension}")
+    )
+    assert trips["trip_id"].astype(str).tolist() == [
+        "T1",
+        "T2",
+    ], "trips should be filtered"
+    assert isinstance(
+        trips["route_id"].dtype, pd.CategoricalDtype
+    ), "route_id should be dictionary-encoded"
+    assert os.path.isfile(
+        os.path.join(output_directory, f"feed_info{output_format.extension}")
+    ), "feed_info should be saved even if it is not filtered"
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"engine": Engine.CSV}, {"incremental": True}],
+)
+def test_perform_filter__when_sqlite_output_format_and_unsupported_option__raises_value_error(
+    sample_gtfs_zip, tmp_path, options
+):
+    with pytest.raises(ValueError):
+        perform_filter(
+            sample_gtfs_zip,
+            os.path.join(tmp_path, "output.sqlite"),
+            FilterType.ROUTE_ID,
+            ["R1"],
+            False,
+            output_format=OutputFormat.SQLITE,
+            **options,
+        )
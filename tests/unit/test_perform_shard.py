@@ -0,0 +1,56 @@
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import perform_shard
+
+
+def _read_gtfs_file(gtfs_zip: str, filename: str) -> pd.DataFrame:
+    with zipfile.ZipFile(gtfs_zip) as input_zip:
+        return pd.read_csv(input_zip.open(filename), dtype=str)
+
+
+def test_perform_shard__splits_routes_with_related_rows(tmp_path, sample_gtfs_zip):
+    output_directory = os.path.join(tmp_path, "shards")
+
+    shards = perform_shard(sample_gtfs_zip, output_directory, 2, False)
+
+    assert [shard.output_gtfs_zip for shard in shards] == [
+        os.path.join(output_directory, "sample_gtfs_1.zip"),
+        os.path.join(output_directory, "sample_gtfs_2.zip"),
+    ], "shards should be numbered after input filename"
+    # R1 has 4 stop times, R2 and R3 have 2 each
+    assert [shard.route_ids for shard in shards] == [
+        ["R1"],
+        ["R2", "R3"],
+    ], "routes should be balanced by stop times"
+    assert [shard.stop_times_count for shard in shards] == [4, 4]
+    trips = _read_gtfs_file(shards[1].output_gtfs_zip, "trips.txt")
+    assert trips["trip_id"].tolist() == [
+        "T3",
+        "T4",
+    ], "trips of R2 and R3 should be kept"
+    agency = _read_gtfs_file(shards[1].output_gtfs_zip, "agency.txt")
+    assert agency["agency_id"].tolist() == ["A1", "A2"], "agencies of routes are kept"
+    assert (
+        "feed_info.txt" in zipfile.ZipFile(shards[0].output_gtfs_zip).namelist()
+    ), "files which are not filtered should be copied"
+
+
+def test_perform_shard__when_shards_outnumber_routes__raises_value_error(
+    tmp_path, sample_gtfs_zip
+):
+    with pytest.raises(ValueError):
+        perform_shard(sample_gtfs_zip, str(tmp_path), 4, False)
+
+
+def test_perform_shard__when_shard_exists_and_overwrite_not_set__raises_file_exists_error(
+    tmp_path, sample_gtfs_zip
+):
+    with open(os.path.join(tmp_path, "sample_gtfs_2.zip"), "w") as f:
+        f.write("")
+
+    with pytest.raises(FileExistsError):
+        perform_shard(sample_gtfs_zip, str(tmp_path), 2, False)
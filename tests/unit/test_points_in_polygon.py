@@ -0,0 +1,42 @@
+import numpy as np
+
+from gtfs_filtering.geo import build_polygon_grid, points_in_polygon
+
+# U shaped polygon: its bounding box center is outside of it
+U_POLYGON = np.array(
+    [
+        [0.0, 0.0],
+        [3.0, 0.0],
+        [3.0, 3.0],
+        [2.0, 3.0],
+        [2.0, 1.0],
+        [1.0, 1.0],
+        [1.0, 3.0],
+        [0.0, 3.0],
+    ]
+)
+
+
+def test_points_in_polygon__tests_points_against_polygon():
+    grid = build_polygon_grid(U_POLYGON, size=4)
+    lons = np.array([0.5, 1.5, 1.5, 2.5, 4.0, np.nan])
+    lats = np.array([2.5, 2.5, 0.5, 2.9, 1.0, 1.0])
+
+    inside = points_in_polygon(lons, lats, grid)
+
+    assert inside.tolist() == [True, False, True, True, False, False]
+
+
+def test_points_in_polygon__matches_polygon_without_grid_index():
+    rng = np.random.default_rng(0)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, 100))
+    radiuses = rng.uniform(0.3, 1, 100)
+    polygon = np.column_stack([radiuses * np.cos(angles), radiuses * np.sin(angles)])
+    lons, lats = rng.uniform(-1.2, 1.2, (2, 10000))
+
+    inside_with_grid = points_in_polygon(lons, lats, build_polygon_grid(polygon))
+    inside_without_grid = points_in_polygon(
+        lons, lats, build_polygon_grid(polygon, size=1)
+    )
+
+    assert (inside_with_grid == inside_without_grid).all(), "results should be equal"
@@ -0,0 +1,31 @@
+import zipfile
+
+import pandas as pd
+
+from gtfs_filtering.core import (
+    FilterType,
+    perform_filter,
+    preview_filter,
+)
+
+
+def test_preview_filter__counts_rows_kept_by_perform_filter(sample_gtfs_zip, tmp_path):
+    output_gtfs = str(tmp_path / "output.zip")
+
+    stats = preview_filter(sample_gtfs_zip, FilterType.ROUTE_ID, ["R1"])
+    perform_filter(sample_gtfs_zip, output_gtfs, FilterType.ROUTE_ID, ["R1"], False)
+
+    with zipfile.ZipFile(output_gtfs) as output_zip:
+        for file_stats in stats.gtfs_files:
+            output_rows = len(pd.read_csv(output_zip.open(file_stats.gtfs_file)))
+            assert (
+                file_stats.output_rows == output_rows
+            ), f"{file_stats.gtfs_file} preview should match filtered rows"
+
+
+def test_preview_filter__does_not_write_output(sample_gtfs_zip, tmp_path):
+    preview_filter(sample_gtfs_zip, FilterType.TRIP_ID, ["T1"])
+
+    assert list(tmp_path.iterdir()) == [
+        tmp_path / "sample_gtfs.zip"
+    ], "no file should be written"
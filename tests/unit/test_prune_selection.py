@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import GTFS, GTFSSelection, prune_selection
+
+
+@pytest.fixture
+def sample_gtfs():
+    return GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1", "A2"]}, dtype=str),
+        routes=pd.DataFrame(
+            {"route_id": ["R1", "R2"], "agency_id": ["A1", "A2"]}, dtype=str
+        ),
+        trips=pd.DataFrame(
+            {
+                "route_id": ["R1", "R2"],
+                "service_id": ["WEEK", "WEEKEND"],
+                "trip_id": ["T1", "T2"],
+                "shape_id": ["SH1", "SH2"],
+            },
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(
+            {"trip_id": ["T1", "T1", "T2"], "stop_id": ["S1", "S2", "S2"]}, dtype=str
+        ),
+        stops=pd.DataFrame(
+            {"stop_id": ["S1", "S2"], "level_id": ["L1", None]}, dtype=str
+        ),
+        levels=pd.DataFrame({"level_id": ["L1", "L2"]}, dtype=str),
+        calendar=pd.DataFrame({"service_id": ["WEEK", "WEEKEND"]}, dtype=str),
+        calendar_dates=pd.DataFrame({"service_id": ["WEEKEND"]}, dtype=str),
+        shapes=pd.DataFrame({"shape_id": ["SH1", "SH1", "SH2"]}, dtype=str),
+        areas=pd.DataFrame({"area_id": ["AR1", "AR2"]}, dtype=str),
+        stop_areas=pd.DataFrame({"area_id": ["AR1"], "stop_id": ["S1"]}, dtype=str),
+    )
+
+
+def _select_all(gtfs: GTFS) -> GTFSSelection:
+    return GTFSSelection(
+        **{
+            name: np.ones(len(gtfs.__getattribute__(name)), dtype=bool)
+            for name in [
+                "agency",
+                "routes",
+                "trips",
+                "stop_times",
+                "stops",
+                "levels",
+                "calendar",
+                "calendar_dates",
+                "shapes",
+                "areas",
+                "stop_areas",
+            ]
+        }
+    )
+
+
+def test_prune_selection__drops_unreferenced_rows(sample_gtfs):
+    selection = _select_all(sample_gtfs)
+
+    prune_selection(sample_gtfs, selection)
+
+    assert selection.levels.tolist() == [True, False], "L2 should be dropped"
+    assert selection.areas.tolist() == [True, False], "AR2 should be dropped"
+    assert selection.agency.all(), "agencies with routes should be kept"
+    assert selection.shapes.all(), "shapes of trips should be kept"
+
+
+def test_prune_selection__when_route_is_dropped__drops_orphans_until_fixed_point(
+    sample_gtfs,
+):
+    selection = _select_all(sample_gtfs)
+    selection.routes[1] = False
+
+    prune_selection(sample_gtfs, selection)
+
+    assert selection.trips.tolist() == [True, False], "T2 of R2 should be dropped"
+    assert selection.stop_times.tolist() == [
+        True,
+        True,
+        False,
+    ], "stop times of T2 should be dropped"
+    assert selection.agency.tolist() == [True, False], "A2 should be dropped"
+    assert selection.calendar.tolist() == [True, False], "WEEKEND should be dropped"
+    assert not selection.calendar_dates.any(), "WEEKEND dates should be dropped"
+    assert selection.shapes.tolist() == [True, True, False], "SH2 should be dropped"
+    assert selection.stops.all(), "stops should never be pruned"
+
+
+def test_prune_selection__when_trips_have_no_shape_id__drops_all_shapes(sample_gtfs):
+    sample_gtfs.trips = sample_gtfs.trips.drop(columns="shape_id")
+    selection = _select_all(sample_gtfs)
+
+    prune_selection(sample_gtfs, selection)
+
+    assert not selection.shapes.any(), "shapes should all be dropped"
+
+
+def test_prune_selection__when_routes_have_no_agency_id__keeps_agency(sample_gtfs):
+    sample_gtfs.agency = sample_gtfs.agency.iloc[:1]
+    sample_gtfs.routes = sample_gtfs.routes.drop(columns="agency_id")
+    selection = _select_all(sample_gtfs)
+
+    prune_selection(sample_gtfs, selection)
+
+    assert selection.agency.tolist() == [True], "single agency should be kept"
+
+
+def test_prune_selection__when_reference_is_missing_from_input__keeps_row(
+    sample_gtfs,
+):
+    sample_gtfs.stop_times.loc[2, "stop_id"] = "UNKNOWN"
+    selection = _select_all(sample_gtfs)
+
+    prune_selection(sample_gtfs, selection)
+
+    assert (
+        selection.stop_times.all()
+    ), "rows referencing rows absent from input should be kept"
+
+
+def test_prune_selection__when_file_is_not_selected__prunes_all_its_rows(
+    sample_gtfs,
+):
+    selection = _select_all(sample_gtfs)
+    selection.levels = None
+
+    prune_selection(sample_gtfs, selection)
+
+    assert selection.levels.tolist() == [True, False], "L2 should be dropped"
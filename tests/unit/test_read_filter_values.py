@@ -0,0 +1,15 @@
+import io
+
+from gtfs_filtering.core import read_filter_values
+
+
+def test_read_filter_values__returns_distinct_stripped_values_in_order():
+    lines = io.StringIO("T2\n  T1 \r\n\nT2\n   \nT3")
+
+    values = read_filter_values(lines)
+
+    assert values == ["T2", "T1", "T3"], "blank lines and duplicates should be dropped"
+
+
+def test_read_filter_values__when_no_line__returns_no_value():
+    assert read_filter_values([]) == [], "no value should be returned"
@@ -0,0 +1,128 @@
+import json
+import os
+
+import pytest
+
+from gtfs_filtering.core import AndFilter, FilterType, ValueMatch
+from gtfs_filtering.watch import read_jobs_config
+
+
+def _write_config(tmp_path, config) -> str:
+    path = os.path.join(tmp_path, "jobs.json")
+    with open(path, "w") as f:
+        json.dump(config, f)
+    return path
+
+
+def test_read_jobs_config__when_config_is_valid__returns_jobs(tmp_path):
+    path = _write_config(
+        tmp_path,
+        {
+            "jobs": [
+                {
+                    "name": "metro",
+                    "output_directory": "out/metro",
+                    "filter_values": ["R1"],
+                },
+                {
+                    "name": "stops",
+                    "output_directory": "out/stops",
+                    "filter_type": "stop_id",
+                    "filter_values": ["S*"],
+                    "value_match": "glob",
+                    "trim": True,
+                },
+                {
+                    "name": "expression",
+                    "output_directory": "out/expression",
+                    "filter_spec": {
+                        "and": [{"route_id": ["R1"]}, {"trip_id": ["T1", "T2"]}]
+                    },
+                },
+            ]
+        },
+    )
+
+    jobs = read_jobs_config(path)
+
+    assert [job.name for job in jobs] == ["metro", "stops", "expression"]
+    assert jobs[0].filter_type == FilterType.ROUTE_ID, "route_id is default filter type"
+    assert jobs[1].filter_type == FilterType.STOP_ID
+    assert jobs[1].value_match == ValueMatch.GLOB
+    assert jobs[1].trim, "trim should be read"
+    assert isinstance(jobs[2].filter_expression, AndFilter), "filter spec is parsed"
+
+
+def test_read_jobs_config__when_compression_level_is_a_string__converts_it(tmp_path):
+    path = _write_config(
+        tmp_path,
+        {
+            "jobs": [
+                {
+                    "name": "metro",
+                    "output_directory": "out/metro",
+                    "filter_values": ["R1"],
+                    "compression_level": "9",
+                }
+            ]
+        },
+    )
+
+    jobs = read_jobs_config(path)
+
+    assert jobs[0].compression_level == 9, "compression level should be an int"
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        [],
+        {"jobs": []},
+        {"jobs": [{"output_directory": "out", "filter_values": ["R1"]}]},
+        {"jobs": [{"name": "no values", "output_directory": "out"}]},
+        {
+            "jobs": [
+                {
+                    "name": "unknown key",
+                    "output_directory": "out",
+                    "filter_values": ["R1"],
+                    "unknown": 1,
+                }
+            ]
+        },
+        {
+            "jobs": [
+                {
+                    "name": "unknown engine",
+                    "output_directory": "out",
+                    "filter_values": ["R1"],
+                    "engine": "unknown",
+                }
+            ]
+        },
+        *(
+            {
+                "jobs": [
+                    {
+                        "name": "invalid compression level",
+                        "output_directory": "out",
+                        "filter_values": ["R1"],
+                        "compression_level": compression_level,
+                    }
+                ]
+            }
+            for compression_level in ["high", 10, [9]]
+        ),
+        {
+            "jobs": [
+                {"name": "a", "output_directory": "out", "filter_values": ["R1"]},
+                {"name": "b", "output_directory": "out", "filter_values": ["R2"]},
+            ]
+        },
+    ],
+)
+def test_read_jobs_config__when_config_is_invalid__raises_value_error(tmp_path, config):
+    path = _write_config(tmp_path, config)
+
+    with pytest.raises(ValueError):
+        read_jobs_config(path)
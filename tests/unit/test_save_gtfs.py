@@ -1,9 +1,16 @@
+import contextlib
 import os
+import sqlite3
 
 import pandas as pd
 import pytest
 
-from gtfs_filtering.core import GTFS, save_gtfs
+from gtfs_filtering.core import (
+    GTFS,
+    OutputFormat,
+    SQLITE_DATABASE_FILENAME,
+    save_gtfs,
+)
 
 
 @pytest.fixture
@@ -108,3 +115,40 @@ def test_save_gtfs__when_directory_is_not_writable__raises_permission_error(
 
     # Restore permissions for cleanup
     os.chmod(unwritable_directory, 0o700)
+
+
+def test_save_gtfs__when_sqlite_output_format__saves_tables_in_database(
+    gtfs_data, tmp_path
+):
+    save_gtfs(gtfs_data, tmp_path, OutputFormat.SQLITE)
+
+    with contextlib.closing(
+        sqlite3.connect(os.path.join(tmp_path, SQLITE_DATABASE_FILENAME))
+    ) as connection:
+        stops_df = pd.read_sql("SELECT * FROM stops", connection)
+        tables = [
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        ]
+
+    pd.testing.assert_frame_equal(stops_df, gtfs_data.stops), "frames should be equal"
+    assert "agency" not in tables, "None files should not be saved"
+
+
+def test_save_gtfs__when_parquet_output_format__saves_one_file_per_gtfs_file(
+    gtfs_data, tmp_path
+):
+    pytest.importorskip("pyarrow")
+
+    save_gtfs(gtfs_data, tmp_path, OutputFormat.PARQUET)
+
+    stops_df = pd.read_parquet(os.path.join(tmp_path, "stops.parquet"))
+    assert stops_df["stop_name"].tolist() == [
+        "Stop 1",
+        "Stop 2",
+    ], "stops should be saved"
+    assert not os.path.isfile(
+        os.path.join(tmp_path, "agency.parquet")
+    ), "file should not be saved"
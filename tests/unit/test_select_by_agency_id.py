@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import GTFS, select_by_agency_id
+
+
+@pytest.fixture
+def sample_gtfs():
+    return GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1", "A2"]}, dtype=str),
+        stops=pd.DataFrame(
+            {
+                "stop_id": ["S1", "S2", "S3"],
+                "zone_id": ["Z1", "Z1", "Z2"],
+                "parent_station": [None, None, None],
+            },
+            dtype=str,
+        ),
+        routes=pd.DataFrame(
+            {"route_id": ["R1", "R2", "R3"], "agency_id": ["A1", "A1", "A2"]},
+            dtype=str,
+        ),
+        trips=pd.DataFrame(
+            {
+                "trip_id": ["T1", "T2", "T3"],
+                "route_id": ["R1", "R2", "R3"],
+                "service_id": ["WEEK", "WEEK", "WEEK"],
+            },
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(
+            {"trip_id": ["T1", "T2", "T3"], "stop_id": ["S1", "S2", "S3"]}, dtype=str
+        ),
+        fare_attributes=pd.DataFrame(
+            {"fare_id": ["F1", "F2", "F3"], "agency_id": ["A1", "A2", "A1"]},
+            dtype=str,
+        ),
+        fare_rules=pd.DataFrame(
+            {
+                "fare_id": ["F1", "F1", "F2", "F3"],
+                "route_id": ["R1", "R3", None, None],
+                "origin_id": [None, None, None, "Z2"],
+            },
+            dtype=str,
+        ),
+    )
+
+
+def test_select_by_agency_id__keeps_routes_of_agencies_and_related_rows(sample_gtfs):
+    selection = select_by_agency_id(sample_gtfs, ["A1"])
+
+    assert selection.agency.tolist() == [True, False], "only A1 should be kept"
+    assert selection.routes.tolist() == [True, True, False], "R1 and R2 should be kept"
+    assert selection.trips.tolist() == [True, True, False], "T1 and T2 should be kept"
+    assert selection.stops.tolist() == [True, True, False], "S1 and S2 should be kept"
+
+
+def test_select_by_agency_id__keeps_fares_consistent(sample_gtfs):
+    selection = select_by_agency_id(sample_gtfs, ["A1"])
+
+    assert selection.fare_rules.tolist() == [
+        True,
+        False,
+        False,
+        False,
+    ], "only rules of kept fares on kept routes and zones should be kept"
+    assert selection.fare_attributes.tolist() == [
+        True,
+        False,
+        False,
+    ], "fares of other agencies and fares without any kept rule should be dropped"
+
+
+def test_select_by_agency_id__when_routes_agency_id_is_missing__keeps_all_routes_of_single_agency(
+    sample_gtfs,
+):
+    sample_gtfs.agency = pd.DataFrame({"agency_id": ["A1"]}, dtype=str)
+    sample_gtfs.routes = sample_gtfs.routes.drop(columns="agency_id")
+    sample_gtfs.fare_attributes = None
+    sample_gtfs.fare_rules = None
+
+    selection = select_by_agency_id(sample_gtfs, ["A1"])
+
+    assert selection.routes.tolist() == [True, True, True], "all routes should be kept"
+    assert selection.trips.tolist() == [True, True, True], "all trips should be kept"
+    assert selection.agency.tolist() == [True], "single agency should be kept"
+
+
+def test_select_by_agency_id__when_agency_is_unknown__keeps_no_route(sample_gtfs):
+    selection = select_by_agency_id(sample_gtfs, ["UNKNOWN"])
+
+    assert not selection.routes.any(), "no route should be kept"
+    assert not selection.trips.any(), "no trip should be kept"
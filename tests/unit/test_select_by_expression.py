@@ -0,0 +1,100 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import (
+    GTFS,
+    AndFilter,
+    FilterPredicate,
+    FilterType,
+    OrFilter,
+    select_by_expression,
+)
+
+
+@pytest.fixture
+def sample_gtfs():
+    return GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1"]}, dtype=str),
+        stops=pd.DataFrame(
+            {"stop_id": ["S1", "S2"], "parent_station": [None, None]}, dtype=str
+        ),
+        routes=pd.DataFrame(
+            {"route_id": ["R1", "R2"], "agency_id": ["A1", "A1"]}, dtype=str
+        ),
+        trips=pd.DataFrame(
+            {
+                "trip_id": ["T1", "T2", "T3"],
+                "route_id": ["R1", "R1", "R2"],
+                "service_id": ["WEEK", "WEEKEND", "WEEK"],
+            },
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(
+            {"trip_id": ["T1", "T2", "T3"], "stop_id": ["S1", "S1", "S2"]}, dtype=str
+        ),
+        calendar=pd.DataFrame(
+            {
+                "service_id": ["WEEK", "WEEKEND"],
+                "monday": ["1", "0"],
+                "tuesday": ["1", "0"],
+                "wednesday": ["1", "0"],
+                "thursday": ["1", "0"],
+                "friday": ["1", "0"],
+                "saturday": ["0", "1"],
+                "sunday": ["0", "1"],
+                "start_date": ["20240101", "20240101"],
+                "end_date": ["20241231", "20241231"],
+            },
+            dtype=str,
+        ),
+    )
+
+
+def test_select_by_expression__when_and__keeps_trips_matching_all_operands(
+    sample_gtfs,
+):
+    expression = AndFilter(
+        [
+            FilterPredicate(FilterType.ROUTE_ID, ["R1"]),
+            # monday to wednesday
+            FilterPredicate(FilterType.SERVICE_DATE, ["20240101", "20240103"]),
+        ]
+    )
+
+    selection = select_by_expression(sample_gtfs, expression)
+
+    assert selection.trips.tolist() == [True, False, False], "only T1 should be kept"
+    assert selection.routes.tolist() == [True, False], "only R1 should be kept"
+    assert selection.calendar.tolist() == [True, False], "only WEEK should be kept"
+    assert "calendar" in selection.transforms, "calendar should be clipped to window"
+
+
+def test_select_by_expression__when_or__keeps_trips_matching_any_operand(
+    sample_gtfs,
+):
+    expression = OrFilter(
+        [
+            FilterPredicate(FilterType.TRIP_ID, ["T2"]),
+            FilterPredicate(FilterType.STOP_ID, ["S2"]),
+        ]
+    )
+
+    selection = select_by_expression(sample_gtfs, expression)
+
+    assert selection.trips.tolist() == [False, True, True], "T2 and T3 should be kept"
+    assert selection.routes.tolist() == [True, True], "R1 and R2 should be kept"
+    assert "calendar" not in selection.transforms, "calendar should not be clipped"
+
+
+def test_select_by_expression__when_filter_values_are_invalid__raises_value_error(
+    sample_gtfs,
+):
+    expression = AndFilter(
+        [
+            FilterPredicate(FilterType.ROUTE_ID, ["R1"]),
+            FilterPredicate(FilterType.TIME_WINDOW, ["06:00:00"]),
+        ]
+    )
+
+    with pytest.raises(ValueError):
+        select_by_expression(sample_gtfs, expression)
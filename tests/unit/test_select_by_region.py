@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import (
+    GTFS,
+    parse_bbox,
+    parse_polygon,
+    select_by_bbox,
+    select_by_polygon,
+)
+
+
+@pytest.fixture
+def sample_gtfs():
+    return GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1"]}, dtype=str),
+        stops=pd.DataFrame(
+            {
+                "stop_id": ["S1", "S2", "S3"],
+                "stop_lat": ["48.85", "48.86", "45.76"],
+                "stop_lon": ["2.35", "2.36", "4.83"],
+                "parent_station": [None, None, None],
+            },
+            dtype=str,
+        ),
+        routes=pd.DataFrame(
+            {"route_id": ["R1", "R2"], "agency_id": ["A1", "A1"]}, dtype=str
+        ),
+        trips=pd.DataFrame(
+            {
+                "trip_id": ["T1", "T2"],
+                "route_id": ["R1", "R2"],
+                "service_id": ["WEEK", "WEEK"],
+                "shape_id": ["SH1", "SH2"],
+            },
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(
+            {"trip_id": ["T1", "T1", "T2"], "stop_id": ["S1", "S3", "S3"]}, dtype=str
+        ),
+        shapes=pd.DataFrame(
+            {
+                "shape_id": ["SH1", "SH1", "SH2"],
+                "shape_pt_lat": ["48.85", "45.76", "45.76"],
+                "shape_pt_lon": ["2.35", "4.83", "4.83"],
+            },
+            dtype=str,
+        ),
+    )
+
+
+def test_select_by_bbox__keeps_trips_serving_a_stop_inside_bbox(sample_gtfs):
+    selection = select_by_bbox(sample_gtfs, (2.2, 48.8, 2.5, 48.9))
+
+    assert selection.trips.tolist() == [True, False], "only T1 should be kept"
+    assert selection.stop_times.tolist() == [
+        True,
+        True,
+        False,
+    ], "all stop times of T1 should be kept"
+
+
+def test_select_by_bbox__when_trim__drops_stop_times_and_shapes_outside_of_bbox(
+    sample_gtfs,
+):
+    selection = select_by_bbox(sample_gtfs, (2.2, 48.8, 2.5, 48.9), trim=True)
+
+    assert selection.stop_times.tolist() == [True, False, False]
+    assert selection.stops.tolist() == [True, False, False], "only S1 should be kept"
+    assert selection.shapes.tolist() == [True, False, False]
+
+
+def test_select_by_polygon__keeps_trips_serving_a_stop_inside_polygon(sample_gtfs):
+    polygon = np.array([[4.0, 45.0], [5.0, 45.0], [5.0, 46.0], [4.0, 46.0]])
+
+    selection = select_by_polygon(sample_gtfs, polygon)
+
+    assert selection.trips.tolist() == [True, True], "T1 and T2 should be kept"
+
+
+def test_parse_polygon__parses_vertices():
+    polygon = parse_polygon(["2.2,48.8", "2.5,48.8", "2.5,48.9"])
+
+    assert polygon.tolist() == [[2.2, 48.8], [2.5, 48.8], [2.5, 48.9]]
+
+
+@pytest.mark.parametrize(
+    "filter_values", [["2.2,48.8", "2.5,48.8"], ["2.2,48.8", "2.5", "2.5,48.9"]]
+)
+def test_parse_polygon__when_polygon_is_invalid__raises_value_error(filter_values):
+    with pytest.raises(ValueError):
+        parse_polygon(filter_values)
+
+
+@pytest.mark.parametrize(
+    "filter_values",
+    [
+        ["2.2", "48.8", "2.5"],
+        ["2.2", "48.8", "2.5", "north"],
+        ["2.5", "48.8", "2.2", "48.9"],
+    ],
+)
+def test_parse_bbox__when_bbox_is_invalid__raises_value_error(filter_values):
+    with pytest.raises(ValueError):
+        parse_bbox(filter_values)
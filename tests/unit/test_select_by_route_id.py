@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import GTFS, select_by_route_id
+
+
+@pytest.fixture
+def sample_gtfs():
+    return GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1", "A2"]}, dtype=str),
+        stops=pd.DataFrame(
+            {
+                "stop_id": ["ST1", "S1", "S2"],
+                "parent_station": [None, "ST1", None],
+            },
+            dtype=str,
+        ),
+        routes=pd.DataFrame(
+            {"route_id": ["R1", "R2"], "agency_id": ["A1", "A2"]}, dtype=str
+        ),
+        trips=pd.DataFrame(
+            {
+                "trip_id": ["T1", "T2"],
+                "route_id": ["R1", "R2"],
+                "service_id": ["WEEK", "WEEK"],
+            },
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(
+            {"trip_id": ["T1", "T2", "T2"], "stop_id": ["S1", "S2", "S1"]}, dtype=str
+        ),
+        calendar=pd.DataFrame({"service_id": ["WEEK"]}, dtype=str),
+    )
+
+
+def test_select_by_route_id__selects_related_rows(sample_gtfs):
+    selection = select_by_route_id(sample_gtfs, ["R1"])
+
+    assert selection.agency.tolist() == [True, False], "agency A1 should be selected"
+    assert selection.routes.tolist() == [True, False], "route R1 should be selected"
+    assert selection.trips.tolist() == [True, False], "trip T1 should be selected"
+    assert selection.stop_times.tolist() == [
+        True,
+        False,
+        False,
+    ], "stop times of T1 should be selected"
+    assert selection.stops.tolist() == [
+        True,
+        True,
+        False,
+    ], "S1 and its parent station should be selected"
+    assert selection.calendar.tolist() == [True], "calendar should be selected"
+
+
+def test_select_by_route_id__when_gtfs_file_is_absent__does_not_select_it(
+    sample_gtfs,
+):
+    selection = select_by_route_id(sample_gtfs, ["R1"])
+
+    assert selection.calendar_dates is None, "calendar_dates should not be selected"
+    assert selection.shapes is None, "shapes should not be selected"
+
+
+def test_select_by_route_id__does_not_modify_gtfs(sample_gtfs):
+    trips = sample_gtfs.trips.copy()
+    stops = sample_gtfs.stops.copy()
+
+    select_by_route_id(sample_gtfs, ["R1"])
+
+    assert sample_gtfs.trips.equals(trips), "trips should not be modified"
+    assert sample_gtfs.stops.equals(stops), "stops should not be modified"
+
+
+def test_select_by_route_id__when_stops_have_no_parent_station__selects_served_stops(
+    sample_gtfs,
+):
+    sample_gtfs.stops = sample_gtfs.stops.drop(columns="parent_station")
+
+    selection = select_by_route_id(sample_gtfs, ["R2"])
+
+    assert selection.stops.tolist() == [
+        False,
+        True,
+        True,
+    ], "stops served by route R2 should be selected"
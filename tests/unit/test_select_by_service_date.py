@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import (
+    GTFS,
+    filter_by_service_date,
+    parse_service_date_window,
+    select_by_service_date,
+)
+
+
+@pytest.fixture
+def sample_gtfs():
+    calendar_data = {
+        "service_id": ["WEEK", "WEEKEND"],
+        "monday": ["1", "0"],
+        "tuesday": ["1", "0"],
+        "wednesday": ["1", "0"],
+        "thursday": ["1", "0"],
+        "friday": ["1", "0"],
+        "saturday": ["0", "1"],
+        "sunday": ["0", "1"],
+        "start_date": ["20240101", "20240101"],
+        "end_date": ["20241231", "20241231"],
+    }
+    return GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1"]}, dtype=str),
+        stops=pd.DataFrame(
+            {"stop_id": ["S1", "S2"], "parent_station": [None, None]}, dtype=str
+        ),
+        routes=pd.DataFrame(
+            {"route_id": ["R1", "R2"], "agency_id": ["A1", "A1"]}, dtype=str
+        ),
+        trips=pd.DataFrame(
+            {
+                "trip_id": ["T1", "T2"],
+                "route_id": ["R1", "R2"],
+                "service_id": ["WEEK", "WEEKEND"],
+            },
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(
+            {"trip_id": ["T1", "T2"], "stop_id": ["S1", "S2"]}, dtype=str
+        ),
+        calendar=pd.DataFrame(calendar_data, dtype=str),
+        calendar_dates=pd.DataFrame(
+            {
+                "service_id": ["WEEK", "WEEK"],
+                "date": ["20240102", "20240301"],
+                "exception_type": ["2", "2"],
+            },
+            dtype=str,
+        ),
+    )
+
+
+def test_select_by_service_date__drops_trips_not_running_in_window(sample_gtfs):
+    selection = select_by_service_date(sample_gtfs, "20240102", "20240105")
+
+    assert selection.trips.tolist() == [True, False], "only T1 should be selected"
+    assert selection.routes.tolist() == [True, False], "only R1 should be selected"
+    assert selection.stops.tolist() == [True, False], "only S1 should be selected"
+
+
+def test_filter_by_service_date__clips_calendar_to_window(sample_gtfs):
+    filtered_gtfs = filter_by_service_date(sample_gtfs, "20240102", "20240105")
+
+    assert filtered_gtfs.calendar[["service_id", "start_date", "end_date"]].to_dict(
+        "records"
+    ) == [{"service_id": "WEEK", "start_date": "20240102", "end_date": "20240105"}]
+    assert filtered_gtfs.calendar_dates["date"].tolist() == [
+        "20240102"
+    ], "exceptions outside of window should be dropped"
+    assert sample_gtfs.calendar["start_date"].tolist() == [
+        "20240101",
+        "20240101",
+    ], "input calendar should not be modified"
+
+
+@pytest.mark.parametrize(
+    "filter_values",
+    [["20240101"], ["20240101", "2024-01-31"], ["20240131", "20240101"]],
+)
+def test_parse_service_date_window__when_window_is_invalid__raises_value_error(
+    filter_values,
+):
+    with pytest.raises(ValueError):
+        parse_service_date_window(filter_values)
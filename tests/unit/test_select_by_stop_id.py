@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering import core
+from gtfs_filtering.core import GTFS, select_by_stop_id
+
+
+@pytest.fixture
+def sample_gtfs():
+    return GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1"]}, dtype=str),
+        stops=pd.DataFrame(
+            {
+                "stop_id": ["ST1", "P1", "B1", "S2"],
+                "location_type": ["1", "0", "4", "0"],
+                "parent_station": [None, "ST1", "P1", None],
+            },
+            dtype=str,
+        ),
+        routes=pd.DataFrame(
+            {"route_id": ["R1", "R2"], "agency_id": ["A1", "A1"]}, dtype=str
+        ),
+        trips=pd.DataFrame(
+            {
+                "trip_id": ["T1", "T2", "T3"],
+                "route_id": ["R1", "R1", "R2"],
+                "service_id": ["WEEK", "WEEK", "WEEK"],
+            },
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(
+            {
+                "trip_id": ["T1", "T1", "T2", "T3"],
+                "stop_id": ["P1", "S2", "S2", "B1"],
+            },
+            dtype=str,
+        ),
+    )
+
+
+def test_select_by_stop_id__keeps_trips_serving_stops_with_all_their_stop_times(
+    sample_gtfs,
+):
+    selection = select_by_stop_id(sample_gtfs, ["S2"])
+
+    assert selection.trips.tolist() == [True, True, False], "T1 and T2 should be kept"
+    assert selection.stop_times.tolist() == [
+        True,
+        True,
+        True,
+        False,
+    ], "all stop times of T1 and T2 should be kept"
+    assert selection.routes.tolist() == [True, False], "only R1 should be kept"
+
+
+def test_select_by_stop_id__when_station__keeps_trips_serving_its_child_stops(
+    sample_gtfs,
+):
+    selection = select_by_stop_id(sample_gtfs, ["ST1"])
+
+    assert selection.trips.tolist() == [
+        True,
+        False,
+        True,
+    ], "trips serving platform P1 and boarding area B1 should be kept"
+
+
+def test_select_by_stop_id__when_called_twice__builds_stop_trips_index_once(
+    sample_gtfs, monkeypatch: pytest.MonkeyPatch
+):
+    built_indexes = []
+    build_stop_trips_index = core.build_stop_trips_index
+
+    def spy_build_stop_trips_index(stop_times):
+        built_indexes.append(stop_times)
+        return build_stop_trips_index(stop_times)
+
+    monkeypatch.setattr(
+        "gtfs_filtering.core.build_stop_trips_index", spy_build_stop_trips_index
+    )
+
+    select_by_stop_id(sample_gtfs, ["P1"])
+    selection = select_by_stop_id(sample_gtfs, ["S2"])
+
+    assert len(built_indexes) == 1, "stop trips index should be built once"
+    assert selection.trips.tolist() == [True, True, False], "T1 and T2 should be kept"
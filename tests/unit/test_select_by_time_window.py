@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import (
+    GTFS,
+    parse_time_window,
+    select_by_time_window,
+)
+
+
+@pytest.fixture
+def sample_gtfs():
+    stop_times_data = {
+        "trip_id": ["T1", "T1", "T1", "T2", "T2", "T3"],
+        "arrival_time": [
+            "05:50:00",
+            None,
+            "06:10:00",
+            "11:00:00",
+            "11:30:00",
+            "30:00:00",
+        ],
+        "departure_time": [
+            "05:50:00",
+            None,
+            "06:10:00",
+            "11:00:00",
+            "11:30:00",
+            "30:00:00",
+        ],
+        "stop_id": ["S1", "S2", "S3", "S1", "S2", "S3"],
+    }
+    return GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1"]}, dtype=str),
+        stops=pd.DataFrame(
+            {"stop_id": ["S1", "S2", "S3"], "parent_station": [None, None, None]},
+            dtype=str,
+        ),
+        routes=pd.DataFrame({"route_id": ["R1"], "agency_id": ["A1"]}, dtype=str),
+        trips=pd.DataFrame(
+            {
+                "trip_id": ["T1", "T2", "T3"],
+                "route_id": ["R1", "R1", "R1"],
+                "service_id": ["WEEK", "WEEK", "WEEK"],
+            },
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(stop_times_data, dtype=str),
+    )
+
+
+def test_select_by_time_window__keeps_trips_with_a_stop_time_in_window(sample_gtfs):
+    selection = select_by_time_window(sample_gtfs, 6 * 3600, 10 * 3600)
+
+    assert selection.trips.tolist() == [True, False, False], "only T1 should be kept"
+    assert selection.stop_times.tolist() == [
+        True,
+        True,
+        True,
+        False,
+        False,
+        False,
+    ], "all stop times of T1 should be kept"
+
+
+def test_select_by_time_window__when_trim__drops_stop_times_outside_of_window(
+    sample_gtfs,
+):
+    selection = select_by_time_window(sample_gtfs, 5 * 3600 + 55 * 60, 10 * 3600, True)
+
+    assert selection.stop_times.tolist() == [
+        False,
+        False,
+        True,
+        False,
+        False,
+        False,
+    ], "only stop times of T1 in window should be kept"
+    assert selection.stops.tolist() == [
+        False,
+        False,
+        True,
+    ], "only stops of kept stop times should be kept"
+
+
+def test_select_by_time_window__when_window_is_after_midnight__keeps_trips_over_24h(
+    sample_gtfs,
+):
+    selection = select_by_time_window(
+        sample_gtfs, *parse_time_window(["29:00:00", "31:00:00"])
+    )
+
+    assert selection.trips.tolist() == [False, False, True], "only T3 should be kept"
+
+
+@pytest.mark.parametrize(
+    "filter_values", [["06:00:00"], ["06:00:00", "6h"], ["10:00:00", "06:00:00"]]
+)
+def test_parse_time_window__when_window_is_invalid__raises_value_error(filter_values):
+    with pytest.raises(ValueError):
+        parse_time_window(filter_values)
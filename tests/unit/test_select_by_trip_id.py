@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import GTFS, filter_by_trip_id, select_by_trip_id
+
+
+@pytest.fixture
+def sample_gtfs():
+    return GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1"]}, dtype=str),
+        stops=pd.DataFrame(
+            {"stop_id": ["S1", "S2"], "parent_station": [None, None]}, dtype=str
+        ),
+        routes=pd.DataFrame(
+            {"route_id": ["R1", "R2"], "agency_id": ["A1", "A1"]}, dtype=str
+        ),
+        trips=pd.DataFrame(
+            {
+                "trip_id": ["T1", "T2", "T3"],
+                "route_id": ["R1", "R1", "R2"],
+                "service_id": ["WEEK", "WEEK", "WEEK"],
+            },
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(
+            {"trip_id": ["T1", "T2", "T3"], "stop_id": ["S1", "S1", "S2"]}, dtype=str
+        ),
+    )
+
+
+def test_select_by_trip_id__selects_trip_and_its_route(sample_gtfs):
+    selection = select_by_trip_id(sample_gtfs, ["T2"])
+
+    assert selection.trips.tolist() == [
+        False,
+        True,
+        False,
+    ], "only trip T2 should be selected"
+    assert selection.routes.tolist() == [True, False], "route R1 should be selected"
+    assert selection.stops.tolist() == [True, False], "stop S1 should be selected"
+
+
+def test_filter_by_trip_id__does_not_modify_gtfs(sample_gtfs):
+    trips = sample_gtfs.trips.copy()
+
+    filtered_gtfs = filter_by_trip_id(sample_gtfs, ["T2"])
+
+    assert sample_gtfs.trips.equals(trips), "trips should not be modified"
+    assert filtered_gtfs.trips["trip_id"].tolist() == [
+        "T2"
+    ], "filtered trips should only contain T2"
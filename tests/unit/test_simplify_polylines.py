@@ -0,0 +1,58 @@
+import numpy as np
+
+from gtfs_filtering.geo import simplify_polylines
+
+# straight line along the equator with a 1 m bump, then a 1 km detour (1e-5 degree ~ 1.1 m)
+LONS = np.array([0.0, 0.001, 0.002, 0.003, 0.004, 0.005])
+LATS = np.array([0.0, 0.00001, 0.0, 0.01, 0.0, 0.0])
+
+
+def test_simplify_polylines__drops_points_closer_than_tolerance():
+    kept = simplify_polylines(LONS, LATS, np.array([0, 6]), 10)
+
+    assert kept.tolist() == [
+        True,
+        False,
+        True,
+        True,
+        True,
+        True,
+    ], "1 m bump should be dropped, detour should be kept"
+
+
+def test_simplify_polylines__when_tolerance_is_zero__drops_only_aligned_points():
+    lons = np.array([0.0, 0.001, 0.002, 0.003])
+    lats = np.array([0.0, 0.0, 0.0, 0.01])
+
+    kept = simplify_polylines(lons, lats, np.array([0, 4]), 0)
+
+    assert kept.tolist() == [True, False, True, True], "aligned point should be dropped"
+
+
+def test_simplify_polylines__simplifies_each_polyline_separately():
+    lons = np.concatenate([LONS, LONS, [1.0]])
+    lats = np.concatenate([LATS, LATS, [1.0]])
+
+    kept = simplify_polylines(lons, lats, np.array([0, 6, 12, 13]), 2000)
+
+    assert kept.tolist() == [True] + [False] * 4 + [True] + [True] + [False] * 4 + [
+        True
+    ] + [True], "first and last points of each polyline should be kept"
+
+
+def test_simplify_polylines__when_polyline_is_closed__keeps_farthest_point():
+    lons = np.array([0.0, 0.01, 0.0])
+    lats = np.array([0.0, 0.0, 0.0])
+
+    kept = simplify_polylines(lons, lats, np.array([0, 3]), 10)
+
+    assert kept.tolist() == [True, True, True], "loop should not collapse to a point"
+
+
+def test_simplify_polylines__when_coordinates_are_missing__drops_them():
+    lons = np.array([0.0, np.nan, 0.003, 0.004])
+    lats = np.array([0.0, np.nan, 0.01, 0.0])
+
+    kept = simplify_polylines(lons, lats, np.array([0, 4]), 10)
+
+    assert kept.tolist() == [True, False, True, True]
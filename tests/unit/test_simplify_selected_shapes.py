@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import GTFS, GTFSSelection, simplify_selected_shapes
+
+
+@pytest.fixture
+def sample_gtfs():
+    return GTFS(
+        shapes=pd.DataFrame(
+            {
+                # rows are not in sequence order, middle point of SH1 is 1 m off the line
+                "shape_id": ["SH1", "SH1", "SH1", "SH2", "SH2", "SH2"],
+                "shape_pt_lat": ["0", "0.00001", "0", "0", "0.01", "0"],
+                "shape_pt_lon": ["0.002", "0.001", "0", "0", "0.001", "0.002"],
+                "shape_pt_sequence": ["3", "2", "1", "1", "2", "3"],
+                "shape_dist_traveled": ["222", "111", "0", "0", "1111", "2222"],
+            },
+            dtype=str,
+        ),
+    )
+
+
+def test_simplify_selected_shapes__drops_points_closer_than_tolerance(sample_gtfs):
+    selection = GTFSSelection(shapes=np.ones(6, dtype=bool))
+
+    simplify_selected_shapes(sample_gtfs, selection, 10)
+
+    assert selection.shapes.tolist() == [
+        True,
+        False,
+        True,
+        True,
+        True,
+        True,
+    ], "middle point of SH1 should be dropped"
+
+
+def test_simplify_selected_shapes__when_tolerance_is_negative__raises_value_error(
+    sample_gtfs,
+):
+    selection = GTFSSelection(shapes=np.ones(6, dtype=bool))
+
+    with pytest.raises(ValueError):
+        simplify_selected_shapes(sample_gtfs, selection, -1)
+
+
+def test_simplify_selected_shapes__when_shapes_are_absent__does_nothing():
+    selection = GTFSSelection()
+
+    simplify_selected_shapes(GTFS(), selection, 10)
+
+    assert selection.shapes is None
@@ -0,0 +1,115 @@
+import contextlib
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from gtfs_filtering.sqlite_filter import connect, filter_gtfs_zip, load_gtfs_file
+
+
+@pytest.fixture()
+def input_zip(tmp_path):
+    path = os.path.join(tmp_path, "input.zip")
+    with zipfile.ZipFile(path, "w") as gtfs_zip:
+        gtfs_zip.writestr(
+            "stops.txt",
+            '\ufeffstop_id,stop_name,parent_station\r\nS1,"Stop, 1",P1\r\nS2,Stop 2\r\n\r\n',
+        )
+        gtfs_zip.writestr("empty.txt", "")
+    with zipfile.ZipFile(path) as gtfs_zip:
+        yield gtfs_zip
+
+
+@pytest.fixture()
+def database(tmp_path) -> str:
+    return os.path.join(tmp_path, "gtfs.sqlite")
+
+
+def test_load_gtfs_file__loads_rows_as_text(input_zip, database):
+    with contextlib.closing(connect(database)) as connection:
+        columns = load_gtfs_file(input_zip, "stops.txt", connection)
+        rows = connection.execute("SELECT * FROM stops ORDER BY rowid").fetchall()
+
+    assert columns == [
+        "stop_id",
+        "stop_name",
+        "parent_station",
+    ], "BOM should be removed"
+    assert rows == [
+        ("S1", "Stop, 1", "P1"),
+        ("S2", "Stop 2", ""),
+    ], "short rows should be padded and blank lines skipped"
+
+
+def test_load_gtfs_file__when_blank_lines_precede_header__skips_them(
+    tmp_path, database
+):
+    path = os.path.join(tmp_path, "blank_lines.zip")
+    with zipfile.ZipFile(path, "w") as gtfs_zip:
+        gtfs_zip.writestr("stops.txt", "\n \nstop_id,stop_name\nS1,Stop 1\n")
+
+    with (
+        zipfile.ZipFile(path) as input_zip,
+        contextlib.closing(connect(database)) as connection,
+    ):
+        columns = load_gtfs_file(input_zip, "stops.txt", connection)
+        rows = connection.execute("SELECT * FROM stops").fetchall()
+
+    assert columns == ["stop_id", "stop_name"], "first non blank line is the header"
+    assert rows == [("S1", "Stop 1")]
+
+
+def test_load_gtfs_file__when_file_is_empty__raises_value_error(input_zip, database):
+    with contextlib.closing(connect(database)) as connection:
+        with pytest.raises(ValueError):
+            load_gtfs_file(input_zip, "empty.txt", connection)
+
+
+def test_filter_gtfs_zip__writes_filtered_gtfs_files(
+    sample_gtfs_zip, tmp_path, database
+):
+    output_path = os.path.join(tmp_path, "output.zip")
+    with (
+        zipfile.ZipFile(sample_gtfs_zip) as input_zip,
+        zipfile.ZipFile(output_path, "w") as output_zip,
+    ):
+        written = filter_gtfs_zip(input_zip, output_zip, database, route_ids=["R1"])
+
+    assert "feed_info.txt" not in written, "feed_info should not be filtered"
+    with zipfile.ZipFile(output_path) as output_zip:
+        trips = pd.read_csv(output_zip.open("trips.txt"), dtype=str)
+        stops = pd.read_csv(output_zip.open("stops.txt"), dtype=str)
+    assert trips["trip_id"].tolist() == ["T1", "T2"], "trips should be filtered"
+    assert "ST1" in stops["stop_id"].tolist(), "parent station should be kept"
+
+
+def test_filter_gtfs_zip__when_both_route_ids_and_trip_ids__raises_value_error(
+    sample_gtfs_zip, tmp_path, database
+):
+    with (
+        zipfile.ZipFile(sample_gtfs_zip) as input_zip,
+        zipfile.ZipFile(os.path.join(tmp_path, "output.zip"), "w") as output_zip,
+    ):
+        with pytest.raises(ValueError):
+            filter_gtfs_zip(
+                input_zip, output_zip, database, route_ids=["R1"], trip_ids=["T1"]
+            )
+
+
+def test_load_gtfs_file__when_row_has_extra_fields__raises_value_error(
+    tmp_path, database
+):
+    path = os.path.join(tmp_path, "extra_fields.zip")
+    with zipfile.ZipFile(path, "w") as gtfs_zip:
+        gtfs_zip.writestr("stops.txt", "stop_id,stop_name\nS1,Stop 1\nS2,Stop 2,P1\n")
+
+    with (
+        zipfile.ZipFile(path) as input_zip,
+        contextlib.closing(connect(database)) as connection,
+    ):
+        with pytest.raises(ValueError, match="line 3 of file 'stops.txt'"):
+            load_gtfs_file(input_zip, "stops.txt", connection)
+        rows = connection.execute("SELECT * FROM stops").fetchall()
+
+    assert rows == [], "rows loaded before the error should be rolled back"
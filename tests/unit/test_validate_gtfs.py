@@ -0,0 +1,126 @@
+import pandas as pd
+import pytest
+
+from gtfs_filtering.core import GTFS, ValidationCheck, validate_gtfs
+
+
+@pytest.fixture
+def valid_gtfs():
+    return GTFS(
+        agency=pd.DataFrame({"agency_id": ["A1"]}, dtype=str),
+        stops=pd.DataFrame(
+            {"stop_id": ["ST1", "S1", "S2"], "parent_station": [None, "ST1", None]},
+            dtype=str,
+        ),
+        routes=pd.DataFrame({"route_id": ["R1"], "agency_id": ["A1"]}, dtype=str),
+        trips=pd.DataFrame(
+            {"trip_id": ["T1"], "route_id": ["R1"], "service_id": ["WEEK"]},
+            dtype=str,
+        ),
+        stop_times=pd.DataFrame(
+            {
+                "trip_id": ["T1", "T1"],
+                "stop_id": ["S1", "S2"],
+                "stop_sequence": ["1", "2"],
+            },
+            dtype=str,
+        ),
+        calendar_dates=pd.DataFrame(
+            {"service_id": ["WEEK"], "date": ["20240101"], "exception_type": ["1"]},
+            dtype=str,
+        ),
+    )
+
+
+def test_validate_gtfs__when_gtfs_is_valid__reports_no_issue(valid_gtfs):
+    report = validate_gtfs(valid_gtfs)
+
+    assert report.is_valid, f"no issue should be reported: {report.issues}"
+
+
+def test_validate_gtfs__when_references_are_missing__reports_missing_references(
+    valid_gtfs,
+):
+    valid_gtfs.stops = valid_gtfs.stops[valid_gtfs.stops["stop_id"] != "ST1"]
+    valid_gtfs.stop_times.loc[1, "stop_id"] = "UNKNOWN"
+
+    report = validate_gtfs(valid_gtfs)
+
+    issues = {(issue.gtfs_file, *issue.columns): issue for issue in report.issues}
+    assert set(issues) == {
+        ("stops.txt", "parent_station"),
+        ("stop_times.txt", "stop_id"),
+    }, "missing parent station and stop should be reported"
+    assert issues["stop_times.txt", "stop_id"].check == (
+        ValidationCheck.MISSING_REFERENCE
+    )
+    assert issues["stop_times.txt", "stop_id"].examples == ["UNKNOWN"]
+
+
+def test_validate_gtfs__when_primary_key_is_duplicated__reports_duplicate_key(
+    valid_gtfs,
+):
+    valid_gtfs.stop_times.loc[1, "stop_sequence"] = "1"
+
+    report = validate_gtfs(valid_gtfs)
+
+    assert [(issue.check, issue.rows_count) for issue in report.issues] == [
+        (ValidationCheck.DUPLICATE_KEY, 2)
+    ], "both rows with the same key should be reported"
+
+
+def test_validate_gtfs__when_calendar_service_id_is_duplicated__reports_duplicate_key(
+    valid_gtfs,
+):
+    valid_gtfs.calendar = pd.DataFrame(
+        {
+            "service_id": ["WEEK", "WEEK"],
+            **{
+                weekday: ["1", "0"]
+                for weekday in [
+                    "monday",
+                    "tuesday",
+                    "wednesday",
+                    "thursday",
+                    "friday",
+                    "saturday",
+                    "sunday",
+                ]
+            },
+            "start_date": ["20240101", "20240101"],
+            "end_date": ["20241231", "20241231"],
+        },
+        dtype=str,
+    )
+
+    report = validate_gtfs(valid_gtfs)
+
+    assert [
+        (issue.check, issue.gtfs_file, issue.rows_count) for issue in report.issues
+    ] == [
+        (ValidationCheck.DUPLICATE_KEY, "calendar.txt", 2)
+    ], "only duplicated service_id should be reported"
+
+
+def test_validate_gtfs__when_service_never_runs__reports_inactive_service(
+    valid_gtfs,
+):
+    valid_gtfs.calendar_dates["exception_type"] = "2"
+
+    report = validate_gtfs(valid_gtfs)
+
+    assert [issue.check for issue in report.issues] == [
+        ValidationCheck.INACTIVE_SERVICE
+    ], "service without any day should be reported"
+
+
+def test_validate_gtfs__when_required_column_is_missing__reports_missing_column(
+    valid_gtfs,
+):
+    valid_gtfs.trips = valid_gtfs.trips.drop(columns="route_id")
+
+    report = validate_gtfs(valid_gtfs)
+
+    assert [issue.check for issue in report.issues] == [
+        ValidationCheck.MISSING_COLUMN
+    ], "missing route_id should be reported"
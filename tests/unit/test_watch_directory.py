@@ -0,0 +1,203 @@
+import os
+import shutil
+import threading
+import time
+import zipfile
+
+import pandas as pd
+import pytest
+
+from gtfs_filtering.watch import FilterJob, watch_directory
+
+WATCH_TIMEOUT_SECONDS = 60
+
+
+@pytest.fixture()
+def input_directory(tmp_path):
+    input_directory = os.path.join(tmp_path, "input")
+    os.makedirs(input_directory)
+    return input_directory
+
+
+def _watch_until(input_directory, jobs, expected_results, use_inotify, on_start=None):
+    results = []
+    deadline = time.monotonic() + WATCH_TIMEOUT_SECONDS
+    started = []
+
+    def should_stop():
+        if on_start is not None and not started:
+            started.append(True)
+            on_start()
+        return len(results) >= expected_results or time.monotonic() > deadline
+
+    watch_directory(
+        input_directory,
+        jobs,
+        results.extend,
+        workers=1,
+        debounce_seconds=0.2,
+        poll_interval_seconds=0.1,
+        use_inotify=use_inotify,
+        should_stop=should_stop,
+    )
+    return results
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watch_directory__when_gtfs_zip_is_dropped__applies_all_jobs(
+    tmp_path, input_directory, sample_gtfs_zip, use_inotify
+):
+    jobs = [
+        FilterJob("r1", os.path.join(tmp_path, "r1"), filter_values=["R1"]),
+        FilterJob("r3", os.path.join(tmp_path, "r3"), filter_values=["R3"]),
+    ]
+
+    results = _watch_until(
+        input_directory,
+        jobs,
+        2,
+        use_inotify,
+        on_start=lambda: shutil.copy(
+            sample_gtfs_zip, os.path.join(input_directory, "feed.zip")
+        ),
+    )
+
+    assert [r.succeeded for r in results] == [True, True], "all jobs should succeed"
+    for job, route_id in [(jobs[0], "R1"), (jobs[1], "R3")]:
+        output_gtfs_zip = os.path.join(job.output_directory, "feed.zip")
+        routes = pd.read_csv(
+            zipfile.ZipFile(output_gtfs_zip).open("routes.txt"), dtype=str
+        )
+        assert routes["route_id"].tolist() == [
+            route_id
+        ], "output GTFS is filtered by job"
+
+
+def test_watch_directory__when_a_job_fails__other_jobs_succeed(
+    tmp_path, input_directory, sample_gtfs_zip
+):
+    shutil.copy(sample_gtfs_zip, os.path.join(input_directory, "feed.zip"))
+    not_a_directory = os.path.join(tmp_path, "not_a_directory")
+    with open(not_a_directory, "w") as f:
+        f.write("")
+    jobs = [
+        FilterJob("failing", not_a_directory, filter_values=["R1"]),
+        FilterJob("r1", os.path.join(tmp_path, "r1"), filter_values=["R1"]),
+    ]
+
+    results = _watch_until(input_directory, jobs, 2, use_inotify=False)
+
+    assert [r.succeeded for r in results] == [
+        False,
+        True,
+    ], "failing job should not stop other jobs"
+
+
+def test_watch_directory__when_zip_is_partially_written__waits_for_complete_zip(
+    tmp_path, input_directory, sample_gtfs_zip
+):
+    with open(sample_gtfs_zip, "rb") as f:
+        content = f.read()
+    feed = os.path.join(input_directory, "feed.zip")
+    with open(feed, "wb") as f:
+        # no central directory yet
+        f.write(content[: len(content) // 2])
+    jobs = [FilterJob("r1", os.path.join(tmp_path, "r1"), filter_values=["R1"])]
+
+    def complete_zip():
+        with open(feed, "wb") as f:
+            f.write(content)
+
+    # partial zip stays unchanged longer than debounce delay
+    timer = threading.Timer(1.0, complete_zip)
+    timer.start()
+    try:
+        results = _watch_until(input_directory, jobs, 1, use_inotify=False)
+    finally:
+        timer.cancel()
+
+    assert (
+        len(results) == 1 and results[0].succeeded
+    ), "complete zip should be filtered once"
+
+
+def _exit_on_crash_zip(read_gtfs_zip):
+    def wrapper(input_gtfs_zip):
+        if os.path.basename(input_gtfs_zip) == "crash.zip":
+            os._exit(1)
+        return read_gtfs_zip(input_gtfs_zip)
+
+    return wrapper
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watch_directory__when_a_worker_dies__reports_failure_and_keeps_watching(
+    tmp_path, input_directory, sample_gtfs_zip, monkeypatch, use_inotify
+):
+    from gtfs_filtering import watch
+
+    # workers are forked and inherit the patched read_gtfs_zip
+    monkeypatch.setattr(watch, "read_gtfs_zip", _exit_on_crash_zip(watch.read_gtfs_zip))
+    jobs = [FilterJob("r1", os.path.join(tmp_path, "r1"), filter_values=["R1"])]
+    results = []
+    deadline = time.monotonic() + WATCH_TIMEOUT_SECONDS
+    shutil.copy(sample_gtfs_zip, os.path.join(input_directory, "crash.zip"))
+
+    def on_results(new_results):
+        results.extend(new_results)
+        if len(results) == 1:
+            shutil.copy(sample_gtfs_zip, os.path.join(input_directory, "feed.zip"))
+
+    watch_directory(
+        input_directory,
+        jobs,
+        on_results,
+        workers=1,
+        debounce_seconds=0.2,
+        poll_interval_seconds=0.1,
+        use_inotify=use_inotify,
+        should_stop=lambda: len(results) >= 2 or time.monotonic() > deadline,
+    )
+
+    assert [(os.path.basename(r.input_gtfs_zip), r.succeeded) for r in results] == [
+        ("crash.zip", False),
+        ("feed.zip", True),
+    ], "GTFS zip dropped after a worker died should be filtered"
+    assert "BrokenProcessPool" in results[0].error, "dead worker should be reported"
+
+
+def test_watch_directory__when_gtfs_zip_is_removed_then_restored__filters_it_again(
+    tmp_path, input_directory, sample_gtfs_zip
+):
+    feed = os.path.join(input_directory, "feed.zip")
+    shutil.copy2(sample_gtfs_zip, feed)
+    jobs = [FilterJob("r1", os.path.join(tmp_path, "r1"), filter_values=["R1"])]
+    results = []
+    removed_at = []
+    deadline = time.monotonic() + WATCH_TIMEOUT_SECONDS
+
+    def should_stop():
+        if results and not removed_at:
+            os.remove(feed)
+            removed_at.append(time.monotonic())
+        elif removed_at and not os.path.exists(feed):
+            if time.monotonic() - removed_at[0] > 0.5:
+                # same size and modification time as the removed GTFS zip
+                shutil.copy2(sample_gtfs_zip, feed)
+        return len(results) >= 2 or time.monotonic() > deadline
+
+    watch_directory(
+        input_directory,
+        jobs,
+        results.extend,
+        workers=1,
+        debounce_seconds=0.2,
+        poll_interval_seconds=0.1,
+        use_inotify=False,
+        should_stop=should_stop,
+    )
+
+    assert [r.succeeded for r in results] == [
+        True,
+        True,
+    ], "restored GTFS zip should be filtered again"